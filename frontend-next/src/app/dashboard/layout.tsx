@@ -9,7 +9,7 @@ function ChatbotModal({ onClose }: { onClose: () => void }) {
   const [messages, setMessages] = useState([
     { sender: "bot", text: "Hi! How can I help you today?" }
   ]);
-  const [context, setContext] = useState<any>({});
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const chatRef = React.useRef<HTMLDivElement>(null);
@@ -32,8 +32,8 @@ function ChatbotModal({ onClose }: { onClose: () => void }) {
     const userMessage = input;
     setInput("");
     try {
-      // Always send context with every message
-      const payload: any = { message: userMessage, context };
+      // Conversation state is kept server-side; only the session id is sent
+      const payload: any = { message: userMessage, session_id: sessionId };
       if (user) {
         payload.user_id = user.id;
         payload.user_name = user.name;
@@ -42,9 +42,9 @@ function ChatbotModal({ onClose }: { onClose: () => void }) {
       }
       const res = await apiClient.post("/chatbot/message", payload);
       setMessages(msgs => [...msgs, { sender: "bot", text: res.data.reply }]);
-      // Update context from bot reply if present
-      if (res.data?.data?.context) {
-        setContext(res.data.data.context);
+      // Keep the session id issued by the backend
+      if (res.data?.data?.session_id) {
+        setSessionId(res.data.data.session_id);
       }
     } catch (err: any) {
       setMessages(msgs => [...msgs, { sender: "bot", text: "Sorry, I couldn't process your request. Please try again." }]);
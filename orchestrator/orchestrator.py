@@ -1,6 +1,7 @@
 import os
 import time
 import logging
+from datetime import datetime
 from sqlalchemy import create_engine, text
 from huggingface_hub import HfApi
 import requests
@@ -38,12 +39,21 @@ def get_engine(db_url):
     return create_engine(db_url)
 
 
-def compute_dataset_len(label: str, engine) -> int:
+def compute_dataset_len(label: str, engine, watermark: dict | None = None) -> int:
+    """Rows the next dataset build would add: misclassifications past the last build's watermark plus sampled correct ones."""
     miscond = f"mc.correct_{label} IS NOT NULL AND mc.model_predicted_{label} IS DISTINCT FROM mc.correct_{label}"
+    params = {}
+    if watermark:
+        # Same condition as prepare_pd_df's incremental fetch; older manifests call the timestamp reviewed_at
+        miscond += " AND (mc.updated_at > :since_at OR (mc.updated_at = :since_at AND mc.id > :since_id))"
+        params = {
+            "since_at": datetime.fromisoformat(watermark.get("updated_at") or watermark["reviewed_at"]),
+            "since_id": watermark["misclassified_id"],
+        }
     sql_mis = text(f"SELECT COUNT(*) as mis_count FROM misclassified_complaints mc WHERE mc.reviewed = TRUE AND {miscond}")
 
     with engine.connect() as conn:
-        mis_count = conn.execute(sql_mis).scalar() or 0
+        mis_count = conn.execute(sql_mis, params).scalar() or 0
         correct_count = int(mis_count * 0.5)
         total_len = mis_count + correct_count
 
@@ -74,6 +84,29 @@ def fetch_json_with_retries(url: str, headers: dict | None = None, timeout: int
     raise last_exc
 
 
+def fetch_dataset_state(label: str) -> tuple[str | None, dict | None]:
+    """(version_tag, watermark) of the dataset on the Hub; (None, None) before its first build.
+
+    Incremental builds write the watermark to dataset_metadata.json; datasets built before
+    that only have it in manifest.json next to it, and full builds have none.
+    """
+    url = HF_HUB_METADATA[label]
+    try:
+        metadata = fetch_json_with_retries(url, headers=HEADERS, timeout=10)
+    except requests.exceptions.RequestException as e:
+        logger.warning("No dataset metadata for label '%s' (%s); counting every misclassification", label, str(e))
+        return None, None
+
+    watermark = metadata.get("watermark")
+    if watermark is None:
+        manifest_url = url.rsplit("/", 1)[0] + "/manifest.json"
+        try:
+            watermark = fetch_json_with_retries(manifest_url, headers=HEADERS, timeout=10, retries=1).get("watermark")
+        except requests.exceptions.RequestException:
+            watermark = None
+    return metadata.get("version_tag"), watermark
+
+
 def wait_for_dataset_update(label: str, min_len: int, last_version: str = None) -> dict:
     url = HF_HUB_METADATA[label]
     start_time = time.time()
@@ -108,15 +141,20 @@ def main():
     engine = get_engine(DATABASE_URL)
 
     dataset_len_counts = {}
+    last_versions = {}
     labels_to_prepare = []
 
     for label in ["department", "urgency"]:
         # GitHub Actions UI group
         print(f"::group::Processing label '{label}'")
 
-        ds_len, mis_count, correct_count = compute_dataset_len(label, engine)
+        # Only rows newer than the last build count: the build appends just those, so a
+        # cumulative count would trigger builds that push nothing and never get a new version
+        last_versions[label], watermark = fetch_dataset_state(label)
+        ds_len, mis_count, correct_count = compute_dataset_len(label, engine, watermark)
         dataset_len_counts[label] = ds_len
-        logger.info("Label '%s': misclassified=%d, sampled correct=%d, total dataset_len=%d", label, mis_count, correct_count, ds_len)
+        logger.info("Label '%s': new misclassified=%d, sampled correct=%d, total dataset_len=%d (since %s)",
+                    label, mis_count, correct_count, ds_len, watermark)
 
         # Threshold check
         if ds_len >= THRESHOLDS[label]:
@@ -143,8 +181,7 @@ def main():
     for label in labels_to_prepare:
         print(f"::group::Waiting for dataset upload and retraining for label '{label}'")
 
-        last_version = fetch_json_with_retries(HF_HUB_METADATA[label], headers=HEADERS, timeout=10).get("version_tag")
-        metadata = wait_for_dataset_update(label, min_len=dataset_len_counts[label], last_version=last_version)
+        metadata = wait_for_dataset_update(label, min_len=dataset_len_counts[label], last_version=last_versions[label])
         logger.info("Dataset for label '%s' ready with %d samples (version %s)", label, metadata.get("num_samples"), metadata.get("version_tag"))
 
         # Restart retrain HF Space
@@ -0,0 +1,173 @@
+"""
+Tokens/sec of fixed-length padding vs. length-bucketed dynamic padding, on the bundled
+CSV datasets (data/processed/*.csv).
+
+Inference (forward only, as in the classifier APIs' batch path):
+    one text per forward     the APIs before (pipeline without batch_size)
+    pad to max_length        fixed-shape batches (train_urgency.py before)
+    dynamic, request order   batches padded to their longest text
+    dynamic, sorted          shortest-first batches, results put back in request order (after)
+
+Training (forward + backward, batches as the Trainer draws them):
+    pad to max_length        train_urgency.py before
+    dynamic, random          model_pipeline.py before (DataCollatorWithPadding only)
+    dynamic, length-grouped  LengthGroupedSampler, i.e. group_by_length=True (after)
+
+Throughput counts real (non-pad) tokens only. The model is xlm-roberta-base's
+architecture with random weights (compute per token is what matters here) and
+--layers encoder layers. The tokenizer is --tokenizer if it can be loaded, otherwise a
+Unigram tokenizer trained on the CSVs, as a stand-in for XLM-R's SentencePiece.
+
+Usage:
+    python scripts/benchmark_length_bucketing.py
+    python scripts/benchmark_length_bucketing.py --layers 12 --limit 0 --train-limit 1024
+"""
+import argparse
+import glob
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+import torch
+from transformers import (
+    AutoTokenizer,
+    PreTrainedTokenizerFast,
+    XLMRobertaConfig,
+    XLMRobertaForSequenceClassification,
+)
+from transformers.trainer_pt_utils import LengthGroupedSampler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.common.text_normalization import clean_text_series  # noqa: E402
+
+
+def load_tokenizer(name: str, texts):
+    try:
+        return AutoTokenizer.from_pretrained(name), name
+    except Exception:
+        from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers, processors, trainers
+
+        tok = Tokenizer(models.Unigram())
+        tok.normalizer = normalizers.NFKC()
+        tok.pre_tokenizer = pre_tokenizers.Metaspace()
+        tok.decoder = decoders.Metaspace()
+        trainer = trainers.UnigramTrainer(
+            vocab_size=8000, special_tokens=["<s>", "<pad>", "</s>", "<unk>"], unk_token="<unk>"
+        )
+        tok.train_from_iterator(texts, trainer)
+        tok.post_processor = processors.TemplateProcessing(
+            single="<s> $A </s>", special_tokens=[("<s>", 0), ("</s>", 2)]
+        )
+        fast = PreTrainedTokenizerFast(
+            tokenizer_object=tok, bos_token="<s>", eos_token="</s>", unk_token="<unk>", pad_token="<pad>"
+        )
+        return fast, f"Unigram(8k) trained on the CSVs ({name} not reachable)"
+
+
+def pad_batches(encoded, order, batch_size, pad_id, fixed_length=None):
+    """Yield (input_ids, attention_mask, real_tokens) tensors for consecutive batches of `order`."""
+    for start in range(0, len(order), batch_size):
+        rows = [encoded[i] for i in order[start:start + batch_size]]
+        width = fixed_length or max(len(r) for r in rows)
+        ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+        mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for j, r in enumerate(rows):
+            ids[j, :len(r)] = torch.tensor(r)
+            mask[j, :len(r)] = 1
+        yield ids, mask, sum(len(r) for r in rows)
+
+
+def run(model, batches, train=False):
+    tokens = padded = 0
+    start = time.perf_counter()
+    for ids, mask, real in batches:
+        if train:
+            out = model(input_ids=ids, attention_mask=mask, labels=torch.zeros(len(ids), dtype=torch.long))
+            out.loss.backward()
+            model.zero_grad(set_to_none=True)
+        else:
+            with torch.no_grad():
+                model(input_ids=ids, attention_mask=mask)
+        tokens += real
+        padded += ids.numel()
+    seconds = time.perf_counter() - start
+    return tokens / seconds, seconds, tokens / padded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokenizer", default="xlm-roberta-base")
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-length", type=int, default=96, help="Fixed length of the padded baseline (train_urgency.py).")
+    parser.add_argument("--limit", type=int, default=800, help="Texts per CSV for inference (0 = all).")
+    parser.add_argument("--train-limit", type=int, default=256, help="Texts per CSV for training steps.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    csvs = sorted(glob.glob(os.path.join(ROOT, "data", "processed", "*.csv")))
+    frames = {os.path.basename(p): clean_text_series(pd.read_csv(p)["grievance"].astype(str)).tolist() for p in csvs}
+    tokenizer, tok_name = load_tokenizer(args.tokenizer, [t for texts in frames.values() for t in texts])
+
+    config = XLMRobertaConfig(
+        vocab_size=len(tokenizer), num_hidden_layers=args.layers, max_position_embeddings=514,
+        pad_token_id=tokenizer.pad_token_id, num_labels=3,
+    )
+    model = XLMRobertaForSequenceClassification(config)
+    print(f"Tokenizer: {tok_name}")
+    print(f"Model: xlm-roberta-base architecture, {args.layers} layers, random weights; "
+          f"batch {args.batch_size}; {torch.get_num_threads()} CPU thread(s)")
+
+    for name, texts in frames.items():
+        rng = random.Random(args.seed)
+        texts = rng.sample(texts, len(texts))
+        encoded = tokenizer(texts, truncation=True, max_length=args.max_length)["input_ids"]
+        infer = encoded[:args.limit] if args.limit else encoded
+        lengths = [len(e) for e in encoded]
+        print(f"\n{name}: {len(texts)} texts, tokens/text mean {sum(lengths) / len(lengths):.1f}, "
+              f"max {max(lengths)} (truncated at {args.max_length})")
+
+        pad = tokenizer.pad_token_id
+        request_order = list(range(len(infer)))
+        sorted_order = sorted(request_order, key=lambda i: len(texts[i]))  # what the APIs sort on
+        model.eval()
+        inference = [
+            ("one text per forward", pad_batches(infer, request_order, 1, pad)),
+            ("pad to max_length", pad_batches(infer, request_order, args.batch_size, pad, args.max_length)),
+            ("dynamic, request order", pad_batches(infer, request_order, args.batch_size, pad)),
+            ("dynamic, sorted (after)", pad_batches(infer, sorted_order, args.batch_size, pad)),
+        ]
+        print(f"  inference on {len(infer)} texts{'':<13}tokens/s   seconds  real/padded")
+        base = None
+        for label, batches in inference:
+            tps, seconds, density = run(model, batches)
+            base = base or tps
+            print(f"    {label:<32} {tps:9.0f} {seconds:9.2f} {density:10.0%}   x{tps / base:4.1f}")
+
+        train = encoded[:args.train_limit]
+        train_lengths = [len(e) for e in train]
+        random_order = list(range(len(train)))
+        random.Random(args.seed).shuffle(random_order)
+        generator = torch.Generator().manual_seed(args.seed)
+        grouped_order = list(LengthGroupedSampler(args.batch_size, lengths=train_lengths, generator=generator))
+        model.train()
+        training = [
+            ("pad to max_length", pad_batches(train, random_order, args.batch_size, pad, args.max_length)),
+            ("dynamic, random", pad_batches(train, random_order, args.batch_size, pad)),
+            ("dynamic, length-grouped (after)", pad_batches(train, grouped_order, args.batch_size, pad)),
+        ]
+        print(f"  training on {len(train)} texts")
+        base = None
+        for label, batches in training:
+            tps, seconds, density = run(model, batches, train=True)
+            base = base or tps
+            print(f"    {label:<32} {tps:9.0f} {seconds:9.2f} {density:10.0%}   x{tps / base:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
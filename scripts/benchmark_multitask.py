@@ -0,0 +1,113 @@
+"""
+Per-complaint classification cost: two single-task models (urgency + department, one
+encoder forward each, as with the two classifier Spaces) vs. the multitask model (one
+shared encoder forward feeding both heads, multitask_classifier_api /predict_all).
+
+Each complaint from the bundled CSV (data/processed/*.csv) is classified on its own, as
+the backend does on complaint creation. Reported per complaint: mean compute, and p50/p95
+latency, where the two-model latency is the sum of both forwards (one CPU serves both)
+plus --hop-ms per request for the extra network round trip.
+
+The encoders are xlm-roberta-base's architecture with random weights (cost, not accuracy,
+is measured here) and --layers layers. The tokenizer is --tokenizer if it can be loaded,
+otherwise a Unigram tokenizer trained on the CSVs (see benchmark_length_bucketing.py).
+
+Usage:
+    python scripts/benchmark_multitask.py
+    python scripts/benchmark_multitask.py --layers 12 --limit 300 --hop-ms 40
+"""
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+import pandas as pd
+import torch
+from transformers import XLMRobertaConfig, XLMRobertaForSequenceClassification, XLMRobertaModel
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src", "common"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.common.text_normalization import clean_text_series  # noqa: E402
+from multitask_model import MultiTaskClassifier  # noqa: E402
+from benchmark_length_bucketing import load_tokenizer  # noqa: E402
+
+TASKS = {
+    "urgency": {0: "NORMAL", 1: "URGENT", 2: "HIGHLY URGENT"},
+    "department": {
+        0: "Municipal Governance & Community Services",
+        1: "Education, Health & Social Welfare",
+        2: "Infrastructure, Utilities & Natural Resources",
+        3: "Security & Law Enforcement",
+    },
+}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+@torch.inference_mode()
+def time_forward(model, encoded):
+    start = time.perf_counter()
+    model(**encoded)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokenizer", default="xlm-roberta-base")
+    parser.add_argument("--layers", type=int, default=12)
+    parser.add_argument("--limit", type=int, default=200, help="Complaints classified (0 = all).")
+    parser.add_argument("--hop-ms", type=float, default=0.0, help="Network round trip added per request.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    csvs = sorted(glob.glob(os.path.join(ROOT, "data", "processed", "*.csv")))
+    texts = [t for p in csvs for t in clean_text_series(pd.read_csv(p)["grievance"].astype(str)).tolist()]
+    tokenizer, tok_name = load_tokenizer(args.tokenizer, texts)
+    texts = random.Random(args.seed).sample(texts, len(texts))[:args.limit or None]
+
+    def config(num_labels=2):
+        return XLMRobertaConfig(
+            vocab_size=len(tokenizer), num_hidden_layers=args.layers, max_position_embeddings=514,
+            pad_token_id=tokenizer.pad_token_id, num_labels=num_labels,
+        )
+
+    single = {task: XLMRobertaForSequenceClassification(config(len(labels))).eval() for task, labels in TASKS.items()}
+    multitask = MultiTaskClassifier(XLMRobertaModel(config(), add_pooling_layer=False), TASKS).eval()
+    print(f"Tokenizer: {tok_name}")
+    print(f"Encoders: xlm-roberta-base architecture, {args.layers} layers, random weights; "
+          f"{len(texts)} complaints one at a time; {torch.get_num_threads()} CPU thread(s); hop {args.hop_ms:.0f} ms")
+
+    hop = args.hop_ms / 1000
+    two_compute, two_latency, one_compute, one_latency = [], [], [], []
+    for text in texts:
+        encoded = tokenizer(text, truncation=True, max_length=512, return_tensors="pt")
+        encoded.pop("token_type_ids", None)
+        seconds = sum(time_forward(model, encoded) for model in single.values())
+        two_compute.append(seconds)
+        two_latency.append(seconds + 2 * hop)
+        seconds = time_forward(multitask, encoded)
+        one_compute.append(seconds)
+        one_latency.append(seconds + hop)
+
+    print(f"\n  per complaint{'':<26}compute ms   p50 ms   p95 ms")
+    rows = [("two models (urgency + department)", two_compute, two_latency),
+            ("multitask model (/predict_all)", one_compute, one_latency)]
+    for label, compute, latency in rows:
+        print(f"    {label:<36} {1000 * statistics.mean(compute):9.1f} "
+              f"{1000 * percentile(latency, 0.5):8.1f} {1000 * percentile(latency, 0.95):8.1f}")
+    print(f"\n  compute x{statistics.mean(two_compute) / statistics.mean(one_compute):.2f} lower, "
+          f"p95 latency x{percentile(two_latency, 0.95) / percentile(one_latency, 0.95):.2f} lower")
+
+
+if __name__ == "__main__":
+    main()
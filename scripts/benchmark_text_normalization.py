@@ -0,0 +1,158 @@
+"""
+Parity check and benchmark for src/common/text_normalization.py.
+
+1. Parity: clean_text / clean_nepali_text (scalar, batch and series forms) must return
+   exactly what the previous implementations returned, on every grievance in the CSV
+   and on a set of edge cases (unicode whitespace, nested tags, URLs inside tags, e-mails,
+   missing values).
+2. Timing: the previous df.apply path against the series path, on the CSV repeated
+   --scale times.
+
+Exits non-zero if the parity check fails. The edge cases are also covered by
+tests/data_science/test_text_normalization.py; this script adds the full CSV and timing.
+
+Usage:
+    python scripts/benchmark_text_normalization.py
+    python scripts/benchmark_text_normalization.py --scale 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.common import text_normalization as tn  # noqa: E402
+
+DEFAULT_CSV = os.path.join(ROOT, "data", "processed", "final-grievance-data_with_urgency-dept.csv")
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "plain text",
+    "  leading and trailing  ",
+    "tabs\tand\nnew\r\nlines",
+    "non breaking spaces　here and\u0085there",
+    "<b>bold</b> and <i>italic</i>",
+    "<a href=http://example.com>link</a>",
+    "<a href='https://example.com/x?y=1'>link</a> text",
+    "visit www.example.com now",
+    "http://a.b/c<br>next",
+    "multi\nline <tag\nspanning> lines",
+    "mail me at someone@example.com please",
+    "foo@http://x.y",
+    "emoji 😀 and symbols € ™ ✓",
+    "नमस्ते, हाम्रो टोलमा पानी छैन। कृपया छिटो मद्दत गर्नुहोस्!",
+    "mixed नेपाली and English (with punctuation): yes; no? \"quoted\" 'single' - dash",
+    "१२३ devanagari digits ॐ",
+    "​zero‌width‍joiners",
+    "x ᠎ mongolian vowel separator",
+    "<<nested>> <unclosed",
+    "www.a.com www.b.com http://c.com",
+]
+
+
+def legacy_clean_text(text: str) -> str:
+    """clean_text as it was in prepare_dataset, the classifier APIs and data_science."""
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
+    text = re.sub(r'<.*?>', '', text)  # Remove HTML tags
+    text = re.sub(r'\n', ' ', text)  # Replace newlines with space
+    text = re.sub(r'\s+', ' ', text).strip()  # Reduce multiple spaces
+    return text
+
+
+def legacy_clean_nepali_text(text):
+    """clean_nepali_text as it was in data_prep.py."""
+    if pd.isna(text):
+        return ""
+    text = str(text)
+    text = re.sub(r'http\S+|www\S+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^A-Za-z0-9ऀ-ॿ\s.,!?;:()\"\'-]', '', text)
+    return text.strip()
+
+
+def check_parity(texts: pd.Series) -> bool:
+    ok = True
+    expected = [legacy_clean_text(t) for t in texts]
+    forms = {
+        "clean_text": [tn.clean_text(t) for t in texts],
+        "clean_text_batch": tn.clean_text_batch(texts),
+        "clean_text_series": tn.clean_text_series(texts).tolist(),
+    }
+    for name, got in forms.items():
+        bad = [i for i, (a, b) in enumerate(zip(expected, got)) if a != b]
+        print(f"  {name:<24} {len(texts) - len(bad)}/{len(texts)} identical")
+        for i in bad[:3]:
+            print(f"    {texts.iloc[i]!r}: {expected[i]!r} != {got[i]!r}")
+        ok &= not bad
+
+    with_missing = pd.concat([texts, pd.Series([None, np.nan, 12345])], ignore_index=True)
+    expected = [legacy_clean_nepali_text(t) for t in with_missing]
+    forms = {
+        "clean_nepali_text": [tn.clean_nepali_text(t) for t in with_missing],
+        "clean_nepali_text_batch": tn.clean_nepali_text_batch(with_missing),
+        "clean_nepali_text_series": tn.clean_nepali_text_series(with_missing).tolist(),
+    }
+    for name, got in forms.items():
+        bad = [i for i, (a, b) in enumerate(zip(expected, got)) if a != b]
+        print(f"  {name:<24} {len(with_missing) - len(bad)}/{len(with_missing)} identical")
+        for i in bad[:3]:
+            print(f"    {with_missing.iloc[i]!r}: {expected[i]!r} != {got[i]!r}")
+        ok &= not bad
+
+    # Missing values stay missing in clean_text_series (clean_text itself raises on them)
+    ok &= tn.clean_text_series(pd.Series(["a", None])).isna().tolist() == [False, True]
+    return ok
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=DEFAULT_CSV)
+    parser.add_argument("--scale", type=int, default=100, help="Repeat the CSV this many times for timing.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    grievances = pd.read_csv(args.csv)["grievance"]
+    print(f"Parity on {len(grievances)} grievances + {len(EDGE_CASES)} edge cases")
+    ok = check_parity(pd.concat([grievances, pd.Series(EDGE_CASES)], ignore_index=True))
+
+    big = pd.concat([grievances] * args.scale, ignore_index=True)
+    print(f"Timing on {len(big)} rows ({'pyarrow' if tn.ARROW_STRING is not None else 'no pyarrow'}), best of {args.repeat}")
+    variants = [
+        ("clean_text", "apply (before)", lambda: big.apply(legacy_clean_text)),
+        ("clean_text", "batch", lambda: tn.clean_text_batch(big)),
+        ("clean_text", "series", lambda: tn.clean_text_series(big)),
+        ("clean_nepali_text", "apply (before)", lambda: big.apply(legacy_clean_nepali_text)),
+        ("clean_nepali_text", "batch", lambda: tn.clean_nepali_text_batch(big)),
+        ("clean_nepali_text", "series", lambda: tn.clean_nepali_text_series(big)),
+    ]
+    baseline = {}
+    for func, name, fn in variants:
+        ms = best_of(args.repeat, fn)
+        baseline.setdefault(func, ms)
+        print(f"  {func:<18} {name:<15} {ms:9.1f} ms  x{baseline[func] / ms:5.1f}")
+
+    if not ok:
+        print("FAILED")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Training cost of one retrain: cold start (MODEL_CHECKPOINT, the whole train split, the
+default 3 epochs) vs. warm start (the deployed model, the latest shard's new rows plus a
+replay sample of older rows, WARM_START_EPOCHS epochs), with and without frozen layers.
+
+The train split is 80% of the bundled CSVs (data/processed/*.csv); the new rows are the
+last --delta-rows of it, mixed with older rows by load_dataset.warm_start_train_split.
+Seconds per optimizer step (forward, backward and AdamW over the trainable parameters, on
+length-grouped batches as the Trainer draws them) are measured on --steps batches drawn at
+random from each run's own rows. A run's time is the measured seconds per padded token times
+the padded tokens of all its batches, over its epochs. Evaluation time is not counted.
+
+The model is xlm-roberta-base's architecture with random weights (cost, not accuracy, is
+measured) and --layers layers; --vocab-size 250002 gives XLM-R's full embedding matrix,
+whose optimizer update is a large part of a step that freezing the embeddings removes.
+The tokenizer is --tokenizer if it can be loaded, otherwise a Unigram tokenizer trained on
+the CSVs (see benchmark_length_bucketing.py).
+
+Usage:
+    python scripts/benchmark_warm_start.py
+    python scripts/benchmark_warm_start.py --delta-rows 500 --freeze-layers 8 --vocab-size 250002
+"""
+import argparse
+import gc
+import glob
+import math
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+import torch
+from datasets import Dataset
+from transformers import XLMRobertaConfig, XLMRobertaForSequenceClassification
+from transformers.trainer_pt_utils import LengthGroupedSampler
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "src", "services", "retrain_model"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.common.text_normalization import clean_text_series  # noqa: E402
+from load_dataset import warm_start_train_split  # noqa: E402
+from benchmark_length_bucketing import load_tokenizer, pad_batches  # noqa: E402
+
+
+def freeze(model, num_layers):
+    """Same parameters as GrievanceClassifier.freeze_layers."""
+    if num_layers:
+        for module in [model.base_model.embeddings, *model.base_model.encoder.layer[:num_layers]]:
+            for param in module.parameters():
+                param.requires_grad = False
+
+
+def epoch_seconds(model, encoded, batch_size, pad_id, steps, seed):
+    """
+    Estimated seconds of one training epoch over `encoded`, and its number of steps, from
+    `steps` random length-grouped batches (after one warm-up step).
+    """
+    params = [p for p in model.parameters() if p.requires_grad]
+    optimizer = torch.optim.AdamW(params, lr=2e-5, weight_decay=0.01)
+    generator = torch.Generator().manual_seed(seed)
+    order = list(LengthGroupedSampler(batch_size, lengths=[len(e) for e in encoded], generator=generator))
+    batches = list(pad_batches(encoded, order, batch_size, pad_id))
+    model.train()
+    seconds = tokens = 0
+    for i, (ids, mask, _) in enumerate(random.Random(seed).sample(batches, min(steps + 1, len(batches)))):
+        start = time.perf_counter()
+        out = model(input_ids=ids, attention_mask=mask, labels=torch.zeros(len(ids), dtype=torch.long))
+        out.loss.backward()
+        optimizer.step()
+        optimizer.zero_grad(set_to_none=True)
+        if i:
+            seconds += time.perf_counter() - start
+            tokens += ids.numel()
+    return seconds / tokens * sum(ids.numel() for ids, _, _ in batches), len(batches)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokenizer", default="xlm-roberta-base")
+    parser.add_argument("--layers", type=int, default=12)
+    parser.add_argument("--vocab-size", type=int, default=0, help="Embedding rows (0 = the tokenizer's).")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-length", type=int, default=128, help="Truncation length (MAX_LENGTH); ~99% of texts are shorter.")
+    parser.add_argument("--delta-rows", type=int, default=300, help="New training rows in the latest shard.")
+    parser.add_argument("--replay-ratio", type=float, default=1.0)
+    parser.add_argument("--cold-epochs", type=float, default=3)
+    parser.add_argument("--warm-epochs", type=float, default=2)
+    parser.add_argument("--freeze-layers", type=int, default=6)
+    parser.add_argument("--steps", type=int, default=16, help="Training steps timed per run.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    csvs = sorted(glob.glob(os.path.join(ROOT, "data", "processed", "*.csv")))
+    texts = [t for p in csvs for t in clean_text_series(pd.read_csv(p)["grievance"].astype(str)).tolist()]
+    tokenizer, tok_name = load_tokenizer(args.tokenizer, texts)
+    texts = list(dict.fromkeys(texts))  # warm_start_train_split tells new rows from old by text
+    texts = random.Random(args.seed).sample(texts, len(texts))
+    full_train = Dataset.from_dict({"grievance": texts[:int(0.8 * len(texts))]})
+    delta_train = full_train.select(range(len(full_train) - args.delta_rows, len(full_train)))
+    warm_train = warm_start_train_split(full_train, delta_train, replay_ratio=args.replay_ratio, seed=args.seed)
+
+    print(f"Tokenizer: {tok_name}")
+    print(f"Model: xlm-roberta-base architecture, {args.layers} layers, vocab {args.vocab_size or len(tokenizer)}, "
+          f"random weights; batch {args.batch_size}, max_length {args.max_length}; {torch.get_num_threads()} CPU thread(s)")
+    print(f"Train split {len(full_train)} rows; warm start {len(delta_train)} new + "
+          f"{len(warm_train) - len(delta_train)} replay rows")
+
+    runs = [
+        ("cold start (before)", full_train, args.cold_epochs, 0),
+        ("warm start", warm_train, args.warm_epochs, 0),
+        (f"warm start, {args.freeze_layers} layers frozen", warm_train, args.warm_epochs, args.freeze_layers),
+    ]
+    print(f"\n  {'run':<34} {'rows':>6} {'epochs':>6} {'steps':>6} {'s/step':>7} {'minutes':>8}")
+    baseline = None
+    for label, rows, epochs, frozen in runs:
+        torch.manual_seed(args.seed)
+        config = XLMRobertaConfig(
+            vocab_size=args.vocab_size or len(tokenizer), num_hidden_layers=args.layers,
+            max_position_embeddings=514, pad_token_id=tokenizer.pad_token_id, num_labels=4,
+        )
+        model = XLMRobertaForSequenceClassification(config)
+        freeze(model, frozen)
+        encoded = tokenizer(list(rows["grievance"]), truncation=True, max_length=args.max_length)["input_ids"]
+        seconds, batches = epoch_seconds(model, encoded, args.batch_size, tokenizer.pad_token_id, args.steps, args.seed)
+        steps = math.ceil(batches * epochs)
+        minutes = seconds * epochs / 60
+        step = seconds / batches
+        baseline = baseline or minutes
+        print(f"  {label:<34} {len(rows):6d} {epochs:6g} {steps:6g} {step:7.2f} {minutes:8.1f}   x{baseline / minutes:5.1f}")
+        del model
+        gc.collect()
+
+
+if __name__ == "__main__":
+    main()
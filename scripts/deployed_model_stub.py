@@ -0,0 +1,160 @@
+"""
+Local stand-in for the deployed classifier APIs (dept_classifier_api /predict,
+urgency_classiifer_api /predict_urgency, multitask_classifier_api /predict_all), for
+exercising the retrain pipeline's comparison against the deployed model, or the backend's
+classification calls, without a Space.
+
+It speaks the same protocol: POST {"text": str | List[str]} returns one prediction dict
+for a single text and a list for several, and empty strings are rejected with 422.
+/predict_all answers {"urgency": {...}, "department": {...}} per text; every other path
+answers an urgency prediction. Labels are derived from a hash of the text, so they are
+stable across calls. Latency and
+failures are configurable, to mimic model inference time and a flaky Space.
+
+Serve it:
+    python scripts/deployed_model_stub.py --port 8765 --latency 0.05 --per-text 0.005
+    API_ENDPOINT=http://127.0.0.1:8765/predict  (retrain_model)
+
+Or compare one-text-at-a-time sequential querying with batched concurrent querying
+(retrain_model/deployed_model_client.py) against an in-process stub:
+    python scripts/deployed_model_stub.py --benchmark --texts 300 --fail-rate 0.05
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LABELS = ["NORMAL", "URGENT", "HIGHLY URGENT"]
+DEPARTMENT_LABELS = [
+    "Municipal Governance & Community Services",
+    "Education, Health & Social Welfare",
+    "Infrastructure, Utilities & Natural Resources",
+    "Security & Law Enforcement",
+]
+
+
+def stub_label(text: str, labels=LABELS) -> str:
+    return labels[int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16) % len(labels)]
+
+
+def stub_prediction(text: str, path: str) -> dict:
+    urgency = {"label": stub_label(text), "confidence": 0.9, "scores": {}}
+    if path.rstrip("/").endswith("/predict_all"):
+        return {"urgency": urgency, "department": {"label": stub_label(text, DEPARTMENT_LABELS), "confidence": 0.9, "scores": {}}}
+    return urgency
+
+
+def make_handler(latency: float, per_text: float, fail_rate: float, seed: int):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        requests_served = 0
+
+        def _reply(self, status: int, body) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            with lock:
+                Handler.requests_served += 1
+                fail = rng.random() < fail_rate
+            texts = body.get("text")
+            single = isinstance(texts, str)
+            texts = [texts] if single else texts
+            if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t.strip() for t in texts):
+                return self._reply(422, {"detail": "Input must be non-empty strings."})
+            time.sleep(latency + per_text * len(texts))
+            if fail:
+                return self._reply(503, {"detail": "Space is waking up."})
+            preds = [stub_prediction(t, self.path) for t in texts]
+            self._reply(200, preds[0] if single else preds)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int, latency: float, per_text: float, fail_rate: float, seed: int = 0) -> ThreadingHTTPServer:
+    """Start the stub in a background thread and return the server (call .shutdown())."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, per_text, fail_rate, seed))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(args) -> None:
+    sys.path.insert(0, os.path.join(ROOT, "src", "services", "retrain_model"))
+    from deployed_model_client import query_deployed_labels
+
+    texts = [f"grievance number {i}: the street light near ward office is broken" for i in range(args.texts)]
+    texts[3] = "   "  # rejected by the API's validation
+    server = serve(0, args.latency, args.per_text, args.fail_rate, seed=args.seed)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/predict"
+    print(f"Stub: {args.latency * 1000:.0f} ms per request + {args.per_text * 1000:.0f} ms per text, "
+          f"{args.fail_rate:.0%} of requests fail with 503")
+
+    runs = [
+        ("sequential, 1 text/request (before)", dict(batch_size=1, max_workers=1)),
+        (f"batched {args.batch_size}, {args.workers} workers", dict(batch_size=args.batch_size, max_workers=args.workers)),
+    ]
+    ok = True
+    for name, kwargs in runs:
+        start = time.perf_counter()
+        labels, batches = query_deployed_labels(texts, endpoint, backoff=0.05, **kwargs)
+        elapsed = time.perf_counter() - start
+        correct = sum(label == stub_label(t) for label, t in zip(labels, texts) if label is not None)
+        missing = sum(label is None for label in labels)
+        retries = sum(b["attempts"] - 1 for b in batches)
+        slowest = max(b["seconds"] for b in batches)
+        print(f"  {name:<40} {elapsed:7.2f} s  {len(batches):4d} requests  {retries:3d} retries  "
+              f"slowest {slowest:.3f} s  {missing} unanswered")
+        ok &= correct == len(texts) - missing and labels[3] is None
+
+    server.shutdown()
+    if not ok:
+        print("FAILED: wrong labels returned")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per request.")
+    parser.add_argument("--per-text", type=float, default=0.005, help="Additional seconds per text in a request.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--benchmark", action="store_true")
+    parser.add_argument("--texts", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args)
+        return
+
+    server = serve(args.port, args.latency, args.per_text, args.fail_rate, seed=args.seed)
+    print(f"Stub deployed model on http://127.0.0.1:{args.port}/predict (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
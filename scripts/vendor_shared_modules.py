@@ -0,0 +1,79 @@
+"""
+Copy the shared modules in src/common into the services that are built on their own.
+
+Each service under src/services is a separate Docker build context (a Hugging Face
+Space), so it cannot reach src/common at build time. The modules it imports as
+top-level files are listed in SHARED_MODULES and committed as copies in the service
+directory, so a Space built straight from git is self-contained. Run this script after
+editing a module in src/common; tests/data_science fails while a copy differs.
+
+--check exits non-zero when a copy is missing or differs from src/common; --clean
+removes the copies.
+
+Usage:
+    python scripts/vendor_shared_modules.py
+    python scripts/vendor_shared_modules.py dept_classifier_api prepare_dataset
+    python scripts/vendor_shared_modules.py --check
+"""
+import argparse
+import filecmp
+import os
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMON_DIR = os.path.join(ROOT, "src", "common")
+SERVICES_DIR = os.path.join(ROOT, "src", "services")
+
+# Service directory -> modules from src/common it imports
+SHARED_MODULES = {
+    "prepare_dataset": ["text_normalization.py"],
+    "dept_classifier_api": ["text_normalization.py"],
+    "urgency_classiifer_api": ["text_normalization.py"],
+    "multitask_classifier_api": ["text_normalization.py", "multitask_model.py"],
+    "retrain_model": ["multitask_model.py"],
+}
+
+
+def vendored_files(services):
+    """(source, destination) for every shared module of `services`."""
+    return [
+        (os.path.join(COMMON_DIR, module), os.path.join(SERVICES_DIR, service, module))
+        for service in services for module in SHARED_MODULES[service]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("services", nargs="*", help=f"Services to vendor into (default: all of {', '.join(SHARED_MODULES)}).")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--check", action="store_true", help="Only verify the copies.")
+    group.add_argument("--clean", action="store_true", help="Remove the copies.")
+    args = parser.parse_args()
+
+    unknown = set(args.services) - set(SHARED_MODULES)
+    if unknown:
+        parser.error(f"unknown service(s): {', '.join(sorted(unknown))}")
+
+    ok = True
+    for source, dest in vendored_files(args.services or SHARED_MODULES):
+        rel = os.path.relpath(dest, ROOT)
+        if args.clean:
+            if os.path.exists(dest):
+                os.remove(dest)
+                print(f"  removed {rel}")
+        elif args.check:
+            same = os.path.exists(dest) and filecmp.cmp(source, dest, shallow=False)
+            print(f"  {rel}: {'ok' if same else 'MISSING' if not os.path.exists(dest) else 'DIFFERS'}")
+            ok &= same
+        else:
+            shutil.copyfile(source, dest)
+            print(f"  {os.path.relpath(source, ROOT)} -> {rel}")
+
+    if not ok:
+        print("Run python scripts/vendor_shared_modules.py")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,7 @@ from sqlalchemy import pool
 from alembic import context
 
 from app.core.database import Base
-from app.models import user, complaint, location  # ensure all models are imported so Alembic can detect them
+from app.models import user, complaint, location, chat_session, sla, duplicate, data_version  # ensure all models are imported so Alembic can detect them
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
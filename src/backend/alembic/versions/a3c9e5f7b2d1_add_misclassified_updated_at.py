@@ -0,0 +1,33 @@
+"""add misclassified_complaints.updated_at
+
+Revision ID: a3c9e5f7b2d1
+Revises: f1b7c2d9e4a6
+Create Date: 2025-12-06 09:41:18.305527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5f7b2d1'
+down_revision: Union[str, Sequence[str], None] = 'f1b7c2d9e4a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('misclassified_complaints', sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    # Existing rows get the timestamp the dataset watermark used until now, so watermarks
+    # already stored in dataset manifests keep pointing at the same rows
+    op.execute('UPDATE misclassified_complaints SET updated_at = COALESCE(reviewed_at, created_at, updated_at)')
+    op.create_index('ix_misclassified_complaints_updated_at', 'misclassified_complaints', ['updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_misclassified_complaints_updated_at', table_name='misclassified_complaints')
+    op.drop_column('misclassified_complaints', 'updated_at')
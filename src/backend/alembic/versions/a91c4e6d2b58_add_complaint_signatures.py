@@ -0,0 +1,42 @@
+"""add complaint minhash signatures
+
+Revision ID: a91c4e6d2b58
+Revises: e6b2d9f4a1c3
+Create Date: 2025-12-01 11:32:07.581904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a91c4e6d2b58'
+down_revision: Union[str, Sequence[str], None] = 'e6b2d9f4a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'complaint_signatures',
+        sa.Column('complaint_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('ward_id', sa.Integer(), nullable=True),
+        sa.Column('date_submitted', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('cluster_id', sa.Integer(), nullable=False),
+        sa.Column('similarity', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('complaint_id')
+    )
+    op.create_index('ix_complaint_signatures_ward_id_date_submitted', 'complaint_signatures', ['ward_id', 'date_submitted'], unique=False)
+    op.create_index('ix_complaint_signatures_cluster_id', 'complaint_signatures', ['cluster_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaint_signatures_cluster_id', table_name='complaint_signatures')
+    op.drop_index('ix_complaint_signatures_ward_id_date_submitted', table_name='complaint_signatures')
+    op.drop_table('complaint_signatures')
@@ -0,0 +1,185 @@
+"""partition complaints and status history by month
+
+Revision ID: b4e1f0c7a912
+Revises: 7c2e9a41d3b5
+Create Date: 2025-11-24 09:41:18.226310
+
+"""
+import re
+from datetime import date
+from typing import List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e1f0c7a912'
+down_revision: Union[str, Sequence[str], None] = '7c2e9a41d3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Monthly partitions are created from the oldest row (capped at this many months back; older
+# rows land in the DEFAULT partition) up to this many months ahead.
+MAX_MONTHS_BACK = 60
+MONTHS_AHEAD = 3
+
+# table -> (partition column, fallback expression for NULLs)
+PARTITIONED_TABLES = {
+    'complaints': ('date_submitted', 'COALESCE(created_at, now())'),
+    'complaint_status_history': ('changed_at', 'COALESCE(created_at, now())'),
+}
+
+# Foreign keys Postgres cannot keep once complaints is partitioned (they would need the partition column)
+COMPLAINT_CHILD_FKS = [
+    ('complaint_status_history', 'complaint_status_history_complaint_id_fkey'),
+    ('misclassified_complaints', 'misclassified_complaints_complaint_id_fkey'),
+]
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _detach_indexes(table: str) -> List[str]:
+    """
+    Drop every secondary index of `table` and return their definitions. `LIKE ... INCLUDING
+    INDEXES` would also copy the single-column primary key, which a partitioned table cannot
+    have, so the indexes are re-created by `_restore_indexes` once the new table is loaded.
+    """
+    rows = op.get_bind().execute(sa.text(
+        'SELECT i.relname, pg_get_indexdef(x.indexrelid) FROM pg_index x '
+        'JOIN pg_class i ON i.oid = x.indexrelid '
+        'WHERE x.indrelid = CAST(:table AS regclass) AND NOT x.indisprimary ORDER BY i.relname'
+    ), {'table': table}).all()
+    for name, _ in rows:
+        op.execute(f'DROP INDEX {name}')
+    return [definition for _, definition in rows]
+
+
+def _restore_indexes(definitions: List[str], old: str, table: str) -> None:
+    for definition in definitions:
+        # "CREATE INDEX ix ON [ONLY] public.<old> USING ..." -> "... ON <table> USING ..."
+        op.execute(re.sub(rf' ON (ONLY )?(\S+\.)?{old} ', f' ON {table} ', definition, count=1))
+
+
+def _detach_foreign_keys(table: str) -> List[Tuple[str, str]]:
+    """Drop the outgoing foreign keys of `table` (LIKE never copies them) and return (name, definition)."""
+    rows = op.get_bind().execute(sa.text(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f' ORDER BY conname"
+    ), {'table': table}).all()
+    for name, _ in rows:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+    return [(name, definition) for name, definition in rows]
+
+
+def _restore_foreign_keys(foreign_keys: List[Tuple[str, str]], table: str) -> None:
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+def _partition_table(table: str, column: str, null_fallback: str) -> None:
+    conn = op.get_bind()
+    old = f'{table}_unpartitioned'
+
+    op.execute(f'UPDATE {table} SET {column} = {null_fallback} WHERE {column} IS NULL')
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    indexes = _detach_indexes(old)
+    foreign_keys = _detach_foreign_keys(old)
+    op.execute(
+        f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({column})'
+    )
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL')
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})')
+    _restore_foreign_keys(foreign_keys, table)
+
+    op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    this_month = date.today().replace(day=1)
+    oldest = conn.execute(sa.text(f'SELECT min({column}) FROM {old}')).scalar()
+    start = oldest.date().replace(day=1) if oldest is not None else this_month
+    start = max(start, _add_months(this_month, -MAX_MONTHS_BACK))
+    month = start
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE {table}_p{month.year:04d}_{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    # Indexes on the partitioned parent cascade to every partition
+    _restore_indexes(indexes, old, table)
+    # Keep the id sequence alive when the old table is dropped
+    op.execute(f'ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old}')
+
+
+def _unpartition_table(table: str, column: str) -> None:
+    partitioned = f'{table}_partitioned'
+
+    op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+    op.execute(f'ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey')
+    indexes = _detach_indexes(partitioned)
+    foreign_keys = _detach_foreign_keys(partitioned)
+    op.execute(f'CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)')
+    op.execute(f'ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL')
+    _restore_foreign_keys(foreign_keys, table)
+    op.execute(f'INSERT INTO {table} SELECT * FROM {partitioned}')
+    _restore_indexes(indexes, partitioned, table)
+    op.execute(f'ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY {table}.id')
+    # Dropping the parent drops every attached partition with it
+    op.execute(f'DROP TABLE {partitioned}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for child, constraint in COMPLAINT_CHILD_FKS:
+        op.execute(f'ALTER TABLE {child} DROP CONSTRAINT IF EXISTS {constraint}')
+
+    for table, (column, null_fallback) in PARTITIONED_TABLES.items():
+        _partition_table(table, column, null_fallback)
+
+    op.create_index('ix_complaint_status_history_complaint_id', 'complaint_status_history', ['complaint_id'], unique=False, if_not_exists=True)
+    op.create_index('ix_misclassified_complaints_complaint_id', 'misclassified_complaints', ['complaint_id'], unique=False, if_not_exists=True)
+
+    # ON DELETE CASCADE from complaints, now done by a row trigger on the partitioned parent
+    op.execute(
+        'CREATE OR REPLACE FUNCTION complaints_cascade_delete() RETURNS trigger AS $$ '
+        'BEGIN '
+        'DELETE FROM complaint_status_history WHERE complaint_id = OLD.id; '
+        'DELETE FROM misclassified_complaints WHERE complaint_id = OLD.id; '
+        'RETURN OLD; END; $$ LANGUAGE plpgsql'
+    )
+    op.execute(
+        'CREATE TRIGGER complaints_cascade_delete AFTER DELETE ON complaints '
+        'FOR EACH ROW EXECUTE FUNCTION complaints_cascade_delete()'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS complaints_cascade_delete ON complaints')
+    op.execute('DROP FUNCTION IF EXISTS complaints_cascade_delete()')
+    op.drop_index('ix_misclassified_complaints_complaint_id', table_name='misclassified_complaints')
+    op.drop_index('ix_complaint_status_history_complaint_id', table_name='complaint_status_history')
+
+    for table, (column, _) in reversed(list(PARTITIONED_TABLES.items())):
+        _unpartition_table(table, column)
+
+    for child, constraint in COMPLAINT_CHILD_FKS:
+        op.execute(
+            f'ALTER TABLE {child} ADD CONSTRAINT {constraint} FOREIGN KEY (complaint_id) '
+            f'REFERENCES complaints(id) ON DELETE CASCADE'
+        )
@@ -0,0 +1,85 @@
+"""add sla summary tables
+
+Revision ID: d3a8c5e17f40
+Revises: b4e1f0c7a912
+Create Date: 2025-11-26 14:05:52.918244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8c5e17f40'
+down_revision: Union[str, Sequence[str], None] = 'b4e1f0c7a912'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'complaint_sla_facts',
+        sa.Column('complaint_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('department', sa.String(length=100), nullable=True),
+        sa.Column('urgency', sa.String(length=20), nullable=True),
+        sa.Column('ward_id', sa.Integer(), nullable=True),
+        sa.Column('municipality_id', sa.Integer(), nullable=True),
+        sa.Column('district_id', sa.Integer(), nullable=True),
+        sa.Column('submitted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('first_action_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('first_action_seconds', sa.Float(), nullable=True),
+        sa.Column('resolution_seconds', sa.Float(), nullable=True),
+        sa.Column('reopen_count', sa.SmallInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('complaint_id')
+    )
+    op.create_index('ix_complaint_sla_facts_department', 'complaint_sla_facts', ['department'], unique=False)
+    op.create_index('ix_complaint_sla_facts_municipality_id', 'complaint_sla_facts', ['municipality_id'], unique=False)
+    op.create_index('ix_complaint_sla_facts_urgency', 'complaint_sla_facts', ['urgency'], unique=False)
+    op.create_table(
+        'sla_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('dimension', sa.String(length=20), nullable=False),
+        sa.Column('group_key', sa.String(length=100), nullable=False),
+        sa.Column('complaints', sa.Integer(), nullable=False),
+        sa.Column('actioned', sa.Integer(), nullable=False),
+        sa.Column('resolved', sa.Integer(), nullable=False),
+        sa.Column('reopened', sa.Integer(), nullable=False),
+        sa.Column('avg_first_action_seconds', sa.Float(), nullable=True),
+        sa.Column('p50_first_action_seconds', sa.Float(), nullable=True),
+        sa.Column('p90_first_action_seconds', sa.Float(), nullable=True),
+        sa.Column('p99_first_action_seconds', sa.Float(), nullable=True),
+        sa.Column('avg_resolution_seconds', sa.Float(), nullable=True),
+        sa.Column('p50_resolution_seconds', sa.Float(), nullable=True),
+        sa.Column('p90_resolution_seconds', sa.Float(), nullable=True),
+        sa.Column('p99_resolution_seconds', sa.Float(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dimension', 'group_key', name='uq_sla_summary_dimension_group_key')
+    )
+    op.create_table(
+        'sla_refresh_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    # The incremental refresh finds touched complaints by these timestamps
+    op.create_index('ix_complaint_status_history_changed_at', 'complaint_status_history', ['changed_at'], unique=False)
+    op.create_index('ix_complaints_updated_at', 'complaints', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_complaints_updated_at', table_name='complaints')
+    op.drop_index('ix_complaint_status_history_changed_at', table_name='complaint_status_history')
+    op.drop_table('sla_refresh_state')
+    op.drop_table('sla_summary')
+    op.drop_index('ix_complaint_sla_facts_urgency', table_name='complaint_sla_facts')
+    op.drop_index('ix_complaint_sla_facts_municipality_id', table_name='complaint_sla_facts')
+    op.drop_index('ix_complaint_sla_facts_department', table_name='complaint_sla_facts')
+    op.drop_table('complaint_sla_facts')
@@ -0,0 +1,43 @@
+"""add complaint full-text search index
+
+Revision ID: e6b2d9f4a1c3
+Revises: d3a8c5e17f40
+Create Date: 2025-11-28 10:17:36.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6b2d9f4a1c3'
+down_revision: Union[str, Sequence[str], None] = 'd3a8c5e17f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Added on the partitioned parent, the generated column propagates to every partition
+    op.execute(
+        "ALTER TABLE complaints ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(message, ''))) STORED"
+    )
+    op.execute('CREATE INDEX IF NOT EXISTS ix_complaints_search_vector ON complaints USING GIN (search_vector)')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_complaints_message_trgm ON complaints USING GIN (message gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_complaints_message_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_complaints_search_vector')
+    op.execute('ALTER TABLE complaints DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,55 @@
+"""cascade complaint deletes to signatures and sla facts
+
+Revision ID: f1b7c2d9e4a6
+Revises: c5d7e3a8f219
+Create Date: 2025-12-05 10:17:43.602198
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b7c2d9e4a6'
+down_revision: Union[str, Sequence[str], None] = 'c5d7e3a8f219'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables keyed by complaint_id that the complaints_cascade_delete trigger clears
+CASCADE_CHILDREN = [
+    'complaint_status_history',
+    'misclassified_complaints',
+    'complaint_signatures',
+    'complaint_sla_facts',
+]
+PREVIOUS_CASCADE_CHILDREN = CASCADE_CHILDREN[:2]
+
+
+def _replace_cascade_function(children) -> None:
+    deletes = ' '.join(f'DELETE FROM {child} WHERE complaint_id = OLD.id;' for child in children)
+    op.execute(
+        'CREATE OR REPLACE FUNCTION complaints_cascade_delete() RETURNS trigger AS $$ '
+        f'BEGIN {deletes} RETURN OLD; END; $$ LANGUAGE plpgsql'
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Rows left behind by complaints deleted before the trigger covered these tables
+    for child in CASCADE_CHILDREN[2:]:
+        op.execute(f'DELETE FROM {child} c WHERE NOT EXISTS (SELECT 1 FROM complaints WHERE id = c.complaint_id)')
+    # The trigger created by b4e1f0c7a912 calls this function, so replacing it is enough
+    _replace_cascade_function(CASCADE_CHILDREN)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    _replace_cascade_function(PREVIOUS_CASCADE_CHILDREN)
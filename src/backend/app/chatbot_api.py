@@ -11,22 +11,26 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel, Field, EmailStr
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case, cast, literal, String
 import traceback
 from .models import Complaint, User, ComplaintStatusHistory
 from .models.location import District, Municipality, Ward
-from app.core.database import get_db
-from app.routers.complaints import predict_urgency, predict_department, DEPARTMENT_API_BASE, CLASSIFIER_TIMEOUT_SECONDS
+from app.core.database import get_db, get_read_db, is_replica_session, SessionLocal
+from app.routers.complaints import predict_all, DEPARTMENT_API_BASE, CLASSIFIER_TIMEOUT_SECONDS
 from app.utils.label_converter import resolve_label
 from app.schemas.complaint import DEPARTMENT_LABEL_MAP, URGENCY_LABEL_MAP
+from app.services.chat_session_store import chat_sessions
+from app.services.intent_engine import intent_engine
+from app.services.location_resolver import user_location_info
+from app.services.auth_token_cache import auth_token_cache
+from app.routers.admin import get_current_admin
+from app.models.admin import Admin
+from app.utils.fast_json import model_list_response
 import httpx
 import os
 from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError
-from passlib.context import CryptContext
-
-# Password hashing setup
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from app.services.password_service import hash_password, verify_password as verify_password_hash
 
 # FastAPI security
 security = HTTPBearer()
@@ -49,6 +53,8 @@ STATUS_NAMES = {
 class ChatMessage(BaseModel):
     message: str
     user_id: Optional[int] = None
+    session_id: Optional[str] = None
+    # Deprecated: conversation state is kept server-side; only used to seed a new session
     context: Optional[Dict[str, Any]] = None
 
 class ChatReply(BaseModel):
@@ -103,13 +109,66 @@ def extract_str(obj, field):
     if isinstance(obj, dict):
         return str(obj.get(field, "") or "")
     return str(getattr(obj, field, "") or "")
+
+
+# --- Session helpers (state lives server-side, see app/services/chat_session_store.py) ---
+def _cached_options(state: Dict[str, Any], kind: str, scope: Any, loader, prefix: str = "") -> Dict[str, Any]:
+    """Return the numbered option list for `kind` from the session, loading it only when the scope changes."""
+    cached = state["options"].get(kind)
+    if cached is None or cached.get("scope") != scope:
+        items = [[item_id, str(label)] for item_id, label in loader()]
+        cached = {
+            "scope": scope,
+            "items": items,
+            "text": "\n".join(f"  {i+1}. {prefix}{label}" for i, (_, label) in enumerate(items)),
+        }
+        state["options"][kind] = cached
+    return cached
+
+
+def _district_options(db: Session, state: Dict[str, Any]) -> Dict[str, Any]:
+    return _cached_options(
+        state, "districts", None,
+        lambda: db.query(District.id, District.name).filter(District.is_active == True).all()
+    )
+
+
+def _municipality_options(db: Session, state: Dict[str, Any], district_id: Optional[int]) -> Dict[str, Any]:
+    return _cached_options(
+        state, "municipalities", district_id,
+        lambda: db.query(Municipality.id, Municipality.name).filter(Municipality.district_id == district_id, Municipality.is_active == True).all()
+    )
+
+
+def _ward_options(db: Session, state: Dict[str, Any], municipality_id: Optional[int]) -> Dict[str, Any]:
+    return _cached_options(
+        state, "wards", municipality_id,
+        lambda: db.query(Ward.id, Ward.ward_number).filter(Ward.municipality_id == municipality_id, Ward.is_active == True).all(),
+        prefix="Ward "
+    )
+
+
+def _pick_option(options: Dict[str, Any], msg: str) -> Optional[List[Any]]:
+    """Resolve a 1-based number typed by the user to an [id, label] pair from the cached list."""
+    if msg.isdigit():
+        idx = int(msg) - 1
+        if 0 <= idx < len(options["items"]):
+            return options["items"][idx]
+    return None
+
+
+def _reply(session_id: str, state: Dict[str, Any], reply: str, intent: str, next_step: Optional[str] = None, **data) -> ChatReply:
+    """Persist the session state and build the reply; only the session id travels back to the client."""
+    chat_sessions.save(session_id, state)
+    return ChatReply(reply=reply, intent=intent, next_step=next_step, data={"session_id": session_id, **data})
+
+
 @router.post("/message", response_model=ChatReply)
 async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
     """Main chatbot endpoint. Handles user input and returns appropriate response. Intent routing: greeting, info, file_complaint, check_status, list_complaints, help, unknown. Supports authenticated users (user_id provided) and anonymous users."""
 
-    context = getattr(chat, 'context', None)
-    if not isinstance(context, dict):
-        context = {}
+    session_id, state = chat_sessions.load(chat.session_id, user_id=chat.user_id, legacy_context=chat.context)
+    context = state["context"]
 
     # Detect intent on first message or if not set in context, or if user message is not a number (so user is typing a new command)
     msg = chat.message.strip()
@@ -127,21 +186,16 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
     if intent == "greeting":
         greeting_msg = "🙏 Namaste! Welcome to Sambodhan Grievance System.\n\nI can help you with:\n\n1️⃣ **File a Complaint** - Submit a new grievance\n2️⃣ **Track Status** - Check your complaint status by ID\n3️⃣ **My Complaints** - View all your complaints\n4️⃣ **Help** - Get assistance\n\nWhat would you like to do today?"
         context.clear()  # Clear any previous context
-        return ChatReply(
-            reply=greeting_msg,
-            intent="greeting",
-            next_step=None,
-            data={"context": context}
-        )
+        return _reply(session_id, state, greeting_msg, "greeting")
 
     # === LIST COMPLAINTS INTENT ===
     if intent == "list_complaints":
+        context.clear()
         if not chat.user_id:
-            return ChatReply(
-                reply="❌ Please login to view your complaints.\n\nYou can login from the dashboard to access this feature.",
-                intent="list_complaints",
-                next_step=None,
-                data={"context": {}}
+            return _reply(
+                session_id, state,
+                "❌ Please login to view your complaints.\n\nYou can login from the dashboard to access this feature.",
+                "list_complaints"
             )
         
         # Get user's complaints
@@ -153,11 +207,10 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         ).order_by(Complaint.created_at.desc()).limit(10).all()
         
         if not complaints:
-            return ChatReply(
-                reply="📋 You haven't filed any complaints yet.\n\nWould you like to file a new complaint? Just type 'file complaint'.",
-                intent="list_complaints",
-                next_step=None,
-                data={"context": {}}
+            return _reply(
+                session_id, state,
+                "📋 You haven't filed any complaints yet.\n\nWould you like to file a new complaint? Just type 'file complaint'.",
+                "list_complaints"
             )
         
         complaint_list = "📋 **Your Recent Complaints:**\n\n"
@@ -168,11 +221,9 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         
         complaint_list += "\n💡 To check status of a specific complaint, type: 'track <complaint_id>'"
         
-        return ChatReply(
-            reply=complaint_list,
-            intent="list_complaints",
-            next_step=None,
-            data={"context": {}, "complaints": [extract_int(c, 'id') for c in complaints]}
+        return _reply(
+            session_id, state, complaint_list, "list_complaints",
+            complaints=[extract_int(c, 'id') for c in complaints]
         )
 
     # === TRACK COMPLAINT FLOW ===
@@ -190,22 +241,22 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
             if complaint_id:
                 context["complaint_id"] = complaint_id
             else:
-                return ChatReply(
-                    reply="🔍 **Track Complaint Status**\n\nPlease provide your complaint ID number.\n\nExample: Type '123' or 'track 123'",
-                    intent="check_status",
-                    next_step="Provide your complaint ID",
-                    data={"context": context}
+                return _reply(
+                    session_id, state,
+                    "🔍 **Track Complaint Status**\n\nPlease provide your complaint ID number.\n\nExample: Type '123' or 'track 123'",
+                    "check_status",
+                    next_step="Provide your complaint ID"
                 )
         
         # Fetch complaint status
         complaint = db.query(Complaint).filter(Complaint.id == context["complaint_id"]).first()
         if not complaint:
             context.pop("complaint_id", None)
-            return ChatReply(
-                reply="❌ **Complaint Not Found**\n\nComplaint ID not found. Please check the ID and try again.\n\nYou can view all your complaints by typing 'my complaints'.",
-                intent="check_status",
-                next_step="Provide your complaint ID",
-                data={"context": context}
+            return _reply(
+                session_id, state,
+                "❌ **Complaint Not Found**\n\nComplaint ID not found. Please check the ID and try again.\n\nYou can view all your complaints by typing 'my complaints'.",
+                "check_status",
+                next_step="Provide your complaint ID"
             )
         
         # Get location info
@@ -252,58 +303,48 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         
         context.clear()  # Clear context after showing status
         
-        return ChatReply(
-            reply=status_reply,
-            intent="check_status",
-            next_step=None,
-            data={"context": context, "complaint_id": complaint.id}
-        )
+        return _reply(session_id, state, status_reply, "check_status", complaint_id=complaint.id)
 
 
     # === FILE GRIEVANCE FLOW ===
     if intent == "file_complaint" and context.get("intent") == "file_complaint":
         # Check if user is authenticated (optional but recommended)
         if not chat.user_id:
-            return ChatReply(
-                reply="⚠️ **Please Login First**\n\nTo file a complaint, please login to your account from the dashboard.\n\nIf you don't have an account, you can register quickly!",
-                intent="file_complaint",
-                next_step=None,
-                data={"context": {}}
+            context.clear()
+            return _reply(
+                session_id, state,
+                "⚠️ **Please Login First**\n\nTo file a complaint, please login to your account from the dashboard.\n\nIf you don't have an account, you can register quickly!",
+                "file_complaint"
             )
         
         # Step 1: District selection (robust)
         if not context.get("district_id"):
-            districts = db.query(District).filter(District.is_active == True).all()
+            districts = _district_options(db, state)
             if msg.isdigit():
-                idx = int(msg) - 1
-                if 0 <= idx < len(districts):
-                    selected_district = districts[idx]
-                    context["district_id"] = selected_district.id
-                    context["district_name"] = str(selected_district.name)
+                selected_district = _pick_option(districts, msg)
+                if selected_district:
+                    context["district_id"], context["district_name"] = selected_district
                     # After district selection, prompt for municipality for the selected district only, and RETURN immediately
-                    municipalities = db.query(Municipality).filter(Municipality.district_id == selected_district.id, Municipality.is_active == True).all()
-                    muni_list = [f"  {i+1}. {str(m.name)}" for i, m in enumerate(municipalities)]
-                    return ChatReply(
-                        reply=f"✅ District **{str(selected_district.name)}** selected.\n\n📍 **Step 2:** Select your municipality\n\n" + "\n".join(muni_list) + "\n\nType the number of your municipality.",
-                        intent="file_complaint",
-                        next_step="Provide your municipality number",
-                        data={"context": context}
+                    municipalities = _municipality_options(db, state, context["district_id"])
+                    return _reply(
+                        session_id, state,
+                        f"✅ District **{context['district_name']}** selected.\n\n📍 **Step 2:** Select your municipality\n\n" + municipalities["text"] + "\n\nType the number of your municipality.",
+                        "file_complaint",
+                        next_step="Provide your municipality number"
                     )
                 else:
-                    district_list = [f"  {i+1}. {str(d.name)}" for i, d in enumerate(districts)]
-                    return ChatReply(
-                        reply=f"❌ Invalid selection.\n\n📍 **Step 1:** Select your district\n\n" + "\n".join(district_list) + "\n\nType the number of your district.",
-                        intent="file_complaint",
-                        next_step="Provide your district number",
-                        data={"context": context}
+                    return _reply(
+                        session_id, state,
+                        f"❌ Invalid selection.\n\n📍 **Step 1:** Select your district\n\n" + districts["text"] + "\n\nType the number of your district.",
+                        "file_complaint",
+                        next_step="Provide your district number"
                     )
             # If not a valid district selection, always prompt for district again
-            district_list = [f"  {i+1}. {str(d.name)}" for i, d in enumerate(districts)]
-            return ChatReply(
-                reply=f"📝 **Filing a New Complaint**\n\n📍 **Step 1:** Select your district\n\n" + "\n".join(district_list) + "\n\nType the number of your district.",
-                intent="file_complaint",
-                next_step="Provide your district number",
-                data={"context": context}
+            return _reply(
+                session_id, state,
+                f"📝 **Filing a New Complaint**\n\n📍 **Step 1:** Select your district\n\n" + districts["text"] + "\n\nType the number of your district.",
+                "file_complaint",
+                next_step="Provide your district number"
             )
 
     # Step 2: Municipality (numbered selection, robust, single path)
@@ -311,47 +352,40 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         district_id = context.get("district_id")
         if not district_id:
             # Defensive: should never happen, but fallback to district selection
-            districts = db.query(District).filter(District.is_active == True).all()
-            district_list = [f"  {i+1}. {str(d.name)}" for i, d in enumerate(districts)]
-            return ChatReply(
-                reply=f"📝 **Filing a New Complaint**\n\n📍 **Step 1:** Select your district\n\n" + "\n".join(district_list) + "\n\nType the number of your district.",
-                intent="file_grievance",
-                next_step="Provide your district number",
-                data={"context": context}
+            districts = _district_options(db, state)
+            return _reply(
+                session_id, state,
+                f"📝 **Filing a New Complaint**\n\n📍 **Step 1:** Select your district\n\n" + districts["text"] + "\n\nType the number of your district.",
+                "file_grievance",
+                next_step="Provide your district number"
             )
-        municipalities = db.query(Municipality).filter(Municipality.district_id == district_id, Municipality.is_active == True).all()
-        msg = chat.message.strip()
+        municipalities = _municipality_options(db, state, district_id)
         selected_muni = None
         if msg.isdigit():
-            idx = int(msg) - 1
-            if 0 <= idx < len(municipalities):
-                selected_muni = municipalities[idx]
+            selected_muni = _pick_option(municipalities, msg)
         else:
             # Try to match by name (case-insensitive, partial match)
             msg_lower = msg.lower()
-            for m in municipalities:
-                if msg_lower in str(m.name).lower():
-                    selected_muni = m
+            for item in municipalities["items"]:
+                if msg_lower in item[1].lower():
+                    selected_muni = item
                     break
         if selected_muni:
-            context["municipality_id"] = selected_muni.id
-            context["municipality_name"] = str(selected_muni.name)
+            context["municipality_id"], context["municipality_name"] = selected_muni
             # Prompt for ward selection next
-            wards = db.query(Ward).filter(Ward.municipality_id == selected_muni.id, Ward.is_active == True).all()
-            ward_list = [f"  {i+1}. Ward {str(w.ward_number)}" for i, w in enumerate(wards)]
-            return ChatReply(
-                reply=f"✅ Municipality **{str(selected_muni.name)}** selected.\n\n📍 **Step 3:** Select your ward\n\n" + "\n".join(ward_list) + "\n\nType the number of your ward.",
-                intent="file_complaint",
-                next_step="Provide your ward number",
-                data={"context": context}
+            wards = _ward_options(db, state, context["municipality_id"])
+            return _reply(
+                session_id, state,
+                f"✅ Municipality **{context['municipality_name']}** selected.\n\n📍 **Step 3:** Select your ward\n\n" + wards["text"] + "\n\nType the number of your ward.",
+                "file_complaint",
+                next_step="Provide your ward number"
             )
         else:
-            muni_list = [f"  {i+1}. {str(m.name)}" for i, m in enumerate(municipalities)]
-            return ChatReply(
-                reply=f"❌ Invalid selection.\n\n📍 **Step 2:** Select your municipality\n\n" + "\n".join(muni_list) + "\n\nType the number of your municipality.",
-                intent="file_complaint",
-                next_step="Provide your municipality number",
-                data={"context": context}
+            return _reply(
+                session_id, state,
+                f"❌ Invalid selection.\n\n📍 **Step 2:** Select your municipality\n\n" + municipalities["text"] + "\n\nType the number of your municipality.",
+                "file_complaint",
+                next_step="Provide your municipality number"
             )
 
     # Step 3: Ward (numbered selection, robust, single path)
@@ -359,63 +393,55 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         municipality_id = context.get("municipality_id")
         if not municipality_id:
             # Defensive: should never happen, but fallback to municipality selection
-            district_id = context.get("district_id")
-            municipalities = db.query(Municipality).filter(Municipality.district_id == district_id, Municipality.is_active == True).all()
-            muni_list = [f"{i+1}. {str(m.name)}" for i, m in enumerate(municipalities)]
-            return ChatReply(
-                reply=f"Please select your municipality by number or name.\nAvailable municipalities:\n" + "\n".join(muni_list),
-                intent="file_grievance",
-                next_step="Provide your municipality number",
-                data={"context": context}
+            municipalities = _municipality_options(db, state, context.get("district_id"))
+            return _reply(
+                session_id, state,
+                f"Please select your municipality by number or name.\nAvailable municipalities:\n" + municipalities["text"],
+                "file_grievance",
+                next_step="Provide your municipality number"
             )
-        wards = db.query(Ward).filter(Ward.municipality_id == municipality_id, Ward.is_active == True).all()
-        msg = chat.message.strip()
+        wards = _ward_options(db, state, municipality_id)
         if msg.isdigit():
-            idx = int(msg) - 1
-            if 0 <= idx < len(wards):
-                selected_ward = wards[idx]
-                context["ward_id"] = selected_ward.id
-                context["ward_number"] = str(selected_ward.ward_number)
-                return ChatReply(
-                    reply=f"✅ Ward **{str(selected_ward.ward_number)}** selected.\n\n💬 **Step 4:** Describe your grievance\n\nPlease describe your problem in detail (minimum 10 characters).\n\nBe as specific as possible to help us resolve your issue quickly.",
-                    intent="file_complaint",
-                    next_step="Provide your grievance/problem description",
-                    data={"context": context}
+            selected_ward = _pick_option(wards, msg)
+            if selected_ward:
+                context["ward_id"], context["ward_number"] = selected_ward
+                return _reply(
+                    session_id, state,
+                    f"✅ Ward **{context['ward_number']}** selected.\n\n💬 **Step 4:** Describe your grievance\n\nPlease describe your problem in detail (minimum 10 characters).\n\nBe as specific as possible to help us resolve your issue quickly.",
+                    "file_complaint",
+                    next_step="Provide your grievance/problem description"
                 )
             else:
-                ward_list = [f"  {i+1}. Ward {str(w.ward_number)}" for i, w in enumerate(wards)]
-                return ChatReply(
-                    reply=f"❌ Invalid selection.\n\n📍 **Step 3:** Select your ward\n\n" + "\n".join(ward_list) + "\n\nType the number of your ward.",
-                    intent="file_complaint",
-                    next_step="Provide your ward number",
-                    data={"context": context}
+                return _reply(
+                    session_id, state,
+                    f"❌ Invalid selection.\n\n📍 **Step 3:** Select your ward\n\n" + wards["text"] + "\n\nType the number of your ward.",
+                    "file_complaint",
+                    next_step="Provide your ward number"
                 )
         else:
-            ward_list = [f"  {i+1}. Ward {str(w.ward_number)}" for i, w in enumerate(wards)]
-            return ChatReply(
-                reply=f"📍 **Step 3:** Select your ward\n\n" + "\n".join(ward_list) + "\n\nType the number of your ward.",
-                intent="file_complaint",
-                next_step="Provide your ward number",
-                data={"context": context}
+            return _reply(
+                session_id, state,
+                f"📍 **Step 3:** Select your ward\n\n" + wards["text"] + "\n\nType the number of your ward.",
+                "file_complaint",
+                next_step="Provide your ward number"
             )
 
     # Step 4: Problem description (single path)
     if not context.get("problem_description"):
-        msg = chat.message.strip()
         if len(msg) >= 10:
             context["problem_description"] = msg
         else:
-            return ChatReply(
-                reply="❌ Description too short.\n\n💬 **Step 4:** Describe your grievance\n\nPlease provide more details (minimum 10 characters).",
-                intent="file_complaint",
-                next_step="Provide your grievance/problem description",
-                data={"context": context}
+            return _reply(
+                session_id, state,
+                "❌ Description too short.\n\n💬 **Step 4:** Describe your grievance\n\nPlease provide more details (minimum 10 characters).",
+                "file_complaint",
+                next_step="Provide your grievance/problem description"
             )
 
     # All info collected, file complaint - Use same logic as submit grievance
     try:
-        urgency_result = await predict_urgency(context["problem_description"])
-        dept_result = await predict_department(context["problem_description"])
+        results = await predict_all(context["problem_description"])
+        urgency_result, dept_result = results["urgency"], results["department"]
         
         # Use resolve_label to convert API results to proper string format
         urgency_label = resolve_label(urgency_result["urgency"], URGENCY_LABEL_MAP)
@@ -427,10 +453,6 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         urgency_label = resolve_label(0, URGENCY_LABEL_MAP)
         department_label = resolve_label(0, DEPARTMENT_LABEL_MAP)
     
-    # Get location names for display
-    district = db.query(District).filter(District.id == context["district_id"]).first()
-    municipality = db.query(Municipality).filter(Municipality.id == context["municipality_id"]).first()
-    
     new_complaint = Complaint(
         citizen_id=chat.user_id,
         department=department_label,
@@ -449,24 +471,20 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
     dept_name = department_label
     urgency_name = urgency_label
     
+    # Location names were captured in the session while the user picked them
     success_msg = f"✅ **Complaint Filed Successfully!**\n\n"
     success_msg += f"📋 **Complaint ID:** #{new_complaint.id}\n"
     success_msg += f"📂 **Department:** {dept_name}\n"
     success_msg += f"⚡ **Urgency:** {urgency_name}\n"
     success_msg += f"📊 **Status:** Pending\n"
-    success_msg += f"📍 **Location:** {district.name if district else ''}, {municipality.name if municipality else ''}, Ward {context['ward_number']}\n"
+    success_msg += f"📍 **Location:** {context.get('district_name', '')}, {context.get('municipality_name', '')}, Ward {context.get('ward_number', '')}\n"
     success_msg += f"\n💡 **Track your complaint:** Use ID #{new_complaint.id}\n"
     success_msg += f"\n📌 You can check status anytime by typing: 'track {new_complaint.id}'"
     
     # Clear context after successful filing
     context.clear()
     
-    return ChatReply(
-        reply=success_msg,
-        intent="file_complaint",
-        next_step=None,
-        data={"complaint_id": new_complaint.id, "created": True, "context": {}}
-    )
+    return _reply(session_id, state, success_msg, "file_complaint", complaint_id=new_complaint.id, created=True)
 
     # === HELP INTENT ===
     if intent == "help":
@@ -482,25 +500,17 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
         help_msg += "• Login to view all your complaints\n\n"
         help_msg += "How can I help you today?"
         
-        return ChatReply(
-            reply=help_msg,
-            intent="help",
-            next_step=None,
-            data={"context": {}}
-        )
+        context.clear()
+        return _reply(session_id, state, help_msg, "help")
 
     # === UNKNOWN INTENT - Use RAG/LLM ===
     if intent == "unknown":
+        context.clear()
         # Try to use RAG documentation lookup
         try:
             docs_context = retrieve_docs_context(msg)
             llm_reply = await call_grok_llm(msg, docs_context)
-            return ChatReply(
-                reply=llm_reply + "\n\n💡 Type 'help' to see what I can do!",
-                intent="unknown",
-                next_step=None,
-                data={"context": {}}
-            )
+            return _reply(session_id, state, llm_reply + "\n\n💡 Type 'help' to see what I can do!", "unknown")
         except:
             # Fallback if RAG fails
             fallback_msg = "🤔 I'm not sure I understand.\n\n"
@@ -511,12 +521,7 @@ async def chatbot_message(chat: ChatMessage, db: Session = Depends(get_db)):
             fallback_msg += "• **Get help** - Type 'help'\n\n"
             fallback_msg += "What would you like to do?"
             
-            return ChatReply(
-                reply=fallback_msg,
-                intent="unknown",
-                next_step=None,
-                data={"context": {}}
-            )
+            return _reply(session_id, state, fallback_msg, "unknown")
 
 
 
@@ -532,6 +537,28 @@ class ComplaintStatusResponse(BaseModel):
     history: List[Dict[str, Any]]
 
 
+class UserComplaintItem(BaseModel):
+    """One row of /auth/complaints, validated straight from the query's row tuples"""
+    id: int
+    message: str
+    department: str
+    department_name: str
+    urgency: str
+    urgency_name: str
+    current_status: str
+    status_name: str
+    created_at: Optional[datetime] = None
+    ward_id: Optional[int] = None
+    ward_name: str
+    ward_number: Optional[int] = None
+    municipality_id: Optional[int] = None
+    municipality_name: Optional[str] = None
+    district_id: Optional[int] = None
+    district_name: Optional[str] = None
+
+    model_config = {"from_attributes": True}
+
+
 class GeoListResponse(BaseModel):
     """Generic geo entity list response"""
     success: bool
@@ -593,14 +620,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash (argon2 runs on the password hashing pool)"""
+    return await verify_password_hash(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    """Hash password using bcrypt"""
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """Hash password using argon2 (runs on the password hashing pool)"""
+    return await hash_password(password)
 
 
 async def get_current_user(
@@ -613,8 +640,12 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated - no credentials provided"
         )
+    token = credentials.credentials
+    # Recently verified token: skip signature verification and the user lookup
+    cached_user = auth_token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id_str = payload.get("sub")
         if user_id_str is None:
@@ -652,42 +683,35 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
+    auth_token_cache.set(token, user, payload.get("exp"))
     return user
 
 
+@router.get("/auth/token-cache/stats")
+def get_token_cache_stats(admin: Admin = Depends(get_current_admin)):
+    """Hit rate and staleness of the verified-token cache used by get_current_user (admins only)."""
+    return auth_token_cache.stats()
+
+
 # ========== Intent Detection ==========
 
 def detect_intent(message: str) -> str:
-    """Rule-based intent detection using keyword matching."""
-    message_lower = message.lower()
-    
-    # Greeting intent
-    if any(word in message_lower for word in ["hello", "hi", "hey", "namaste", "greetings"]):
-        return "greeting"
-    
-    # File complaint intent
-    if any(word in message_lower for word in ["file", "register", "submit", "complaint", "grievance", "problem", "issue", "report"]):
-        return "file_complaint"
-    
-    # Check status intent
-    if any(word in message_lower for word in ["status", "track", "check", "progress", "update", "where is", "my complaint"]):
-        return "check_status"
-    
-    # List my complaints
-    if any(word in message_lower for word in ["my complaints", "my grievances", "list", "show all", "view all"]):
-        return "list_complaints"
-    
-    # Help intent
-    if any(word in message_lower for word in ["help", "support", "assist", "how", "what can you do", "guide"]):
-        return "help"
-    
-    return "unknown"
+    """Rule-based intent detection using the compiled keyword matcher (see app/services/intent_engine.py)."""
+    return intent_engine.detect(message).intent
 
 
 @router.get("/complaints/{complaint_id}", response_model=ComplaintStatusResponse)
-def get_complaint_status(complaint_id: int, db: Session = Depends(get_db)):
+def get_complaint_status(complaint_id: int, db: Session = Depends(get_read_db)):
     """Retrieve complaint details and status history by ID."""
     complaint = db.query(Complaint).filter(Complaint.id == complaint_id).first()
+    if not complaint and is_replica_session(db):
+        # A complaint filed moments ago may not have replicated yet
+        db.close()
+        db = SessionLocal()
+        try:
+            return get_complaint_status(complaint_id, db)
+        finally:
+            db.close()
     
     if not complaint:
         raise HTTPException(
@@ -722,7 +746,7 @@ def get_complaint_status(complaint_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/geo/districts", response_model=GeoListResponse)
-def get_districts(db: Session = Depends(get_db)):
+def get_districts(db: Session = Depends(get_read_db)):
     """Get list of active districts."""
     districts = db.query(District).filter(District.is_active == True).all()
     
@@ -734,7 +758,7 @@ def get_districts(db: Session = Depends(get_db)):
 
 
 @router.get("/geo/municipalities", response_model=GeoListResponse)
-def get_municipalities(district_id: Optional[int] = None, db: Session = Depends(get_db)):
+def get_municipalities(district_id: Optional[int] = None, db: Session = Depends(get_read_db)):
     """Get list of active municipalities, optionally filtered by district_id."""
     query = db.query(Municipality).filter(Municipality.is_active == True)
     
@@ -754,7 +778,7 @@ def get_municipalities(district_id: Optional[int] = None, db: Session = Depends(
 
 
 @router.get("/geo/wards", response_model=GeoListResponse)
-def get_wards(municipality_id: Optional[int] = None, db: Session = Depends(get_db)):
+def get_wards(municipality_id: Optional[int] = None, db: Session = Depends(get_read_db)):
     """Get list of active wards, optionally filtered by municipality_id."""
     query = db.query(Ward).filter(Ward.is_active == True)
     
@@ -801,8 +825,11 @@ async def signup(request: UserSignupRequest, db: Session = Depends(get_db)):
                 detail="Invalid ward ID"
             )
     
+    # Return the connection to the pool while argon2 runs so a signup/login burst cannot exhaust it
+    db.close()
+
     # Create new user
-    hashed_password = get_password_hash(request.password)
+    hashed_password = await get_password_hash(request.password)
     new_user = User(
         name=request.name,
         email=request.email,
@@ -821,19 +848,8 @@ async def signup(request: UserSignupRequest, db: Session = Depends(get_db)):
         # Generate JWT token
         access_token = create_access_token(data={"sub": new_user.id})
         
-        # Get location info if ward_id exists
-        location_info = {}
-        if extract_int(new_user, 'ward_id') > 0:
-            ward = db.query(Ward).filter(Ward.id == extract_int(new_user, 'ward_id')).first()
-            if ward:
-                municipality = db.query(Municipality).filter(Municipality.id == extract_int(ward, 'municipality_id')).first()
-                if municipality:
-                    district = db.query(District).filter(District.id == extract_int(municipality, 'district_id')).first()
-                    location_info = {
-                        "ward_name": f"Ward {extract_int(ward, 'ward_number')}",
-                        "municipality_name": extract_str(municipality, 'name'),
-                        "district_name": extract_str(district, 'name') if district else None
-                    }
+        # Get location info if ward_id exists (single joined query)
+        location_info = user_location_info(db, extract_int(new_user, 'ward_id'))
         
         return AuthResponse(
             success=True,
@@ -872,8 +888,10 @@ async def login(request: UserLoginRequest, db: Session = Depends(get_db)):
             detail="Invalid email or password"
         )
     
-    # Verify password
-    if not verify_password(request.password, extract_str(user, 'password_hash')):
+    # Verify password (connection goes back to the pool while argon2 runs)
+    password_hash = extract_str(user, 'password_hash')
+    db.close()
+    if not await verify_password(request.password, password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -882,19 +900,8 @@ async def login(request: UserLoginRequest, db: Session = Depends(get_db)):
     # Generate JWT token
     access_token = create_access_token(data={"sub": user.id})
     
-    # Get location info if ward_id exists
-    location_info = {}
-    if extract_int(user, 'ward_id') > 0:
-        ward = db.query(Ward).filter(Ward.id == extract_int(user, 'ward_id')).first()
-        if ward:
-            municipality = db.query(Municipality).filter(Municipality.id == extract_int(ward, 'municipality_id')).first()
-            if municipality:
-                district = db.query(District).filter(District.id == extract_int(municipality, 'district_id')).first()
-                location_info = {
-                    "ward_name": f"Ward {extract_int(ward, 'ward_number')}",
-                    "municipality_name": extract_str(municipality, 'name'),
-                    "district_name": extract_str(district, 'name') if district else None
-                }
+    # Get location info if ward_id exists (single joined query)
+    location_info = user_location_info(db, extract_int(user, 'ward_id'))
     
     return AuthResponse(
         success=True,
@@ -920,21 +927,8 @@ async def get_current_user_profile(
     """Get current authenticated user's profile. Requires valid JWT token in Authorization header."""
     # get_current_user already validates authentication
     
-    # Get location info
-    ward_name = None
-    municipality_name = None
-    district_name = None
-    
-    if extract_int(current_user, 'ward_id'):
-        ward = db.query(Ward).filter(Ward.id == extract_int(current_user, 'ward_id')).first()
-        if ward:
-            ward_name = f"Ward {extract_int(ward, 'ward_number')}"
-            municipality = db.query(Municipality).filter(Municipality.id == extract_int(ward, 'municipality_id')).first()
-            if municipality:
-                municipality_name = extract_str(municipality, 'name')
-                district = db.query(District).filter(District.id == extract_int(municipality, 'district_id')).first()
-                if district:
-                    district_name = extract_str(district, 'name')
+    # Get location info (single joined query)
+    location_info = user_location_info(db, extract_int(current_user, 'ward_id'))
 
     return UserProfileResponse(
         id=extract_int(current_user, 'id'),
@@ -942,61 +936,49 @@ async def get_current_user_profile(
         email=extract_str(current_user, 'email') or "",
         phone=extract_str(current_user, 'phone'),
         ward_id=extract_int(current_user, 'ward_id'),
-        ward_name=ward_name,
-        municipality_name=municipality_name,
-        district_name=district_name,
+        ward_name=location_info.get("ward_name"),
+        municipality_name=location_info.get("municipality_name"),
+        district_name=location_info.get("district_name"),
         role=extract_str(current_user, 'role') or "",
         created_at=getattr(current_user, 'created_at', None) or datetime.now()
     )
 
 
-@router.get("/auth/complaints", response_model=List[Dict[str, Any]])
+@router.get("/auth/complaints", response_model=List[UserComplaintItem])
 async def get_user_complaints(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all complaints filed by the current authenticated user. Requires valid JWT token."""
     # get_current_user already validates authentication
-    
-    # Get user's complaints with eager loading of ward -> municipality -> district
-    from sqlalchemy.orm import joinedload
-    complaints = db.query(Complaint).options(
-        joinedload(Complaint.ward).joinedload(Ward.municipality).joinedload(Municipality.district)
-    ).filter(
-        Complaint.citizen_id == current_user.id
-    ).order_by(Complaint.created_at.desc()).all()
-    
 
-    result = []
-    for complaint in complaints:
-        # Get location info from ward relationship
-        ward = complaint.ward
-        municipality = ward.municipality if ward else None
-        district = municipality.district if municipality else None
-        
-        # Get ward number if available
-        ward_name = f"Ward {ward.ward_number}" if (ward and ward.ward_number) else ""
-        
-        # Get department and urgency as strings (database stores them as strings)
-        department_str = extract_str(complaint, "department") or ""
-        urgency_str = extract_str(complaint, "urgency") or ""
-
-        result.append({
-            "id": extract_int(complaint, "id"),
-            "message": extract_str(complaint, "message"),
-            "department": department_str,  # Return string value
-            "department_name": department_str if department_str else "Unknown",  # Use the string directly
-            "urgency": urgency_str,  # Return string value  
-            "urgency_name": urgency_str if urgency_str else "NORMAL",  # Use the string directly
-            "current_status": extract_str(complaint, "current_status") or "PENDING",
-            "status_name": extract_str(complaint, "current_status") or "PENDING",
-            "created_at": getattr(complaint, "created_at", None),
-            "ward_id": extract_int(complaint, "ward_id"),
-            "ward_name": ward_name,
-            "ward_number": ward.ward_number if ward else None,
-            "municipality_id": municipality.id if municipality else None,
-            "municipality_name": municipality.name if municipality else None,
-            "district_id": district.id if district else None,
-            "district_name": district.name if district else None,
-        })
-    return result
+    # Plain columns instead of ORM objects: the defaults the old per-row dict building applied
+    # (empty strings, "Unknown", "NORMAL", "PENDING", ward label) are computed in SQL;
+    # a complaint without a ward keeps ward_id null
+    rows = db.query(
+        Complaint.id,
+        func.coalesce(Complaint.message, "").label("message"),
+        func.coalesce(Complaint.department, "").label("department"),
+        func.coalesce(Complaint.department, "Unknown").label("department_name"),
+        func.coalesce(Complaint.urgency, "").label("urgency"),
+        func.coalesce(Complaint.urgency, "NORMAL").label("urgency_name"),
+        func.coalesce(Complaint.current_status, "PENDING").label("current_status"),
+        func.coalesce(Complaint.current_status, "PENDING").label("status_name"),
+        Complaint.created_at,
+        Complaint.ward_id,
+        case(
+            (func.coalesce(Ward.ward_number, 0) != 0, literal("Ward ") + cast(Ward.ward_number, String)),
+            else_="",
+        ).label("ward_name"),
+        Ward.ward_number,
+        Municipality.id.label("municipality_id"),
+        Municipality.name.label("municipality_name"),
+        District.id.label("district_id"),
+        District.name.label("district_name"),
+    ).outerjoin(Ward, Complaint.ward_id == Ward.id) \
+     .outerjoin(Municipality, Ward.municipality_id == Municipality.id) \
+     .outerjoin(District, Municipality.district_id == District.id) \
+     .filter(Complaint.citizen_id == current_user.id) \
+     .order_by(Complaint.created_at.desc()).all()
+
+    return model_list_response(UserComplaintItem, rows)
@@ -1,19 +1,289 @@
-
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Any, Callable, Dict, TypeVar
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL environment variable is not set. Please check your .env file and dotenv loading.")
 
-engine = create_engine(DATABASE_URL)
+# Pool tuning (ignored for SQLite, which keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+# Opt-in: run async endpoints' queries through an AsyncEngine (asyncpg / aiosqlite)
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+
+# Optional read replica for read-only dependencies; writes always go to DATABASE_URL
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "2"))
+
+T = TypeVar("T")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_engine kwargs for `url`: tuned QueuePool for server databases, thread-safe connections for SQLite."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"echo": DB_ECHO, "connect_args": {"check_same_thread": False}}
+    return {
+        "echo": DB_ECHO,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart (postgresql -> asyncpg, sqlite -> aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+class PoolMetrics:
+    """Counters fed by pool events; `snapshot` adds the pool's own live gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+
+    def attach(self, engine) -> None:
+        @event.listens_for(engine.pool, "connect")
+        def _connect(dbapi_conn, record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine.pool, "checkout")
+        def _checkout(dbapi_conn, record, proxy):
+            with self._lock:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, self.checkouts - self.checkins)
+
+        @event.listens_for(engine.pool, "checkin")
+        def _checkin(dbapi_conn, record):
+            with self._lock:
+                self.checkins += 1
+
+        @event.listens_for(engine.pool, "invalidate")
+        def _invalidate(dbapi_conn, record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def snapshot(self, engine) -> Dict[str, Any]:
+        pool = engine.pool
+        with self._lock:
+            data = {
+                "pool_class": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                # High-water mark of concurrently checked-out connections; near size + overflow means the pool is saturated
+                "peak_checked_out": self.peak_checked_out,
+            }
+        for gauge in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, gauge):
+                data[gauge] = getattr(pool, gauge)()
+        return data
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+
+read_engine = None
+ReadSessionLocal = None
+read_pool_metrics = None
+if DATABASE_READ_URL:
+    read_engine = create_engine(DATABASE_READ_URL, **engine_options(DATABASE_READ_URL))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    read_pool_metrics = PoolMetrics()
+    read_pool_metrics.attach(read_engine)
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if DB_ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    if DATABASE_READ_URL:
+        _async_read_url = async_database_url(DATABASE_READ_URL)
+        async_read_engine = create_async_engine(_async_read_url, **engine_options(_async_read_url))
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+# Seconds the replica is behind the primary. 0 when it is caught up (receive LSN == replay LSN)
+# or is not in recovery at all, so an idle primary does not look like a lagging replica.
+_PG_REPLICA_LAG_SQL = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """
+    Decides whether read-only work may use the replica. The replication lag is measured at
+    most every `check_interval` seconds; if it exceeds `max_lag_seconds`, or the replica
+    cannot be reached, reads fall back to the primary until the next check.
+    """
+
+    def __init__(self, replica_engine, max_lag_seconds: float = DB_REPLICA_MAX_LAG_SECONDS, check_interval: float = DB_REPLICA_LAG_CHECK_INTERVAL):
+        self.replica_engine = replica_engine
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = replica_engine is not None
+        self.last_lag_seconds = None
+        self.last_error = None
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def measure_lag(self) -> float:
+        if self.replica_engine.dialect.name != "postgresql":
+            # SQLite (or other) stand-in used for local testing: no replication to lag behind
+            return 0.0
+        with self.replica_engine.connect() as conn:
+            return float(conn.execute(_PG_REPLICA_LAG_SQL).scalar() or 0.0)
+
+    def use_replica(self) -> bool:
+        if self.replica_engine is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                try:
+                    self.last_lag_seconds = self.measure_lag()
+                    self.last_error = None
+                    self._healthy = self.last_lag_seconds <= self.max_lag_seconds
+                    if not self._healthy:
+                        print(f"[Database] Replica lag {self.last_lag_seconds:.1f}s exceeds {self.max_lag_seconds}s, reading from primary")
+                except Exception as e:
+                    self.last_error = str(e)
+                    self._healthy = False
+                    print(f"[Database] Replica unavailable, reading from primary: {e}")
+            if self._healthy:
+                self.replica_reads += 1
+            else:
+                self.primary_fallbacks += 1
+            return self._healthy
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "configured": self.replica_engine is not None,
+                "healthy": self._healthy,
+                "last_lag_seconds": self.last_lag_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+                "last_error": self.last_error,
+                "replica_reads": self.replica_reads,
+                "primary_fallbacks": self.primary_fallbacks,
+            }
+
+
+replica_router = ReplicaRouter(read_engine)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session for read-only endpoints: the replica when configured and caught up, otherwise the primary."""
+    db = ReadSessionLocal() if replica_router.use_replica() else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def is_replica_session(db) -> bool:
+    """True when `db` reads from the replica (callers may retry a miss on the primary)."""
+    return read_engine is not None and db.get_bind() is read_engine
+
+
+async def get_async_db():
+    """AsyncSession dependency; only available when DB_ASYNC_ENABLED=true."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled. Set DB_ASYNC_ENABLED=true to use get_async_db.")
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run sync ORM code `fn(session, *args, **kwargs)` from an async endpoint without blocking
+    the event loop: through AsyncSession.run_sync when the async engine is enabled, otherwise
+    on the threadpool with a regular Session.
+    """
+    return await _run_with(SessionLocal, AsyncSessionLocal, fn, *args, **kwargs)
+
+
+async def run_read_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """run_db for read-only work: routed to the replica when it is configured and healthy."""
+    # The lag check may touch the network, so it runs off the event loop
+    if read_engine is not None and await run_in_threadpool(replica_router.use_replica):
+        return await _run_with(ReadSessionLocal, AsyncReadSessionLocal, fn, *args, **kwargs)
+    return await _run_with(SessionLocal, AsyncSessionLocal, fn, *args, **kwargs)
+
+
+async def _run_with(sync_factory, async_factory, fn: Callable[..., T], *args, **kwargs) -> T:
+    if async_factory is not None:
+        async with async_factory() as session:
+            return await session.run_sync(lambda sync_session: fn(sync_session, *args, **kwargs))
+
+    def _call():
+        db = sync_factory()
+        try:
+            return fn(db, *args, **kwargs)
+        finally:
+            db.close()
+
+    return await run_in_threadpool(_call)
+
+
+def pool_status() -> Dict[str, Any]:
+    """Pool counters and gauges for the sync engine, plus the replica and async engines when enabled."""
+    status = {"sync": pool_metrics.snapshot(engine)}
+    if read_engine is not None:
+        status["read"] = read_pool_metrics.snapshot(read_engine)
+        status["replica"] = replica_router.status()
+    if async_engine is not None:
+        pool = async_engine.pool
+        status["async"] = {
+            gauge: getattr(pool, gauge)() for gauge in ("size", "checkedin", "checkedout", "overflow") if hasattr(pool, gauge)
+        }
+    return status
@@ -1,4 +1,6 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routers import complaints, user, location, admin
@@ -6,8 +8,17 @@ from app import chatbot_api
 from app.routers.analytics import router as analytics_router
 from app.routers.misclassification import router as misclassification_router
 from app.routers import retrain_spaces, trigger_orchestrator
+from app.routers.feed import router as feed_router
+from app.services.change_feed import pg_listener
+from app.services import duplicate_detector, sla_service
+from sqlalchemy import text
+
+from app.core.database import engine, pool_status
+from app.models.admin import Admin
+from app.routers.admin import get_current_admin
+from app.utils.fast_json import ORJSONResponse
 
-app = FastAPI(title="Sambodhan API")
+app = FastAPI(title="Sambodhan API", default_response_class=ORJSONResponse)
 
 # Configure CORS for frontend access
 app.add_middleware(
@@ -32,7 +43,49 @@ app.include_router(analytics_router)
 app.include_router(misclassification_router)
 app.include_router(retrain_spaces.router)
 app.include_router(trigger_orchestrator.router)
+app.include_router(feed_router)
+
+
+@app.on_event("startup")
+async def start_sla_refresh():
+    if sla_service.SLA_REFRESH_INTERVAL_SECONDS > 0:
+        app.state.sla_refresh_task = asyncio.create_task(sla_service.run_refresh_loop())
+
+
+@app.on_event("startup")
+async def start_duplicate_index():
+    app.state.dedup_sync_task = asyncio.create_task(duplicate_detector.run_sync_loop())
+
+
+@app.on_event("shutdown")
+def stop_change_feed():
+    pg_listener.stop()
+
+
+@app.on_event("shutdown")
+def stop_background_tasks():
+    for name in ("sla_refresh_task", "dedup_sync_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
 
 @app.get("/")
 def root():
     return {"message": "Welcome to Sambodhan API", "status": "running"}
+
+
+@app.get("/health/db")
+def db_health():
+    """Whether the primary database answers. Pool and replica details are at /health/db/pool."""
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception:
+        return ORJSONResponse({"status": "down"}, status_code=503)
+    return {"status": "up"}
+
+
+@app.get("/health/db/pool")
+def db_pool_status(admin: Admin = Depends(get_current_admin)):
+    """Connection pool counters and gauges, and replica lag/errors (admins only)."""
+    return pool_status()
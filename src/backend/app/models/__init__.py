@@ -1,3 +1,7 @@
 from app.models.user import User
 from app.models.location import District, Municipality, Ward
-from app.models.complaint import Complaint, ComplaintStatusHistory, MisclassifiedComplaint
\ No newline at end of file
+from app.models.complaint import Complaint, ComplaintStatusHistory, MisclassifiedComplaint
+from app.models.chat_session import ChatSession
+from app.models.sla import ComplaintSlaFact, SlaSummary, SlaRefreshState
+from app.models.duplicate import ComplaintSignature
+from app.models.data_version import DataVersion
\ No newline at end of file
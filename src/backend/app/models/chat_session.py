@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, func
+from app.core.database import Base
+
+
+class ChatSession(Base):
+    __tablename__ = "chatbot_sessions"
+    __table_args__ = (
+        Index("ix_chatbot_sessions_expires_at", "expires_at"),
+    )
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=True)
+    # Conversation context plus cached option lists, see app/services/chat_session_store.py
+    state = Column(JSON, nullable=False, default=dict)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
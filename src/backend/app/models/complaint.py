@@ -8,23 +8,39 @@ from sqlalchemy import (
     ForeignKey,
     func,
     Boolean,
-    CheckConstraint
+    CheckConstraint,
+    ForeignKeyConstraint,
+    Index
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 from app.core.database import Base
 from app.models.location import Ward
+from app.models.partitioning import (
+    monthly_partitioning,
+    register_partition_bootstrap,
+    skip_on_partitioned_postgres,
+)
+from app.models.search import register_search_index
 
 
 
 
 class Complaint(Base):
     __tablename__ = "complaints"
+    # Monthly partitions on Postgres; the primary key becomes (id, date_submitted) there
+    __table_args__ = (
+        Index("ix_complaints_updated_at", "updated_at"),
+        monthly_partitioning("date_submitted"),
+    )
 
     id = Column(Integer, primary_key=True)
     citizen_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     
+    # ward_id, department, urgency and current_status use active_history: assigning one loads
+    # the old value first if it is expired, so the change feed can report it under "prev"
+
     # Department stored as string label
-    department = Column(
+    department = column_property(Column(
         String(100),
         CheckConstraint(
             "department IN ("
@@ -35,45 +51,52 @@ class Complaint(Base):
             ")"
         ),
         nullable=True
-    )
+    ), active_history=True)
 
     message = Column(Text, nullable=False)
     message_processed = Column(Text)
 
     # Urgency stored as string label
-    urgency = Column(
+    urgency = column_property(Column(
         String(20),
         CheckConstraint(
             "urgency IN ('NORMAL', 'URGENT', 'HIGHLY URGENT')"
         ),
         nullable=True
-    )
+    ), active_history=True)
 
-    current_status = Column(
+    current_status = column_property(Column(
         String(20),
         CheckConstraint(
             "current_status IN ('PENDING', 'IN PROCESS', 'RESOLVED', 'REJECTED')"
         ),
         default="PENDING",
-    )
-    date_submitted = Column(DateTime(timezone=True), server_default=func.now())
-    ward_id = Column(Integer, ForeignKey("wards.id", ondelete="SET NULL"))
+    ), active_history=True)
+    date_submitted = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    ward_id = column_property(Column(Integer, ForeignKey("wards.id", ondelete="SET NULL")), active_history=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     citizen = relationship("User", back_populates="complaints")
     history = relationship("ComplaintStatusHistory", back_populates="complaint", cascade="all, delete-orphan")
     misclassifications = relationship("MisclassifiedComplaint", back_populates="complaint", cascade="all, delete-orphan")
+    signature = relationship("ComplaintSignature", back_populates="complaint", cascade="all, delete-orphan", uselist=False)
+    sla_fact = relationship("ComplaintSlaFact", back_populates="complaint", cascade="all, delete-orphan", uselist=False)
     ward = relationship("Ward", back_populates="complaints")
 
 class ComplaintStatusHistory(Base):
     __tablename__ = "complaint_status_history"
+    __table_args__ = (
+        ForeignKeyConstraint(["complaint_id"], ["complaints.id"], ondelete="CASCADE").ddl_if(callable_=skip_on_partitioned_postgres),
+        Index("ix_complaint_status_history_changed_at", "changed_at"),
+        monthly_partitioning("changed_at"),
+    )
 
     id = Column(Integer, primary_key=True)
-    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), nullable=False)
+    complaint_id = Column(Integer, nullable=False, index=True)
     status = Column(SmallInteger, CheckConstraint("status BETWEEN 0 AND 3"), nullable=False)
     changed_by_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
-    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     comment = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -83,9 +106,13 @@ class ComplaintStatusHistory(Base):
 
 class MisclassifiedComplaint(Base):
     __tablename__ = "misclassified_complaints"
+    __table_args__ = (
+        ForeignKeyConstraint(["complaint_id"], ["complaints.id"], ondelete="CASCADE").ddl_if(callable_=skip_on_partitioned_postgres),
+        Index("ix_misclassified_complaints_updated_at", "updated_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    complaint_id = Column(Integer, ForeignKey("complaints.id", ondelete="CASCADE"), nullable=False)
+    complaint_id = Column(Integer, nullable=False, index=True)
 
     # Predicted labels as strings
     model_predicted_department = Column(
@@ -135,9 +162,22 @@ class MisclassifiedComplaint(Base):
     reviewed = Column(Boolean, default=False)
     reviewed_at = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # High-water mark of the incremental dataset builds (prepare_dataset/dataset_snapshots.py)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     complaint = relationship("Complaint", back_populates="misclassifications")
     # Note: Change relationship name if you add this to Admin model
     # reported_by_admin = relationship("Admin", back_populates="misclassifications_reported")
-    
 
+
+# Tables whose rows go with their complaint; on Postgres the cascade trigger deletes them
+COMPLAINT_CASCADE_CHILDREN = [
+    ("complaint_status_history", "complaint_id"),
+    ("misclassified_complaints", "complaint_id"),
+    ("complaint_signatures", "complaint_id"),
+    ("complaint_sla_facts", "complaint_id"),
+]
+
+register_partition_bootstrap(Complaint.__table__, cascade_children=COMPLAINT_CASCADE_CHILDREN)
+register_partition_bootstrap(ComplaintStatusHistory.__table__)
+register_search_index(Complaint.__table__)
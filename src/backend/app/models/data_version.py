@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, event, func
+from app.core.database import Base
+
+# Data sets whose version the HTTP layer uses for ETags (see app/services/data_versions.py)
+DATA_SET_NAMES = ("complaints", "locations")
+
+
+class DataVersion(Base):
+    """Monotonic change counter per data set, bumped in the same transaction as the change."""
+    __tablename__ = "data_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+@event.listens_for(DataVersion.__table__, "after_create")
+def _seed_data_versions(target, connection, **kw):
+    connection.execute(target.insert(), [{"name": name, "version": 0} for name in DATA_SET_NAMES])
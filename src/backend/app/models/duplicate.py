@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, DateTime, LargeBinary, Index, ForeignKeyConstraint, func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.partitioning import skip_on_partitioned_postgres
+
+
+class ComplaintSignature(Base):
+    """MinHash signature and duplicate cluster of a complaint (see app/services/duplicate_detector.py)."""
+    __tablename__ = "complaint_signatures"
+    __table_args__ = (
+        ForeignKeyConstraint(["complaint_id"], ["complaints.id"], ondelete="CASCADE").ddl_if(callable_=skip_on_partitioned_postgres),
+        Index("ix_complaint_signatures_ward_id_date_submitted", "ward_id", "date_submitted"),
+        Index("ix_complaint_signatures_cluster_id", "cluster_id"),
+    )
+
+    complaint_id = Column(Integer, primary_key=True, autoincrement=False)
+    ward_id = Column(Integer)
+    date_submitted = Column(DateTime(timezone=True), nullable=False)
+    # uint32 MinHash values, little-endian
+    signature = Column(LargeBinary, nullable=False)
+    # complaint_id of the first complaint in the cluster; equals complaint_id when it has no earlier duplicate
+    cluster_id = Column(Integer, nullable=False)
+    # Estimated Jaccard similarity to the complaint it was matched with
+    similarity = Column(Float)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    complaint = relationship("Complaint", back_populates="signature")
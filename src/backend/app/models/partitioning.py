@@ -0,0 +1,170 @@
+"""
+Monthly range partitioning for large, time-ordered tables (PostgreSQL only).
+
+A model opts in by ending its `__table_args__` tuple with the kwargs dict returned by
+`monthly_partitioning("date_submitted")`:
+
+    __table_args__ = (
+        Index("ix_complaints_updated_at", "updated_at"),
+        monthly_partitioning("date_submitted"),
+    )
+
+On PostgreSQL the table is created `PARTITION BY RANGE (<column>)`, its primary key
+gets the partition column appended (Postgres requires it), and a DEFAULT partition
+plus a window of monthly partitions is created right after the table. Other dialects
+(SQLite in development) get a plain table and ignore all of this.
+
+Partitions are named `<table>_pYYYY_MM` and cover [first of month, first of next month).
+Queries that filter on the partition column are pruned by the planner automatically.
+"""
+from datetime import date
+from typing import Dict, Any, List, Tuple
+
+from sqlalchemy import event, text, PrimaryKeyConstraint, Table
+from sqlalchemy.ext.compiler import compiles
+
+PARTITION_INFO_KEY = "monthly_partition_column"
+
+
+def monthly_partitioning(column: str) -> Dict[str, Any]:
+    """Table kwargs declaring monthly RANGE partitioning on `column`."""
+    return {"postgresql_partition_by": f"RANGE ({column})", "info": {PARTITION_INFO_KEY: column}}
+
+
+def partition_column(table: Table):
+    return table.info.get(PARTITION_INFO_KEY)
+
+
+def is_partitioned(table: Table) -> bool:
+    return partition_column(table) is not None
+
+
+def skip_on_partitioned_postgres(ddl, target, bind, **kw) -> bool:
+    """`ddl_if` callable for foreign keys that point at a partitioned table.
+
+    Postgres can only reference a partitioned table through a unique key that includes
+    the partition column, so those foreign keys exist on other dialects only; on Postgres
+    a cascade trigger (see `cascade_delete_trigger_sql`) keeps child rows in step.
+    """
+    return kw["dialect"].name != "postgresql"
+
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _primary_key_with_partition_column(constraint, compiler, **kw):
+    sql = compiler.visit_primary_key_constraint(constraint, **kw)
+    column = partition_column(constraint.table) if constraint.table is not None else None
+    if column and column not in constraint.columns.keys() and sql.endswith(")"):
+        sql = sql[:-1] + f", {compiler.preparer.quote(column)})"
+    return sql
+
+
+# -------------------------
+# Partition DDL helpers (shared by create_all and scripts/manage_partitions.py)
+# -------------------------
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_p{month.year:04d}_{month.month:02d}"
+
+
+def month_range(start: date, end: date) -> List[date]:
+    """First-of-month dates from `start`'s month up to and including `end`'s month."""
+    months, current = [], month_start(start)
+    while current <= month_start(end):
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def create_month_partition_sql(table_name: str, column: str, month: date, copy_columns: str = "*") -> List[str]:
+    """
+    Statements creating the partition for `month`. The partition is built detached, rows
+    that landed in the DEFAULT partition for that month are moved into it, and only then is
+    it attached, so this also works when the default partition already holds such rows.
+    `copy_columns` must leave out generated columns, which cannot be inserted into.
+    """
+    name = partition_name(table_name, month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    target = name if copy_columns == "*" else f"{name} ({copy_columns})"
+    return [
+        f"CREATE TABLE IF NOT EXISTS {name} (LIKE {table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)",
+        f"WITH moved AS (DELETE FROM {table_name}_default WHERE {column} >= '{lower}' AND {column} < '{upper}' RETURNING *) "
+        f"INSERT INTO {target} SELECT {copy_columns} FROM moved",
+        f"ALTER TABLE {table_name} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')",
+    ]
+
+
+def stored_columns(conn, table_name: str) -> str:
+    """Comma-separated, quoted list of the table's non-generated columns in order."""
+    return conn.execute(text(
+        "SELECT string_agg(quote_ident(attname), ', ' ORDER BY attnum) FROM pg_attribute "
+        "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped AND attgenerated = ''"
+    ), {"table": table_name}).scalar()
+
+
+def existing_partitions(conn, table_name: str) -> List[Tuple[str, str]]:
+    """(partition name, bound expression) for every partition currently attached to `table_name`."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table_name})
+    return [(name, bound) for name, bound in rows]
+
+
+def ensure_month_partitions(conn, table_name: str, column: str, months: List[date]) -> List[str]:
+    """Create any missing monthly partitions; returns the names created."""
+    attached = {name for name, _ in existing_partitions(conn, table_name)}
+    created, copy_columns = [], None
+    for month in months:
+        name = partition_name(table_name, month)
+        if name in attached:
+            continue
+        copy_columns = copy_columns or stored_columns(conn, table_name)
+        for statement in create_month_partition_sql(table_name, column, month, copy_columns):
+            conn.execute(text(statement))
+        created.append(name)
+    return created
+
+
+def cascade_delete_trigger_sql(parent: str, children: List[Tuple[str, str]]) -> List[str]:
+    """Replace ON DELETE CASCADE foreign keys that Postgres cannot declare against a partitioned parent."""
+    deletes = " ".join(f"DELETE FROM {child} WHERE {fk_column} = OLD.id;" for child, fk_column in children)
+    return [
+        f"CREATE OR REPLACE FUNCTION {parent}_cascade_delete() RETURNS trigger AS $$ "
+        f"BEGIN {deletes} RETURN OLD; END; $$ LANGUAGE plpgsql",
+        f"DROP TRIGGER IF EXISTS {parent}_cascade_delete ON {parent}",
+        f"CREATE TRIGGER {parent}_cascade_delete AFTER DELETE ON {parent} "
+        f"FOR EACH ROW EXECUTE FUNCTION {parent}_cascade_delete()",
+    ]
+
+
+# Months created around "today" when a partitioned table is first created
+INITIAL_MONTHS_BACK = 12
+INITIAL_MONTHS_AHEAD = 3
+
+
+def register_partition_bootstrap(table: Table, cascade_children: List[Tuple[str, str]] = ()) -> None:
+    """After CREATE TABLE on Postgres: add the DEFAULT partition, the initial monthly window and cascade trigger."""
+
+    @event.listens_for(table, "after_create")
+    def _bootstrap(target, connection, **kw):
+        if connection.dialect.name != "postgresql":
+            return
+        column = partition_column(target)
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {target.name}_default PARTITION OF {target.name} DEFAULT"))
+        today = date.today()
+        ensure_month_partitions(
+            connection, target.name, column,
+            month_range(add_months(month_start(today), -INITIAL_MONTHS_BACK), add_months(month_start(today), INITIAL_MONTHS_AHEAD)),
+        )
+        if cascade_children:
+            for statement in cascade_delete_trigger_sql(target.name, list(cascade_children)):
+                connection.execute(text(statement))
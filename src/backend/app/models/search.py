@@ -0,0 +1,40 @@
+"""
+Full-text search columns and indexes for complaint text (PostgreSQL only).
+
+`search_vector` is a STORED generated tsvector over the message, indexed with GIN, plus
+a pg_trgm GIN index on the raw message for fuzzy and substring matching. The 'simple'
+text search configuration is used because complaints are written in Nepali as well as
+English and Postgres ships no Nepali stemmer; 'simple' lowercases and splits on word
+boundaries, which keeps Devanagari tokens intact.
+
+The column is not mapped on the model, so other dialects (SQLite in development) never
+see it; app/services/complaint_search.py falls back to an in-process index there.
+"""
+from typing import List
+
+from sqlalchemy import event, text, Table
+
+SEARCH_CONFIG = "simple"
+SEARCH_VECTOR_COLUMN = "search_vector"
+
+
+def search_index_sql(table_name: str, column: str = "message") -> List[str]:
+    """Idempotent statements adding the tsvector column, its GIN index and the trigram index."""
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector "
+        f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', coalesce({column}, ''))) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{SEARCH_VECTOR_COLUMN} ON {table_name} USING GIN ({SEARCH_VECTOR_COLUMN})",
+        f"CREATE INDEX IF NOT EXISTS ix_{table_name}_{column}_trgm ON {table_name} USING GIN ({column} gin_trgm_ops)",
+    ]
+
+
+def register_search_index(table: Table, column: str = "message") -> None:
+    """After CREATE TABLE on Postgres: add the search column and indexes."""
+
+    @event.listens_for(table, "after_create")
+    def _create_search_index(target, connection, **kw):
+        if connection.dialect.name != "postgresql":
+            return
+        for statement in search_index_sql(target.name, column):
+            connection.execute(text(statement))
@@ -0,0 +1,65 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, DateTime, Index, UniqueConstraint, ForeignKeyConstraint, func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.partitioning import skip_on_partitioned_postgres
+
+
+class ComplaintSlaFact(Base):
+    """Per-complaint SLA timings derived from complaint_status_history (see app/services/sla_service.py)."""
+    __tablename__ = "complaint_sla_facts"
+    __table_args__ = (
+        ForeignKeyConstraint(["complaint_id"], ["complaints.id"], ondelete="CASCADE").ddl_if(callable_=skip_on_partitioned_postgres),
+        Index("ix_complaint_sla_facts_department", "department"),
+        Index("ix_complaint_sla_facts_municipality_id", "municipality_id"),
+        Index("ix_complaint_sla_facts_urgency", "urgency"),
+    )
+
+    complaint_id = Column(Integer, primary_key=True, autoincrement=False)
+    department = Column(String(100))
+    urgency = Column(String(20))
+    ward_id = Column(Integer)
+    municipality_id = Column(Integer)
+    district_id = Column(Integer)
+    submitted_at = Column(DateTime(timezone=True))
+    first_action_at = Column(DateTime(timezone=True))
+    resolved_at = Column(DateTime(timezone=True))
+    first_action_seconds = Column(Float)
+    resolution_seconds = Column(Float)
+    reopen_count = Column(SmallInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    complaint = relationship("Complaint", back_populates="sla_fact")
+
+
+class SlaSummary(Base):
+    """SLA aggregates per dimension value; dimension is 'all', 'department', 'municipality' or 'urgency'."""
+    __tablename__ = "sla_summary"
+    __table_args__ = (
+        UniqueConstraint("dimension", "group_key", name="uq_sla_summary_dimension_group_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    dimension = Column(String(20), nullable=False)
+    group_key = Column(String(100), nullable=False)
+    complaints = Column(Integer, nullable=False, default=0)
+    actioned = Column(Integer, nullable=False, default=0)
+    resolved = Column(Integer, nullable=False, default=0)
+    reopened = Column(Integer, nullable=False, default=0)
+    avg_first_action_seconds = Column(Float)
+    p50_first_action_seconds = Column(Float)
+    p90_first_action_seconds = Column(Float)
+    p99_first_action_seconds = Column(Float)
+    avg_resolution_seconds = Column(Float)
+    p50_resolution_seconds = Column(Float)
+    p90_resolution_seconds = Column(Float)
+    p99_resolution_seconds = Column(Float)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SlaRefreshState(Base):
+    """Single-row watermark for the incremental SLA refresh."""
+    __tablename__ = "sla_refresh_state"
+
+    id = Column(Integer, primary_key=True)
+    watermark = Column(DateTime(timezone=True))
+    refreshed_at = Column(DateTime(timezone=True))
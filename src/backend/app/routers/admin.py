@@ -1,28 +1,29 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.admin import Admin
 from app.schemas.admin import AdminCreate, AdminRead
-from passlib.context import CryptContext
+from app.services.password_service import hash_password_blocking, verify_password_blocking
+from app.services.location_resolver import admin_location_names
+from app.utils.fast_json import items_response, validate_list
 from pydantic import BaseModel, EmailStr
-from jose import jwt
+from jose import JWTError, jwt
 from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/api/admins", tags=["Admins"])
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
 SECRET_KEY = "your-very-secret-key"  # Replace with env var in production
 # NOTE: This SECRET_KEY must match chatbot_api.py for JWT compatibility
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return hash_password_blocking(password)
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_password_blocking(plain_password, hashed_password)
 
 from typing import Optional
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -31,6 +32,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+admin_security = HTTPBearer()
+
+
+def get_current_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(admin_security),
+    db: Session = Depends(get_db),
+) -> Admin:
+    """The admin a bearer token from /api/admins/login belongs to; 401 for any other token."""
+    unauthorized = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Admin authentication required")
+    try:
+        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        # Citizen tokens (chatbot_api.py) share the key but carry no role claim
+        admin_id = int(payload["sub"]) if payload.get("role") else None
+    except (JWTError, KeyError, TypeError, ValueError):
+        raise unauthorized
+    admin = db.get(Admin, admin_id) if admin_id is not None else None
+    if admin is None:
+        raise unauthorized
+    return admin
+
 class AdminLoginRequest(BaseModel):
     email: EmailStr
     password: str
@@ -67,8 +88,6 @@ def register_admin(admin_in: AdminCreate, db: Session = Depends(get_db)):
 # Admin login endpoint
 @router.post("/login", response_model=AdminLoginResponse)
 def login_admin(login_req: AdminLoginRequest, db: Session = Depends(get_db)):
-    from app.models.location import Municipality, District
-    
     admin = db.query(Admin).filter(Admin.email == login_req.email).first()
     if not admin or not verify_password(login_req.password, admin.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
@@ -77,23 +96,7 @@ def login_admin(login_req: AdminLoginRequest, db: Session = Depends(get_db)):
     
     # Convert SQLAlchemy admin to AdminRead schema and enrich with location names
     admin_dict = AdminRead.model_validate(admin).model_dump()
-    
-    # For Super Admin with district_id, fetch district name
-    if admin.district_id is not None:
-        district = db.query(District).filter(District.id == admin.district_id).first()
-        if district:
-            admin_dict["district_name"] = district.name
-    
-    # For other admins with municipality_id, fetch municipality and district names
-    if admin.municipality_id is not None:
-        municipality = db.query(Municipality).filter(Municipality.id == admin.municipality_id).first()
-        if municipality:
-            admin_dict["municipality_name"] = municipality.name
-            # Get district name from municipality's district
-            if municipality.district_id is not None:
-                district = db.query(District).filter(District.id == municipality.district_id).first()
-                if district:
-                    admin_dict["district_name"] = district.name
+    admin_dict.update(admin_location_names(db, [admin], own_district=True)[0])
     
     admin_read = AdminRead(**admin_dict)
     return AdminLoginResponse(access_token=access_token, admin=admin_read)
@@ -109,8 +112,6 @@ def get_admins(
     department: Optional[str] = Query(None, description="Filter by department"),
     db: Session = Depends(get_db)
 ):
-    from app.models.location import Municipality, District
-    
     query = db.query(Admin)
     
     # Apply filters
@@ -125,47 +126,25 @@ def get_admins(
     
     admins = query.all()
     
-    # Enrich with municipality and district names
-    result = []
-    for admin in admins:
-        admin_dict = AdminRead.model_validate(admin).model_dump()
-        
-        if admin.municipality_id is not None:
-            municipality = db.query(Municipality).filter(Municipality.id == admin.municipality_id).first()
-            if municipality:
-                admin_dict["municipality_name"] = municipality.name
-                # Get district name from municipality's district
-                if municipality.district_id is not None:
-                    district = db.query(District).filter(District.id == municipality.district_id).first()
-                    if district:
-                        admin_dict["district_name"] = district.name
-        
-        result.append(AdminRead(**admin_dict))
-    
-    return result
+    # Enrich with municipality and district names (batched, independent of admin count)
+    items = validate_list(AdminRead, admins)
+    for item, location_names in zip(items, admin_location_names(db, admins)):
+        item.municipality_name = location_names.get("municipality_name")
+        item.district_name = location_names.get("district_name")
+
+    return items_response(AdminRead, items)
 
 
 # GET /api/admins/{id} endpoint
 from fastapi import Path
 @router.get("/{admin_id}", response_model=AdminRead)
 def get_admin_by_id(admin_id: int = Path(..., description="Admin ID"), db: Session = Depends(get_db)):
-    from app.models.location import Municipality, District
-    
     admin = db.query(Admin).filter(Admin.id == admin_id).first()
     if not admin:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found")
     
     # Fetch municipality and district names
     admin_dict = AdminRead.model_validate(admin).model_dump()
-    
-    if admin.municipality_id is not None:
-        municipality = db.query(Municipality).filter(Municipality.id == admin.municipality_id).first()
-        if municipality:
-            admin_dict["municipality_name"] = municipality.name
-            # Get district name from municipality's district
-            if municipality.district_id is not None:
-                district = db.query(District).filter(District.id == municipality.district_id).first()
-                if district:
-                    admin_dict["district_name"] = district.name
+    admin_dict.update(admin_location_names(db, [admin])[0])
     
     return AdminRead(**admin_dict)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
-from app.core.database import get_db
-from app.services import analytics_service
+from datetime import date
+from app.core.database import get_db, run_read_db
+from app.services import analytics_service, data_versions, sla_service
+from app.utils.http_cache import ANALYTICS_CACHE_CONTROL, is_fresh, make_etag, not_modified, set_cache_headers
 from sqlalchemy import func, case
 from app import models
 
@@ -26,6 +28,15 @@ def get_filters(request: Request):
         filters["district_id"] = int(district_id)
     return filters
 
+async def analytics_etag(request: Request, name: str, filters: Dict[str, Any], cacheable: bool = True) -> str:
+    """The cache file's last_updated when the cached payload will be served, else the complaints data version."""
+    stamp = analytics_service.cache_stamp(name) if cacheable and not filters else None
+    if stamp is not None:
+        return make_etag(request, "cache", stamp)
+    version = await run_read_db(data_versions.get_version, "complaints")
+    # Rolling windows (last N days) move at midnight even when no complaint changed
+    return make_etag(request, "db", version, date.today().isoformat())
+
 # Test endpoint
 @router.get("/test-alive", summary="Test if analytics router is loaded")
 def test_alive():
@@ -33,55 +44,75 @@ def test_alive():
 
 # Dashboard endpoints
 @router.get("/summary", response_model=Dict[str, Any])
-async def api_summary(request: Request, db: Session = Depends(get_db)):
+async def api_summary(request: Request, response: Response):
     try:
         filters = get_filters(request)
-        return analytics_service.get_cached_or_compute(db, "summary", **filters)
+        etag = await analytics_etag(request, "summary", filters)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
+        return await run_read_db(analytics_service.get_cached_or_compute, "summary", **filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-urgency", response_model=Dict[str, Any])
-async def api_by_urgency(request: Request, db: Session = Depends(get_db)):
+async def api_by_urgency(request: Request, response: Response):
     try:
         filters = get_filters(request)
-        return analytics_service.get_cached_or_compute(db, "by_urgency", **filters)
+        etag = await analytics_etag(request, "by_urgency", filters)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
+        return await run_read_db(analytics_service.get_cached_or_compute, "by_urgency", **filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-department", response_model=Dict[str, Any])
-async def api_by_department(request: Request, db: Session = Depends(get_db)):
+async def api_by_department(request: Request, response: Response):
     try:
         filters = get_filters(request)
-        return analytics_service.get_cached_or_compute(db, "by_department", **filters)
+        etag = await analytics_etag(request, "by_department", filters)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
+        return await run_read_db(analytics_service.get_cached_or_compute, "by_department", **filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-status", response_model=Dict[str, Any])
-async def api_by_status(request: Request, db: Session = Depends(get_db)):
+async def api_by_status(request: Request, response: Response):
     try:
         filters = get_filters(request)
-        return analytics_service.get_cached_or_compute(db, "by_status", **filters)
+        etag = await analytics_etag(request, "by_status", filters)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
+        return await run_read_db(analytics_service.get_cached_or_compute, "by_status", **filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-district", response_model=Dict[str, Any])
-async def api_by_district(request: Request, db: Session = Depends(get_db)):
+async def api_by_district(request: Request, response: Response):
     try:
         filters = get_filters(request)
-        return analytics_service.get_cached_or_compute(db, "by_district", **filters)
+        etag = await analytics_etag(request, "by_district", filters)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
+        return await run_read_db(analytics_service.get_cached_or_compute, "by_district", **filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Custom visualization endpoints
 @router.get("/location-hotspots")
-async def api_location_hotspots(request: Request, db: Session = Depends(get_db)):
+async def api_location_hotspots(request: Request):
     """Get complaint counts by district (simplified for stability)"""
     try:
         filters = get_filters(request)
         
         # Get by-department data which we know works
-        dept_data = analytics_service.get_cached_or_compute(db, "by_department", **filters)
+        dept_data = await run_read_db(analytics_service.get_cached_or_compute, "by_department", **filters)
         
         # Handle nested data structure
         if isinstance(dept_data, dict) and "data" in dept_data:
@@ -114,12 +145,12 @@ async def api_location_hotspots(request: Request, db: Session = Depends(get_db))
 
 
 @router.get("/quality-metrics")
-async def api_quality_metrics(request: Request, db: Session = Depends(get_db)):
+async def api_quality_metrics(request: Request):
     """Get quality metrics over time (monthly trend)"""
     try:
         filters = get_filters(request)
         print(f"[Quality Metrics] Filters: {filters}")
-        trend_result = analytics_service.get_cached_or_compute(db, "trends_monthly", months=12, **filters)
+        trend_result = await run_read_db(analytics_service.get_cached_or_compute, "trends_monthly", months=12, **filters)
         
         # Handle nested data structure
         if isinstance(trend_result, dict) and "data" in trend_result:
@@ -150,27 +181,37 @@ async def api_quality_metrics(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/performance")
-async def api_performance(request: Request, db: Session = Depends(get_db)):
+async def api_performance(request: Request):
     """Get performance metrics comparing department vs city averages"""
     try:
         filters = get_filters(request)
         print(f"[Performance] Filters: {filters}")
-        summary = analytics_service.get_cached_or_compute(db, "summary", **filters)
+        summary = await run_read_db(analytics_service.get_cached_or_compute, "summary", **filters)
         
         # Calculate basic performance metrics
         data = summary.get("data", summary)
         total = data.get("total_complaints", 0) or data.get("total", 0)
         resolved = data.get("by_status", {}).get("Resolved", 0)
         
+        # Timings come from the SLA facts (kept current by the scheduled refresh); "city" is the
+        # same area without the ward/department narrowing
+        city_filters = {k: v for k, v in filters.items() if k in ("municipality_id", "district_id")}
+        scoped = await run_read_db(sla_service.scope_metrics, **filters)
+        city = await run_read_db(sla_service.scope_metrics, **city_filters)
+
         performance = {
-            "avgResponseTime": 0,  # Placeholder - implement if you have response time data
-            "cityAvgResponseTime": 0,
+            "avgResponseTime": scoped["avg_first_action_hours"],
+            "cityAvgResponseTime": city["avg_first_action_hours"],
             "resolutionRate": round((resolved / total * 100) if total > 0 else 0, 1),
-            "cityResolutionRate": 0,  # Placeholder - requires city-wide data
+            "cityResolutionRate": city["resolution_rate"],
             "citizenSatisfaction": 0,  # Placeholder - implement if you have feedback data
             "cityCitizenSatisfaction": 0,
-            "firstTimeResolution": 0,  # Placeholder
-            "cityFirstTimeResolution": 0,
+            "firstTimeResolution": scoped["first_time_resolution_rate"],
+            "cityFirstTimeResolution": city["first_time_resolution_rate"],
+            "avgResolutionTime": scoped["avg_resolution_hours"],
+            "cityAvgResolutionTime": city["avg_resolution_hours"],
+            "reopenRate": scoped["reopen_rate"],
+            "cityReopenRate": city["reopen_rate"],
         }
         print(f"[Performance] Returning metrics: {performance}")
         return performance
@@ -186,16 +227,20 @@ async def api_performance(request: Request, db: Session = Depends(get_db)):
 @router.get("/trends/daily", response_model=Dict[str, Any])
 async def api_trends_daily(
     request: Request,
+    response: Response,
     days: int = Query(30, ge=1, le=365, description="Number of past days (default 30)"),
-    db: Session = Depends(get_db),
 ):
     try:
         filters = get_filters(request)
+        etag = await analytics_etag(request, "trends_daily", filters, cacheable=days == 30)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
         print(f"[Trends Daily] Filters: {filters}, Days: {days}")
         if days == 30:
-            result = analytics_service.get_cached_or_compute(db, "trends_daily", days=days, **filters)
+            result = await run_read_db(analytics_service.get_cached_or_compute, "trends_daily", days=days, **filters)
         else:
-            computed = analytics_service.trends_daily(db, days=days, **filters)
+            computed = await run_read_db(analytics_service.trends_daily, days=days, **filters)
             result = {"data": computed}
         print(f"[Trends Daily] Returning {len(result.get('data', []))} data points")
         return result
@@ -209,14 +254,18 @@ async def api_trends_daily(
 @router.get("/trends/weekly", response_model=Dict[str, Any])
 async def api_trends_weekly(
     request: Request,
+    response: Response,
     weeks: int = Query(12, ge=1, le=52, description="Number of past weeks (default 12)"),
-    db: Session = Depends(get_db),
 ):
     try:
         filters = get_filters(request)
+        etag = await analytics_etag(request, "trends_weekly", filters, cacheable=weeks == 12)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
         if weeks == 12:
-            return analytics_service.get_cached_or_compute(db, "trends_weekly", weeks=weeks, **filters)
-        computed = analytics_service.trends_weekly(db, weeks=weeks, **filters)
+            return await run_read_db(analytics_service.get_cached_or_compute, "trends_weekly", weeks=weeks, **filters)
+        computed = await run_read_db(analytics_service.trends_weekly, weeks=weeks, **filters)
         return {"data": computed}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -224,18 +273,41 @@ async def api_trends_weekly(
 @router.get("/trends/monthly", response_model=Dict[str, Any])
 async def api_trends_monthly(
     request: Request,
+    response: Response,
     months: int = Query(12, ge=1, le=60, description="Number of past months (default 12)"),
-    db: Session = Depends(get_db),
 ):
     try:
         filters = get_filters(request)
+        etag = await analytics_etag(request, "trends_monthly", filters, cacheable=months == 12)
+        if is_fresh(request, etag):
+            return not_modified(etag, ANALYTICS_CACHE_CONTROL)
+        set_cache_headers(response, etag, ANALYTICS_CACHE_CONTROL)
         if months == 12:
-            return analytics_service.get_cached_or_compute(db, "trends_monthly", months=months, **filters)
-        computed = analytics_service.trends_monthly(db, months=months, **filters)
+            return await run_read_db(analytics_service.get_cached_or_compute, "trends_monthly", months=months, **filters)
+        computed = await run_read_db(analytics_service.trends_monthly, months=months, **filters)
         return {"data": computed}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sla", response_model=Dict[str, Any])
+async def api_sla(
+    dimension: str = Query(None, description="all, department, municipality or urgency"),
+):
+    """SLA percentiles (time to first action, resolution) and reopen rates per group"""
+    if dimension and dimension not in ("all", *sla_service.DIMENSIONS):
+        raise HTTPException(status_code=400, detail=f"Unknown dimension: {dimension}")
+    try:
+        return await run_read_db(sla_service.sla_summary, dimension)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/sla/refresh", response_model=Dict[str, Any])
+def api_sla_refresh(full: bool = Query(False, description="Rebuild every complaint instead of only the changed ones"), db: Session = Depends(get_db)):
+    try:
+        return sla_service.refresh(db, full=full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"SLA refresh error: {str(e)}")
+
 @router.post("/recompute", response_model=Dict[str, str])
 def api_recompute_all(
     days: int = Query(30, ge=1, le=365),
@@ -257,7 +329,7 @@ def api_recompute_all(
 
 
 @router.get("/export")
-async def api_export_analytics(request: Request, db: Session = Depends(get_db)):
+async def api_export_analytics(request: Request):
     """Export analytics data as CSV file"""
     try:
         from fastapi.responses import StreamingResponse
@@ -268,7 +340,7 @@ async def api_export_analytics(request: Request, db: Session = Depends(get_db)):
         filters = get_filters(request)
         
         # Fetch all analytics data
-        summary = analytics_service.get_cached_or_compute(db, "summary", **filters)
+        summary = await run_read_db(analytics_service.get_cached_or_compute, "summary", **filters)
         data = summary.get("data", summary)
         
         # Create CSV in memory
@@ -1,39 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import and_, or_
-from app.core.database import SessionLocal
+from starlette.concurrency import run_in_threadpool
+from app.core.database import get_db, get_read_db, SessionLocal
+from app.services import complaint_ingest, complaint_search, sla_service
+from app.services.duplicate_detector import duplicate_detector, signature as minhash_signature
+from app.utils.fast_json import model_list_response
 from app.utils.label_converter import resolve_label
 from app.schemas.complaint import DEPARTMENT_LABEL_MAP, URGENCY_LABEL_MAP, STATUS_LABEL_MAP
 from app import models, schemas
 from typing import Optional
 import httpx
+import asyncio
 import os
 from typing import Dict, Any
+from datetime import datetime
 
 router = APIRouter(prefix="/api/complaints", tags=["Complaints"])
 
 # Hugging Face API endpoints
 URGENCY_API_BASE = os.getenv("URGENCY_API_BASE", "https://kar137-sambodhan-urgency-classifier-space.hf.space")
 DEPARTMENT_API_BASE = os.getenv("DEPARTMENT_API_BASE", "https://mr-kush-sambodhan-department-classifier.hf.space")
+# Multitask classifier (one model, one call for urgency + department); when unset, the two APIs above are used
+CLASSIFIER_API_BASE = os.getenv("CLASSIFIER_API_BASE", "")
 CLASSIFIER_TIMEOUT_SECONDS = int(os.getenv("CLASSIFIER_TIMEOUT_SECONDS", "30"))
 
 
-# Dependency: create and close DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# ML Classification helper functions
+def _urgency_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """predict_urgency's return shape from an urgency prediction dict."""
+    label_map = {"NORMAL": 0, "URGENT": 1, "HIGHLY URGENT": 2}
+    return {
+        "urgency": label_map.get(result.get("label", "").upper(), 0),
+        "confidence": result.get("confidence", 0.0),
+        "label": result.get("label", "")
+    }
+
+
+def _department_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """predict_department's return shape from a department prediction dict."""
+    return {
+        "department": result.get("label", "").strip() or "Unclassified",
+        "confidence": result.get("confidence", 0.0)
+    }
 
 
-# ML Classification helper functions
 async def predict_urgency(text: str) -> Dict[str, Any]:
     """
     Call external urgency classifier API.
     Returns: {"urgency": int, "confidence": float}
     """
+    if CLASSIFIER_API_BASE:
+        return (await predict_all(text))["urgency"]
     try:
         async with httpx.AsyncClient(timeout=CLASSIFIER_TIMEOUT_SECONDS) as client:
             response = await client.post(
@@ -41,19 +60,8 @@ async def predict_urgency(text: str) -> Dict[str, Any]:
                 json={"text": text}
             )
             response.raise_for_status()
-            result = response.json()
             # Map model label to int code
-            label_map = {
-                "NORMAL": 0,
-                "URGENT": 1,
-                "HIGHLY URGENT": 2
-            }
-            urgency_code = label_map.get(result.get("label", "").upper(), 0)
-            return {
-                "urgency": urgency_code,
-                "confidence": result.get("confidence", 0.0),
-                "label": result.get("label", "")
-            }
+            return _urgency_result(response.json())
     except Exception as e:
         print(f"Urgency classifier error: {str(e)}")
         # Fallback to default urgency if classifier fails
@@ -65,6 +73,8 @@ async def predict_department(text: str) -> Dict[str, Any]:
     Call external department classifier API.
     Returns: {"department": str, "confidence": float}
     """
+    if CLASSIFIER_API_BASE:
+        return (await predict_all(text))["department"]
     try:
         async with httpx.AsyncClient(timeout=CLASSIFIER_TIMEOUT_SECONDS) as client:
             response = await client.post(
@@ -72,20 +82,78 @@ async def predict_department(text: str) -> Dict[str, Any]:
                 json={"text": text, "return_probabilities": False}
             )
             response.raise_for_status()
-            result = response.json()
-
             # Use the label directly (official department name)
-            department_label = result.get("label", "").strip()
-
-            return {
-                "department": department_label or "Unclassified",
-                "confidence": result.get("confidence", 0.0)
-            }
+            return _department_result(response.json())
     except Exception as e:
         print(f"Department classifier error: {str(e)}")
         return {"department": "Unclassified", "confidence": 0.0}
 
 
+async def predict_all(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Urgency and department of one text.
+    With CLASSIFIER_API_BASE set this is a single call to the multitask classifier's
+    /predict_all; otherwise both single-task APIs are called concurrently.
+    Returns: {"urgency": predict_urgency(...) result, "department": predict_department(...) result}
+    """
+    if not CLASSIFIER_API_BASE:
+        urgency, department = await asyncio.gather(predict_urgency(text), predict_department(text))
+        return {"urgency": urgency, "department": department}
+    try:
+        async with httpx.AsyncClient(timeout=CLASSIFIER_TIMEOUT_SECONDS) as client:
+            response = await client.post(f"{CLASSIFIER_API_BASE}/predict_all", json={"text": text})
+            response.raise_for_status()
+            result = response.json()
+        return {
+            "urgency": _urgency_result(result.get("urgency", {})),
+            "department": _department_result(result.get("department", {})),
+        }
+    except Exception as e:
+        print(f"Multitask classifier error: {str(e)}")
+        return {"urgency": {"urgency": 0, "confidence": 0.0}, "department": {"department": "Unclassified", "confidence": 0.0}}
+
+
+async def predict_batch(texts: list[str]) -> tuple[list[Optional[str]], list[Optional[str]]]:
+    """
+    Classify many texts with one request per classifier (both APIs accept a list of texts),
+    or a single /predict_all request when CLASSIFIER_API_BASE is set.
+    Returns (urgency labels, department labels); entries are None when a classifier fails.
+    """
+    async def _post(client: httpx.AsyncClient, url: str, payload: Dict[str, Any]) -> list:
+        try:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+            result = response.json()
+            return result if isinstance(result, list) else [result]
+        except Exception as e:
+            print(f"Batch classifier error ({url}): {str(e)}")
+            return []
+
+    async with httpx.AsyncClient(timeout=CLASSIFIER_TIMEOUT_SECONDS) as client:
+        if CLASSIFIER_API_BASE:
+            results = await _post(client, f"{CLASSIFIER_API_BASE}/predict_all", {"text": texts})
+            urgency_results = [r.get("urgency", {}) for r in results]
+            department_results = [r.get("department", {}) for r in results]
+        else:
+            urgency_results, department_results = await asyncio.gather(
+                _post(client, f"{URGENCY_API_BASE}/predict_urgency", {"text": texts}),
+                _post(client, f"{DEPARTMENT_API_BASE}/predict", {"text": texts, "return_probabilities": False}),
+            )
+
+    def _labels(results: list, mapping: Dict[int, str], normalize) -> list[Optional[str]]:
+        if len(results) != len(texts):
+            return [None] * len(texts)
+        labels = []
+        for result in results:
+            label = normalize(result.get("label", ""))
+            labels.append(label if label in mapping.values() else None)
+        return labels
+
+    return (
+        _labels(urgency_results, URGENCY_LABEL_MAP, lambda l: l.strip().upper()),
+        _labels(department_results, DEPARTMENT_LABEL_MAP, lambda l: l.strip()),
+    )
+
 
 # 🔹 POST: Create new complaint
 @router.post("/", response_model=schemas.ComplaintRead)
@@ -126,22 +194,33 @@ async def create_complaint(
     if complaint_data.get("date_submitted") is None:
         complaint_data["date_submitted"] = datetime.utcnow()
 
+    # Near-duplicate of a recent complaint in the same ward? Reuse its labels instead of calling the models
+    signature = minhash_signature(complaint.message)
+    duplicate = await run_in_threadpool(duplicate_detector.find, db, signature, complaint_data.get("ward_id"), complaint_data["date_submitted"])
+
+    # Return the connection to the pool while the classifiers run; the session reconnects for the insert
+    db.close()
     
     # ✅ ML classification
     try:
-        # Use urgency from frontend if provided, else run classifier
-        if complaint.urgency:
-            complaint_data["urgency"] = complaint.urgency
-        else:
+        # Use urgency/department from frontend (or a near-duplicate) if provided, else run classifier
+        urgency = complaint.urgency or (duplicate.urgency if duplicate is not None else None)
+        department = complaint.department or (duplicate.department if duplicate is not None else None)
+
+        # Both missing: one call classifies both
+        if not urgency and not department:
+            results = await predict_all(complaint.message)
+            urgency = resolve_label(results["urgency"]["urgency"], URGENCY_LABEL_MAP)
+            department = resolve_label(results["department"]["department"], DEPARTMENT_LABEL_MAP)
+        if not urgency:
             urgency_result = await predict_urgency(complaint.message)
-            complaint_data["urgency"] = resolve_label(urgency_result["urgency"], URGENCY_LABEL_MAP)
-
-        # Use department from frontend if provided, else run classifier
-        if complaint.department:
-            complaint_data["department"] = complaint.department
-        else:
+            urgency = resolve_label(urgency_result["urgency"], URGENCY_LABEL_MAP)
+        if not department:
             department_result = await predict_department(complaint.message)
-            complaint_data["department"] = resolve_label(department_result["department"], DEPARTMENT_LABEL_MAP)
+            department = resolve_label(department_result["department"], DEPARTMENT_LABEL_MAP)
+
+        complaint_data["urgency"] = urgency
+        complaint_data["department"] = department
 
     except Exception as e:
         print(f"ML classification failed, using defaults: {str(e)}")
@@ -153,6 +232,8 @@ async def create_complaint(
     db_complaint = models.Complaint(**complaint_data)
     try:
         db.add(db_complaint)
+        db.flush()
+        duplicate_detector.record(db, db_complaint.id, db_complaint.ward_id, db_complaint.date_submitted, signature, duplicate)
         db.commit()
         db.refresh(db_complaint)
         return db_complaint
@@ -165,6 +246,26 @@ async def create_complaint(
         raise HTTPException(status_code=500, detail=f"Server error: {str(exc)}") from exc
 
 
+# 🔹 POST: Bulk import complaints from an NDJSON or CSV upload
+@router.post("/bulk", response_model=dict)
+async def bulk_create_complaints(
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON (one JSON object per line)"),
+    classify: bool = Query(True, description="Classify rows that have no urgency/department"),
+):
+    """
+    Columns/keys: message (required), ward_id or district + municipality + ward,
+    citizen_id, urgency, department, date_submitted (ISO 8601).
+    Valid rows are inserted; invalid ones are returned as per-row errors.
+    """
+    try:
+        fmt = complaint_ingest.detect_format(file.filename, file.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await complaint_ingest.ingest_upload(
+        file.file, fmt, SessionLocal, classify=predict_batch if classify else None
+    )
+
+
 # @router.post("/", response_model=dict)
 # def create_complaint(complaint: schemas.ComplaintCreate, db: Session = Depends(get_db)):
 #     db_complaint = models.Complaint(**complaint.model_dump())
@@ -252,7 +353,7 @@ def report_misclassification(
 def get_misclassified_urgency_complaints(
     reviewed: bool | None = Query(False, description="Filter by review status (True/False)"),
     reported_by_user_id: int | None = Query(None, description="Filter by reporter user ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(models.MisclassifiedComplaint).filter(
         models.MisclassifiedComplaint.correct_urgency != models.MisclassifiedComplaint.model_predicted_urgency
@@ -264,8 +365,7 @@ def get_misclassified_urgency_complaints(
     if reported_by_user_id is not None:
         query = query.filter(models.MisclassifiedComplaint.reported_by_user_id == reported_by_user_id)
 
-    results = query.order_by(models.MisclassifiedComplaint.created_at.desc()).all()
-    return results
+    return model_list_response(schemas.MisclassifiedComplaintRead, query.order_by(models.MisclassifiedComplaint.created_at.desc()).all())
 
 
 # 🔹 GET: Fetch only misclassified department complaints
@@ -273,7 +373,7 @@ def get_misclassified_urgency_complaints(
 def get_misclassified_department_complaints(
     reviewed: bool | None = Query(False, description="Filter by review status (True/False)"),
     reported_by_user_id: int | None = Query(None, description="Filter by reporter user ID"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     query = db.query(models.MisclassifiedComplaint).filter(
         models.MisclassifiedComplaint.correct_department != models.MisclassifiedComplaint.model_predicted_department
@@ -285,8 +385,7 @@ def get_misclassified_department_complaints(
     if reported_by_user_id is not None:
         query = query.filter(models.MisclassifiedComplaint.reported_by_user_id == reported_by_user_id)
 
-    results = query.order_by(models.MisclassifiedComplaint.created_at.desc()).all()
-    return results
+    return model_list_response(schemas.MisclassifiedComplaintRead, query.order_by(models.MisclassifiedComplaint.created_at.desc()).all())
 
 
 # 🔹 PATCH: Update complaint (partial update)
@@ -301,6 +400,7 @@ def update_complaint(complaint_id: int, updated: schemas.ComplaintUpdate, db: Se
     if "current_status" in update_data and isinstance(update_data["current_status"], int):
         from app.schemas.complaint import STATUS_LABEL_MAP
         update_data["current_status"] = STATUS_LABEL_MAP.get(update_data["current_status"], "PENDING")
+    sla_service.record_status_change(db, db_complaint, update_data.get("current_status"))
     for key, value in update_data.items():
         setattr(db_complaint, key, value)
 
@@ -322,6 +422,7 @@ def update_complaint_details(
     updated.current_status = resolve_label(
         updated.current_status, STATUS_LABEL_MAP
     ) if updated.current_status is not None else db_complaint.current_status
+    sla_service.record_status_change(db, db_complaint, updated.current_status)
     update_data = updated.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_complaint, key, value)
@@ -339,7 +440,7 @@ def get_complaints(
     district_id: int | None = Query(None),
     municipality_id: int | None = Query(None),
     ward_id: int | None = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     # Eagerly load ward with nested municipality and district
     query = db.query(models.Complaint).options(
@@ -364,9 +465,49 @@ def get_complaints(
     if ward_id is not None:
         query = query.filter(models.Complaint.ward_id == ward_id)
 
-    complaints = query.all()
+    return model_list_response(schemas.ComplaintRead, query.all())
 
-    return complaints
+# 🔹 GET: Near-duplicate clusters (largest first)
+@router.get("/duplicates", response_model=dict)
+def get_duplicate_clusters(
+    ward_id: int | None = Query(None),
+    days: int = Query(7, ge=1, le=90, description="Clusters with a complaint submitted in the last N days"),
+    min_size: int = Query(2, ge=2),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+):
+    clusters = duplicate_detector.clusters(db, ward_id=ward_id, days=days, min_size=min_size, limit=limit)
+    return {"clusters": clusters, "index": duplicate_detector.stats()}
+
+# 🔹 GET: Full-text search over complaint messages (keyset paginated)
+@router.get("/search", response_model=schemas.ComplaintSearchPage)
+def search_complaints(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text (websearch syntax: quotes, OR, -word)"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    sort: str = Query("relevance", description="relevance or recent"),
+    fuzzy: bool = Query(False, description="Trigram matching for misspellings and partial words"),
+    department: str | None = Query(None),
+    urgency: str | None = Query(None),
+    status: str | None = Query(None),
+    ward_id: int | None = Query(None),
+    date_from: datetime | None = Query(None),
+    date_to: datetime | None = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    try:
+        page = complaint_search.search_complaints(
+            db, q, limit=limit, cursor=cursor, sort=sort, fuzzy=fuzzy,
+            department=department, urgency=urgency, status=status, ward_id=ward_id,
+            date_from=date_from, date_to=date_to,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    page["items"] = [
+        schemas.ComplaintSearchHit.model_validate(complaint).model_copy(update={"rank": rank})
+        for complaint, rank in page["items"]
+    ]
+    return page
 
 # GET: Fetch a single complaint by ID
 @router.get("/{complaint_id}", response_model=schemas.ComplaintRead)
@@ -379,6 +520,14 @@ def get_complaint(complaint_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Complaint not found")
     return complaint
 
+# GET: Duplicate cluster a complaint belongs to
+@router.get("/{complaint_id}/duplicates", response_model=dict)
+def get_complaint_duplicates(complaint_id: int, db: Session = Depends(get_db)):
+    cluster = duplicate_detector.cluster_of(db, complaint_id)
+    if cluster is None:
+        raise HTTPException(status_code=404, detail="No duplicate information for this complaint")
+    return cluster
+
 # 🔹 DELETE: Delete complaint by ID
 @router.delete("/{complaint_id}", response_model=schemas.ComplaintRead)
 @router.delete("/{complaint_id}")
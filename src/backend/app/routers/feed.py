@@ -0,0 +1,100 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.models.admin import Admin
+from app.routers.admin import get_current_admin
+from app.services import change_feed
+
+router = APIRouter(prefix="/api/feed", tags=["Change Feed"])
+
+
+def sse_message(event_id: str, event_type: str, data: Dict[str, Any]) -> str:
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def admin_scope(admin: Admin) -> Dict[str, Any]:
+    """The part of the data an admin may watch, by role (same rules as the dashboard's filters)."""
+    if admin.role == "department_admin" and admin.department:
+        scope = {"department": admin.department}
+        if admin.municipality_id:
+            scope["municipality_id"] = admin.municipality_id
+        return scope
+    if admin.role == "municipal_admin" and admin.municipality_id:
+        return {"municipality_id": admin.municipality_id}
+    if admin.role == "super_admin":
+        return {"district_id": admin.district_id} if admin.district_id else {}
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No complaint scope assigned to this admin")
+
+
+def clamp_scope(admin: Admin, requested: Dict[str, Any]) -> change_feed.Scope:
+    """Narrow the requested scope to the admin's; 403 when it asks for another area or department."""
+    allowed = admin_scope(admin)
+    for field, value in requested.items():
+        if value is not None and field in allowed and value != allowed[field]:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"{field} is outside your scope")
+    # Ward, municipality and district filters combine with AND, so a ward elsewhere simply matches nothing
+    return change_feed.Scope(**{**{k: v for k, v in requested.items() if v is not None}, **allowed})
+
+
+@router.get("/complaints")
+async def complaint_feed(
+    request: Request,
+    ward_id: Optional[int] = Query(None),
+    municipality_id: Optional[int] = Query(None),
+    district_id: Optional[int] = Query(None),
+    department: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db),
+):
+    """
+    Server-sent events with complaint changes in the given scope, for admins only.
+
+    The scope is clamped to the admin's department / municipality / district. The token
+    goes in the Authorization header, so browsers need a fetch-based SSE client rather
+    than EventSource. The stream opens with a "hello" event carrying the current
+    last_event_id. Open the stream first, then fetch the analytics summaries, then apply
+    "change" events on top. On "resync", re-fetch the summaries.
+    """
+    scope = clamp_scope(admin, {"ward_id": ward_id, "municipality_id": municipality_id, "district_id": district_id, "department": department})
+    # The stream can stay open for hours; do not hold the auth lookup's pooled connection for it
+    db.close()
+    sub, backlog = change_feed.broker.subscribe(scope, last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield sse_message("", "hello", {"last_event_id": change_feed.broker.last_event_id})
+            for item in backlog:
+                yield sse_message(*item)
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=change_feed.CHANGE_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield sse_message(*item)
+        finally:
+            change_feed.broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/stats")
+def feed_stats(admin: Admin = Depends(get_current_admin)):
+    return change_feed.broker.stats()
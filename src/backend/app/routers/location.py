@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pathlib import Path
+import hashlib
 import json
 
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.services import data_versions
+from app.utils.http_cache import LOCATION_CACHE_CONTROL, check_etag, make_etag
 from app.models.location import District, Municipality, Ward
 from app.schemas.location import (
     DistrictCreate, DistrictRead,
@@ -16,6 +19,11 @@ from app.schemas.location import (
 router = APIRouter(prefix="/api/location", tags=["Locations"])
 
 
+def location_cache(request: Request, response: Response, db: Session = Depends(get_read_db)) -> None:
+    """Conditional GET for the location tables, keyed on their data_versions counter."""
+    check_etag(request, response, make_etag(request, data_versions.get_version(db, "locations")), LOCATION_CACHE_CONTROL)
+
+
 # -------------------- District --------------------
 @router.post("/districts/", response_model=DistrictRead)
 def create_district(district_in: DistrictCreate, db: Session = Depends(get_db)):
@@ -26,19 +34,19 @@ def create_district(district_in: DistrictCreate, db: Session = Depends(get_db)):
     return district
 
 
-@router.get("/districts/", response_model=List[DistrictRead])
+@router.get("/districts/", response_model=List[DistrictRead], dependencies=[Depends(location_cache)])
 def read_districts(
     skip: int = 0,
     limit: int = 100,
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(District).filter(District.is_active == is_active)
     return query.offset(skip).limit(limit).all()
 
 
-@router.get("/districts/{district_id}", response_model=DistrictRead)
-def read_district(district_id: int, db: Session = Depends(get_db)):
+@router.get("/districts/{district_id}", response_model=DistrictRead, dependencies=[Depends(location_cache)])
+def read_district(district_id: int, db: Session = Depends(get_read_db)):
     district = db.query(District).filter(District.id == district_id).first()
     if not district:
         raise HTTPException(status_code=404, detail="District not found")
@@ -77,13 +85,13 @@ def create_municipality(municipality_in: MunicipalityCreate, db: Session = Depen
     return municipality
 
 
-@router.get("/municipalities/", response_model=List[MunicipalityRead])
+@router.get("/municipalities/", response_model=List[MunicipalityRead], dependencies=[Depends(location_cache)])
 def read_municipalities(
     district_id: int | None = Query(None),
     skip: int = 0,
     limit: int = 100,
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     query = db.query(Municipality).filter(Municipality.is_active == is_active)
     if district_id:
@@ -91,8 +99,8 @@ def read_municipalities(
     return query.offset(skip).limit(limit).all()
 
 
-@router.get("/municipalities/{municipality_id}", response_model=MunicipalityRead)
-def read_municipality(municipality_id: int, db: Session = Depends(get_db)):
+@router.get("/municipalities/{municipality_id}", response_model=MunicipalityRead, dependencies=[Depends(location_cache)])
+def read_municipality(municipality_id: int, db: Session = Depends(get_read_db)):
     municipality = db.query(Municipality).filter(Municipality.id == municipality_id).first()
     if not municipality:
         raise HTTPException(status_code=404, detail="Municipality not found")
@@ -132,13 +140,13 @@ def create_ward(ward_in: WardCreate, db: Session = Depends(get_db)):
     return ward
 
 
-@router.get("/wards/", response_model=List[WardRead])
+@router.get("/wards/", response_model=List[WardRead], dependencies=[Depends(location_cache)])
 def read_wards(
     municipality_id: int | None = Query(None),
     skip: int = 0,
     limit: int = 100,
     is_active: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     from sqlalchemy.orm import joinedload
     query = db.query(Ward).options(
@@ -149,8 +157,8 @@ def read_wards(
     return query.offset(skip).limit(limit).all()
 
 
-@router.get("/wards/{ward_id}", response_model=WardRead)
-def read_ward(ward_id: int, db: Session = Depends(get_db)):
+@router.get("/wards/{ward_id}", response_model=WardRead, dependencies=[Depends(location_cache)])
+def read_ward(ward_id: int, db: Session = Depends(get_read_db)):
     ward = db.query(Ward).filter(Ward.id == ward_id).first()
     if not ward:
         raise HTTPException(status_code=404, detail="Ward not found")
@@ -209,10 +217,17 @@ def delete_ward(ward_id: int, db: Session = Depends(get_db)):
 
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent / "data"
-with open(BASE_DIR / "location_id.json", "r", encoding="utf-8") as f:
-    location_data = json.load(f)
+with open(BASE_DIR / "location_id.json", "rb") as f:
+    location_bytes = f.read()
+location_data = json.loads(location_bytes)
+# The file only changes with a deploy, so its hash is the version
+LOCATION_DATA_VERSION = hashlib.sha1(location_bytes).hexdigest()
+
+def location_ids_cache(request: Request, response: Response) -> None:
+    check_etag(request, response, make_etag(request, LOCATION_DATA_VERSION), LOCATION_CACHE_CONTROL)
+
 
-@router.get("/location-ids")
+@router.get("/location-ids", dependencies=[Depends(location_ids_cache)])
 def get_location_ids(
     district: Optional[str] = Query(None, description="District name"),
     municipality: Optional[str] = Query(None, description="Municipality name"),
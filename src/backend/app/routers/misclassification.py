@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from app.core.database import get_db
 from app.models.complaint import Complaint, MisclassifiedComplaint
 from app.models.admin import Admin
+from app.utils.fast_json import model_list_response
 
 router = APIRouter(prefix="/api/misclassifications", tags=["misclassifications"])
 
@@ -105,8 +106,7 @@ async def list_misclassifications(
     if department:
         query = query.join(Complaint).filter(Complaint.department == department)
     
-    misclassifications = query.offset(skip).limit(limit).all()
-    return misclassifications
+    return model_list_response(MisclassificationResponse, query.offset(skip).limit(limit).all())
 
 
 @router.get("/{misclassification_id}", response_model=MisclassificationResponse)
@@ -5,16 +5,13 @@ from app.models.user import User, UserRole
 from app.schemas.user import DEPARTMENT_LABEL_MAP, UserCreate, UserRead, UserUpdate
 from app.utils.label_converter import resolve_label
 from typing import List, Optional
-from passlib.context import CryptContext
+from app.services.password_service import hash_password_blocking
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
-# Password hashing setup
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
-
-# Helper function
+# Helper function (sync endpoints run in a worker thread; hashing itself runs on the bounded pool)
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return hash_password_blocking(password)
 
 
 # Register a new user
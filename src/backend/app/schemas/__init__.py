@@ -1 +1 @@
-from .complaint import ComplaintBase, ComplaintCreate, ComplaintRead, ComplaintUpdate, ComplaintDetailUpdate, MisclassifiedComplaintCreate, MisclassifiedComplaintRead
+from .complaint import ComplaintBase, ComplaintCreate, ComplaintRead, ComplaintUpdate, ComplaintDetailUpdate, ComplaintSearchHit, ComplaintSearchPage, MisclassifiedComplaintCreate, MisclassifiedComplaintRead
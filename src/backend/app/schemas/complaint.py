@@ -71,6 +71,17 @@ class ComplaintRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ComplaintSearchHit(ComplaintRead):
+    rank: float = 0.0
+
+
+class ComplaintSearchPage(BaseModel):
+    items: list[ComplaintSearchHit]
+    next_cursor: Optional[str] = None
+    backend: str
+    took_ms: float
+
+
 # -------------------- Misclassified Complaints --------------------
 
 
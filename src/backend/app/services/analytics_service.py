@@ -23,6 +23,25 @@ def _save_cache(name: str, payload: Dict[str, Any]) -> str:
     return path
 
 
+_cache_stamps: Dict[str, Tuple[int, str]] = {}
+
+
+def cache_stamp(name: str) -> Optional[str]:
+    """`last_updated` of a cache file, re-read only when the file changes; None if there is no cache."""
+    path = os.path.join(DATA_DIR, f"analytics_{name}.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    known = _cache_stamps.get(name)
+    if known is None or known[0] != mtime:
+        cached = _load_cache(name) or {}
+        # Files without last_updated still get a stable stamp from their mtime
+        known = (mtime, cached.get("last_updated") or str(mtime))
+        _cache_stamps[name] = known
+    return known[1]
+
+
 def _load_cache(name: str) -> Optional[Dict[str, Any]]:
     path = os.path.join(DATA_DIR, f"analytics_{name}.json")
     if not os.path.exists(path):
@@ -271,6 +290,18 @@ def _period_labels_for_months(months: int) -> List[str]:
     return labels
 
 
+def _lookback_start(trunc: str, lookback_value: int) -> datetime:
+    """Start of the oldest period returned by the matching _period_labels_for_* function (UTC)."""
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if trunc == "day":
+        return today - timedelta(days=lookback_value - 1)
+    if trunc == "week":
+        oldest = today - timedelta(weeks=lookback_value - 1)
+        return oldest - timedelta(days=oldest.weekday())
+    index = today.year * 12 + (today.month - 1) - (lookback_value - 1)
+    return today.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
 def _grouped_trend(
     db: Session,
     trunc: str,
@@ -292,7 +323,8 @@ def _grouped_trend(
     # We'll select truncated_date, urgency, department, count
     truncated = func.date_trunc(trunc, models.Complaint.date_submitted).label("period_start")
     query = db.query(truncated, models.Complaint.urgency, models.Complaint.department, func.count(models.Complaint.id))
-    query = query.filter(models.Complaint.date_submitted.isnot(None))
+    # Lower bound on the partition key lets Postgres prune monthly partitions outside the window
+    query = query.filter(models.Complaint.date_submitted >= _lookback_start(trunc, lookback_value))
     if ward_id:
         query = query.filter(models.Complaint.ward_id == ward_id)
     if department:
@@ -0,0 +1,182 @@
+# app/services/auth_token_cache.py
+"""
+Short-lived cache of verified JWTs for the chatbot auth dependency.
+
+`get_current_user` used to verify the token signature and load the `User` row on
+every authenticated request. A hit here maps the raw bearer token straight to a
+detached snapshot of the user, skipping both steps. Entries live for at most
+AUTH_TOKEN_CACHE_TTL_SECONDS and never beyond the token's own `exp` claim.
+
+Any flush that updates or deletes a `User` drops that user's cached tokens in this
+process (again after commit, so a concurrent reader cannot re-cache the old row).
+Other workers catch up within the TTL.
+
+Configuration (environment):
+  AUTH_TOKEN_CACHE_TTL_SECONDS   lifetime of a cached token (default 30, 0 disables)
+  AUTH_TOKEN_CACHE_MAX_ENTRIES   LRU cap (default 10000)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "30"))
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+
+# Never copied into a snapshot
+_EXCLUDED_COLUMNS = {"password_hash"}
+
+
+def user_snapshot(user: User) -> Dict[str, Any]:
+    """Column values of a loaded user, minus the password hash."""
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(User).column_attrs
+        if attr.key not in _EXCLUDED_COLUMNS
+    }
+
+
+class AuthTokenCache:
+    """Token -> user snapshot with TTL, LRU eviction and per-user invalidation."""
+
+    def __init__(self, ttl_seconds: float = AUTH_TOKEN_CACHE_TTL_SECONDS, max_entries: int = AUTH_TOKEN_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # token -> (expires_at, cached_at, user_id, snapshot)
+        self._entries: "OrderedDict[str, Tuple[float, float, int, Dict[str, Any]]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+        self._invalidated = 0
+        self._age_total = 0.0
+        self._age_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, token: str) -> Optional[User]:
+        """Detached `User` for a cached token, or None on a miss."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires_at, cached_at, _, snapshot = entry
+            if expires_at <= now:
+                self._drop(token)
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(token)
+            age = now - cached_at
+            self._hits += 1
+            self._age_total += age
+            self._age_max = max(self._age_max, age)
+        return User(**snapshot)
+
+    def set(self, token: str, user: User, token_exp: Optional[float] = None) -> None:
+        """Cache a verified token. `token_exp` is the JWT `exp` claim (unix seconds)."""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, float(token_exp) - time.time())
+            if ttl <= 0:
+                return
+        snapshot = user_snapshot(user)
+        user_id = snapshot["id"]
+        now = time.monotonic()
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (now + ttl, now, user_id, snapshot)
+            self._tokens_by_user.setdefault(user_id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self._evicted += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget every cached token of a user (profile update, password change, deletion)."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+                self._invalidated += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "ttl_seconds": self.ttl_seconds,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "invalidated": self._invalidated,
+                # Age of the snapshot when served: how stale a hit can be relative to the DB row
+                "avg_hit_age_seconds": round(self._age_total / self._hits, 3) if self._hits else 0.0,
+                "max_hit_age_seconds": round(self._age_max, 3),
+            }
+
+    def _drop(self, token: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[2])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[2]]
+
+
+auth_token_cache = AuthTokenCache()
+
+
+# --- Invalidation hooks -------------------------------------------------------
+
+_PENDING_KEY = "auth_token_cache_invalidate"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    user_id = target.id
+    if user_id is None:
+        return
+    auth_token_cache.invalidate_user(user_id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        auth_token_cache.invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,420 @@
+# app/services/change_feed.py
+"""
+Complaint change feed for live dashboards.
+
+Writers describe every complaint insert/update/delete as a small event (no message
+text, no citizen): id, ward, department, urgency, status, and under "prev" the old
+values of whatever of those changed. That is enough for a dashboard to move one
+complaint between its counters instead of re-fetching the summaries. Bulk ingest
+publishes one "bulk_insert" event per (ward, department, urgency, status) group with
+a "count".
+
+Transport:
+  Postgres   events are sent with pg_notify() on the writing transaction, so they are
+             delivered on commit and dropped on rollback. Each worker process runs one
+             LISTEN thread (started with the first subscriber) that hands them to its
+             local broker; every worker therefore sees every worker's writes. The
+             thread uses psycopg2's poll()/notifies, so this needs the psycopg2 driver
+             (postgresql:// or postgresql+psycopg2://).
+  otherwise  events wait in session.info and go straight to the in-process broker
+             after commit (SQLite, other Postgres drivers; single-process only).
+
+The broker fans events out to subscribers (the SSE endpoint) filtered by scope:
+ward_id, municipality_id, district_id and/or department. An update matches when either
+its new or its previous values fall in scope, so a complaint moving out of a scope is
+seen as a delta there too. Slow subscribers whose queue overflows, and all
+subscribers after a lost LISTEN connection, get a "resync" event and should re-fetch.
+
+Event ids are "<boot>-<seq>". The broker keeps the last CHANGE_FEED_REPLAY_SIZE
+events so a reconnecting client (Last-Event-ID) receives what it missed; an unknown
+id (other worker, restart, too old) gets "resync" instead.
+
+Configuration (environment):
+  CHANGE_FEED_ENABLED            publish events at all (default true)
+  CHANGE_FEED_CHANNEL            Postgres NOTIFY channel (default complaint_changes)
+  CHANGE_FEED_QUEUE_SIZE         events buffered per subscriber before resync (default 1000)
+  CHANGE_FEED_REPLAY_SIZE        recent events kept for Last-Event-ID replay (default 1000)
+  CHANGE_FEED_HEARTBEAT_SECONDS  SSE keep-alive comment interval (default 15)
+"""
+import asyncio
+import itertools
+import json
+import os
+import select
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import SessionLocal, engine
+
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() == "true"
+CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "complaint_changes")
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "1000"))
+CHANGE_FEED_REPLAY_SIZE = int(os.getenv("CHANGE_FEED_REPLAY_SIZE", "1000"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+
+# Fields carried by every event; the first two define scope together with the ward's parents
+EVENT_FIELDS = ["ward_id", "department", "urgency", "current_status"]
+# NOTIFY payloads must stay under 8000 bytes
+NOTIFY_PAYLOAD_LIMIT = 7500
+# Ward -> parents map is reloaded on a miss, but not more often than this
+WARD_RELOAD_MIN_SECONDS = 30.0
+# DBAPI drivers PgListener can LISTEN with
+NOTIFY_DRIVERS = ("psycopg2",)
+
+
+def uses_notify() -> bool:
+    """Whether events cross processes through LISTEN/NOTIFY rather than staying in-process."""
+    return engine.dialect.name == "postgresql" and engine.dialect.driver in NOTIFY_DRIVERS
+
+
+if engine.dialect.name == "postgresql" and not uses_notify():
+    print(f"[Change Feed] Driver {engine.dialect.driver} has no LISTEN support here; "
+          "events reach this process's subscribers only")
+
+
+def _jsonable(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def complaint_event(op: str, complaint: models.Complaint) -> Dict[str, Any]:
+    """Event for an ORM complaint in the current flush, with the old values of changed fields.
+
+    The event fields are mapped with active_history (app/models/complaint.py), so the old
+    value is in the attribute history even when the row was expired before the assignment.
+    """
+    ev = {"op": op, "id": complaint.id, "count": 1}
+    ev.update({field: getattr(complaint, field) for field in EVENT_FIELDS})
+    ev["updated_at"] = _jsonable(getattr(complaint, "updated_at", None))
+    if op == "update":
+        state = inspect(complaint)
+        prev = {}
+        for field in EVENT_FIELDS:
+            history = state.attrs[field].history
+            if history.has_changes() and history.deleted:
+                prev[field] = history.deleted[0]
+        ev["prev"] = prev
+    return ev
+
+
+def bulk_events(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One "bulk_insert" event per (ward, department, urgency, status) group of inserted rows."""
+    groups: Dict[Tuple, int] = {}
+    for row in rows:
+        key = tuple(row.get(field) for field in EVENT_FIELDS)
+        groups[key] = groups.get(key, 0) + 1
+    return [
+        {"op": "bulk_insert", "id": None, "count": count, **dict(zip(EVENT_FIELDS, key))}
+        for key, count in groups.items()
+    ]
+
+
+def _payloads(events: List[Dict[str, Any]]) -> Iterable[str]:
+    """JSON arrays of events, each under the NOTIFY size limit."""
+    chunk, size = [], 2
+    for ev in events:
+        encoded = json.dumps(ev, separators=(",", ":"), default=str)
+        if chunk and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            yield "[" + ",".join(chunk) + "]"
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield "[" + ",".join(chunk) + "]"
+
+
+class Scope:
+    """Subscriber filter; None fields match everything."""
+
+    def __init__(self, ward_id: Optional[int] = None, municipality_id: Optional[int] = None,
+                 district_id: Optional[int] = None, department: Optional[str] = None):
+        self.ward_id = ward_id
+        self.municipality_id = municipality_id
+        self.district_id = district_id
+        self.department = department
+
+    @property
+    def needs_parents(self) -> bool:
+        return self.municipality_id is not None or self.district_id is not None
+
+    def _matches(self, ward_id, department, parents: "WardParents") -> bool:
+        if self.department is not None and department != self.department:
+            return False
+        if self.ward_id is not None and ward_id != self.ward_id:
+            return False
+        if self.needs_parents:
+            municipality_id, district_id = parents.get(ward_id)
+            if self.municipality_id is not None and municipality_id != self.municipality_id:
+                return False
+            if self.district_id is not None and district_id != self.district_id:
+                return False
+        return True
+
+    def matches(self, ev: Dict[str, Any], parents: "WardParents") -> bool:
+        if self._matches(ev.get("ward_id"), ev.get("department"), parents):
+            return True
+        prev = ev.get("prev") or {}
+        if "ward_id" in prev or "department" in prev:
+            return self._matches(prev.get("ward_id", ev.get("ward_id")), prev.get("department", ev.get("department")), parents)
+        return False
+
+
+class WardParents:
+    """ward_id -> (municipality_id, district_id), loaded from the database and reloaded on a miss."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._map: Dict[int, Tuple[int, int]] = {}
+        self._loaded_at: Optional[float] = None
+
+    def _reload(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Ward.id, models.Municipality.id, models.Municipality.district_id) \
+                .join(models.Municipality, models.Ward.municipality_id == models.Municipality.id).all()
+            self._map = {ward_id: (municipality_id, district_id) for ward_id, municipality_id, district_id in rows}
+        finally:
+            db.close()
+        self._loaded_at = time.monotonic()
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > WARD_RELOAD_MIN_SECONDS
+
+    def get(self, ward_id: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+        if ward_id is None:
+            return None, None
+        parents = self._map.get(ward_id)
+        if parents is None and self._stale():
+            with self._lock:
+                if ward_id not in self._map and self._stale():
+                    try:
+                        self._reload()
+                    except Exception as e:
+                        print(f"[Change Feed] Ward map reload failed: {e}")
+                        self._loaded_at = time.monotonic()
+            parents = self._map.get(ward_id)
+        return parents or (None, None)
+
+
+class Subscription:
+    def __init__(self, scope: Scope, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.scope = scope
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def _put(self, item: Tuple[str, str, Dict[str, Any]]) -> None:
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("", "resync", {"reason": "overflow"}))
+
+    def deliver(self, item: Tuple[str, str, Dict[str, Any]]) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # loop closed; the endpoint unsubscribes on its way out
+
+
+class ChangeBroker:
+    """In-process fan-out of change events to scoped subscribers."""
+
+    def __init__(self, queue_size: int = CHANGE_FEED_QUEUE_SIZE, replay_size: int = CHANGE_FEED_REPLAY_SIZE):
+        self.queue_size = queue_size
+        self.boot = uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        self._recent: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=replay_size)
+        self.parents = WardParents()
+        self.published = 0
+
+    @property
+    def last_event_id(self) -> str:
+        with self._lock:
+            seq = self._recent[-1][0] if self._recent else 0
+        return f"{self.boot}-{seq}"
+
+    def subscribe(self, scope: Scope, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[Tuple[str, str, Dict[str, Any]]]]:
+        """Register a subscriber on the running loop; returns it with the events to replay first."""
+        sub = Subscription(scope, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(sub)
+            recent = list(self._recent)
+        backlog = []
+        if last_event_id:
+            boot, _, seq = last_event_id.partition("-")
+            oldest = recent[0][0] if recent else None
+            if boot != self.boot or not seq.isdigit() or (oldest is not None and int(seq) < oldest - 1):
+                backlog.append(("", "resync", {"reason": "unknown last event id"}))
+            else:
+                backlog.extend(
+                    (f"{self.boot}-{n}", "change", ev) for n, ev in recent
+                    if n > int(seq) and scope.matches(ev, self.parents)
+                )
+        pg_listener.ensure_started()
+        return sub, backlog
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, events: Iterable[Dict[str, Any]]) -> None:
+        """Hand events to matching subscribers; safe to call from any thread."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            numbered = []
+            for ev in events:
+                n = next(self._seq)
+                self._recent.append((n, ev))
+                numbered.append((n, ev))
+            self.published += len(numbered)
+        for sub in subscribers:
+            for n, ev in numbered:
+                if sub.scope.matches(ev, self.parents):
+                    sub.deliver((f"{self.boot}-{n}", "change", ev))
+
+    def resync_all(self, reason: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.deliver(("", "resync", {"reason": reason}))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": engine.dialect.name,
+            "transport": "notify" if uses_notify() else "in-process",
+            "subscribers": self.subscriber_count,
+            "published": self.published,
+            "last_event_id": self.last_event_id,
+            "listener_running": pg_listener.running,
+        }
+
+
+class PgListener:
+    """One LISTEN connection per process feeding NOTIFY payloads into the broker (Postgres + psycopg2 only)."""
+
+    def __init__(self, channel: str = CHANGE_FEED_CHANNEL):
+        self.channel = channel
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def ensure_started(self) -> None:
+        if not uses_notify() or self.running:
+            return
+        with self._lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="change-feed-listener", daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _connect(self):
+        # Dedicated DBAPI connection outside the pool: it stays in LISTEN for the process lifetime
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while not self._stop.is_set():
+            try:
+                conn = self._connect()
+            except Exception as e:
+                print(f"[Change Feed] LISTEN connect failed: {e}; retrying in {backoff:.0f}s")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+            if not first:
+                # Anything sent while we were disconnected is gone
+                broker.resync_all("listener reconnected")
+            first, backoff = False, 1.0
+            print(f"[Change Feed] Listening on {self.channel}")
+            try:
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            broker.publish(json.loads(notify.payload))
+                        except ValueError:
+                            print(f"[Change Feed] Ignoring malformed payload on {self.channel}")
+            except Exception as e:
+                print(f"[Change Feed] LISTEN connection lost: {e}")
+            finally:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+
+broker = ChangeBroker()
+pg_listener = PgListener()
+
+
+def publish(db: Session, events: List[Dict[str, Any]]) -> None:
+    """
+    Queue events on the current transaction: NOTIFY on Postgres, after-commit broker
+    delivery otherwise. Writers that bypass the ORM (bulk ingest) call this themselves.
+    """
+    if not CHANGE_FEED_ENABLED or not events:
+        return
+    if uses_notify():
+        connection = db.connection()
+        for payload in _payloads(events):
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANGE_FEED_CHANNEL, "payload": payload})
+    else:
+        db.info.setdefault("change_feed_pending", []).extend(
+            {k: _jsonable(v) for k, v in ev.items()} for ev in events
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_complaint_changes(session, flush_context):
+    if not CHANGE_FEED_ENABLED:
+        return
+    events = []
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if isinstance(obj, models.Complaint) and (op != "update" or session.is_modified(obj)):
+                events.append(complaint_event(op, obj))
+    if events:
+        publish(session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed_changes(session):
+    pending = session.info.pop("change_feed_pending", None)
+    if pending:
+        broker.publish(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_changes(session):
+    session.info.pop("change_feed_pending", None)
@@ -0,0 +1,173 @@
+# app/services/chat_session_store.py
+"""
+Server-side conversation state for the chatbot.
+
+The client only holds an opaque session id. Everything else (intent, selected
+district/municipality/ward, problem description and the numbered option lists
+shown to the user) lives here, either in process memory or in the
+`chatbot_sessions` table when several workers need to share it.
+
+Configuration (environment):
+  CHAT_SESSION_BACKEND       "memory" (default) or "sql"
+  CHAT_SESSION_TTL_SECONDS   idle lifetime of a session (default 1800)
+  CHAT_SESSION_MAX_ENTRIES   cap for the in-memory backend (default 10000)
+"""
+import os
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.database import SessionLocal
+from app.models.chat_session import ChatSession
+
+CHAT_SESSION_BACKEND = os.getenv("CHAT_SESSION_BACKEND", "memory").lower()
+CHAT_SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+CHAT_SESSION_MAX_ENTRIES = int(os.getenv("CHAT_SESSION_MAX_ENTRIES", "10000"))
+
+
+def new_state(user_id: Optional[int] = None, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Empty session state. `options` caches numbered lists keyed by kind (districts, municipalities, wards)."""
+    return {"user_id": user_id, "context": dict(context or {}), "options": {}}
+
+
+class InMemorySessionStore:
+    """Process-local TTL store with LRU eviction once `max_entries` is reached."""
+
+    def __init__(self, ttl_seconds: int = CHAT_SESSION_TTL_SECONDS, max_entries: int = CHAT_SESSION_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            expires_at, state = entry
+            if expires_at < time.monotonic():
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return copy.deepcopy(state)
+
+    def set(self, session_id: str, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[session_id] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(state))
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class SQLSessionStore:
+    """Stores session state as JSON in the `chatbot_sessions` table so all workers see the same conversation."""
+
+    # Expired rows are purged opportunistically every N writes
+    PURGE_EVERY = 200
+
+    def __init__(self, session_factory=SessionLocal, ttl_seconds: int = CHAT_SESSION_TTL_SECONDS):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            row = db.query(ChatSession).filter(ChatSession.id == session_id).first()
+            if row is None:
+                return None
+            expires_at = row.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < datetime.now(timezone.utc):
+                db.delete(row)
+                db.commit()
+                return None
+            return dict(row.state or {})
+        finally:
+            db.close()
+
+    def set(self, session_id: str, state: Dict[str, Any]) -> None:
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            db.merge(ChatSession(
+                id=session_id,
+                user_id=state.get("user_id"),
+                state=state,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+            ))
+            with self._writes_lock:
+                self._writes += 1
+                purge = self._writes % self.PURGE_EVERY == 0
+            if purge:
+                db.query(ChatSession).filter(ChatSession.expires_at < now).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def delete(self, session_id: str) -> None:
+        db = self.session_factory()
+        try:
+            db.query(ChatSession).filter(ChatSession.id == session_id).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+
+class ChatSessionManager:
+    """Front door used by the chatbot router: resolves a session id to state and persists it back."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def load(
+        self,
+        session_id: Optional[str],
+        user_id: Optional[int] = None,
+        legacy_context: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Return (session_id, state). Unknown or expired ids, and sessions that belong to a
+        different user, start a fresh session. Clients that still post `context` without a
+        session id get it used as the initial state.
+        """
+        state = self.store.get(session_id) if session_id else None
+        if state is not None and state.get("user_id") not in (None, user_id):
+            state = None
+        if state is None:
+            session_id = secrets.token_urlsafe(24)
+            state = new_state(user_id, legacy_context if isinstance(legacy_context, dict) else None)
+        state["user_id"] = user_id
+        state.setdefault("context", {})
+        state.setdefault("options", {})
+        return session_id, state
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> None:
+        self.store.set(session_id, state)
+
+    def delete(self, session_id: str) -> None:
+        self.store.delete(session_id)
+
+
+def build_session_store(backend: str = CHAT_SESSION_BACKEND):
+    if backend == "sql":
+        return SQLSessionStore()
+    if backend == "memory":
+        return InMemorySessionStore()
+    raise ValueError(f"Unknown chat session backend: {backend}")
+
+
+chat_sessions = ChatSessionManager(build_session_store())
@@ -0,0 +1,338 @@
+# app/services/complaint_ingest.py
+"""
+Bulk complaint ingestion (NDJSON or CSV uploads).
+
+Rows are read lazily from the uploaded file and handled in batches of
+BULK_INGEST_BATCH_SIZE. Each batch goes through the same steps:
+validate -> resolve ward -> classify the rows that lack urgency/department -> write.
+Rows that fail validation are reported with their 1-based row number and never
+reach the database.
+
+Writes use Postgres COPY when the connection is psycopg2 and a single executemany
+INSERT otherwise (SQLite, other drivers). If a batch write fails, the batch is
+retried row by row inside savepoints so only the offending rows are rejected.
+
+Configuration (environment):
+  BULK_INGEST_BATCH_SIZE       rows per validate/classify/write batch (default 1000)
+  BULK_INGEST_MAX_ROWS         upload cap (default 100000)
+  BULK_INGEST_MAX_ERRORS       per-row errors returned in the response (default 1000)
+  BULK_CLASSIFY_BATCH_SIZE     texts per classifier request (default 64)
+  LOCATION_MAP_TTL_SECONDS     how long the ward lookup map is reused (default 300)
+"""
+import csv
+import codecs
+import io
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Callable, Awaitable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models
+from app.schemas.complaint import DEPARTMENT_LABEL_MAP, URGENCY_LABEL_MAP
+from app.utils.label_converter import resolve_label
+from app.services import change_feed, data_versions
+
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "1000"))
+BULK_INGEST_MAX_ROWS = int(os.getenv("BULK_INGEST_MAX_ROWS", "100000"))
+BULK_INGEST_MAX_ERRORS = int(os.getenv("BULK_INGEST_MAX_ERRORS", "1000"))
+BULK_CLASSIFY_BATCH_SIZE = int(os.getenv("BULK_CLASSIFY_BATCH_SIZE", "64"))
+LOCATION_MAP_TTL_SECONDS = float(os.getenv("LOCATION_MAP_TTL_SECONDS", "300"))
+
+LOCATION_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "location_id.json")
+
+# Column order used for both COPY and executemany
+COLUMNS = ["citizen_id", "department", "message", "urgency", "current_status", "date_submitted", "ward_id"]
+MIN_MESSAGE_LENGTH = 10
+
+# classify(texts) -> (urgency labels, department labels), one entry per text (None if unknown)
+BatchClassifier = Callable[[List[str]], Awaitable[Tuple[List[Optional[str]], List[Optional[str]]]]]
+
+
+def _norm(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+class LocationMap:
+    """
+    Ward lookup shared by all uploads: valid ward ids from the `wards` table plus
+    (district, municipality, ward number) names from data/location_id.json.
+    Rebuilt at most every LOCATION_MAP_TTL_SECONDS.
+    """
+
+    def __init__(self, ttl_seconds: float = LOCATION_MAP_TTL_SECONDS, names_path: str = LOCATION_JSON):
+        self.ttl_seconds = ttl_seconds
+        self.names_path = names_path
+        self._lock = threading.Lock()
+        self._loaded_at = 0.0
+        self._ward_ids: set = set()
+        self._by_name: Dict[Tuple[str, str, int], int] = {}
+
+    def _refresh(self, db: Session) -> None:
+        ward_ids = {ward_id for (ward_id,) in db.query(models.Ward.id).all()}
+        by_name = {}
+        if os.path.exists(self.names_path):
+            with open(self.names_path, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    by_name[(_norm(item["district"]), _norm(item["municipality"]), int(item["ward"]))] = item["ward_id"]
+        self._ward_ids, self._by_name = ward_ids, by_name
+        self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self, db: Session) -> None:
+        with self._lock:
+            if time.monotonic() - self._loaded_at >= self.ttl_seconds:
+                self._refresh(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def resolve(self, row: Dict[str, Any]) -> Optional[int]:
+        """Ward id for a row given either `ward_id` or district/municipality/ward names. Raises ValueError if unknown."""
+        ward_id = row.get("ward_id")
+        if ward_id not in (None, ""):
+            ward_id = int(ward_id)
+            if ward_id not in self._ward_ids:
+                raise ValueError(f"Unknown ward_id {ward_id}")
+            return ward_id
+        district, municipality, ward = row.get("district"), row.get("municipality"), row.get("ward")
+        if not (district and municipality and ward not in (None, "")):
+            return None
+        ward_id = self._by_name.get((_norm(district), _norm(municipality), int(ward)))
+        if ward_id is None or ward_id not in self._ward_ids:
+            raise ValueError(f"Unknown location {district} / {municipality} / ward {ward}")
+        return ward_id
+
+
+location_map = LocationMap()
+
+
+# -------------------------
+# Parsing
+# -------------------------
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> str:
+    name = (filename or "").lower()
+    ctype = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in ctype:
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in ctype or "jsonl" in ctype:
+        return "ndjson"
+    raise ValueError("Unsupported upload format; send a .csv or .ndjson/.jsonl file")
+
+
+def iter_rows(binary_file, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """
+    Yield (row_number, dict) lazily from a binary file object. Rows that cannot be
+    parsed are yielded as (row_number, Exception) so they show up as row errors.
+    """
+    text = codecs.getreader("utf-8-sig")(binary_file)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+        return
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Each NDJSON line must be a JSON object")
+            yield row_number, row
+        except ValueError as e:
+            yield row_number, e
+
+
+def _label(value: Any, mapping: Dict[int, str]) -> Optional[str]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        value = int(value)
+    if isinstance(value, str):
+        value = value.strip().upper() if mapping is URGENCY_LABEL_MAP else value.strip()
+    return resolve_label(value, mapping)
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def validate_batch(db: Session, batch: List[Tuple[int, Any]], errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Turn raw rows into insert-ready dicts (plus a `_row` number); invalid rows are appended to `errors`."""
+    location_map.ensure_loaded(db)
+    candidates = []
+    for row_number, raw in batch:
+        if isinstance(raw, Exception):
+            errors.append({"row": row_number, "error": f"Parse error: {raw}"})
+            continue
+        try:
+            message = (raw.get("message") or "").strip()
+            if len(message) < MIN_MESSAGE_LENGTH:
+                raise ValueError(f"message must be at least {MIN_MESSAGE_LENGTH} characters")
+            citizen_id = raw.get("citizen_id")
+            candidates.append({
+                "_row": row_number,
+                "citizen_id": int(citizen_id) if citizen_id not in (None, "") else None,
+                "department": _label(raw.get("department"), DEPARTMENT_LABEL_MAP),
+                "message": message,
+                "urgency": _label(raw.get("urgency"), URGENCY_LABEL_MAP),
+                "current_status": "PENDING",
+                "date_submitted": _parse_datetime(raw.get("date_submitted")) or datetime.utcnow(),
+                "ward_id": location_map.resolve(raw),
+            })
+        except (ValueError, TypeError) as e:
+            errors.append({"row": row_number, "error": str(e)})
+
+    # One query per batch for the citizen foreign key
+    citizen_ids = {row["citizen_id"] for row in candidates if row["citizen_id"] is not None}
+    known = set()
+    if citizen_ids:
+        known = {uid for (uid,) in db.query(models.User.id).filter(models.User.id.in_(citizen_ids)).all()}
+    valid = []
+    for row in candidates:
+        if row["citizen_id"] is not None and row["citizen_id"] not in known:
+            errors.append({"row": row["_row"], "error": f"Citizen with ID {row['citizen_id']} does not exist"})
+            continue
+        valid.append(row)
+    return valid
+
+
+async def classify_missing(rows: List[Dict[str, Any]], classify: BatchClassifier) -> None:
+    """Fill urgency/department for rows that did not provide them, BULK_CLASSIFY_BATCH_SIZE texts per request."""
+    pending = [row for row in rows if row["urgency"] is None or row["department"] is None]
+    for start in range(0, len(pending), BULK_CLASSIFY_BATCH_SIZE):
+        chunk = pending[start:start + BULK_CLASSIFY_BATCH_SIZE]
+        urgencies, departments = await classify([row["message"] for row in chunk])
+        for row, urgency, department in zip(chunk, urgencies, departments):
+            if row["urgency"] is None:
+                row["urgency"] = urgency
+            if row["department"] is None:
+                row["department"] = department
+
+
+# -------------------------
+# Writing
+# -------------------------
+def _copy_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([
+            row[c].isoformat() if isinstance(row[c], datetime) else row[c]
+            for c in COLUMNS
+        ])
+    buf.seek(0)
+    dbapi_conn = db.connection().connection.dbapi_connection
+    with dbapi_conn.cursor() as cursor:
+        # Unquoted empty fields are NULL in CSV COPY; messages are never empty
+        cursor.copy_expert(f"COPY complaints ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _insert_rows(db: Session, rows: List[Dict[str, Any]]) -> None:
+    db.execute(insert(models.Complaint.__table__), [{c: row[c] for c in COLUMNS} for row in rows])
+
+
+def write_batch(db: Session, rows: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> Tuple[int, str]:
+    """Persist a validated batch. Returns (rows inserted, method used)."""
+    if not rows:
+        return 0, "none"
+    use_copy = db.get_bind().dialect.driver == "psycopg2"
+    try:
+        if use_copy:
+            _copy_rows(db, rows)
+        else:
+            _insert_rows(db, rows)
+        # Core inserts skip the ORM flush hooks that normally bump the version and publish changes
+        data_versions.mark(db, ["complaints"])
+        change_feed.publish(db, change_feed.bulk_events(rows))
+        db.commit()
+        return len(rows), "copy" if use_copy else "executemany"
+    except Exception as e:
+        db.rollback()
+        print(f"[Bulk Ingest] Batch write failed ({e}); retrying row by row")
+
+    inserted = []
+    for row in rows:
+        try:
+            with db.begin_nested():
+                _insert_rows(db, [row])
+            inserted.append(row)
+        except Exception as e:
+            errors.append({"row": row["_row"], "error": f"Database error: {getattr(e, 'orig', e)}"})
+    if inserted:
+        data_versions.mark(db, ["complaints"])
+        change_feed.publish(db, change_feed.bulk_events(inserted))
+    db.commit()
+    return len(inserted), "row-by-row"
+
+
+async def ingest_upload(
+    binary_file,
+    fmt: str,
+    session_factory: Callable[[], Session],
+    classify: Optional[BatchClassifier] = None,
+) -> Dict[str, Any]:
+    """Stream, validate, classify and write an uploaded file; returns counts and per-row errors."""
+    started = time.perf_counter()
+    rows = iter_rows(binary_file, fmt)
+    errors: List[Dict[str, Any]] = []
+    received = inserted = 0
+    methods = set()
+
+    def next_batch() -> List[Tuple[int, Any]]:
+        batch = []
+        for item in rows:
+            batch.append(item)
+            if len(batch) >= BULK_INGEST_BATCH_SIZE:
+                break
+        return batch
+
+    db = session_factory()
+    try:
+        while True:
+            batch = await run_in_threadpool(next_batch)
+            if not batch:
+                break
+            truncated = received + len(batch) > BULK_INGEST_MAX_ROWS
+            if truncated:
+                batch = batch[:BULK_INGEST_MAX_ROWS - received]
+            received += len(batch)
+
+            valid = await run_in_threadpool(validate_batch, db, batch, errors)
+            # Release the connection while the classifiers run
+            db.close()
+            if classify is not None:
+                await classify_missing(valid, classify)
+            count, method = await run_in_threadpool(write_batch, db, valid, errors)
+            inserted += count
+            methods.add(method)
+            if received >= BULK_INGEST_MAX_ROWS:
+                # The limit can fall exactly on a batch boundary: look for a leftover row
+                if truncated or await run_in_threadpool(next, rows, None) is not None:
+                    errors.append({"row": received + 1, "error": f"Row limit of {BULK_INGEST_MAX_ROWS} reached; remaining rows were not processed"})
+                break
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    errors.sort(key=lambda e: e["row"])
+    print(f"[Bulk Ingest] {inserted}/{received} rows inserted in {elapsed:.2f}s ({len(errors)} errors)")
+    return {
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors[:BULK_INGEST_MAX_ERRORS],
+        "errors_truncated": len(errors) > BULK_INGEST_MAX_ERRORS,
+        "write_method": ", ".join(sorted(methods - {"none"})) or "none",
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_minute": round(inserted / elapsed * 60) if elapsed > 0 else inserted,
+    }
@@ -0,0 +1,350 @@
+# app/services/complaint_search.py
+"""
+Full-text search over complaint messages for GET /api/complaints/search.
+
+PostgreSQL: matches `search_vector @@ websearch_to_tsquery('simple', q)` against the
+GIN-indexed generated column (see app/models/search.py) and ranks with ts_rank_cd.
+Fuzzy mode uses the pg_trgm index instead (`q <% message`, ranked by word_similarity),
+which also catches misspellings and partial Devanagari words that whole-token search misses.
+
+Other dialects (SQLite in development): an in-process inverted index ranked with BM25's
+term-frequency saturation. Like ts_rank_cd it uses no corpus statistics (no IDF, a fixed
+reference length), so a score only depends on the document and the query, and a
+relevance cursor stays valid when the index changes between pages. It is built on first use and kept current on every search from the complaints table:
+rows with a higher id, or with updated_at past the last sync, are re-indexed, and
+deleted rows drop out when a page is loaded.
+
+Both backends return pages ordered by (rank, id) or (date_submitted, id) descending with
+an opaque keyset cursor, so deep pages cost the same as the first one.
+
+Configuration (environment):
+  SEARCH_FUZZY_THRESHOLD     minimum trigram similarity in fuzzy mode (default 0.3)
+  SEARCH_INDEX_SYNC_SECONDS  minimum time between in-process index syncs (default 2)
+"""
+import base64
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Float, and_, cast, func, literal, literal_column, or_
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.models.search import SEARCH_CONFIG, SEARCH_VECTOR_COLUMN
+
+SEARCH_FUZZY_THRESHOLD = float(os.getenv("SEARCH_FUZZY_THRESHOLD", "0.3"))
+SEARCH_INDEX_SYNC_SECONDS = float(os.getenv("SEARCH_INDEX_SYNC_SECONDS", "2"))
+SORTS = ("relevance", "recent")
+
+# Latin/Devanagari word characters; the danda (U+0964/5) ends a sentence like '.'
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u097F]+")
+
+
+def tokenize(text_value: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall((text_value or "").lower())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+# -------------------------
+# Keyset cursor
+# -------------------------
+def encode_cursor(sort_value, complaint_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, complaint_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], sort: str) -> Optional[Tuple[Any, int]]:
+    if not cursor:
+        return None
+    try:
+        sort_value, complaint_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if sort == "recent":
+            sort_value = _utc(datetime.fromisoformat(sort_value))
+        else:
+            sort_value = float(sort_value)
+        return sort_value, int(complaint_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+# -------------------------
+# PostgreSQL
+# -------------------------
+def _apply_filters(query, filters: Dict[str, Any]):
+    if filters.get("department"):
+        query = query.filter(models.Complaint.department == filters["department"])
+    if filters.get("urgency"):
+        query = query.filter(models.Complaint.urgency == filters["urgency"])
+    if filters.get("status"):
+        query = query.filter(models.Complaint.current_status == filters["status"])
+    if filters.get("ward_id"):
+        query = query.filter(models.Complaint.ward_id == filters["ward_id"])
+    # date_submitted is the partition key: these bounds prune whole partitions
+    if filters.get("date_from"):
+        query = query.filter(models.Complaint.date_submitted >= filters["date_from"])
+    if filters.get("date_to"):
+        query = query.filter(models.Complaint.date_submitted < filters["date_to"])
+    return query
+
+
+def _search_postgres(db: Session, q: str, fuzzy: bool, sort: str, limit: int, cursor, filters) -> Tuple[List[Tuple[Any, float]], Optional[str]]:
+    if fuzzy:
+        match = literal(q).op("<%")(models.Complaint.message)
+        rank = cast(func.word_similarity(q, models.Complaint.message), Float)
+        db.execute(func.set_config("pg_trgm.word_similarity_threshold", str(SEARCH_FUZZY_THRESHOLD), True).select())
+    else:
+        vector = literal_column(f"complaints.{SEARCH_VECTOR_COLUMN}")
+        ts_query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+        match = vector.op("@@")(ts_query)
+        # float8 so the value survives the round trip through the cursor exactly
+        rank = cast(func.ts_rank_cd(vector, ts_query), Float)
+
+    query = db.query(models.Complaint, rank).options(
+        joinedload(models.Complaint.ward).joinedload(models.Ward.municipality).joinedload(models.Municipality.district)
+    ).filter(match)
+    query = _apply_filters(query, filters)
+
+    sort_column = rank if sort == "relevance" else models.Complaint.date_submitted
+    if cursor is not None:
+        sort_value, last_id = cursor
+        query = query.filter(or_(sort_column < sort_value, and_(sort_column == sort_value, models.Complaint.id < last_id)))
+    rows = query.order_by(sort_column.desc(), models.Complaint.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        complaint, score = rows[-1]
+        next_cursor = encode_cursor(score if sort == "relevance" else complaint.date_submitted, complaint.id)
+    return [(complaint, float(score or 0.0)) for complaint, score in rows], next_cursor
+
+
+# -------------------------
+# In-process fallback
+# -------------------------
+class InvertedIndex:
+    """Token -> {complaint id: term frequency}, with per-document filter fields for search."""
+
+    K1 = 1.2
+    B = 0.75
+    # Document length (in tokens) that gets no length penalty; stands in for BM25's corpus average
+    REFERENCE_LENGTH = 20
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_tokens: Dict[int, Dict[str, int]] = {}
+        self.doc_fields: Dict[int, Dict[str, Any]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.token_trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self.max_id = 0
+        self.synced_at: Optional[datetime] = None
+        self.last_sync_monotonic = 0.0
+
+    # Maintenance
+    def _remove(self, complaint_id: int) -> None:
+        tokens = self.doc_tokens.pop(complaint_id, None)
+        self.doc_fields.pop(complaint_id, None)
+        self.doc_lengths.pop(complaint_id, None)
+        if not tokens:
+            return
+        for token, tf in tokens.items():
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(complaint_id, None)
+                if not postings:
+                    del self.postings[token]
+                    for trigram in _trigrams(token):
+                        self.token_trigrams[trigram].discard(token)
+
+    def _add(self, complaint) -> None:
+        self._remove(complaint.id)
+        counts: Dict[str, int] = defaultdict(int)
+        for token in tokenize(complaint.message):
+            counts[token] += 1
+        for token, tf in counts.items():
+            if token not in self.postings:
+                for trigram in _trigrams(token):
+                    self.token_trigrams[trigram].add(token)
+            self.postings[token][complaint.id] = tf
+        self.doc_tokens[complaint.id] = dict(counts)
+        self.doc_lengths[complaint.id] = sum(counts.values())
+        self.doc_fields[complaint.id] = {
+            "department": complaint.department,
+            "urgency": complaint.urgency,
+            "status": complaint.current_status,
+            "ward_id": complaint.ward_id,
+            "date_submitted": _utc(complaint.date_submitted),
+        }
+        self.max_id = max(self.max_id, complaint.id)
+
+    def sync(self, db: Session) -> int:
+        """Index new and changed complaints; returns how many rows were (re)indexed."""
+        if time.monotonic() - self.last_sync_monotonic < SEARCH_INDEX_SYNC_SECONDS:
+            return 0
+        with self._lock:
+            started = datetime.now(timezone.utc)
+            columns = (models.Complaint.id, models.Complaint.message, models.Complaint.department, models.Complaint.urgency,
+                       models.Complaint.current_status, models.Complaint.ward_id, models.Complaint.date_submitted)
+            query = db.query(*columns)
+            if self.synced_at is not None:
+                # Small overlap covers transactions that committed just after the previous sync started
+                since = self.synced_at - timedelta(seconds=5)
+                query = query.filter(or_(models.Complaint.id > self.max_id, models.Complaint.updated_at >= since))
+            count = 0
+            for row in query.yield_per(5000):
+                self._add(row)
+                count += 1
+            self.synced_at = started
+            self.last_sync_monotonic = time.monotonic()
+            if count:
+                print(f"[Search] Indexed {count} complaints ({len(self.doc_tokens)} total)")
+            return count
+
+    def discard(self, complaint_ids: Iterable[int]) -> None:
+        with self._lock:
+            for complaint_id in complaint_ids:
+                self._remove(complaint_id)
+
+    # Querying
+    def _expand(self, term: str) -> List[str]:
+        """Vocabulary tokens similar to `term` (trigram Jaccard) or containing it."""
+        grams = _trigrams(term)
+        candidates: Dict[str, int] = defaultdict(int)
+        for trigram in grams:
+            for token in self.token_trigrams.get(trigram, ()):
+                candidates[token] += 1
+        similar = []
+        for token, shared in candidates.items():
+            similarity = shared / (len(grams) + len(_trigrams(token)) - shared)
+            if similarity >= SEARCH_FUZZY_THRESHOLD or term in token:
+                similar.append(token)
+        return similar
+
+    def _matches(self, fields: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        for key in ("department", "urgency", "status", "ward_id"):
+            if filters.get(key) and fields[key] != filters[key]:
+                return False
+        submitted = fields["date_submitted"]
+        if filters.get("date_from") and (submitted is None or submitted < _utc(filters["date_from"])):
+            return False
+        if filters.get("date_to") and (submitted is None or submitted >= _utc(filters["date_to"])):
+            return False
+        return True
+
+    def search(self, q: str, fuzzy: bool, filters: Dict[str, Any]) -> Dict[int, float]:
+        """Scores of every matching document; all query terms must match (any expansion in fuzzy mode)."""
+        terms = list(dict.fromkeys(tokenize(q)))
+        if not terms:
+            return {}
+        with self._lock:
+            scores: Optional[Dict[int, float]] = None
+            for term in terms:
+                variants = self._expand(term) if fuzzy else ([term] if term in self.postings else [])
+                term_scores: Dict[int, float] = defaultdict(float)
+                for token in variants:
+                    for complaint_id, tf in self.postings[token].items():
+                        length = self.doc_lengths[complaint_id]
+                        norm = tf * (self.K1 + 1) / (tf + self.K1 * (1 - self.B + self.B * length / self.REFERENCE_LENGTH))
+                        term_scores[complaint_id] = max(term_scores[complaint_id], norm)
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {cid: score + term_scores[cid] for cid, score in scores.items() if cid in term_scores}
+                if not scores:
+                    return {}
+            return {cid: score for cid, score in scores.items() if self._matches(self.doc_fields[cid], filters)}
+
+    def sort_value(self, complaint_id: int, sort: str, score: float):
+        return score if sort == "relevance" else (self.doc_fields[complaint_id]["date_submitted"] or datetime.min.replace(tzinfo=timezone.utc))
+
+
+memory_index = InvertedIndex()
+
+
+def _in_order(keys: Iterable[Tuple[Any, int]], first: int) -> Iterable[int]:
+    """Complaint ids by descending key, ordering only as many as the caller consumes (doubling batches)."""
+    candidates = list(keys)
+    taken, window = 0, first
+    while taken < len(candidates):
+        for _, complaint_id in heapq.nlargest(window, candidates)[taken:]:
+            yield complaint_id
+        taken, window = min(window, len(candidates)), window * 2
+
+
+def _search_memory(db: Session, q: str, fuzzy: bool, sort: str, limit: int, cursor, filters) -> Tuple[List[Tuple[Any, float]], Optional[str]]:
+    memory_index.sync(db)
+    scores = memory_index.search(q, fuzzy, filters)
+    keys = ((memory_index.sort_value(cid, sort, score), cid) for cid, score in scores.items())
+    if cursor is not None:
+        keys = (key for key in keys if key < cursor)
+    # Usually the page plus a margin for rows deleted since the last sync; more is ordered only when needed
+    ordered = _in_order(keys, 2 * limit + 1)
+
+    results: List[Tuple[Any, float]] = []
+    while len(results) <= limit:
+        page_ids = list(itertools.islice(ordered, limit + 1 - len(results)))
+        if not page_ids:
+            break
+        rows = db.query(models.Complaint).options(
+            joinedload(models.Complaint.ward).joinedload(models.Ward.municipality).joinedload(models.Municipality.district)
+        ).filter(models.Complaint.id.in_(page_ids)).all()
+        by_id = {row.id: row for row in rows}
+        memory_index.discard(cid for cid in page_ids if cid not in by_id)
+        results.extend((by_id[cid], scores[cid]) for cid in page_ids if cid in by_id)
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        complaint, score = results[-1]
+        next_cursor = encode_cursor(memory_index.sort_value(complaint.id, sort, score), complaint.id)
+    return results, next_cursor
+
+
+# -------------------------
+# Entry point
+# -------------------------
+def search_complaints(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "relevance",
+    fuzzy: bool = False,
+    **filters,
+) -> Dict[str, Any]:
+    """One page of matches: {"items": [(complaint, rank), ...], "next_cursor": str | None, "backend": str}."""
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {SORTS}")
+    decoded = decode_cursor(cursor, sort)
+    started = time.perf_counter()
+    if db.get_bind().dialect.name == "postgresql":
+        backend = "postgres-trigram" if fuzzy else "postgres-fts"
+        items, next_cursor = _search_postgres(db, q, fuzzy, sort, limit, decoded, filters)
+    else:
+        backend = "memory"
+        items, next_cursor = _search_memory(db, q, fuzzy, sort, limit, decoded, filters)
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "backend": backend,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,74 @@
+# app/services/data_versions.py
+"""
+Change counters per data set, used to build ETags for read endpoints.
+
+ORM flushes that insert, delete or really change (`Session.is_modified`) a row of a
+tracked table mark its data set on the session; the marked data sets are bumped once,
+right before the transaction commits. The counter therefore moves exactly when the
+data becomes visible, all workers and the read replica agree on it, and the
+data_versions row is locked only for the commit instead of the whole transaction.
+Writers that bypass the ORM (bulk COPY/executemany ingest) call `mark` themselves.
+Reading a version is a primary-key lookup.
+"""
+from typing import Iterable
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.models.data_version import DataVersion
+
+# table name -> data set
+TRACKED_TABLES = {
+    "complaints": "complaints",
+    "complaint_status_history": "complaints",
+    "districts": "locations",
+    "municipalities": "locations",
+    "wards": "locations",
+}
+
+
+def bump(db: Session, names: Iterable[str]) -> None:
+    """Increment the version of each data set in the current transaction."""
+    connection = db.connection()
+    for name in sorted(set(names)):
+        connection.execute(
+            update(DataVersion.__table__)
+            .where(DataVersion.__table__.c.name == name)
+            .values(version=DataVersion.__table__.c.version + 1)
+        )
+
+
+def mark(db: Session, names: Iterable[str]) -> None:
+    """Bump each data set once when the current transaction commits."""
+    db.info.setdefault("data_versions_pending", set()).update(names)
+
+
+def get_version(db: Session, name: str) -> int:
+    version = db.query(DataVersion.version).filter(DataVersion.name == name).scalar()
+    return version or 0
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_on_flush(session, flush_context):
+    # new/dirty/deleted still describe what was just flushed; dirty includes objects with no net change
+    names = set()
+    for obj in (*session.new, *session.deleted, *(o for o in session.dirty if session.is_modified(o))):
+        table = getattr(obj, "__tablename__", None)
+        if table in TRACKED_TABLES:
+            names.add(TRACKED_TABLES[table])
+    if names:
+        mark(session, names)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_before_commit(session):
+    # Changes still pending are flushed by commit only after this hook, so flush them here first
+    session.flush()
+    names = session.info.pop("data_versions_pending", None)
+    if names:
+        bump(session, names)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_marks(session):
+    session.info.pop("data_versions_pending", None)
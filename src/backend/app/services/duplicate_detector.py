@@ -0,0 +1,406 @@
+# app/services/duplicate_detector.py
+"""
+Near-duplicate complaint detection with MinHash LSH.
+
+One outage produces many near-identical complaints. Each message is cleaned with the
+shared text_normalization.clean_text the classifier APIs use (URLs, HTML, whitespace),
+lowercased and split into character shingles, then reduced to a MinHash signature. Signatures are
+banded into an LSH table keyed by ward, so lookups only meet complaints from the same
+ward. A candidate counts as a duplicate when it was submitted within the time window
+and its estimated Jaccard similarity reaches the threshold.
+
+A new complaint joins the cluster of its best match. The cluster id is the complaint_id
+of the earliest complaint in the cluster. Clusters and signatures are stored in
+complaint_signatures, so after a restart the in-memory index is rebuilt from the rows
+inside the window without re-hashing any text.
+
+Request handlers only read the in-memory index (`find`, called off the event loop).
+`run_sync_loop`, started with the app, keeps it current every DEDUP_SYNC_SECONDS: it
+loads in-window signatures the index does not hold yet (written by other workers),
+hashes and clusters complaints that have no signature row (bulk imports), and evicts
+entries that left the window. Until the first load finishes, `find` reports no match.
+
+Configuration (environment):
+  DEDUP_NUM_PERM       MinHash permutations (default 128; stored signatures of another length are ignored)
+  DEDUP_BANDS          LSH bands; rows per band = NUM_PERM / BANDS (default 16, ~0.7 similarity knee)
+  DEDUP_THRESHOLD      minimum estimated Jaccard similarity for a duplicate (default 0.7)
+  DEDUP_WINDOW_HOURS   only complaints this close in time are compared (default 72)
+  DEDUP_SHINGLE_SIZE   character shingle length (default 5)
+  DEDUP_SYNC_SECONDS   time between background syncs with the database (default 30)
+"""
+import asyncio
+import os
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event, func, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from text_normalization import clean_text
+
+from app import models
+from app.core.database import SessionLocal
+from app.models.duplicate import ComplaintSignature
+
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.7"))
+DEDUP_WINDOW_HOURS = float(os.getenv("DEDUP_WINDOW_HOURS", "72"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "5"))
+DEDUP_SYNC_SECONDS = float(os.getenv("DEDUP_SYNC_SECONDS", "30"))
+BACKFILL_BATCH_SIZE = 2000
+LOAD_BATCH_SIZE = 5000
+# pg_advisory_xact_lock key for the backfill ("DEDUP" in ASCII)
+BACKFILL_LOCK_KEY = 0x4445445550
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: stored signatures are only comparable if the permutations never change
+_rng = np.random.RandomState(20251201)
+_PERM_A = _rng.randint(1, (1 << 61) - 1, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 61) - 1, size=DEDUP_NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> Set[str]:
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def signature(message: str) -> np.ndarray:
+    """MinHash signature (uint32[DEDUP_NUM_PERM]) of the cleaned message; all-max for empty text."""
+    grams = shingles(clean_text(message or "").lower())
+    if not grams:
+        return np.full(DEDUP_NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    # Universal hashing (a*x + b) mod p for every permutation at once; uint64 wrap-around is fine for hashing
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+class Match(NamedTuple):
+    complaint_id: int
+    cluster_id: int
+    similarity: float
+    department: Optional[str] = None
+    urgency: Optional[str] = None
+
+
+class MinHashLSH:
+    """Banded LSH over signatures, bucketed per ward; entries outside the window are evicted."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS):
+        if num_perm % bands:
+            raise ValueError("DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.buckets: Dict[Tuple[int, int, bytes], Set[int]] = defaultdict(set)
+        # complaint_id -> (ward_id, date_submitted, signature, cluster_id)
+        self.entries: Dict[int, Tuple[int, datetime, np.ndarray, int]] = {}
+
+    def _keys(self, ward_id: int, sig: np.ndarray):
+        for band in range(self.bands):
+            yield ward_id, band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, complaint_id: int, ward_id: int, submitted_at: datetime, sig: np.ndarray, cluster_id: int) -> None:
+        self.remove(complaint_id)
+        self.entries[complaint_id] = (ward_id, _utc(submitted_at), sig, cluster_id)
+        for key in self._keys(ward_id, sig):
+            self.buckets[key].add(complaint_id)
+
+    def remove(self, complaint_id: int) -> None:
+        entry = self.entries.pop(complaint_id, None)
+        if entry is None:
+            return
+        for key in self._keys(entry[0], entry[2]):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(complaint_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def query(self, ward_id: int, submitted_at: datetime, sig: np.ndarray, window: timedelta) -> List[Tuple[int, int, float]]:
+        """(complaint_id, cluster_id, similarity) of in-window candidates at or above the threshold, best first."""
+        submitted_at = _utc(submitted_at)
+        candidates: Set[int] = set()
+        for key in self._keys(ward_id, sig):
+            candidates |= self.buckets.get(key, set())
+        matches = []
+        for complaint_id in candidates:
+            _, other_submitted, other_sig, cluster_id = self.entries[complaint_id]
+            if abs(other_submitted - submitted_at) > window:
+                continue
+            score = similarity(sig, other_sig)
+            if score >= DEDUP_THRESHOLD:
+                matches.append((complaint_id, cluster_id, score))
+        return sorted(matches, key=lambda m: (-m[2], m[0]))
+
+    def evict_before(self, cutoff: datetime) -> int:
+        stale = [cid for cid, entry in self.entries.items() if entry[1] < cutoff]
+        for complaint_id in stale:
+            self.remove(complaint_id)
+        return len(stale)
+
+
+def _lock_backfill_batch(db: Session) -> bool:
+    """On Postgres, one worker backfills at a time: a transaction-scoped try-lock taken per batch."""
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": BACKFILL_LOCK_KEY}).scalar())
+
+
+class DuplicateDetector:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self.index = MinHashLSH()
+        self.window = timedelta(hours=DEDUP_WINDOW_HOURS)
+        self.loaded = False
+
+    # -------------------------
+    # Index maintenance
+    # -------------------------
+    def _cutoff(self) -> datetime:
+        # Twice the window, so complaints submitted with a slightly older date still find their matches
+        return datetime.now(timezone.utc) - 2 * self.window
+
+    def _load(self, db: Session) -> int:
+        """Add in-window signatures the index does not hold yet (all of them on the first call)."""
+        cutoff = self._cutoff()
+        with self._lock:
+            known = set(self.index.entries)
+        missing = [cid for (cid,) in db.query(ComplaintSignature.complaint_id)
+                   .filter(ComplaintSignature.date_submitted >= cutoff, ComplaintSignature.ward_id.isnot(None))
+                   if cid not in known]
+        loaded = 0
+        for start in range(0, len(missing), LOAD_BATCH_SIZE):
+            rows = db.query(ComplaintSignature).filter(ComplaintSignature.complaint_id.in_(missing[start:start + LOAD_BATCH_SIZE]))
+            with self._lock:
+                for row in rows:
+                    sig = np.frombuffer(row.signature, dtype="<u4")
+                    if len(sig) != DEDUP_NUM_PERM:
+                        continue
+                    self.index.add(row.complaint_id, row.ward_id, row.date_submitted, sig.copy(), row.cluster_id)
+                    loaded += 1
+        if loaded or not self.loaded:
+            print(f"[Dedup] Loaded {loaded} signatures from complaint_signatures")
+        self.loaded = True
+        return loaded
+
+    def _backfill(self, db: Session) -> int:
+        """Hash and cluster in-window complaints that have no signature row yet (bulk imports, pre-existing rows)."""
+        count = 0
+        while True:
+            if not _lock_backfill_batch(db):
+                db.rollback()
+                break
+            rows = (
+                db.query(models.Complaint.id, models.Complaint.message, models.Complaint.ward_id, models.Complaint.date_submitted)
+                .outerjoin(ComplaintSignature, ComplaintSignature.complaint_id == models.Complaint.id)
+                .filter(ComplaintSignature.complaint_id.is_(None))
+                .filter(models.Complaint.date_submitted >= self._cutoff())
+                .order_by(models.Complaint.date_submitted, models.Complaint.id)
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                db.rollback()
+                break
+            try:
+                # Oldest first so the earliest complaint becomes the cluster head
+                for complaint_id, message, ward_id, submitted_at in rows:
+                    sig = signature(message)
+                    match = self._best_match(ward_id, submitted_at, sig)
+                    cluster_id = self.record(db, complaint_id, ward_id, submitted_at, sig, match)
+                    # Visible to the rest of this batch right away, not only after the commit
+                    if ward_id is not None:
+                        with self._lock:
+                            self.index.add(complaint_id, ward_id, submitted_at, sig, cluster_id)
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    for complaint_id, *_ in rows:
+                        self.index.remove(complaint_id)
+                raise
+            count += len(rows)
+        if count:
+            print(f"[Dedup] Backfilled {count} complaint signatures")
+        return count
+
+    def sync(self, db: Session) -> None:
+        """Load other workers' signatures, backfill unsigned complaints and evict stale entries."""
+        with self._sync_lock:
+            self._load(db)
+            self._backfill(db)
+            with self._lock:
+                self.index.evict_before(self._cutoff())
+
+    # -------------------------
+    # Matching
+    # -------------------------
+    def _best_match(self, ward_id: Optional[int], submitted_at: datetime, sig: np.ndarray) -> Optional[Match]:
+        # Scoped by ward: complaints without one are never merged
+        if ward_id is None or (sig == _MAX_HASH).all():
+            return None
+        with self._lock:
+            matches = self.index.query(ward_id, submitted_at, sig, self.window)
+        if not matches:
+            return None
+        complaint_id, cluster_id, score = matches[0]
+        return Match(complaint_id, cluster_id, score)
+
+    def find(self, db: Session, sig: np.ndarray, ward_id: Optional[int], submitted_at: datetime) -> Optional[Match]:
+        """
+        Best in-window duplicate of a not-yet-saved complaint, with that complaint's labels for
+        reuse. Blocking (one indexed lookup); async callers run it on the threadpool.
+        """
+        match = self._best_match(ward_id, submitted_at, sig)
+        if match is None:
+            return None
+        labels = db.query(models.Complaint.department, models.Complaint.urgency) \
+            .filter(models.Complaint.id == match.complaint_id).first()
+        if labels is None:
+            with self._lock:
+                self.index.remove(match.complaint_id)
+            return None
+        return match._replace(department=labels.department, urgency=labels.urgency)
+
+    def record(self, db: Session, complaint_id: int, ward_id: Optional[int], submitted_at: datetime, sig: np.ndarray, match: Optional[Match]) -> int:
+        """Stage the signature row in `db`; the in-memory index picks it up when the session commits."""
+        cluster_id = match.cluster_id if match is not None else complaint_id
+        db.add(ComplaintSignature(
+            complaint_id=complaint_id,
+            ward_id=ward_id,
+            date_submitted=submitted_at,
+            signature=sig.astype("<u4").tobytes(),
+            cluster_id=cluster_id,
+            similarity=match.similarity if match is not None else None,
+        ))
+        if ward_id is not None:
+            db.info.setdefault("dedup_pending", []).append((complaint_id, ward_id, submitted_at, sig, cluster_id))
+        if match is not None:
+            print(f"[Dedup] Complaint {complaint_id} duplicates {match.complaint_id} "
+                  f"(cluster {cluster_id}, similarity {match.similarity:.2f})")
+        return cluster_id
+
+    def _apply_pending(self, session: Session) -> None:
+        pending = session.info.pop("dedup_pending", None)
+        if not pending:
+            return
+        with self._lock:
+            for complaint_id, ward_id, submitted_at, sig, cluster_id in pending:
+                self.index.add(complaint_id, ward_id, submitted_at, sig, cluster_id)
+
+    # -------------------------
+    # Reading clusters
+    # -------------------------
+    def _describe(self, db: Session, cluster_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        members: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        rows = (
+            db.query(ComplaintSignature.cluster_id, ComplaintSignature.complaint_id, ComplaintSignature.similarity,
+                     models.Complaint.message, models.Complaint.current_status, models.Complaint.date_submitted)
+            .join(models.Complaint, models.Complaint.id == ComplaintSignature.complaint_id)
+            .filter(ComplaintSignature.cluster_id.in_(cluster_ids))
+            .order_by(ComplaintSignature.cluster_id, ComplaintSignature.complaint_id)
+        )
+        for cluster_id, complaint_id, score, message, status, submitted_at in rows:
+            members[cluster_id].append({
+                "complaint_id": complaint_id,
+                "similarity": round(score, 3) if score is not None else None,
+                "message": message,
+                "current_status": status,
+                "date_submitted": submitted_at.isoformat() if submitted_at else None,
+            })
+        heads = {
+            c.id: c for c in db.query(models.Complaint).filter(models.Complaint.id.in_(cluster_ids))
+        }
+        result = {}
+        for cluster_id in cluster_ids:
+            head = heads.get(cluster_id)
+            result[cluster_id] = {
+                "cluster_id": cluster_id,
+                "size": len(members[cluster_id]),
+                "ward_id": head.ward_id if head else None,
+                "department": head.department if head else None,
+                "urgency": head.urgency if head else None,
+                "message": head.message if head else None,
+                "members": members[cluster_id],
+            }
+        return result
+
+    def clusters(self, db: Session, ward_id: Optional[int] = None, days: int = 7, min_size: int = 2, limit: int = 50) -> List[Dict[str, Any]]:
+        """Largest duplicate clusters with a member submitted in the last `days` days."""
+        query = db.query(ComplaintSignature.cluster_id, func.count(ComplaintSignature.complaint_id).label("size")) \
+            .filter(ComplaintSignature.date_submitted >= datetime.now(timezone.utc) - timedelta(days=days))
+        if ward_id is not None:
+            query = query.filter(ComplaintSignature.ward_id == ward_id)
+        rows = query.group_by(ComplaintSignature.cluster_id) \
+            .having(func.count(ComplaintSignature.complaint_id) >= min_size) \
+            .order_by(func.count(ComplaintSignature.complaint_id).desc(), ComplaintSignature.cluster_id) \
+            .limit(limit).all()
+        described = self._describe(db, [cluster_id for cluster_id, _ in rows])
+        return [described[cluster_id] for cluster_id, _ in rows]
+
+    def cluster_of(self, db: Session, complaint_id: int) -> Optional[Dict[str, Any]]:
+        cluster_id = db.query(ComplaintSignature.cluster_id).filter(ComplaintSignature.complaint_id == complaint_id).scalar()
+        if cluster_id is None:
+            return None
+        return self._describe(db, [cluster_id])[cluster_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "indexed": len(self.index.entries),
+            "buckets": len(self.index.buckets),
+            "num_perm": DEDUP_NUM_PERM,
+            "bands": DEDUP_BANDS,
+            "threshold": DEDUP_THRESHOLD,
+            "window_hours": DEDUP_WINDOW_HOURS,
+        }
+
+
+duplicate_detector = DuplicateDetector()
+
+
+def _sync_once() -> None:
+    db = SessionLocal()
+    try:
+        duplicate_detector.sync(db)
+    except Exception as e:
+        db.rollback()
+        print(f"[Dedup] Sync failed: {e}")
+    finally:
+        db.close()
+
+
+async def run_sync_loop(interval_seconds: float = DEDUP_SYNC_SECONDS) -> None:
+    """Background index maintenance for the app's lifetime (the first round is the initial load)."""
+    while True:
+        await run_in_threadpool(_sync_once)
+        await asyncio.sleep(interval_seconds)
+
+
+@event.listens_for(Session, "after_commit")
+def _index_committed_signatures(session):
+    duplicate_detector._apply_pending(session)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_signatures(session):
+    session.info.pop("dedup_pending", None)
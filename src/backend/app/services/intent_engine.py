@@ -0,0 +1,90 @@
+# app/services/intent_engine.py
+"""
+Keyword intent detection for the chatbot.
+
+All keyword lists are compiled into one alternation regex, so a message is scanned
+once and every hit carries its rule rank; the lowest rank wins, ties go to the
+leftmost hit. Keywords match on word boundaries ("this" no longer matches "hi").
+
+English keywords of four letters or more also match their inflections: plural,
+-ed and -ing, with the final "e" dropped or the final consonant doubled ("files",
+"filed", "filing", "tracking", "submitted"). Shorter ones ("hi", "how") match exactly.
+
+Python's \\b treats Devanagari vowel signs as non-word characters, so boundaries are
+spelled out with explicit look-arounds. Devanagari keywords only need a left
+boundary because Nepali case markers attach to the stem (उजुरीको, गुनासोहरू).
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+# Rules in priority order. An intent may appear more than once so that strong
+# phrases ("my complaints") outrank generic nouns ("complaint").
+INTENT_RULES: List[Tuple[str, Sequence[str]]] = [
+    ("greeting", ["hello", "hi", "hey", "namaste", "greeting", "नमस्ते", "नमस्कार"]),
+    ("list_complaints", ["my complaints", "my grievances", "show all", "view all", "list all", "मेरा उजुरीहरू", "मेरो उजुरीहरू", "सबै उजुरी"]),
+    ("file_complaint", ["file", "register", "submit", "report", "दर्ता"]),
+    ("check_status", ["status", "track", "check", "progress", "update", "where is", "my complaint", "स्थिति", "अवस्था", "ट्र्याक"]),
+    ("list_complaints", ["list"]),
+    ("file_complaint", ["complaint", "grievance", "problem", "issue", "उजुरी", "गुनासो", "समस्या"]),
+    ("help", ["help", "support", "assist", "how", "what can you do", "guide", "मद्दत", "सहयोग", "सहायता"]),
+]
+
+_WORD_CHARS = r"\wऀ-ॿ"
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_INFLECTED = re.compile(r"[a-z]{4,}")
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: str
+    keyword: Optional[str] = None
+    span: Optional[Tuple[int, int]] = None
+
+
+def _inflections(word: str) -> str:
+    """`word` plus its plural, -ed and -ing forms (over-generation is harmless for matching)."""
+    if word.endswith("e"):
+        return f"{word[:-1]}(?:e|es|ed|ing)"
+    last = re.escape(word[-1])
+    return f"{re.escape(word)}(?:s|es|{last}?ed|{last}?ing)?"
+
+
+def _keyword_pattern(keyword: str) -> str:
+    if _INFLECTED.fullmatch(keyword):
+        return _inflections(keyword) + rf"(?![{_WORD_CHARS}])"
+    body = r"\s+".join(re.escape(part) for part in keyword.split())
+    right = "" if _DEVANAGARI.search(keyword) else rf"(?![{_WORD_CHARS}])"
+    return body + right
+
+
+class IntentEngine:
+    """Compiles `rules` once; `detect` returns the winning intent and the matched span."""
+
+    def __init__(self, rules: List[Tuple[str, Sequence[str]]] = INTENT_RULES, default: str = "unknown"):
+        self.default = default
+        self._intents = [intent for intent, _ in rules]
+        alternatives = []
+        for rank, (_, keywords) in enumerate(rules):
+            # Longest keyword first so phrases beat their own prefixes at the same position
+            ordered = sorted(keywords, key=len, reverse=True)
+            alternatives.append(f"(?P<r{rank}>" + "|".join(_keyword_pattern(k) for k in ordered) + ")")
+        # The left boundary is shared by every keyword, so it is checked once per position
+        self._pattern = re.compile(rf"(?<![{_WORD_CHARS}])(?:" + "|".join(alternatives) + ")", re.IGNORECASE)
+
+    def detect(self, message: str) -> IntentMatch:
+        best = None
+        for m in self._pattern.finditer(message or ""):
+            rank = int(m.lastgroup[1:])
+            if best is None or rank < best[0]:
+                best = (rank, m)
+                if rank == 0:
+                    break
+        if best is None:
+            return IntentMatch(self.default)
+        rank, m = best
+        return IntentMatch(self._intents[rank], m.group(0), m.span())
+
+
+intent_engine = IntentEngine()
+
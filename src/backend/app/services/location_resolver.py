@@ -0,0 +1,111 @@
+# app/services/location_resolver.py
+"""
+Batch resolution of ward/municipality/district names.
+
+Profiles and admin listings used to walk ward -> municipality -> district with one
+`.first()` per hop per row. These helpers resolve any number of ids with a single
+joined query per level, so the query count stays constant as the list grows.
+"""
+from typing import Dict, Any, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.location import District, Municipality, Ward
+
+
+def _ids(values: Iterable[Optional[int]]) -> List[int]:
+    return sorted({int(v) for v in values if v})
+
+
+def resolve_wards(db: Session, ward_ids: Iterable[Optional[int]]) -> Dict[int, Dict[str, Any]]:
+    """Map ward id -> ward/municipality/district names using one ward ⋈ municipality ⋈ district query."""
+    ids = _ids(ward_ids)
+    if not ids:
+        return {}
+    rows = (
+        db.query(
+            Ward.id, Ward.ward_number,
+            Municipality.id, Municipality.name,
+            District.id, District.name,
+        )
+        .join(Municipality, Ward.municipality_id == Municipality.id)
+        .outerjoin(District, Municipality.district_id == District.id)
+        .filter(Ward.id.in_(ids))
+        .all()
+    )
+    return {
+        ward_id: {
+            "ward_number": ward_number,
+            "ward_name": f"Ward {ward_number}",
+            "municipality_id": municipality_id,
+            "municipality_name": municipality_name,
+            "district_id": district_id,
+            "district_name": district_name,
+        }
+        for ward_id, ward_number, municipality_id, municipality_name, district_id, district_name in rows
+    }
+
+
+def resolve_municipalities(db: Session, municipality_ids: Iterable[Optional[int]]) -> Dict[int, Dict[str, Any]]:
+    """Map municipality id -> municipality/district names using one municipality ⋈ district query."""
+    ids = _ids(municipality_ids)
+    if not ids:
+        return {}
+    rows = (
+        db.query(Municipality.id, Municipality.name, District.id, District.name)
+        .outerjoin(District, Municipality.district_id == District.id)
+        .filter(Municipality.id.in_(ids))
+        .all()
+    )
+    return {
+        municipality_id: {
+            "municipality_name": municipality_name,
+            "district_id": district_id,
+            "district_name": district_name,
+        }
+        for municipality_id, municipality_name, district_id, district_name in rows
+    }
+
+
+def resolve_districts(db: Session, district_ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """Map district id -> district name."""
+    ids = _ids(district_ids)
+    if not ids:
+        return {}
+    return dict(db.query(District.id, District.name).filter(District.id.in_(ids)).all())
+
+
+def user_location_info(db: Session, ward_id: Optional[int]) -> Dict[str, Any]:
+    """ward_name / municipality_name / district_name for a single user, or {} when the ward is unknown."""
+    location = resolve_wards(db, [ward_id]).get(ward_id) if ward_id else None
+    if not location:
+        return {}
+    return {
+        "ward_name": location["ward_name"],
+        "municipality_name": location["municipality_name"],
+        "district_name": location["district_name"],
+    }
+
+
+def admin_location_names(db: Session, admins: List[Any], own_district: bool = False) -> List[Dict[str, Optional[str]]]:
+    """
+    municipality_name / district_name for each admin, in input order, from the assigned
+    municipality. With own_district (admin login), a super admin's own district_id also
+    gives the district name; an assigned municipality's district still takes precedence.
+    At most two queries regardless of how many admins are passed.
+    """
+    municipalities = resolve_municipalities(db, (a.municipality_id for a in admins))
+    districts = resolve_districts(db, (a.district_id for a in admins)) if own_district else {}
+
+    names = []
+    for admin in admins:
+        entry: Dict[str, Optional[str]] = {}
+        if admin.district_id in districts:
+            entry["district_name"] = districts[admin.district_id]
+        municipality = municipalities.get(admin.municipality_id)
+        if municipality:
+            entry["municipality_name"] = municipality["municipality_name"]
+            if municipality["district_name"] is not None:
+                entry["district_name"] = municipality["district_name"]
+        names.append(entry)
+    return names
@@ -0,0 +1,44 @@
+# app/services/password_service.py
+"""
+Argon2 password hashing off the event loop.
+
+Argon2 is deliberately slow and memory-hard, so a hash/verify call holds a thread
+for tens of milliseconds. All hashing goes through one bounded thread pool:
+async endpoints await it without blocking the event loop, and sync endpoints
+wait on it from their worker thread. argon2-cffi releases the GIL while
+hashing, so the pool runs calls in parallel up to PASSWORD_HASH_WORKERS and
+caps the memory argon2 can claim at any one time.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="argon2")
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, pwd_context.hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, pwd_context.verify, plain_password, hashed_password)
+
+
+def hash_password_blocking(password: str) -> str:
+    """For sync endpoints: runs on the shared pool so concurrent hashing stays bounded."""
+    return _executor.submit(pwd_context.hash, password).result()
+
+
+def verify_password_blocking(plain_password: str, hashed_password: str) -> bool:
+    """For sync endpoints: runs on the shared pool so concurrent hashing stays bounded."""
+    return _executor.submit(pwd_context.verify, plain_password, hashed_password).result()
@@ -0,0 +1,538 @@
+# app/services/sla_service.py
+"""
+SLA analytics derived from complaint_status_history.
+
+Two layers keep requests away from the raw history:
+  complaint_sla_facts  one row per complaint: time to first action, time to resolution,
+                       reopen count, plus department/urgency/location for grouping.
+  sla_summary          per dimension value ('all', 'department', 'municipality', 'urgency'):
+                       counts, averages and p50/p90/p99 of both timings.
+
+`refresh` is incremental. It only revisits complaints whose history rows, or the
+complaint row itself, changed since the stored watermark. Their facts are rebuilt
+from their (short) history, and only the summary groups they belong to are
+re-aggregated. The 'all' row, which every complaint belongs to, instead takes the
+changed facts' deltas for its counts and averages; its percentiles cannot be updated
+that way and are re-aggregated over every fact at most every
+SLA_ALL_PERCENTILES_MAX_AGE_SECONDS (the row's refreshed_at says when). On Postgres the
+percentiles come from percentile_cont; other dialects compute them in Python.
+
+Deleting a complaint through the ORM deletes its fact row with it. An after_flush hook
+then clears refreshed_at on the summary rows that fact counted in ('all' included),
+and the next refresh re-aggregates every row marked that way. Complaints deleted with
+plain SQL lose their fact row (via the cascade trigger or foreign key), but the
+summary only catches up on the next full refresh.
+
+Reads never refresh. `run_refresh_loop` (started with the app) calls `refresh_if_stale`
+every SLA_REFRESH_INTERVAL_SECONDS, and POST /api/analytics/sla/refresh forces one.
+Refreshes are serialized by a process lock plus, on Postgres, a transaction-scoped
+advisory lock, so workers never rebuild the same facts or summary rows concurrently;
+the scheduled job skips its turn instead of waiting when a refresh is already running.
+
+Definitions (status codes follow STATUS_LABEL_MAP: 0 PENDING, 1 IN PROCESS, 2 RESOLVED, 3 REJECTED):
+  first action   first history entry whose status is not PENDING
+  resolution     first RESOLVED entry
+  reopen         any PENDING / IN PROCESS entry after a RESOLVED one
+  first-time resolution   resolved and never reopened
+
+Configuration (environment):
+  SLA_REFRESH_INTERVAL_SECONDS  time between scheduled refreshes, 0 disables them (default 300)
+  SLA_WATERMARK_OVERLAP_SECONDS re-scan window covering commits that land out of order (default 120)
+  SLA_ALL_PERCENTILES_MAX_AGE_SECONDS  how old the 'all' row's percentiles may get (default 3600)
+"""
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, or_, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.database import run_db
+from app.models.sla import ComplaintSlaFact, SlaSummary, SlaRefreshState
+from app.schemas.complaint import STATUS_LABEL_MAP
+
+SLA_REFRESH_INTERVAL_SECONDS = int(os.getenv("SLA_REFRESH_INTERVAL_SECONDS", "300"))
+SLA_WATERMARK_OVERLAP_SECONDS = int(os.getenv("SLA_WATERMARK_OVERLAP_SECONDS", "120"))
+SLA_ALL_PERCENTILES_MAX_AGE_SECONDS = int(os.getenv("SLA_ALL_PERCENTILES_MAX_AGE_SECONDS", "3600"))
+CHUNK_SIZE = 1000
+# pg_advisory_xact_lock key shared by every worker ("SLA" in ASCII)
+REFRESH_LOCK_KEY = 0x534C41
+
+STATUS_CODES = {label: code for code, label in STATUS_LABEL_MAP.items()}
+PENDING, IN_PROCESS, RESOLVED = STATUS_CODES["PENDING"], STATUS_CODES["IN PROCESS"], STATUS_CODES["RESOLVED"]
+
+DIMENSIONS = {
+    "department": ComplaintSlaFact.department,
+    "municipality": ComplaintSlaFact.municipality_id,
+    "urgency": ComplaintSlaFact.urgency,
+}
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def _utc(dt: Optional[datetime]) -> Optional[datetime]:
+    if dt is None:
+        return None
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+# -------------------------
+# Writing history
+# -------------------------
+def record_status_change(db: Session, complaint: models.Complaint, new_status: Optional[str], changed_by_user_id: Optional[int] = None, comment: Optional[str] = None) -> None:
+    """Append a history row when `new_status` (a STATUS_LABEL_MAP label) differs from the complaint's current status."""
+    if new_status is None or new_status == complaint.current_status or new_status not in STATUS_CODES:
+        return
+    db.add(models.ComplaintStatusHistory(
+        complaint_id=complaint.id,
+        status=STATUS_CODES[new_status],
+        changed_by_user_id=changed_by_user_id,
+        comment=comment,
+    ))
+
+
+# -------------------------
+# Facts
+# -------------------------
+def compute_fact(submitted_at: Optional[datetime], history: List[Tuple[int, datetime]]) -> Dict[str, Any]:
+    """Timings for one complaint from its (status, changed_at) history ordered by changed_at."""
+    submitted_at = _utc(submitted_at)
+    first_action_at = resolved_at = None
+    reopen_count = 0
+    was_resolved = False
+    for status, changed_at in history:
+        changed_at = _utc(changed_at)
+        if first_action_at is None and status != PENDING:
+            first_action_at = changed_at
+        if status == RESOLVED:
+            if resolved_at is None:
+                resolved_at = changed_at
+            was_resolved = True
+        elif was_resolved and status in (PENDING, IN_PROCESS):
+            reopen_count += 1
+            was_resolved = False
+
+    def seconds_since_submit(moment):
+        if moment is None or submitted_at is None:
+            return None
+        return max((moment - submitted_at).total_seconds(), 0.0)
+
+    return {
+        "submitted_at": submitted_at,
+        "first_action_at": first_action_at,
+        "resolved_at": resolved_at,
+        "first_action_seconds": seconds_since_submit(first_action_at),
+        "resolution_seconds": seconds_since_submit(resolved_at),
+        "reopen_count": reopen_count,
+    }
+
+
+def _touched_complaint_ids(db: Session, since: Optional[datetime]) -> Set[int]:
+    if since is None:
+        return {cid for (cid,) in db.query(models.Complaint.id).all()}
+    touched = {cid for (cid,) in db.query(models.ComplaintStatusHistory.complaint_id)
+               .filter(models.ComplaintStatusHistory.changed_at >= since).distinct()}
+    touched |= {cid for (cid,) in db.query(models.Complaint.id)
+                .filter(or_(models.Complaint.updated_at >= since, models.Complaint.created_at >= since))}
+    return touched
+
+
+def _fact_totals(facts: Iterable[Tuple[Optional[float], Optional[float], int]]) -> Dict[str, float]:
+    """What (first_action_seconds, resolution_seconds, reopen_count) facts add to a summary row."""
+    totals = dict.fromkeys(("complaints", "actioned", "resolved", "reopened", "first_action_total", "resolution_total"), 0)
+    for first, resolution, reopen_count in facts:
+        totals["complaints"] += 1
+        totals["reopened"] += 1 if reopen_count else 0
+        if first is not None:
+            totals["actioned"] += 1
+            totals["first_action_total"] += first
+        if resolution is not None:
+            totals["resolved"] += 1
+            totals["resolution_total"] += resolution
+    return totals
+
+
+def _rebuild_facts(db: Session, complaint_ids: List[int]) -> Tuple[Dict[str, Set[str]], Dict[str, float]]:
+    """
+    Recompute facts for a chunk of complaints. Returns the summary groups whose members
+    changed, and the change in the 'all' row's totals (see `_fact_totals`).
+    """
+    affected: Dict[str, Set[str]] = defaultdict(set)
+
+    old = db.query(
+        ComplaintSlaFact.department, ComplaintSlaFact.municipality_id, ComplaintSlaFact.urgency,
+        ComplaintSlaFact.first_action_seconds, ComplaintSlaFact.resolution_seconds, ComplaintSlaFact.reopen_count,
+    ).filter(ComplaintSlaFact.complaint_id.in_(complaint_ids)).all()
+    for department, municipality_id, urgency, *_ in old:
+        affected["department"].add(str(department))
+        affected["municipality"].add(str(municipality_id))
+        affected["urgency"].add(str(urgency))
+
+    complaints = (
+        db.query(
+            models.Complaint.id, models.Complaint.department, models.Complaint.urgency,
+            models.Complaint.ward_id, models.Ward.municipality_id, models.Municipality.district_id,
+            models.Complaint.date_submitted,
+        )
+        .outerjoin(models.Ward, models.Complaint.ward_id == models.Ward.id)
+        .outerjoin(models.Municipality, models.Ward.municipality_id == models.Municipality.id)
+        .filter(models.Complaint.id.in_(complaint_ids))
+        .all()
+    )
+    history: Dict[int, List[Tuple[int, datetime]]] = defaultdict(list)
+    for complaint_id, status, changed_at in (
+        db.query(models.ComplaintStatusHistory.complaint_id, models.ComplaintStatusHistory.status, models.ComplaintStatusHistory.changed_at)
+        .filter(models.ComplaintStatusHistory.complaint_id.in_(complaint_ids))
+        .order_by(models.ComplaintStatusHistory.complaint_id, models.ComplaintStatusHistory.changed_at, models.ComplaintStatusHistory.id)
+    ):
+        history[complaint_id].append((status, changed_at))
+
+    db.query(ComplaintSlaFact).filter(ComplaintSlaFact.complaint_id.in_(complaint_ids)).delete(synchronize_session=False)
+    facts = []
+    for complaint_id, department, urgency, ward_id, municipality_id, district_id, submitted_at in complaints:
+        fact = compute_fact(submitted_at, history.get(complaint_id, []))
+        facts.append({
+            "complaint_id": complaint_id, "department": department, "urgency": urgency,
+            "ward_id": ward_id, "municipality_id": municipality_id, "district_id": district_id,
+            **fact,
+        })
+        affected["department"].add(str(department))
+        affected["municipality"].add(str(municipality_id))
+        affected["urgency"].add(str(urgency))
+    if facts:
+        db.bulk_insert_mappings(ComplaintSlaFact, facts)
+
+    removed = _fact_totals(row[3:] for row in old)
+    added = _fact_totals((f["first_action_seconds"], f["resolution_seconds"], f["reopen_count"]) for f in facts)
+    return affected, {key: added[key] - removed[key] for key in added}
+
+
+# -------------------------
+# Summary
+# -------------------------
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Linear interpolation, same as Postgres percentile_cont."""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def _group_key(value) -> str:
+    return str(value)
+
+
+def _aggregate_postgres(db: Session, dimension: str, keys: Optional[Set[str]]) -> List[Dict[str, Any]]:
+    group_expr = "'all'" if dimension == "all" else f"CAST({DIMENSIONS[dimension].key} AS TEXT)"
+    where = ""
+    params: Dict[str, Any] = {}
+    if keys is not None:
+        non_null = [k for k in keys if k != "None"]
+        clauses = []
+        if non_null:
+            clauses.append(f"CAST({DIMENSIONS[dimension].key} AS TEXT) = ANY(:keys)")
+            params["keys"] = non_null
+        if "None" in keys:
+            clauses.append(f"{DIMENSIONS[dimension].key} IS NULL")
+        where = "WHERE " + " OR ".join(clauses)
+    rows = db.execute(text(
+        f"SELECT {group_expr} AS group_key, count(*), count(first_action_seconds), count(resolution_seconds), "
+        f"count(*) FILTER (WHERE reopen_count > 0), "
+        f"avg(first_action_seconds), percentile_cont(ARRAY[0.5, 0.9, 0.99]) WITHIN GROUP (ORDER BY first_action_seconds), "
+        f"avg(resolution_seconds), percentile_cont(ARRAY[0.5, 0.9, 0.99]) WITHIN GROUP (ORDER BY resolution_seconds) "
+        f"FROM complaint_sla_facts {where} GROUP BY 1"
+    ), params).all()
+    out = []
+    for key, complaints, actioned, resolved, reopened, avg_first, p_first, avg_res, p_res in rows:
+        p_first, p_res = p_first or [None] * 3, p_res or [None] * 3
+        out.append({
+            "group_key": _group_key(key), "complaints": complaints, "actioned": actioned,
+            "resolved": resolved, "reopened": reopened,
+            "avg_first_action_seconds": avg_first,
+            "p50_first_action_seconds": p_first[0], "p90_first_action_seconds": p_first[1], "p99_first_action_seconds": p_first[2],
+            "avg_resolution_seconds": avg_res,
+            "p50_resolution_seconds": p_res[0], "p90_resolution_seconds": p_res[1], "p99_resolution_seconds": p_res[2],
+        })
+    return out
+
+
+def _aggregate_python(db: Session, dimension: str, keys: Optional[Set[str]]) -> List[Dict[str, Any]]:
+    column = None if dimension == "all" else DIMENSIONS[dimension]
+    query = db.query(
+        column if column is not None else text("'all'"),
+        ComplaintSlaFact.first_action_seconds, ComplaintSlaFact.resolution_seconds, ComplaintSlaFact.reopen_count,
+    )
+    groups: Dict[str, Dict[str, list]] = defaultdict(lambda: {"first": [], "resolution": [], "n": [0], "reopened": [0]})
+    for key, first, resolution, reopen_count in query.yield_per(10000):
+        key = _group_key(key)
+        if keys is not None and key not in keys:
+            continue
+        group = groups[key]
+        group["n"][0] += 1
+        group["reopened"][0] += 1 if reopen_count else 0
+        if first is not None:
+            group["first"].append(first)
+        if resolution is not None:
+            group["resolution"].append(resolution)
+    out = []
+    for key, group in groups.items():
+        first, resolution = sorted(group["first"]), sorted(group["resolution"])
+        out.append({
+            "group_key": key, "complaints": group["n"][0], "actioned": len(first),
+            "resolved": len(resolution), "reopened": group["reopened"][0],
+            "avg_first_action_seconds": sum(first) / len(first) if first else None,
+            "p50_first_action_seconds": _percentile(first, 0.5), "p90_first_action_seconds": _percentile(first, 0.9), "p99_first_action_seconds": _percentile(first, 0.99),
+            "avg_resolution_seconds": sum(resolution) / len(resolution) if resolution else None,
+            "p50_resolution_seconds": _percentile(resolution, 0.5), "p90_resolution_seconds": _percentile(resolution, 0.9), "p99_resolution_seconds": _percentile(resolution, 0.99),
+        })
+    return out
+
+
+def _refresh_summary(db: Session, dimension: str, keys: Optional[Set[str]]) -> None:
+    """Re-aggregate `keys` of `dimension` (all of them when keys is None) into sla_summary."""
+    aggregate = _aggregate_postgres if db.get_bind().dialect.name == "postgresql" else _aggregate_python
+    rows = aggregate(db, dimension, keys)
+    stale = db.query(SlaSummary).filter(SlaSummary.dimension == dimension)
+    if keys is not None:
+        stale = stale.filter(SlaSummary.group_key.in_(list(keys)))
+    stale.delete(synchronize_session=False)
+    now = datetime.now(timezone.utc)
+    db.bulk_insert_mappings(SlaSummary, [{"dimension": dimension, "refreshed_at": now, **row} for row in rows])
+
+
+def _shift_mean(mean: Optional[float], count: int, total_change: float, new_count: int) -> Optional[float]:
+    if new_count <= 0:
+        return None
+    return ((mean or 0.0) * count + total_change) / new_count
+
+
+def _apply_all_delta(db: Session, delta: Dict[str, float]) -> None:
+    """
+    Add `delta` (from `_rebuild_facts`) to the 'all' row's counts and averages. The row is
+    re-aggregated in full instead when it is missing, marked stale, or its percentiles are
+    older than SLA_ALL_PERCENTILES_MAX_AGE_SECONDS.
+    """
+    row = db.query(SlaSummary).filter(SlaSummary.dimension == "all", SlaSummary.group_key == "all").first()
+    if row is None or row.refreshed_at is None or \
+            datetime.now(timezone.utc) - _utc(row.refreshed_at) >= timedelta(seconds=SLA_ALL_PERCENTILES_MAX_AGE_SECONDS):
+        _refresh_summary(db, "all", None)
+        return
+    actioned = row.actioned + delta["actioned"]
+    resolved = row.resolved + delta["resolved"]
+    values = {
+        "complaints": row.complaints + delta["complaints"],
+        "actioned": actioned,
+        "resolved": resolved,
+        "reopened": row.reopened + delta["reopened"],
+        "avg_first_action_seconds": _shift_mean(row.avg_first_action_seconds, row.actioned, delta["first_action_total"], actioned),
+        "avg_resolution_seconds": _shift_mean(row.avg_resolution_seconds, row.resolved, delta["resolution_total"], resolved),
+        # refreshed_at keeps dating the percentiles, which are left as they are
+        "refreshed_at": row.refreshed_at,
+    }
+    db.query(SlaSummary).filter(SlaSummary.id == row.id).update(values, synchronize_session=False)
+
+
+def _stale_summary_keys(db: Session) -> Dict[str, Set[str]]:
+    """Summary rows marked for re-aggregation (refreshed_at cleared), by dimension."""
+    stale: Dict[str, Set[str]] = defaultdict(set)
+    for dimension, group_key in db.query(SlaSummary.dimension, SlaSummary.group_key).filter(SlaSummary.refreshed_at.is_(None)):
+        stale[dimension].add(group_key)
+    return stale
+
+
+_refresh_lock = threading.Lock()
+
+
+def _lock_refresh(db: Session, wait: bool) -> bool:
+    """Take the cross-process refresh lock for the current transaction (released on commit/rollback)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    if wait:
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY})
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY}).scalar())
+
+
+def _refresh_state(db: Session) -> SlaRefreshState:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        db.execute(insert(SlaRefreshState).values(id=1).on_conflict_do_nothing(index_elements=["id"]))
+    elif db.get(SlaRefreshState, 1) is None:
+        db.add(SlaRefreshState(id=1))
+        db.flush()
+    return db.get(SlaRefreshState, 1)
+
+
+def _is_fresh(state: Optional[SlaRefreshState], max_age_seconds: float) -> bool:
+    return state is not None and state.refreshed_at is not None and \
+        datetime.now(timezone.utc) - _utc(state.refreshed_at) < timedelta(seconds=max_age_seconds)
+
+
+def refresh(db: Session, full: bool = False, wait: bool = True, max_age_seconds: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Bring facts and summary up to date. `full=True` rebuilds everything.
+
+    Only one refresh runs at a time. With `wait=False` the call returns None instead of
+    queueing behind a running one; with `max_age_seconds` it returns None when the last
+    refresh (checked after taking the lock) is more recent than that.
+    """
+    if not _refresh_lock.acquire(blocking=wait):
+        return None
+    try:
+        if not _lock_refresh(db, wait):
+            db.rollback()
+            return None
+        state = _refresh_state(db)
+        if max_age_seconds is not None and _is_fresh(state, max_age_seconds):
+            db.rollback()
+            return None
+        return _refresh_locked(db, state, full)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        _refresh_lock.release()
+
+
+def _refresh_locked(db: Session, state: SlaRefreshState, full: bool) -> Dict[str, Any]:
+    started = datetime.now(timezone.utc)
+    since = None if full or state.watermark is None else _utc(state.watermark) - timedelta(seconds=SLA_WATERMARK_OVERLAP_SECONDS)
+
+    touched = sorted(_touched_complaint_ids(db, since))
+    stale = _stale_summary_keys(db) if since is not None else {}
+    affected: Dict[str, Set[str]] = defaultdict(set)
+    all_delta: Dict[str, float] = defaultdict(int)
+    for start in range(0, len(touched), CHUNK_SIZE):
+        chunk_affected, chunk_delta = _rebuild_facts(db, touched[start:start + CHUNK_SIZE])
+        for dimension, keys in chunk_affected.items():
+            affected[dimension] |= keys
+        for key, change in chunk_delta.items():
+            all_delta[key] += change
+
+    if since is None:
+        db.query(SlaSummary).delete(synchronize_session=False)
+        for dimension in DIMENSIONS:
+            _refresh_summary(db, dimension, None)
+        _refresh_summary(db, "all", None)
+    else:
+        for dimension, keys in stale.items():
+            if dimension != "all":
+                affected[dimension] |= keys
+        for dimension, keys in affected.items():
+            _refresh_summary(db, dimension, keys)
+        if "all" in stale:
+            _refresh_summary(db, "all", None)
+        elif touched:
+            _apply_all_delta(db, all_delta)
+
+    finished = datetime.now(timezone.utc)
+    state.watermark = started
+    state.refreshed_at = finished
+    db.commit()
+    elapsed = (finished - started).total_seconds()
+    print(f"[SLA] Refreshed {len(touched)} complaints ({'full' if since is None else 'incremental'}) in {elapsed:.2f}s")
+    return {"complaints_refreshed": len(touched), "mode": "full" if since is None else "incremental", "elapsed_seconds": round(elapsed, 3)}
+
+
+def refresh_if_stale(db: Session, max_age_seconds: float = SLA_REFRESH_INTERVAL_SECONDS) -> Optional[Dict[str, Any]]:
+    """Incremental refresh unless one ran within `max_age_seconds` or another is running right now."""
+    return refresh(db, wait=False, max_age_seconds=max_age_seconds)
+
+
+async def run_refresh_loop(interval_seconds: float = SLA_REFRESH_INTERVAL_SECONDS) -> None:
+    """Scheduled refresh for the app's lifetime. Every worker runs one; the lock and staleness check keep it to one refresh per interval."""
+    while True:
+        try:
+            # Half the interval, so timer jitter between workers does not skip a whole round
+            await run_db(refresh_if_stale, interval_seconds / 2)
+        except Exception as e:
+            print(f"[SLA] Scheduled refresh failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+# -------------------------
+# Reading
+# -------------------------
+def _summary_dict(row: SlaSummary) -> Dict[str, Any]:
+    def hours(seconds):
+        return round(seconds / 3600, 2) if seconds is not None else None
+
+    return {
+        "complaints": row.complaints,
+        "actioned": row.actioned,
+        "resolved": row.resolved,
+        "reopened": row.reopened,
+        "reopen_rate": round(row.reopened / row.resolved * 100, 1) if row.resolved else 0.0,
+        "first_time_resolution_rate": round((row.resolved - row.reopened) / row.resolved * 100, 1) if row.resolved else 0.0,
+        "first_action_hours": {"avg": hours(row.avg_first_action_seconds), "p50": hours(row.p50_first_action_seconds),
+                               "p90": hours(row.p90_first_action_seconds), "p99": hours(row.p99_first_action_seconds)},
+        "resolution_hours": {"avg": hours(row.avg_resolution_seconds), "p50": hours(row.p50_resolution_seconds),
+                             "p90": hours(row.p90_resolution_seconds), "p99": hours(row.p99_resolution_seconds)},
+        "refreshed_at": row.refreshed_at.isoformat() if row.refreshed_at else None,
+    }
+
+
+def sla_summary(db: Session, dimension: Optional[str] = None) -> Dict[str, Any]:
+    """Stored SLA aggregates, grouped by dimension then group key."""
+    query = db.query(SlaSummary)
+    if dimension:
+        query = query.filter(SlaSummary.dimension == dimension)
+    result: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    for row in query.order_by(SlaSummary.dimension, SlaSummary.group_key):
+        result[row.dimension][row.group_key] = _summary_dict(row)
+    return {"data": dict(result)}
+
+
+def scope_metrics(db: Session, ward_id: Optional[int] = None, department: Optional[str] = None, municipality_id: Optional[int] = None, district_id: Optional[int] = None) -> Dict[str, Any]:
+    """Averages and rates for an arbitrary filter straight from the facts table (one indexed aggregate)."""
+    query = db.query(
+        func.count(ComplaintSlaFact.complaint_id),
+        func.avg(ComplaintSlaFact.first_action_seconds),
+        func.count(ComplaintSlaFact.resolution_seconds),
+        func.sum(case((ComplaintSlaFact.reopen_count > 0, 1), else_=0)),
+        func.avg(ComplaintSlaFact.resolution_seconds),
+    )
+    if ward_id:
+        query = query.filter(ComplaintSlaFact.ward_id == ward_id)
+    if department:
+        query = query.filter(ComplaintSlaFact.department == department)
+    if municipality_id:
+        query = query.filter(ComplaintSlaFact.municipality_id == municipality_id)
+    if district_id:
+        query = query.filter(ComplaintSlaFact.district_id == district_id)
+    complaints, avg_first, resolved, reopened, avg_resolution = query.one()
+    reopened = int(reopened or 0)
+    return {
+        "complaints": complaints or 0,
+        "avg_first_action_hours": round(avg_first / 3600, 2) if avg_first is not None else 0,
+        "avg_resolution_hours": round(avg_resolution / 3600, 2) if avg_resolution is not None else 0,
+        "resolution_rate": round(resolved / complaints * 100, 1) if complaints else 0,
+        "first_time_resolution_rate": round((resolved - reopened) / resolved * 100, 1) if resolved else 0,
+        "reopen_rate": round(reopened / resolved * 100, 1) if resolved else 0,
+    }
+
+
+# -------------------------
+# Deletes
+# -------------------------
+@event.listens_for(Session, "after_flush")
+def _mark_deleted_facts(session, flush_context):
+    """Clear refreshed_at on the summary rows that facts deleted in this flush counted in."""
+    deleted = [obj for obj in session.deleted if isinstance(obj, ComplaintSlaFact)]
+    if not deleted:
+        return
+    keys = {("all", "all")}
+    for fact in deleted:
+        keys |= {("department", str(fact.department)), ("municipality", str(fact.municipality_id)), ("urgency", str(fact.urgency))}
+    session.connection().execute(
+        update(SlaSummary)
+        .where(or_(*(and_(SlaSummary.dimension == dimension, SlaSummary.group_key == key) for dimension, key in keys)))
+        .values(refreshed_at=None)
+    )
@@ -0,0 +1,53 @@
+"""
+JSON responses for large payloads.
+
+`ORJSONResponse` is the application's default response class: the payload FastAPI
+hands over is rendered with orjson instead of the stdlib encoder.
+
+For big lists, `model_list_response` goes one step further and skips FastAPI's
+response_model pass entirely. Pydantic's core validates the ORM objects (or SQLAlchemy
+Row tuples, which expose columns as attributes) and writes JSON bytes in a single
+Rust call, with no intermediate list of dicts. The route keeps its response_model for
+the OpenAPI schema; returning a Response makes FastAPI pass it through untouched.
+
+See scripts/serialization_benchmark.py for the numbers.
+"""
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def validate_list(model: Type[BaseModel], rows: Iterable[Any]) -> List[BaseModel]:
+    """Validate ORM objects / rows into `model` instances in one core call."""
+    return list_adapter(model).validate_python(rows, from_attributes=True)
+
+
+def model_list_json(model: Type[BaseModel], rows: Iterable[Any]) -> bytes:
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def model_list_response(model: Type[BaseModel], rows: Iterable[Any]) -> Response:
+    """JSON array of `model` straight from ORM objects or rows."""
+    return Response(content=model_list_json(model, rows), media_type="application/json")
+
+
+def items_response(model: Type[BaseModel], items: List[BaseModel]) -> Response:
+    """JSON array of already validated (and possibly amended) `model` instances."""
+    return Response(content=list_adapter(model).dump_json(items), media_type="application/json")
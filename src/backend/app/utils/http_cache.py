@@ -0,0 +1,54 @@
+"""
+ETag / conditional GET helpers.
+
+An endpoint computes a cheap version for its data (a data_versions counter, a cache
+file timestamp) *before* doing any real work, turns it into an ETag, and answers a
+matching If-None-Match with an empty 304. Otherwise it sets ETag and Cache-Control
+on the response and builds the payload as usual. check_etag does both steps for
+dependencies, which cannot return a response and raise the 304 instead.
+"""
+import hashlib
+import json
+import os
+
+from fastapi import HTTPException, Request, Response
+
+ANALYTICS_CACHE_CONTROL = os.getenv("ANALYTICS_CACHE_CONTROL", "private, max-age=0, must-revalidate")
+LOCATION_CACHE_CONTROL = os.getenv("LOCATION_CACHE_CONTROL", "public, max-age=300, must-revalidate")
+
+
+def make_etag(request: Request, *version_parts) -> str:
+    """Weak ETag over the path, query string and the data version."""
+    raw = json.dumps([request.url.path, str(request.url.query), *version_parts], default=str, sort_keys=True)
+    return 'W/"' + hashlib.sha1(raw.encode("utf-8")).hexdigest()[:24] + '"'
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """True when the client's If-None-Match already names `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def check_etag(request: Request, response: Response, etag: str, cache_control: str) -> None:
+    """Raise an empty 304 when the client already has `etag`; otherwise set the cache headers."""
+    if is_fresh(request, etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    set_cache_headers(response, etag, cache_control)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+db_throughput_load_test.py
+Measure request throughput and latency of the complaints and analytics endpoints under
+concurrent load. Run it once per server configuration (e.g. default pool vs tuned pool,
+DB_ASYNC_ENABLED=false vs true) and compare the reports.
+
+Usage:
+    python db_throughput_load_test.py --url http://localhost:8000 --concurrency 50 --seconds 20
+    python db_throughput_load_test.py --paths /api/analytics/summary /api/analytics/by-status
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from load_test_stats import percentile
+
+DEFAULT_PATHS = [
+    "/api/complaints/",
+    "/api/analytics/summary",
+    "/api/analytics/by-department",
+    "/api/analytics/trends/monthly",
+]
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: List[float], errors: Dict[str, int]):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            if resp.status_code != 200:
+                errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+                continue
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_path(client: httpx.AsyncClient, path: str, concurrency: int, seconds: float):
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client, path, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"{path:<36} {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50={percentile(latencies, 50):7.1f}ms p99={percentile(latencies, 99):7.1f}ms "
+        f"mean={statistics.fmean(latencies) if latencies else 0.0:7.1f}ms errors={errors or 0}"
+    )
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(base_url=args.url, timeout=60, limits=limits) as client:
+        for path in args.paths:
+            await run_path(client, path, args.concurrency, args.seconds)
+        if args.admin_token:
+            pool = await client.get("/health/db/pool", headers={"Authorization": f"Bearer {args.admin_token}"})
+            if pool.status_code == 200:
+                print(f"pool: {pool.json()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", "-u", default="http://localhost:8000", help="API base URL.")
+    parser.add_argument("--concurrency", "-c", type=int, default=50, help="Concurrent clients per endpoint.")
+    parser.add_argument("--seconds", "-s", type=float, default=20.0, help="Load duration per endpoint.")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS, help="Endpoints to load.")
+    parser.add_argument("--admin-token", help="Admin bearer token; prints /health/db/pool after the run.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
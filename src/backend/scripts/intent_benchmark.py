@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+intent_benchmark.py
+Per-message cost of chatbot intent detection: the compiled keyword matcher
+(app/services/intent_engine.py) against the substring scan it replaced.
+Accuracy is covered by tests/backend/test_intent_engine.py; this only times it.
+
+Usage:
+    python scripts/intent_benchmark.py
+    python scripts/intent_benchmark.py --number 2000
+"""
+
+import argparse
+import timeit
+
+from app.services.intent_engine import intent_engine
+
+MESSAGES = [
+    "hello",
+    "I want to file a complaint",
+    "there is a problem with the road",
+    "बाटोमा समस्या छ",
+    "check status of complaint 45",
+    "मेरो उजुरीको स्थिति",
+    "show my complaints",
+    "what can you do",
+    "this is about the water tank",
+    "Garbage has not been collected from the main road for ten days and it smells terrible.",
+]
+
+
+def legacy_detect(message: str) -> str:
+    """detect_intent as it was in chatbot_api.py before the compiled matcher."""
+    message_lower = message.lower()
+    if any(word in message_lower for word in ["hello", "hi", "hey", "namaste", "greetings"]):
+        return "greeting"
+    if any(word in message_lower for word in ["file", "register", "submit", "complaint", "grievance", "problem", "issue", "report"]):
+        return "file_complaint"
+    if any(word in message_lower for word in ["status", "track", "check", "progress", "update", "where is", "my complaint"]):
+        return "check_status"
+    if any(word in message_lower for word in ["my complaints", "my grievances", "list", "show all", "view all"]):
+        return "list_complaints"
+    if any(word in message_lower for word in ["help", "support", "assist", "how", "what can you do", "guide"]):
+        return "help"
+    return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=1000, help="Passes over the sample messages.")
+    args = parser.parse_args()
+
+    runs = [
+        ("substring scan (before)", lambda: [legacy_detect(m) for m in MESSAGES]),
+        ("compiled matcher", lambda: [intent_engine.detect(m) for m in MESSAGES]),
+    ]
+    for name, fn in runs:
+        seconds = min(timeit.repeat(fn, number=args.number, repeat=3))
+        print(f"{name:<24} {seconds / (args.number * len(MESSAGES)) * 1e6:8.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+login_burst_load_test.py
+Fire a burst of concurrent chatbot logins and measure the latency of an unrelated
+endpoint while the burst is in flight. If password hashing blocks the event loop,
+the probe p99 climbs to roughly (logins x hash time); with hashing offloaded it
+stays close to the idle baseline.
+
+Usage:
+    python login_burst_load_test.py --url http://localhost:8000 \
+        --email citizen@example.com --password secret --logins 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from load_test_stats import percentile
+
+
+def report(name: str, latencies_ms: List[float]):
+    print(
+        f"{name:<12} n={len(latencies_ms):<5} "
+        f"p50={percentile(latencies_ms, 50):8.1f}ms "
+        f"p99={percentile(latencies_ms, 99):8.1f}ms "
+        f"max={max(latencies_ms, default=0.0):8.1f}ms "
+        f"mean={statistics.fmean(latencies_ms) if latencies_ms else 0.0:8.1f}ms"
+    )
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, interval: float, out: List[float]):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        out.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str, out: List[float]):
+    start = time.perf_counter()
+    resp = await client.post("/api/chatbot/auth/login", json={"email": email, "password": password})
+    out.append((time.perf_counter() - start) * 1000)
+    if resp.status_code != 200:
+        print(f"login failed: {resp.status_code} {resp.text[:200]}")
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.logins + 10)
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        # Idle baseline for the probe endpoint
+        baseline: List[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe_path, stop, args.interval, baseline))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await task
+
+        # Same probe while a burst of logins is in flight
+        during: List[float] = []
+        logins: List[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe_path, stop, args.interval, during))
+        await asyncio.gather(*(login(client, args.email, args.password, logins) for _ in range(args.logins)))
+        stop.set()
+        await task
+
+    report("baseline", baseline)
+    report("during", during)
+    report("logins", logins)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", "-u", default="http://localhost:8000", help="API base URL.")
+    parser.add_argument("--email", required=True, help="Email of an existing citizen account.")
+    parser.add_argument("--password", required=True, help="Password of that account.")
+    parser.add_argument("--logins", "-n", type=int, default=50, help="Concurrent logins in the burst.")
+    parser.add_argument("--probe-path", default="/", help="Unrelated endpoint to probe during the burst.")
+    parser.add_argument("--interval", type=float, default=0.01, help="Delay in seconds between probe requests.")
+    parser.add_argument("--baseline-seconds", type=float, default=2.0, help="Idle probing before the burst.")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+manage_partitions.py
+Maintenance for the monthly partitions of `complaints` and `complaint_status_history`
+(PostgreSQL). Creates partitions for the coming months before rows arrive, and detaches
+partitions older than the retention window into an archive schema, where they stay
+queryable but no longer slow down dashboard queries on the live tables.
+
+Run it from cron (e.g. daily); every step is idempotent.
+
+Usage:
+    python scripts/manage_partitions.py --months-ahead 3
+    python scripts/manage_partitions.py --detach-older-than 24 --archive-schema archive
+    python scripts/manage_partitions.py --list
+"""
+
+import argparse
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.models.complaint import Complaint, ComplaintStatusHistory
+from app.models.partitioning import (
+    add_months,
+    ensure_month_partitions,
+    existing_partitions,
+    month_range,
+    month_start,
+    partition_column,
+    partition_name,
+)
+
+TABLES = [Complaint.__table__, ComplaintStatusHistory.__table__]
+
+
+def partition_month(table_name: str, name: str):
+    match = re.fullmatch(rf"{re.escape(table_name)}_p(\d{{4}})_(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months-ahead", type=int, default=3, help="Create partitions up to this many months ahead.")
+    parser.add_argument("--detach-older-than", type=int, default=None, help="Detach partitions whose month ended more than N months ago.")
+    parser.add_argument("--archive-schema", default="archive", help="Schema that detached partitions are moved into.")
+    parser.add_argument("--list", action="store_true", help="Only list the current partitions.")
+    parser.add_argument("--dry-run", action="store_true", help="Print what would be done without changing anything.")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print(f"Partitioning is PostgreSQL-only; nothing to do for {engine.dialect.name}.")
+        return
+
+    this_month = month_start(date.today())
+    with engine.begin() as conn:
+        for table in TABLES:
+            partitions = existing_partitions(conn, table.name)
+            if args.list:
+                print(f"{table.name}: {len(partitions)} partitions")
+                for name, bound in partitions:
+                    print(f"  {name:<40} {bound}")
+                continue
+
+            column = partition_column(table)
+            months = month_range(this_month, add_months(this_month, args.months_ahead))
+            if args.dry_run:
+                attached = {name for name, _ in partitions}
+                missing = [m for m in months if partition_name(table.name, m) not in attached]
+                print(f"[dry-run] {table.name}: would create {len(missing)} partitions")
+            else:
+                created = ensure_month_partitions(conn, table.name, column, months)
+                print(f"{table.name}: created {len(created)} partitions {created}")
+
+            if args.detach_older_than is None:
+                continue
+            cutoff = add_months(this_month, -args.detach_older_than)
+            old = [name for name, _ in partitions if (partition_month(table.name, name) or cutoff) < cutoff]
+            if args.dry_run:
+                print(f"[dry-run] {table.name}: would detach {old} into {args.archive_schema}")
+                continue
+            if old:
+                conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {args.archive_schema}"))
+            for name in old:
+                conn.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name}"))
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {args.archive_schema}"))
+                print(f"{table.name}: detached {name} -> {args.archive_schema}.{name}")
+
+
+if __name__ == "__main__":
+    main()
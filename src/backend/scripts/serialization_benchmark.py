@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+serialization_benchmark.py
+Micro-benchmark of JSON serialization for large complaint lists. It loads N complaints
+(default 10k) with ward -> municipality -> district into a scratch SQLite database, then
+times only the serialization step of each response path:
+
+  stdlib          response_model validation, dump to Python, json.dumps (the old JSONResponse path)
+  orjson          same validation and dump, rendered by the ORJSONResponse default class
+  pydantic-core   TypeAdapter validate + dump_json straight from ORM objects (model_list_response)
+
+and, for /api/chatbot/auth/complaints:
+
+  dicts+stdlib    per-row dicts via extract_str/extract_int, jsonable_encoder, json.dumps
+  rows+core       SQL row tuples validated and dumped by pydantic-core
+
+Usage:
+    python scripts/serialization_benchmark.py
+    python scripts/serialization_benchmark.py --rows 50000 --repeat 7
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "sambodhan_serialization_benchmark.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from sqlalchemy import String, case, cast, func, literal  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+import app.models.admin  # noqa: E402,F401  (misclassified_complaints references admins)
+from app import models, schemas  # noqa: E402
+from app.chatbot_api import UserComplaintItem, extract_int, extract_str  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.schemas.complaint import DEPARTMENT_LABEL_MAP, STATUS_LABEL_MAP, URGENCY_LABEL_MAP  # noqa: E402
+from app.utils.fast_json import ORJSONResponse, list_adapter, model_list_json  # noqa: E402
+
+MESSAGES = [
+    "There is no water supply in our tole since yesterday morning.",
+    "Street lights near the school have been broken for two weeks.",
+    "हाम्रो टोलमा हिजो बिहानदेखि खानेपानी आएको छैन।",
+    "Garbage has not been collected from the main road for ten days and it smells terrible.",
+]
+
+
+def seed(rows: int) -> None:
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    district = models.District(name="Kathmandu")
+    db.add(district)
+    db.flush()
+    municipalities = [models.Municipality(name=f"Municipality {i}", district_id=district.id) for i in range(5)]
+    db.add_all(municipalities)
+    db.flush()
+    wards = [models.Ward(ward_number=n, municipality_id=m.id) for m in municipalities for n in range(1, 11)]
+    db.add_all(wards)
+    db.flush()
+    user = models.User(name="Benchmark", email="bench@example.com", password_hash="x", ward_id=wards[0].id)
+    db.add(user)
+    db.flush()
+    now = datetime.now(timezone.utc)
+    rng = random.Random(7)
+    db.execute(models.Complaint.__table__.insert(), [
+        {
+            "citizen_id": user.id,
+            "message": rng.choice(MESSAGES),
+            "department": rng.choice(list(DEPARTMENT_LABEL_MAP.values())),
+            "urgency": rng.choice(list(URGENCY_LABEL_MAP.values())),
+            "current_status": rng.choice(list(STATUS_LABEL_MAP.values())),
+            "date_submitted": now - timedelta(minutes=i),
+            "ward_id": rng.choice(wards).id,
+        }
+        for i in range(rows)
+    ])
+    db.commit()
+    db.close()
+
+
+def best_of(repeat: int, fn) -> tuple:
+    timings, size = [], 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn())
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, size
+
+
+def legacy_dicts(complaints):
+    result = []
+    for complaint in complaints:
+        ward = complaint.ward
+        municipality = ward.municipality if ward else None
+        district = municipality.district if municipality else None
+        department_str = extract_str(complaint, "department") or ""
+        urgency_str = extract_str(complaint, "urgency") or ""
+        result.append({
+            "id": extract_int(complaint, "id"),
+            "message": extract_str(complaint, "message"),
+            "department": department_str,
+            "department_name": department_str if department_str else "Unknown",
+            "urgency": urgency_str,
+            "urgency_name": urgency_str if urgency_str else "NORMAL",
+            "current_status": extract_str(complaint, "current_status") or "PENDING",
+            "status_name": extract_str(complaint, "current_status") or "PENDING",
+            "created_at": getattr(complaint, "created_at", None),
+            "ward_id": extract_int(complaint, "ward_id"),
+            "ward_name": f"Ward {ward.ward_number}" if (ward and ward.ward_number) else "",
+            "ward_number": ward.ward_number if ward else None,
+            "municipality_id": municipality.id if municipality else None,
+            "municipality_name": municipality.name if municipality else None,
+            "district_id": district.id if district else None,
+            "district_name": district.name if district else None,
+        })
+    return result
+
+
+def stdlib_render(content) -> bytes:
+    # starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of complaints to serialize.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the best run is reported.")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    db = SessionLocal()
+    complaints = db.query(models.Complaint).options(
+        joinedload(models.Complaint.ward).joinedload(models.Ward.municipality).joinedload(models.Municipality.district)
+    ).all()
+    rows = db.query(
+        models.Complaint.id,
+        func.coalesce(models.Complaint.message, "").label("message"),
+        func.coalesce(models.Complaint.department, "").label("department"),
+        func.coalesce(models.Complaint.department, "Unknown").label("department_name"),
+        func.coalesce(models.Complaint.urgency, "").label("urgency"),
+        func.coalesce(models.Complaint.urgency, "NORMAL").label("urgency_name"),
+        func.coalesce(models.Complaint.current_status, "PENDING").label("current_status"),
+        func.coalesce(models.Complaint.current_status, "PENDING").label("status_name"),
+        models.Complaint.created_at,
+        func.coalesce(models.Complaint.ward_id, 0).label("ward_id"),
+        case(
+            (func.coalesce(models.Ward.ward_number, 0) != 0, literal("Ward ") + cast(models.Ward.ward_number, String)),
+            else_="",
+        ).label("ward_name"),
+        models.Ward.ward_number,
+        models.Municipality.id.label("municipality_id"),
+        models.Municipality.name.label("municipality_name"),
+        models.District.id.label("district_id"),
+        models.District.name.label("district_name"),
+    ).outerjoin(models.Ward, models.Complaint.ward_id == models.Ward.id) \
+        .outerjoin(models.Municipality, models.Ward.municipality_id == models.Municipality.id) \
+        .outerjoin(models.District, models.Municipality.district_id == models.District.id).all()
+
+    adapter = list_adapter(schemas.ComplaintRead)
+    orjson_response = ORJSONResponse(content=None)
+
+    def response_model_content():
+        return adapter.dump_python(adapter.validate_python(complaints, from_attributes=True), mode="json")
+
+    variants = [
+        ("ComplaintRead list", "stdlib", lambda: stdlib_render(response_model_content())),
+        ("ComplaintRead list", "orjson", lambda: orjson_response.render(response_model_content())),
+        ("ComplaintRead list", "pydantic-core", lambda: model_list_json(schemas.ComplaintRead, complaints)),
+        ("/auth/complaints", "dicts+stdlib", lambda: stdlib_render(jsonable_encoder(legacy_dicts(complaints)))),
+        ("/auth/complaints", "dicts+orjson", lambda: orjson_response.render(jsonable_encoder(legacy_dicts(complaints)))),
+        ("/auth/complaints", "rows+core", lambda: model_list_json(UserComplaintItem, rows)),
+    ]
+
+    print(f"Serializing {len(complaints)} complaints, best of {args.repeat}")
+    baseline = {}
+    for payload, name, fn in variants:
+        ms, size = best_of(args.repeat, fn)
+        baseline.setdefault(payload, ms)
+        print(f"  {payload:<20} {name:<14} {ms:8.1f} ms  {size / 1024:8.0f} KiB  x{baseline[payload] / ms:4.1f}")
+    db.close()
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Modules shared by the backend, data science code and the deployed services."""
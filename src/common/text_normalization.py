@@ -0,0 +1,132 @@
+"""
+Text normalization shared by dataset preparation, training and the inference services.
+
+One implementation of the two cleaners the project uses, in three forms each:
+
+    clean_text / clean_text_batch / clean_text_series
+        Drop URLs and HTML tags, collapse whitespace (newlines included), strip.
+        Used for the department/urgency classifier datasets and APIs.
+
+    clean_nepali_text / clean_nepali_text_batch / clean_nepali_text_series
+        Drop URLs and e-mail addresses, collapse whitespace, drop every character that
+        is not Latin, digit, Devanagari, whitespace or basic punctuation, strip.
+        Missing values become "". Used by the urgency classifier (data_prep).
+
+Patterns are compiled once at import. The *_series functions run on pyarrow-backed
+strings when pyarrow is installed, so each step is a single vectorized RE2 pass over
+the column instead of a Python call per row; without pyarrow they fall back to the
+precompiled per-row path. pandas itself is optional: the inference APIs do not
+install it and only use the scalar and batch forms. Both paths give exactly the results
+of the original per-row re.sub chains: whitespace is spelled out as the set Python's \\s matches (RE2's \\s is
+ASCII only), and the passes keep their original order, since merging them changes
+results on inputs such as "<a href=http://x>".
+
+The services that are deployed on their own (prepare_dataset and the classifier APIs)
+import it as a top-level module from a committed copy in their directory, kept identical
+by scripts/vendor_shared_modules.py; the backend Dockerfile copies it next to the app. tests/data_science/test_text_normalization.py checks parity with the previous
+implementations; scripts/benchmark_text_normalization.py times them.
+"""
+import re
+from typing import Iterable, List, Optional
+
+try:
+    import pandas as pd
+except ImportError:  # the inference APIs only use the scalar/batch forms
+    pd = None
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_STRING = pd.StringDtype("pyarrow") if pd is not None else None
+except ImportError:
+    ARROW_STRING = None
+
+# Characters Python's str-pattern \s matches (str.isspace), listed explicitly so the
+# same class works in Python re and in pyarrow's RE2
+WS = "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+
+URL_PATTERN = f"https?://[^{WS}]+|www\\.[^{WS}]+"
+TAG_PATTERN = "<.*?>"
+WS_RUN_PATTERN = f"[{WS}]+"
+EDGE_SPACE_PATTERN = "^ | $"  # after collapsing, at most one space at each end
+
+NEPALI_URL_PATTERN = f"http[^{WS}]+|www[^{WS}]+"
+EMAIL_PATTERN = f"[^{WS}]+@[^{WS}]+"
+NEPALI_DISALLOWED_PATTERN = f"[^A-Za-z0-9\u0900-\u097F{WS}.,!?;:()\"'-]"
+NEPALI_EDGE_PATTERN = f"^[{WS}]+|[{WS}]+$"
+
+URL_RE = re.compile(URL_PATTERN)
+TAG_RE = re.compile(TAG_PATTERN)
+WS_RUN_RE = re.compile(WS_RUN_PATTERN)
+NEPALI_URL_RE = re.compile(NEPALI_URL_PATTERN)
+EMAIL_RE = re.compile(EMAIL_PATTERN)
+NEPALI_DISALLOWED_RE = re.compile(NEPALI_DISALLOWED_PATTERN)
+
+
+def _isna(value) -> bool:
+    if pd is not None:
+        return pd.isna(value)
+    return value is None or value != value  # NaN
+
+
+def clean_text(text: str) -> str:
+    """Clean grievance text by removing URLs, HTML tags, extra whitespace."""
+    text = URL_RE.sub("", text)
+    text = TAG_RE.sub("", text)
+    return WS_RUN_RE.sub(" ", text).strip()
+
+
+def clean_nepali_text(text) -> str:
+    """Clean text while preserving Devanagari."""
+    if _isna(text):
+        return ""
+    text = str(text)
+    text = NEPALI_URL_RE.sub("", text)
+    text = EMAIL_RE.sub("", text)
+    text = WS_RUN_RE.sub(" ", text)
+    text = NEPALI_DISALLOWED_RE.sub("", text)
+    return text.strip()
+
+
+def clean_text_batch(texts: Iterable[str]) -> List[str]:
+    """clean_text over a batch (inference requests)."""
+    return [clean_text(t) for t in texts]
+
+
+def clean_nepali_text_batch(texts: Iterable) -> List[str]:
+    """clean_nepali_text over a batch (inference requests)."""
+    return [clean_nepali_text(t) for t in texts]
+
+
+def _arrow(series: "pd.Series") -> Optional["pd.Series"]:
+    if ARROW_STRING is None:
+        return None
+    return series.astype(ARROW_STRING)
+
+
+def clean_text_series(series: "pd.Series") -> "pd.Series":
+    """
+    clean_text over a column. Missing values stay missing. The result has object dtype,
+    like Series.apply(clean_text).
+    """
+    s = _arrow(series)
+    if s is None:
+        return series.map(clean_text, na_action="ignore")
+    s = s.str.replace(URL_PATTERN, "", regex=True)
+    s = s.str.replace(TAG_PATTERN, "", regex=True)
+    s = s.str.replace(WS_RUN_PATTERN, " ", regex=True)
+    s = s.str.replace(EDGE_SPACE_PATTERN, "", regex=True)
+    return s.astype(object).where(series.notna(), series)
+
+
+def clean_nepali_text_series(series: "pd.Series") -> "pd.Series":
+    """clean_nepali_text over a column; missing values become "" (object dtype)."""
+    filled = series.map(str, na_action="ignore").fillna("")
+    s = _arrow(filled)
+    if s is None:
+        return filled.map(clean_nepali_text)
+    s = s.str.replace(NEPALI_URL_PATTERN, "", regex=True)
+    s = s.str.replace(EMAIL_PATTERN, "", regex=True)
+    s = s.str.replace(WS_RUN_PATTERN, " ", regex=True)
+    s = s.str.replace(NEPALI_DISALLOWED_PATTERN, "", regex=True)
+    s = s.str.replace(NEPALI_EDGE_PATTERN, "", regex=True)
+    return s.astype(object)
@@ -3,7 +3,8 @@ Professional Evaluation Module for Sambodhan XLM-RoBERTa Urgency Classifier
 ----------------------------------------------------------------------------
 
 Features:
-- Step-wise metrics logging (every 20 samples)
+- Batched pipeline inference, shortest texts first, optionally sharded across processes
+- Step-wise metrics logging (every 20 samples), from an incrementally updated confusion matrix
 - Runtime & samples/sec tracking
 - TensorBoard-ready curves for Hugging Face "train metrics" tab
 - Multi-run timestamped directories
@@ -13,6 +14,7 @@ Features:
 import os
 import sys
 import time
+import multiprocessing as mp
 import torch
 import numpy as np
 import pandas as pd
@@ -20,7 +22,7 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from tqdm import tqdm
 from datetime import datetime
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score, precision_score, recall_score
+from sklearn.metrics import classification_report, confusion_matrix
 from transformers import pipeline
 from torch.utils.tensorboard import SummaryWriter
 from typing import Optional
@@ -30,6 +32,79 @@ plt.style.use("seaborn-v0_8-darkgrid")
 sns.set_palette("rocket")
 
 STEP_LOG_INTERVAL = 20
+MAX_BATCH_TOKENS = 4096  # padded tokens per forward pass (e.g. 32 x 128)
+
+
+def predict_texts(classifier, texts, batch_size: int = 32, max_batch_tokens: int = MAX_BATCH_TOKENS):
+    """
+    Top label and score for every text, in input order.
+
+    Texts run through the pipeline shortest-first, in batches of at most batch_size texts
+    and at most max_batch_tokens padded tokens, so short texts share large batches while
+    the few long ones (up to the model's max length) do not pad a whole batch out.
+    """
+    lengths = [len(ids) for ids in classifier.tokenizer(texts, truncation=True)["input_ids"]]
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    out = [None] * len(texts)
+    start = 0
+    while start < len(order):
+        end = start + 1
+        while end < len(order) and end - start < batch_size and (end - start + 1) * lengths[order[end]] <= max_batch_tokens:
+            end += 1
+        batch = order[start:end]
+        results = classifier([texts[i] for i in batch], truncation=True, batch_size=len(batch))
+        for i, res in zip(batch, results):
+            out[i] = (res["label"], res["score"])
+        start = end
+    return out
+
+
+def _predict_shard(args):
+    """Worker: load the model once and predict one contiguous shard of texts."""
+    model_path, texts, batch_size, max_batch_tokens, threads = args
+    torch.set_num_threads(threads)
+    classifier = pipeline("text-classification", model=model_path, device=-1)
+    return predict_texts(classifier, texts, batch_size, max_batch_tokens)
+
+
+def predict_sharded(
+    model_path: str,
+    texts,
+    batch_size: int = 32,
+    num_workers: int = 2,
+    max_batch_tokens: int = MAX_BATCH_TOKENS,
+):
+    """predict_texts split across `num_workers` CPU processes, each with its own model copy."""
+    num_workers = max(1, min(num_workers, len(texts)))
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+    bounds = np.linspace(0, len(texts), num_workers + 1).astype(int)
+    shards = [(model_path, texts[a:b], batch_size, max_batch_tokens, threads) for a, b in zip(bounds[:-1], bounds[1:])]
+    with mp.get_context("spawn").Pool(num_workers) as pool:
+        results = pool.map(_predict_shard, shards)
+    return [r for shard in results for r in shard]
+
+
+def stepwise_metrics(cm: np.ndarray):
+    """
+    Accuracy and macro precision/recall/F1 from a confusion matrix (rows = true, cols =
+    predicted). Same values as the sklearn functions on the underlying labels: macro
+    averages cover the labels seen so far in y_true or y_pred, 0 where undefined.
+    """
+    tp = np.diag(cm).astype(float)
+    true_count = cm.sum(axis=1)
+    pred_count = cm.sum(axis=0)
+    seen = (true_count + pred_count) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(pred_count > 0, tp / pred_count, 0.0)
+        recall = np.where(true_count > 0, tp / true_count, 0.0)
+        f1 = np.where(true_count + pred_count > 0, 2 * tp / (true_count + pred_count), 0.0)
+    return {
+        "accuracy": tp.sum() / cm.sum(),
+        "macro_f1": f1[seen].mean(),
+        "precision": precision[seen].mean(),
+        "recall": recall[seen].mean(),
+    }
+
 
 def evaluate_model(
     test_df,
@@ -38,7 +113,17 @@ def evaluate_model(
     hf_repo: Optional[str] = None,
     hf_token: Optional[str] = None,
     dataset_name: str = "Sambodhan Urgency Dataset",
+    batch_size: int = 32,
+    num_workers: int = 1,
 ):
+    """
+    Evaluate the classifier on test_df (columns clean_text, label) and write reports,
+    plots and TensorBoard logs under output_dir/runs/.
+
+    batch_size texts go through the pipeline at once. With num_workers > 1 (CPU only),
+    the test set is split into that many shards, each predicted by its own process and
+    model copy, with the CPU threads divided between them.
+    """
     start_time = time.time()
     timestamp = datetime.now().strftime("%b%d_%H-%M-%S")
     run_name = f"eval_{timestamp}"
@@ -48,57 +133,47 @@ def evaluate_model(
     writer = SummaryWriter(log_dir=run_dir)
     device = 0 if torch.cuda.is_available() else -1
 
-    print(f" Loading model from: {model_path}")
-    classifier = pipeline("text-classification", model=model_path, device=device)
-
     label_map = {0: "NORMAL", 1: "URGENT", 2: "HIGHLY URGENT"}
     inv_label_map = {v: k for k, v in label_map.items()}
 
-    preds, probs, y_true_list, y_pred_list = [], [], [], []
-    step_metrics = {"accuracy": [], "macro_f1": [], "precision": [], "recall": []}
-    step_indices = []
+    texts = test_df["clean_text"].tolist()
+    sharded = num_workers > 1 and device == -1
+    print(f" Evaluating {len(test_df)} samples using {'GPU' if device==0 else 'CPU'} "
+          f"(batch {batch_size}{f', {num_workers} processes' if sharded else ''})...")
 
-    print(f" Evaluating {len(test_df)} samples using {'GPU' if device==0 else 'CPU'}...")
+    # ========================== BATCHED INFERENCE ==========================
+    inference_start = time.time()
+    if sharded:
+        results = predict_sharded(model_path, texts, batch_size, num_workers)
+    else:
+        print(f" Loading model from: {model_path}")
+        classifier = pipeline("text-classification", model=model_path, device=device)
+        results = predict_texts(classifier, texts, batch_size)
+    inference_sec = time.time() - inference_start
 
-    # ========================== INFERENCE & STEP-WISE LOGGING ==========================
-    for step, text in enumerate(tqdm(test_df["clean_text"], desc="Inference", ncols=90)):
-        res = classifier(text, truncation=True)[0]
-        label_id = inv_label_map.get(res["label"], 0)
+    y_true = test_df["label"].to_numpy()
+    y_pred = np.array([inv_label_map.get(label, 0) for label, _ in results])
+    probs = np.array([score for _, score in results])
 
-        preds.append(label_id)
-        probs.append(res["score"])
-        y_true_list.append(test_df["label"].iloc[step])
-        y_pred_list.append(label_id)
+    # ========================== STEP-WISE LOGGING ==========================
+    # Metrics over each prefix, in dataset order, from a running confusion matrix
+    cm_running = np.zeros((len(label_map), len(label_map)), dtype=np.int64)
+    step_metrics = {"accuracy": [], "macro_f1": [], "precision": [], "recall": []}
+    step_indices = []
+    for step in tqdm(range(len(texts)), desc="Step-wise metrics", ncols=90):
+        cm_running[y_true[step], y_pred[step]] += 1
 
         # Log per-sample confidence
-        writer.add_scalar("eval/confidence", res["score"], step)
-
-        # Step-wise logging every STEP_LOG_INTERVAL
-        if (step + 1) % STEP_LOG_INTERVAL == 0 or (step + 1) == len(test_df):
-            y_t = np.array(y_true_list)
-            y_p = np.array(y_pred_list)
-            acc = accuracy_score(y_t, y_p)
-            macro_f1 = f1_score(y_t, y_p, average="macro")
-            prec = precision_score(y_t, y_p, average="macro")
-            rec = recall_score(y_t, y_p, average="macro")
-
-            # Save for plotting
-            step_metrics["accuracy"].append(acc)
-            step_metrics["macro_f1"].append(macro_f1)
-            step_metrics["precision"].append(prec)
-            step_metrics["recall"].append(rec)
-            step_indices.append(step + 1)
+        writer.add_scalar("eval/confidence", probs[step], step)
 
-            # TensorBoard
-            writer.add_scalar("eval/stepwise/accuracy", acc, step + 1)
-            writer.add_scalar("eval/stepwise/macro_f1", macro_f1, step + 1)
-            writer.add_scalar("eval/stepwise/precision", prec, step + 1)
-            writer.add_scalar("eval/stepwise/recall", rec, step + 1)
+        if (step + 1) % STEP_LOG_INTERVAL == 0 or (step + 1) == len(texts):
+            metrics = stepwise_metrics(cm_running)
+            for name, value in metrics.items():
+                step_metrics[name].append(value)
+                writer.add_scalar(f"eval/stepwise/{name}", value, step + 1)
+            step_indices.append(step + 1)
 
     # ========================== METRICS & REPORTS ==========================
-    y_true = np.array(y_true_list)
-    y_pred = np.array(y_pred_list)
-    probs = np.array(probs)
 
     report_dict = classification_report(
         y_true, y_pred, target_names=list(label_map.values()), output_dict=True, digits=4
@@ -179,6 +254,7 @@ def evaluate_model(
     samples_per_sec = len(test_df)/elapsed
     writer.add_scalar("eval/runtime_sec", elapsed)
     writer.add_scalar("eval/samples_per_second", samples_per_sec)
+    writer.add_scalar("eval/inference_sec", inference_sec)
 
     summary = f"""
 📊 SAMBODHAN URGENCY CLASSIFIER EVALUATION
@@ -188,7 +264,7 @@ Samples: {len(test_df)}
 Accuracy: {acc:.4f}
 Macro F1: {macro_f1:.4f}
 Weighted F1: {weighted_f1:.4f}
-Runtime: {elapsed:.2f}s ({samples_per_sec:.2f} samples/sec)
+Runtime: {elapsed:.2f}s ({samples_per_sec:.2f} samples/sec, inference {inference_sec:.2f}s)
 Misclassified: {len(mis_idx)}
 ────────────────────────────────────────────
 Run: {run_name}
@@ -220,6 +296,7 @@ Run: {run_name}
         "macro_f1": macro_f1,
         "weighted_f1": weighted_f1,
         "runtime_sec": elapsed,
+        "inference_sec": inference_sec,
         "samples_per_sec": samples_per_sec,
         "run_dir": run_dir,
         "summary": summary.strip(),
@@ -1,8 +1,8 @@
 
-import re
 import pandas as pd
 from datasets import Dataset, DatasetDict
 from sklearn.model_selection import train_test_split
+from src.common.text_normalization import clean_text, clean_text_series
 
 
 # Label Mappings
@@ -26,18 +26,6 @@ id2urgency = {v: k for k, v in urgency2id.items()}
 
 
 
-# Text Cleaning Function
-
-def clean_text(text: str) -> str:
-    """Clean grievance text by removing URLs, HTML tags, extra whitespace."""
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
-    text = re.sub(r'<.*?>', '', text)  # Remove HTML tags
-    text = re.sub(r'\n', ' ', text)  # Replace newlines with space
-    text = re.sub(r'\s+', ' ', text).strip()  # Reduce multiple spaces
-    return text
-
-
-
 # Dataset Cleaning & Encoding
 
 def clean_and_encode_dataset(df: pd.DataFrame, label_column: str = 'department') -> pd.DataFrame:
@@ -55,7 +43,7 @@ def clean_and_encode_dataset(df: pd.DataFrame, label_column: str = 'department')
         raise ValueError("label_column must be either 'department' or 'urgency'")
 
     df = df.copy()
-    df['grievance'] = df['grievance'].apply(clean_text)
+    df['grievance'] = clean_text_series(df['grievance'])
 
     if label_column == 'department':
         df['label'] = df['department'].map(department2id)
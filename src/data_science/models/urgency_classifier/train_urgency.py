@@ -14,6 +14,7 @@ from transformers import (
     Trainer,
     TrainingArguments,
     EarlyStoppingCallback,
+    DataCollatorWithPadding,
 )
 from datasets import Dataset
 from sklearn.utils.class_weight import compute_class_weight
@@ -475,20 +476,26 @@ def train_model(
     model_name = "xlm-roberta-base"
     tokenizer = XLMRobertaTokenizer.from_pretrained(model_name)
 
+    # No padding at tokenization: the collator pads each batch to its longest text, and
+    # group_by_length batches texts of similar length together (most grievances are short)
     def tokenize(examples):
-        return tokenizer(
+        encoded = tokenizer(
             examples['clean_text'],
             truncation=True,
-            padding='max_length',
             max_length=max_length
         )
+        encoded['length'] = [len(ids) for ids in encoded['input_ids']]
+        return encoded
 
     # ─── Datasets ───
     train_dataset = Dataset.from_pandas(train_df[['clean_text', 'label']]).map(tokenize, batched=True)
     val_dataset = Dataset.from_pandas(val_df[['clean_text', 'label']]).map(tokenize, batched=True)
+    # Metrics do not depend on row order; sorted, consecutive eval batches need almost no padding
+    val_dataset = val_dataset.sort('length')
 
     train_dataset.set_format('torch', columns=['input_ids', 'attention_mask', 'label'])
     val_dataset.set_format('torch', columns=['input_ids', 'attention_mask', 'label'])
+    data_collator = DataCollatorWithPadding(tokenizer=tokenizer)
 
     # ─── Compute class weights with adjustment ───
     class_weights = compute_class_weight(
@@ -529,6 +536,8 @@ def train_model(
         per_device_train_batch_size=batch_size,
         per_device_eval_batch_size=batch_size * 2,
         gradient_accumulation_steps=gradient_accumulation_steps,
+        group_by_length=True,
+        length_column_name='length',
         learning_rate=learning_rate,
         weight_decay=weight_decay,
         warmup_ratio=warmup_ratio,
@@ -557,6 +566,7 @@ def train_model(
         args=training_args,
         train_dataset=train_dataset,
         eval_dataset=val_dataset,
+        data_collator=data_collator,
         compute_metrics=compute_metrics,
         class_weights=class_weights,
         use_focal_loss=use_focal_loss,
@@ -2,6 +2,7 @@
 import torch
 from transformers import pipeline
 from src.data_science.preprocessing.data_prep import clean_nepali_text
+from src.common.text_normalization import clean_nepali_text_batch
 
 class UrgencyClassifier:
     def __init__(self, model_path):
@@ -23,9 +24,14 @@ class UrgencyClassifier:
         
         return response
     
-    def predict_batch(self, texts, return_probabilities=False):
-        texts = [clean_nepali_text(t) for t in texts]
-        all_results = self.classifier(texts)
+    def predict_batch(self, texts, return_probabilities=False, batch_size=16):
+        texts = clean_nepali_text_batch(texts)
+        # Shortest-first batches pad less; results are put back in input order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        sorted_results = self.classifier([texts[i] for i in order], batch_size=batch_size)
+        all_results = [None] * len(texts)
+        for pos, i in enumerate(order):
+            all_results[i] = sorted_results[pos]
         
         predictions = []
         for results in all_results:
@@ -31,8 +31,7 @@
     // State management
     let chatState = {
         isOpen: false,
-        sessionId: null,
-        context: {},
+        sessionId: null,    // Issued by the backend; conversation state is kept server-side
         messageHistory: []
     };
 
@@ -213,8 +212,7 @@
                     user_name: CONFIG.USER_DATA.user_name,
                     user_email: CONFIG.USER_DATA.user_email,
                     user_phone: CONFIG.USER_DATA.user_phone,
-                    session_id: chatState.sessionId,
-                    context: chatState.context
+                    session_id: chatState.sessionId
                 })
             });
 
@@ -226,9 +224,9 @@
 
             const data = await response.json();
 
-            // Update context
-            if (data.data) {
-                chatState.context = { ...chatState.context, ...data.data };
+            // Keep the session id issued by the backend
+            if (data.data && data.data.session_id) {
+                chatState.sessionId = data.data.session_id;
             }
 
             // Display bot response
@@ -351,13 +349,11 @@
     function saveSession() {
         try {
             const sessionData = {
-                sessionId: chatState.sessionId || generateSessionId(),
-                context: chatState.context,
+                sessionId: chatState.sessionId,
                 messageHistory: chatState.messageHistory.slice(-20) // Keep last 20 messages
             };
 
             sessionStorage.setItem(CONFIG.SESSION_STORAGE_KEY, JSON.stringify(sessionData));
-            chatState.sessionId = sessionData.sessionId;
         } catch (e) {
             console.warn('Failed to save chat session:', e);
         }
@@ -372,8 +368,7 @@
 
             if (sessionData) {
                 const data = JSON.parse(sessionData);
-                chatState.sessionId = data.sessionId;
-                chatState.context = data.context || {};
+                chatState.sessionId = data.sessionId || null;
                 chatState.messageHistory = data.messageHistory || [];
 
                 // Restore message history in UI
@@ -420,13 +415,6 @@
         messagesContainer.insertAdjacentHTML('beforeend', messageHTML);
     }
 
-    /**
-     * Generate unique session ID
-     */
-    function generateSessionId() {
-        return 'session_' + Date.now() + '_' + Math.random().toString(36).substr(2, 9);
-    }
-
     // Initialize when DOM is ready
     if (document.readyState === 'loading') {
         document.addEventListener('DOMContentLoaded', init);
@@ -20,6 +20,7 @@ class DepartmentPredictor:
 
         # Device selection
         self.device = 0 if torch.cuda.is_available() else -1
+        self.batch_size = int(os.getenv("INFERENCE_BATCH_SIZE", 16))
 
         print(" Loading tokenizer and model...")
         # Load tokenizer and model
@@ -41,7 +42,13 @@ class DepartmentPredictor:
         if isinstance(texts, str):
             texts = [texts]
 
-        results = self.classifier(texts)
+        # Run the batch shortest-first so each pipeline batch pads to similar lengths,
+        # then put the results back in request order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        sorted_results = self.classifier([texts[i] for i in order], batch_size=self.batch_size)
+        results = [None] * len(texts)
+        for pos, i in enumerate(order):
+            results[i] = sorted_results[pos]
         formatted_results = []
 
         for preds in results:
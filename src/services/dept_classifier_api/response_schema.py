@@ -1,16 +1,8 @@
 from typing import Union, List, Annotated, Dict
 from pydantic import BaseModel, Field, field_validator, model_validator
-import re
 
-
-# Text cleaning function
-def clean_text(text: str) -> str:
-    """Clean grievance text by removing URLs, HTML tags, extra whitespace."""
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
-    text = re.sub(r'<.*?>', '', text)  # Remove HTML tags
-    text = re.sub(r'\n', ' ', text)  # Replace newlines with space
-    text = re.sub(r'\s+', ' ', text).strip()  # Reduce multiple spaces
-    return text
+# Text cleaning (shared implementation, see text_normalization.py)
+from text_normalization import clean_text, clean_text_batch
 
 
 # pydantic classes 
@@ -48,7 +40,7 @@ class TextInput(BaseModel):
         if isinstance(self.text, str):
             self.text = clean_text(self.text)
         else:
-            self.text = [clean_text(t) for t in self.text]
+            self.text = clean_text_batch(self.text)
         return self
 
         
@@ -0,0 +1,63 @@
+from fastapi import FastAPI, HTTPException
+from typing import Union, List
+from contextlib import asynccontextmanager
+import os
+
+from predict_multitask_model import MultiTaskPredictor
+from response_schema import TextInput, MultiTaskClassificationOutput
+from huggingface_hub import HfApi
+
+
+# Model repository setup (shared encoder + urgency and department heads)
+model_repo = os.getenv("MODEL_REPO", "sambodhan/sambodhan_multitask_classifier")
+
+# Hugging Face API for version info
+hf_api = HfApi()
+
+
+# Startup and shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global predictor
+    predictor = MultiTaskPredictor(model_repo=model_repo)
+    yield
+
+
+# FastAPI app
+app = FastAPI(
+    title="Sambodhan Grievance Classifier API",
+    description="One model that classifies citizen grievances by urgency and by municipal department, with confidence scores.",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+
+# Routes
+
+@app.post("/predict_all", response_model=Union[MultiTaskClassificationOutput, List[MultiTaskClassificationOutput]])
+def predict_all(input_data: TextInput):
+    try:
+        return predictor.predict(input_data.text)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+
+@app.get("/")
+def root():
+    latest_tag = None
+    try:
+        latest_tag = hf_api.list_repo_refs(repo_id=model_repo, repo_type="model").tags[0].name
+    except Exception:
+        latest_tag = "unknown"
+
+    return {
+        "message": "Sambodhan Grievance Classifier API is running.",
+        "status": "Active" if predictor else "Inactive",
+        "model_version": latest_tag
+    }
+
+
+# For local testing (optional)
+# if __name__ == "__main__":
+#     port = int(os.getenv("PORT", 7860))
+#     uvicorn.run("app:app", host="0.0.0.0", port=port)
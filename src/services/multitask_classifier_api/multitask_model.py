@@ -0,0 +1,114 @@
+# multitask_model.py
+"""
+One shared encoder with a classification head per task (urgency and department), so a
+grievance is classified for both with a single encoder forward pass.
+
+Saved layout (a Hub model repo or a local directory):
+
+    config.json, model.safetensors   the encoder (AutoModel.from_pretrained loads it)
+    tokenizer files                  the encoder's tokenizer
+    heads.safetensors                one Linear head per task
+    multitask_config.json            {"tasks": {task: {label_id: label}}, "dropout": float}
+
+Used by the retrain service (training) and the multitask classifier API (serving);
+scripts/vendor_shared_modules.py copies it into both build contexts.
+"""
+import json
+import os
+from typing import Callable, Dict, Optional
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from huggingface_hub import snapshot_download
+from safetensors.torch import load_file, save_file
+from transformers import AutoModel
+
+TASKS = ("urgency", "department")
+HEADS_FILE = "heads.safetensors"
+CONFIG_FILE = "multitask_config.json"
+
+# Label value of rows that carry no label for a task (e.g. a row from the urgency dataset
+# has no department label); those rows contribute nothing to that task's loss
+IGNORE_INDEX = -100
+
+
+class MultiTaskClassifier(nn.Module):
+    """Shared transformer encoder with one linear head per task on the first-token embedding."""
+
+    def __init__(
+        self,
+        encoder: nn.Module,
+        tasks: Dict[str, Dict[int, str]],
+        dropout: float = 0.1,
+        loss_fct: Optional[Callable[[torch.Tensor, torch.Tensor], torch.Tensor]] = None,
+    ):
+        """
+        Args:
+            encoder (nn.Module): Transformer encoder (AutoModel) shared by all tasks
+            tasks (dict): {task: id2label} for every head, e.g. {"urgency": id2urgency, ...}
+            dropout (float): Dropout on the pooled embedding. Default=0.1
+            loss_fct (callable, optional): loss(logits, targets) per task. Default: cross-entropy
+        """
+        super().__init__()
+        self.encoder = encoder
+        self.tasks = {task: {int(k): v for k, v in id2label.items()} for task, id2label in tasks.items()}
+        self.dropout_p = dropout
+        self.dropout = nn.Dropout(dropout)
+        hidden_size = encoder.config.hidden_size
+        self.heads = nn.ModuleDict({task: nn.Linear(hidden_size, len(id2label)) for task, id2label in self.tasks.items()})
+        self.loss_fct = loss_fct or F.cross_entropy
+
+    @property
+    def config(self):
+        return self.encoder.config
+
+    def forward(self, input_ids=None, attention_mask=None, **kwargs) -> Dict[str, torch.Tensor]:
+        """
+        Logits for every task, plus the summed loss when `labels_<task>` are given.
+
+        Returns:
+            dict: {"loss" (if labels were given), "logits_<task>" for each task}
+        """
+        encoder_inputs = {k: v for k, v in kwargs.items() if not k.startswith("labels_")}
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask, **encoder_inputs).last_hidden_state
+        pooled = self.dropout(hidden[:, 0])
+
+        outputs, losses = {}, []
+        for task, head in self.heads.items():
+            logits = head(pooled)
+            outputs[f"logits_{task}"] = logits
+            labels = kwargs.get(f"labels_{task}")
+            if labels is not None:
+                mask = labels != IGNORE_INDEX
+                if mask.any():
+                    losses.append(self.loss_fct(logits[mask], labels[mask]))
+        if losses:
+            outputs = {"loss": torch.stack(losses).sum(), **outputs}
+        return outputs
+
+    def save_pretrained(self, save_directory: str) -> None:
+        """Write the encoder, heads and task config to `save_directory`."""
+        os.makedirs(save_directory, exist_ok=True)
+        self.encoder.save_pretrained(save_directory)
+        save_file({k: v.contiguous() for k, v in self.heads.state_dict().items()}, os.path.join(save_directory, HEADS_FILE))
+        with open(os.path.join(save_directory, CONFIG_FILE), "w", encoding="utf-8") as f:
+            json.dump({"tasks": self.tasks, "dropout": self.dropout_p}, f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def from_pretrained(cls, model_repo: str, token: Optional[str] = None, cache_dir: Optional[str] = None, **kwargs) -> "MultiTaskClassifier":
+        """
+        Load a saved multitask model from a local directory or a Hub model repo.
+
+        Args:
+            model_repo (str): Local directory or Hub repo id
+            token (str, optional): HF token for private repos
+            cache_dir (str, optional): Hub download cache
+            **kwargs: Passed to snapshot_download (e.g. revision, force_download)
+        """
+        path = model_repo if os.path.isdir(model_repo) else snapshot_download(model_repo, token=token, cache_dir=cache_dir, **kwargs)
+        with open(os.path.join(path, CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        model = cls(AutoModel.from_pretrained(path), config["tasks"], dropout=config.get("dropout", 0.1))
+        model.heads.load_state_dict(load_file(os.path.join(path, HEADS_FILE)))
+        return model
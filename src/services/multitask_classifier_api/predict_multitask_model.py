@@ -0,0 +1,72 @@
+from transformers import AutoTokenizer
+import torch
+import os
+
+from multitask_model import MultiTaskClassifier
+
+class MultiTaskPredictor:
+    def __init__(self, model_repo="sambodhan/sambodhan_multitask_classifier",
+                 cache_dir="/app/hf_cache"):
+        """Load the shared encoder, its task heads and the tokenizer once at startup."""
+
+        self.model_repo = model_repo
+        self.cache_dir = cache_dir
+
+        # Ensure cache folder exists
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Device selection
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.batch_size = int(os.getenv("INFERENCE_BATCH_SIZE", 16))
+
+        print("Loading tokenizer and model...")
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_repo, cache_dir=self.cache_dir, force_download=True)
+        self.model = MultiTaskClassifier.from_pretrained(self.model_repo, cache_dir=self.cache_dir, force_download=True)
+        self.model.to(self.device).eval()
+        print("Model and tokenizer loaded successfully.")
+
+    @torch.inference_mode()
+    def predict(self, texts):
+        """Predict every task (urgency and department) with scores for a single text or a batch."""
+        if isinstance(texts, str):
+            texts = [texts]
+
+        # Run the batch shortest-first so each batch pads to similar lengths; one encoder
+        # forward pass per batch feeds every task head. Results go back in request order
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        formatted_results = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in batch], truncation=True, padding=True, return_tensors="pt"
+            ).to(self.device)
+            outputs = self.model(**encoded)
+
+            probs = {
+                task: torch.softmax(outputs[f"logits_{task}"].float(), dim=-1).cpu().tolist()
+                for task in self.model.tasks
+            }
+            for row, i in enumerate(batch):
+                formatted_results[i] = {
+                    task: self._format(probs[task][row], id2label)
+                    for task, id2label in self.model.tasks.items()
+                }
+
+        # Return single dict if only one input
+        return formatted_results[0] if len(formatted_results) == 1 else formatted_results
+
+    @staticmethod
+    def _format(probs, id2label):
+        """Top label, its confidence and all label scores (descending) for one task."""
+        scores = sorted(((id2label[i], p) for i, p in enumerate(probs)), key=lambda x: x[1], reverse=True)
+        return {
+            "label": scores[0][0],
+            "confidence": round(scores[0][1], 4),
+            "scores": {label: round(p, 4) for label, p in scores}
+        }
+
+    @staticmethod
+    def load_model():
+        """Helper to preload the model during Docker build."""
+        _ = MultiTaskPredictor()
@@ -0,0 +1,136 @@
+"""
+Benchmark of fetch_misclassified_dataframe against the previous implementation
+(NOT IN subquery, every correct complaint pulled into pandas, .sample() client side).
+
+Seeds a scratch database with N complaints (default 1M) and a small share of reviewed
+misclassifications, then reports wall time, peak Python memory and rows fetched for:
+  legacy        full pull + DataFrame.sample
+  hash          ordered hash sample in SQL (LIMIT n)
+  hash+chunks   same, read through a server-side cursor in chunks
+
+Usage:
+    python benchmark_fetch.py                                # SQLite file in /tmp, 1M complaints
+    python benchmark_fetch.py --rows 200000
+    python benchmark_fetch.py --db-url postgresql://... --no-seed   # existing database
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from prepare_pd_df import fetch_misclassified_dataframe
+
+DEPARTMENTS = [
+    'Municipal Governance & Community Services',
+    'Education, Health & Social Welfare',
+    'Infrastructure, Utilities & Natural Resources',
+    'Security & Law Enforcement',
+]
+URGENCIES = ['NORMAL', 'URGENT', 'HIGHLY URGENT']
+WORDS = "water road light garbage school hospital police drain bridge electricity tole ward office".split()
+
+
+def seed(engine, rows: int, misclassified_share: float) -> None:
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS misclassified_complaints"))
+        conn.execute(text("DROP TABLE IF EXISTS complaints"))
+        conn.execute(text(
+            "CREATE TABLE complaints (id INTEGER PRIMARY KEY, message TEXT NOT NULL, department TEXT, urgency TEXT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE misclassified_complaints (id INTEGER PRIMARY KEY, complaint_id INTEGER NOT NULL, "
+            "model_predicted_department TEXT, model_predicted_urgency TEXT, correct_department TEXT, "
+            "correct_urgency TEXT, reviewed BOOLEAN NOT NULL)"
+        ))
+        conn.execute(text("CREATE INDEX ix_mc_complaint_id ON misclassified_complaints (complaint_id)"))
+        batch = 50_000
+        for start in range(1, rows + 1, batch):
+            conn.execute(text("INSERT INTO complaints VALUES (:id, :message, :department, :urgency)"), [
+                {
+                    "id": i,
+                    "message": " ".join(rng.choices(WORDS, k=rng.randint(8, 40))),
+                    "department": rng.choice(DEPARTMENTS),
+                    "urgency": rng.choice(URGENCIES),
+                }
+                for i in range(start, min(start + batch, rows + 1))
+            ])
+        ids = rng.sample(range(1, rows + 1), int(rows * misclassified_share))
+        conn.execute(text(
+            "INSERT INTO misclassified_complaints VALUES (:id, :cid, :pd, :pu, :cd, :cu, :reviewed)"
+        ), [
+            {"id": n, "cid": cid, "pd": DEPARTMENTS[0], "pu": URGENCIES[0],
+             "cd": rng.choice(DEPARTMENTS[1:]), "cu": rng.choice(URGENCIES[1:]), "reviewed": True}
+            for n, cid in enumerate(ids, 1)
+        ])
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE complaints"))
+
+
+def legacy_fetch(label_column: str, engine, correct_ratio: float = 0.5, random_state: int = 42) -> pd.DataFrame:
+    """The previous implementation (minus the stray complaint_id column)."""
+    miscond = f"mc.correct_{label_column} IS NOT NULL AND mc.model_predicted_{label_column} IS DISTINCT FROM mc.correct_{label_column}"
+    with engine.connect() as conn:
+        df_mis = pd.read_sql(text(f"""
+            SELECT c.message AS grievance, mc.correct_department AS department, mc.correct_urgency AS urgency
+            FROM misclassified_complaints mc JOIN complaints c ON c.id = mc.complaint_id
+            WHERE mc.reviewed = TRUE AND {miscond}
+        """), conn)
+        df_corr_all = pd.read_sql(text(f"""
+            SELECT c.message AS grievance, c.department AS department, c.urgency AS urgency
+            FROM complaints c
+            WHERE c.id NOT IN (SELECT complaint_id FROM misclassified_complaints)
+              AND c.{label_column} IS NOT NULL
+        """), conn)
+    n_correct = int(len(df_mis) * correct_ratio)
+    df_corr = df_corr_all.sample(n=min(n_correct, len(df_corr_all)), random_state=random_state)
+    return pd.concat([df_mis, df_corr], ignore_index=True)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--misclassified-share", type=float, default=0.002)
+    parser.add_argument("--db-url", default=None, help="Defaults to a SQLite file in the temp directory")
+    parser.add_argument("--no-seed", action="store_true", help="Use the existing tables as they are")
+    parser.add_argument("--chunksize", type=int, default=500)
+    args = parser.parse_args()
+
+    db_url = args.db_url or f"sqlite:///{os.path.join(tempfile.gettempdir(), 'prepare_dataset_benchmark.db')}"
+    engine = create_engine(db_url)
+    if not args.no_seed:
+        start = time.perf_counter()
+        seed(engine, args.rows, args.misclassified_share)
+        print(f"Seeded {args.rows} complaints in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+
+    variants = [
+        ("legacy", lambda: legacy_fetch("department", engine)),
+        ("hash", lambda: fetch_misclassified_dataframe("department", engine, sample_method="hash")),
+        ("hash+chunks", lambda: fetch_misclassified_dataframe("department", engine, sample_method="hash", chunksize=args.chunksize)),
+    ]
+    if engine.dialect.name == "postgresql":
+        variants.append(("tablesample", lambda: fetch_misclassified_dataframe("department", engine, sample_method="tablesample")))
+
+    for name, fn in variants:
+        elapsed, peak_mb, n = measure(fn)
+        print(f"  {name:<12} {elapsed:7.2f}s  peak {peak_mb:8.1f} MiB  rows {n}")
+
+
+if __name__ == "__main__":
+    main()
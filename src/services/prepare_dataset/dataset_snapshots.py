@@ -0,0 +1,294 @@
+# dataset_snapshots.py
+"""
+Incremental dataset builds.
+
+Instead of rebuilding and re-pushing the whole dataset on every run, each run appends
+one shard holding only what is new since the previous run:
+
+  - a high-water mark per label (stored in the dataset repo's manifest.json and
+    dataset_metadata.json): (updated_at, misclassified id) of the last misclassification
+    included, and the highest complaint id seen. The next run fetches misclassifications
+    reviewed or changed after the mark and samples correct records only from complaints
+    newer than it. A misclassification whose labels change again lands in a later shard;
+    loading every shard keeps the newest row per complaint.
+  - a stable split per complaint: sha1(salt:complaint_id) picks train/eval/test, so a
+    complaint lands in the same split in every shard and every rebuild, and eval/test
+    never leak into train as the dataset grows.
+  - manifest.json lists every shard with its files, sizes, version tag and watermark.
+    Downstream training loads either the union of all shards or only the latest one
+    (retrain_model/load_dataset.py, DATASET_SHARDS=all|latest).
+
+Shard files live under data/shards/<shard_id>/<split>.parquet with columns
+(complaint_id, grievance, label). Parquet files, manifest and README go up in a single
+Hub commit, which is then tagged like full builds were.
+
+`local_dir` writes the same layout to a directory instead of the Hub (dry runs).
+"""
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, UTC
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from huggingface_hub import CommitOperationAdd, CommitOperationDelete, HfApi, create_repo, hf_hub_download
+from huggingface_hub.utils import EntryNotFoundError, RepositoryNotFoundError
+from sqlalchemy import text
+
+from prepare_pd_df import iter_misclassified_dataframe
+from preprocess_and_prepare_dataset import clean_and_encode_dataset, render_hf_readme
+
+MANIFEST_FILE = "manifest.json"
+SHARD_ROOT = "data/shards"
+SPLITS = ("train", "eval", "test")
+# Changing the salt reshuffles every complaint's split; only do it with a full rebuild
+SPLIT_SALT = os.getenv("DATASET_SPLIT_SALT", "sambodhan-split-v1")
+
+
+def assign_splits(complaint_ids, train_size: float = 0.8, val_size: float = 0.1, test_size: float = 0.1,
+                  salt: str = SPLIT_SALT) -> np.ndarray:
+    """Split name per complaint id from a salted sha1 bucket in [0, 1)."""
+    total = train_size + val_size + test_size
+    if not (0.99 < total < 1.01):
+        raise ValueError("train_size + val_size + test_size must sum to 1.0")
+    buckets = np.array([
+        int(hashlib.sha1(f"{salt}:{int(cid)}".encode()).hexdigest()[:8], 16) / 2**32
+        for cid in complaint_ids
+    ])
+    return np.where(buckets < train_size, "train", np.where(buckets < train_size + val_size, "eval", "test"))
+
+
+def _empty_manifest(hf_dataset_dir: str, label_column: str, split_sizes: Dict[str, float]) -> Dict[str, Any]:
+    return {
+        "format": 1,
+        "dataset_name": hf_dataset_dir,
+        "label_column": label_column,
+        "split_rule": {"method": "sha1", "salt": SPLIT_SALT, **split_sizes},
+        "watermark": None,
+        "num_samples": 0,
+        "splits": {split: 0 for split in SPLITS},
+        "shards": [],
+    }
+
+
+def load_manifest(hf_dataset_dir: str, hf_token: Optional[str] = None, local_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The dataset's manifest, or None if it has never been built incrementally."""
+    if local_dir:
+        path = os.path.join(local_dir, MANIFEST_FILE)
+    else:
+        try:
+            path = hf_hub_download(hf_dataset_dir, MANIFEST_FILE, repo_type="dataset", token=hf_token)
+        except (EntryNotFoundError, RepositoryNotFoundError):
+            return None
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def max_complaint_id(engine) -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM complaints")).scalar() or 0)
+
+
+def watermark_time(watermark: Dict[str, Any]) -> pd.Timestamp:
+    """The watermark's misclassification timestamp (manifests written before updated_at call it reviewed_at)."""
+    return pd.Timestamp(watermark.get("updated_at") or watermark["reviewed_at"])
+
+
+def fetch_delta(label_column: str, engine, watermark: Optional[Dict[str, Any]], correct_ratio: float = 0.5,
+                random_state: int = 42, chunksize: Optional[int] = None):
+    """New rows since `watermark` (all rows if None) and the watermark that covers them."""
+    ceiling = max_complaint_id(engine)
+    since = None
+    if watermark:
+        since = dict(watermark, updated_at=watermark_time(watermark).to_pydatetime())
+    chunks = list(iter_misclassified_dataframe(
+        label_column, engine,
+        correct_ratio=correct_ratio,
+        random_state=random_state,
+        chunksize=chunksize,
+        since=since,
+        max_complaint_id=ceiling,
+    ))
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=["complaint_id", "grievance", "department", "urgency"])
+
+    new_watermark = {
+        "updated_at": watermark_time(watermark).isoformat() if watermark else pd.Timestamp(0, tz="UTC").isoformat(),
+        "misclassified_id": watermark["misclassified_id"] if watermark else 0,
+        "complaint_id": ceiling,
+    }
+    mis = df[df["misclassified_id"].notna()] if "misclassified_id" in df else df.iloc[0:0]
+    if not mis.empty:
+        # Rows come ordered by (updated_at, misclassified_id)
+        last = mis.iloc[-1]
+        new_watermark["updated_at"] = pd.Timestamp(last["updated_at"]).isoformat()
+        new_watermark["misclassified_id"] = int(last["misclassified_id"])
+    return df, new_watermark, len(mis)
+
+
+def build_shard_frames(df: pd.DataFrame, label_column: str, split_sizes: Dict[str, float]) -> Dict[str, pd.DataFrame]:
+    """Cleaned and encoded rows per split, columns (complaint_id, grievance, label)."""
+    df_clean = clean_and_encode_dataset(df, label_column=label_column)
+    # clean_and_encode_dataset keeps the index, so ids line up with the surviving rows
+    df_clean.insert(0, "complaint_id", df.loc[df_clean.index, "complaint_id"].astype("int64"))
+    df_clean["label"] = df_clean["label"].astype("int64")
+    splits = assign_splits(df_clean["complaint_id"], **split_sizes)
+    return {split: df_clean[splits == split].reset_index(drop=True) for split in SPLITS}
+
+
+def _parquet_bytes(frame: pd.DataFrame) -> bytes:
+    buf = io.BytesIO()
+    frame.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def _commit(hf_dataset_dir: str, hf_token: Optional[str], files: Dict[str, bytes], deletes: List[str],
+            commit_message: str, version_tag: str, local_dir: Optional[str]) -> None:
+    if local_dir:
+        for path in deletes:
+            full = os.path.join(local_dir, path)
+            if os.path.exists(full):
+                os.remove(full)
+        for path, content in files.items():
+            full = os.path.join(local_dir, path)
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as f:
+                f.write(content)
+        return
+
+    api = HfApi()
+    create_repo(repo_id=hf_dataset_dir, token=hf_token, repo_type="dataset", private=False, exist_ok=True)
+    operations = [CommitOperationDelete(path_in_repo=path) for path in deletes]
+    operations += [CommitOperationAdd(path_in_repo=path, path_or_fileobj=content) for path, content in files.items()]
+    api.create_commit(
+        repo_id=hf_dataset_dir,
+        repo_type="dataset",
+        operations=operations,
+        commit_message=commit_message,
+        token=hf_token,
+    )
+    print(f"[INFO]  Shard committed to Hugging Face Hub: {hf_dataset_dir}")
+    try:
+        api.create_tag(repo_id=hf_dataset_dir, repo_type="dataset", tag=version_tag, token=hf_token)
+        print(f"[INFO]  Version tag created: {version_tag}")
+    except Exception as e:
+        print(f"[WARN]  Failed to tag version: {e}")
+
+
+def _stale_files(hf_dataset_dir: str, hf_token: Optional[str], local_dir: Optional[str]) -> List[str]:
+    """Data files a first or full build replaces: pre-shard push_to_hub files and old shards."""
+    if local_dir:
+        paths = [
+            os.path.relpath(os.path.join(root, name), local_dir).replace(os.sep, "/")
+            for root, _, names in os.walk(os.path.join(local_dir, "data")) for name in names
+        ]
+    else:
+        try:
+            paths = HfApi().list_repo_files(hf_dataset_dir, repo_type="dataset", token=hf_token)
+        except RepositoryNotFoundError:
+            return []
+    return [p for p in paths if p.startswith("data/")]
+
+
+def build_incremental_dataset(engine,
+                              hf_token: Optional[str],
+                              hf_dataset_dir: str,
+                              label_column: str = "department",
+                              correct_ratio: float = 0.5,
+                              min_dataset_len: int = 0,
+                              full_rebuild: bool = False,
+                              train_size: float = 0.8,
+                              val_size: float = 0.1,
+                              test_size: float = 0.1,
+                              chunksize: Optional[int] = None,
+                              local_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Append one shard with the rows added since the last build.
+
+    Returns a summary dict: status ('pushed' or 'no_new_data'), shard_id, version_tag,
+    delta counts, union totals and the new watermark.
+
+    Raises:
+        ValueError: the union would stay below `min_dataset_len` (nothing is pushed and
+        the watermark does not move, so the rows are picked up again next run).
+    """
+    split_sizes = {"train_size": train_size, "val_size": val_size, "test_size": test_size}
+    manifest = None if full_rebuild else load_manifest(hf_dataset_dir, hf_token, local_dir)
+    if manifest is not None and manifest["split_rule"].get("salt") != SPLIT_SALT:
+        raise RuntimeError("DATASET_SPLIT_SALT changed since the last build; run a full rebuild")
+    first_build = manifest is None
+    if first_build:
+        manifest = _empty_manifest(hf_dataset_dir, label_column, split_sizes)
+
+    df, watermark, n_misclassified = fetch_delta(
+        label_column, engine, manifest["watermark"], correct_ratio=correct_ratio, chunksize=chunksize
+    )
+    if n_misclassified == 0:
+        print(f"[INFO]  No new reviewed misclassifications for '{label_column}' since {manifest['watermark']}")
+        return {"status": "no_new_data", "num_samples": manifest["num_samples"], "watermark": manifest["watermark"]}
+
+    frames = build_shard_frames(df, label_column, split_sizes)
+    delta_splits = {split: len(frame) for split, frame in frames.items()}
+    delta_total = sum(delta_splits.values())
+    union_total = manifest["num_samples"] + delta_total
+    if union_total < int(min_dataset_len):
+        raise ValueError(
+            f"Skipped pushing '{label_column}' dataset — insufficient data ({union_total} < {min_dataset_len})."
+        )
+
+    timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+    version_tag = f"v{timestamp}"
+    shard_id = f"{len(manifest['shards']) + 1:06d}"
+    shard_dir = f"{SHARD_ROOT}/{shard_id}"
+    files = {f"{shard_dir}/{split}.parquet": _parquet_bytes(frame) for split, frame in frames.items()}
+
+    manifest["shards"].append({
+        "shard_id": shard_id,
+        "version_tag": version_tag,
+        "created_at": datetime.now(UTC).isoformat(),
+        "num_samples": delta_total,
+        "num_misclassified": n_misclassified,
+        "splits": delta_splits,
+        "files": {split: f"{shard_dir}/{split}.parquet" for split in SPLITS},
+        "watermark": watermark,
+    })
+    manifest["watermark"] = watermark
+    manifest["num_samples"] = union_total
+    manifest["splits"] = {split: manifest["splits"].get(split, 0) + delta_splits[split] for split in SPLITS}
+    files[MANIFEST_FILE] = json.dumps(manifest, indent=4).encode("utf-8")
+
+    metadata = {
+        "dataset_name": hf_dataset_dir,
+        "version_tag": version_tag,
+        "label_column": label_column,
+        "created_at": datetime.now(UTC).isoformat(),
+        "commit_message": f"Dataset shard {shard_id} ({label_column}) - {timestamp}",
+        "num_samples": union_total,
+        "splits": manifest["splits"],
+        "author": "mr-kush",
+        "description": f"Processed and versioned dataset for {label_column} classification, built incrementally in shards.",
+        "data_files": {split: f"{SHARD_ROOT}/*/{split}.parquet" for split in SPLITS},
+        # The orchestrator counts new misclassifications from here to decide on the next build
+        "watermark": watermark,
+    }
+    files["README.md"] = render_hf_readme(metadata).encode("utf-8")
+    files["dataset_metadata.json"] = json.dumps({k: v for k, v in metadata.items() if k != "data_files"}, indent=4).encode("utf-8")
+
+    # A full rebuild starts again at shard 000001, so keep the paths it is about to write
+    deletes = [path for path in _stale_files(hf_dataset_dir, hf_token, local_dir) if path not in files] if first_build else []
+    _commit(hf_dataset_dir, hf_token, files, deletes, metadata["commit_message"], version_tag, local_dir)
+    print(f"[INFO]  Shard {shard_id}: {delta_total} rows ({n_misclassified} misclassified), union {union_total}")
+
+    return {
+        "status": "pushed",
+        "shard_id": shard_id,
+        "version_tag": version_tag,
+        "delta_samples": delta_total,
+        "delta_splits": delta_splits,
+        "num_samples": union_total,
+        "splits": manifest["splits"],
+        "watermark": watermark,
+    }
@@ -7,6 +7,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from huggingface_hub import HfApi
 from preprocess_and_prepare_dataset import preprocess_and_push_dataset
 from prepare_pd_df import fetch_misclassified_dataframe
+from dataset_snapshots import build_incremental_dataset
 
 
 #  LOAD ENVIRONMENT 
@@ -28,6 +29,9 @@ def prepare_datasets():
     WANDB_API_KEY = os.getenv('WANDB_API_KEY') 
     WANDB_PROJECT_NAME = os.getenv('WANDB_PROJECT_NAME', "sambodhan-dataset-pipeline")
     MIN_DATASET_LEN= os.getenv('MIN_DATASET_LEN', 1000)
+    SAMPLE_METHOD = os.getenv('CORRECT_SAMPLE_METHOD', 'auto')  # auto | hash | tablesample
+    INCREMENTAL_DATASET = os.getenv('INCREMENTAL_DATASET', 'true').lower() == 'true'
+    FULL_DATASET_REBUILD = os.getenv('FULL_DATASET_REBUILD', 'false').lower() == 'true'
 
     # Validate environment variables
     required_env = {
@@ -51,6 +55,8 @@ def prepare_datasets():
             "department_dataset": dept_dataset_dir,
             "urgency_dataset": urgency_dataset_dir,
             "hf_space_id": PREPARE_DATASET_SPACE_ID,
+            "incremental": INCREMENTAL_DATASET,
+            "full_rebuild": FULL_DATASET_REBUILD,
             "timestamp": time.strftime('%Y-%m-%d %H:%M:%S'),
         },
         tags=["dataset-prep", "hf-space", "auto-sync"],
@@ -99,11 +105,40 @@ def prepare_datasets():
 
     for label, dataset_dir in dataset_mapping.items():
         try:
+            if INCREMENTAL_DATASET:
+                wandb.termlog(f"Building incremental '{label}' shard...")
+                result = build_incremental_dataset(
+                    engine=engine,
+                    hf_token=hf_token,
+                    hf_dataset_dir=dataset_dir,
+                    label_column=label,
+                    correct_ratio=0.5,
+                    min_dataset_len=int(MIN_DATASET_LEN),
+                    full_rebuild=FULL_DATASET_REBUILD,
+                )
+                wandb.log({
+                    f"{label}_push_status": result["status"],
+                    f"{label}_records_fetched": result.get("delta_samples", 0),
+                    f"{label}_dataset_size": result["num_samples"],
+                })
+                if result["status"] == "no_new_data":
+                    wandb.termlog(f"No new data for '{label}'; dataset left unchanged.")
+                    continue
+
+                wandb.termlog(f"Pushed '{label}' shard {result['shard_id']} ({result['delta_samples']} new rows, {result['num_samples']} total).")
+                wandb.alert(
+                    title=f"{label.capitalize()} Dataset Updated",
+                    text=f"Appended shard {result['shard_id']} ({result['delta_samples']} rows) to {dataset_dir}",
+                    level=wandb.AlertLevel.INFO,
+                )
+                continue
+
             wandb.termlog(f"Fetching misclassified data for '{label}'...")
             df = fetch_misclassified_dataframe(
                 label_column=label,
                 engine=engine,
                 correct_ratio=0.5,
+                sample_method=SAMPLE_METHOD,
             )
             record_count = len(df)
             wandb.log({f"{label}_records_fetched": record_count})
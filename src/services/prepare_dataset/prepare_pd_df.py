@@ -1,13 +1,173 @@
 # prepare_pd_dataframe.py
 
+from typing import Any, Dict, Iterator, Optional
+
 import pandas as pd
 from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+COLUMNS = ["grievance", "department", "urgency"]
+
+# Ordered hash sampling: rows are ranked by (id * a + b) mod p, with a and b derived
+# from the seed. The ranking is the same on every run with the same seed, works on
+# any SQL backend (integer arithmetic only), and new complaints never reshuffle the
+# rank of existing ones.
+HASH_PRIME = 2147483647  # 2^31 - 1
+
+# "auto" switches to TABLESAMPLE (Postgres) above this estimated number of complaints
+TABLESAMPLE_MIN_ROWS = 200_000
+# Bernoulli percentage is sized for this many times the rows needed, so the sample is
+# rarely short after the anti-join and label filter
+TABLESAMPLE_OVERSAMPLE = 4.0
+
+
+def _hash_params(seed: int):
+    a = (seed * 2654435761 + 1) % (HASH_PRIME - 1) + 1
+    b = (seed * 40503 + 12345) % HASH_PRIME
+    return a, b
+
+
+def _estimated_complaints(conn) -> int:
+    """Planner row estimate for complaints, summed over partitions (Postgres only)."""
+    return int(conn.execute(text("""
+        SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)
+        FROM pg_class
+        WHERE oid = 'complaints'::regclass
+           OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'complaints'::regclass)
+    """)).scalar() or 0)
+
+
+def _correct_sample_sql(label_column: str, tablesample: bool, id_range: bool = False) -> str:
+    sample = "TABLESAMPLE BERNOULLI (:pct) REPEATABLE (:seed)" if tablesample else ""
+    in_range = "AND c.id > :min_complaint_id AND c.id <= :max_complaint_id" if id_range else ""
+    return f"""
+        SELECT c.id AS complaint_id,
+               c.message AS grievance,
+               c.department AS department,
+               c.urgency AS urgency
+        FROM complaints c {sample}
+        WHERE c.{label_column} IS NOT NULL
+          {in_range}
+          AND NOT EXISTS (SELECT 1 FROM misclassified_complaints mc WHERE mc.complaint_id = c.id)
+        ORDER BY (CAST(c.id AS BIGINT) * :hash_a + :hash_b) % :hash_p
+        LIMIT :n
+    """
+
+
+def _read(conn, sql: str, params: dict, chunksize: Optional[int]) -> Iterator[pd.DataFrame]:
+    if chunksize:
+        # Server-side cursor: rows arrive chunk by chunk instead of all at once
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunksize)
+        yield from pd.read_sql(text(sql), conn, params=params, chunksize=chunksize)
+    else:
+        yield pd.read_sql(text(sql), conn, params=params)
 
 
-def fetch_misclassified_dataframe(label_column: str, 
-                                  engine, 
+def iter_misclassified_dataframe(label_column: str,
+                                 engine,
+                                 correct_ratio: float = 0.5,
+                                 random_state: int = 42,
+                                 chunksize: Optional[int] = None,
+                                 sample_method: str = "auto",
+                                 since: Optional[Dict[str, Any]] = None,
+                                 max_complaint_id: Optional[int] = None
+                                 ) -> Iterator[pd.DataFrame]:
+    """
+    Streaming form of `fetch_misclassified_dataframe`: yields DataFrames with columns
+    ['complaint_id', 'grievance', 'department', 'urgency', 'misclassified_id', 'updated_at'],
+    misclassified records first, then the sampled correct records (whose last two
+    columns are null). With `chunksize`, each query is read through a server-side
+    cursor and no chunk is larger than `chunksize` rows.
+
+    since / max_complaint_id (incremental builds):
+      since = {"updated_at", "misclassified_id", "complaint_id"} is the previous build's
+      high-water mark. Only misclassifications reviewed or changed after it (by
+      updated_at, then id) are returned, and correct records are sampled from complaints with
+      since["complaint_id"] < id <= max_complaint_id.
+
+    sample_method:
+      'hash'         exact ordered hash sample (any backend)
+      'tablesample'  Postgres TABLESAMPLE BERNOULLI ... REPEATABLE prefilter, then the
+                     same hash ordering; falls back to 'hash' if the sample comes up short
+      'auto'         'tablesample' on Postgres once complaints exceed TABLESAMPLE_MIN_ROWS
+    """
+    if label_column not in {"department", "urgency"}:
+        raise ValueError("label_column must be either 'department' or 'urgency'")
+    if sample_method not in {"auto", "hash", "tablesample"}:
+        raise ValueError("sample_method must be 'auto', 'hash' or 'tablesample'")
+
+    # define conditions based on column
+    miscond = f"mc.correct_{label_column} IS NOT NULL AND mc.model_predicted_{label_column} IS DISTINCT FROM mc.correct_{label_column}"
+
+    mis_params: Dict[str, Any] = {}
+    if since:
+        miscond += " AND (mc.updated_at > :since_at OR (mc.updated_at = :since_at AND mc.id > :since_id))"
+        mis_params = {"since_at": since["updated_at"], "since_id": since["misclassified_id"]}
+
+    # SQL to fetch misclassified records
+    sql_mis = f"""
+        SELECT c.id AS complaint_id,
+               c.message AS grievance,
+               mc.correct_department AS department,
+               mc.correct_urgency AS urgency,
+               mc.id AS misclassified_id,
+               mc.updated_at AS updated_at
+        FROM misclassified_complaints mc
+        JOIN complaints c ON c.id = mc.complaint_id
+        WHERE mc.reviewed = TRUE
+          AND {miscond}
+        ORDER BY mc.updated_at, mc.id
+    """
+    n_mis = 0
+    with engine.connect() as conn:
+        for chunk in _read(conn, sql_mis, mis_params, chunksize):
+            n_mis += len(chunk)
+            if not chunk.empty:
+                yield chunk
+
+    n_correct = int(n_mis * correct_ratio)
+    if n_correct <= 0:
+        return
+
+    hash_a, hash_b = _hash_params(random_state)
+    params = {"n": n_correct, "hash_a": hash_a, "hash_b": hash_b, "hash_p": HASH_PRIME}
+    id_range = since is not None or max_complaint_id is not None
+    if id_range:
+        params.update(min_complaint_id=(since or {}).get("complaint_id") or 0,
+                      max_complaint_id=max_complaint_id if max_complaint_id is not None else 2**63 - 1)
+
+    with engine.connect() as conn:
+        # A bounded id range is an index range scan already; TABLESAMPLE is for whole-table pulls
+        use_tablesample = sample_method != "hash" and not id_range and conn.dialect.name == "postgresql"
+        if use_tablesample:
+            estimate = _estimated_complaints(conn)
+            use_tablesample = estimate > 0 and (sample_method == "tablesample" or estimate >= TABLESAMPLE_MIN_ROWS)
+        if use_tablesample:
+            pct = min(100.0, 100.0 * TABLESAMPLE_OVERSAMPLE * n_correct / estimate)
+            try:
+                sampled = pd.read_sql(text(_correct_sample_sql(label_column, True)), conn,
+                                      params=dict(params, pct=pct, seed=random_state))
+            except SQLAlchemyError as e:
+                print(f"TABLESAMPLE failed ({e}); using hash sampling")
+                conn.rollback()
+                sampled = None
+            if sampled is not None and (len(sampled) >= n_correct or pct >= 100.0):
+                step = chunksize or max(len(sampled), 1)
+                for start in range(0, len(sampled), step):
+                    yield sampled.iloc[start:start + step].reset_index(drop=True)
+                return
+
+        # Only the n_correct lowest-ranked rows leave the database (top-N sort, no full pull)
+        for chunk in _read(conn, _correct_sample_sql(label_column, False, id_range), params, chunksize):
+            yield chunk
+
+
+def fetch_misclassified_dataframe(label_column: str,
+                                  engine,
                                   correct_ratio: float = 0.5,
-                                  random_state: int = 42
+                                  random_state: int = 42,
+                                  chunksize: Optional[int] = None,
+                                  sample_method: str = "auto"
                                   ) -> pd.DataFrame:
     """
     Fetches a DataFrame with grievance text + labels from the tables:
@@ -16,75 +176,42 @@ def fetch_misclassified_dataframe(label_column: str,
     Will include:
       - all reviewed misclassified records (model_predicted_x != correct_x)
       - + sampled correct records (model_predicted_x == correct_x) at `correct_ratio` of misclassified count.
-    
+
+    The correct records are sampled in the database (seeded ordered hash sampling with
+    a NOT EXISTS anti-join), so only the rows that end up in the DataFrame are fetched.
+
     Args:
       label_column (str): either 'department' or 'urgency'
       correct_ratio (float): fraction of misclassified count to sample from correct set
       random_state (int): random seed for sampling
-    
+      chunksize (int, optional): read through a server-side cursor in chunks of this size
+      sample_method (str): 'auto', 'hash' or 'tablesample' (see iter_misclassified_dataframe)
+
     Returns:
       pd.DataFrame with columns ['grievance', 'department', 'urgency']
     """
-    if label_column not in {"department", "urgency"}:
-        raise ValueError("label_column must be either 'department' or 'urgency'")
-    
-    
-    
-    # define conditions based on column
-    miscond = f"mc.correct_{label_column} IS NOT NULL AND mc.model_predicted_{label_column} IS DISTINCT FROM mc.correct_{label_column}"
-    
-    # SQL to fetch misclassified records
-    sql_mis = text(f"""
-        SELECT c.message AS grievance,
-               mc.correct_department AS department,
-               mc.correct_urgency AS urgency
-        FROM misclassified_complaints mc
-        JOIN complaints c ON c.id = mc.complaint_id
-        WHERE mc.reviewed = TRUE
-          AND {miscond}
-    """)
-    with engine.connect() as conn:
-        df_mis = pd.read_sql(sql_mis, conn)
-    
-    # basic check
-    if df_mis.empty:
-        return pd.DataFrame(columns=["grievance","department","urgency"])
-    
-    n_mis = len(df_mis)
-    n_correct = int(n_mis * correct_ratio)
-    
-    # SQL to fetch correct records from complaints table NOT in misclassified_complaints
-    sql_corr = text(f"""
-        SELECT c.id AS complaint_id,
-               c.message AS grievance,
-               c.department AS department,
-               c.urgency AS urgency
-        FROM complaints c
-        WHERE c.id NOT IN (SELECT complaint_id FROM misclassified_complaints)
-          AND c.{label_column} IS NOT NULL
-    """)
-    
-    with engine.connect() as conn:
-        df_corr_all = pd.read_sql(sql_corr, conn)
-    
-    if n_correct > 0 and not df_corr_all.empty:
-        # reproducible random sample
-        df_corr = df_corr_all.sample(n=min(n_correct, len(df_corr_all)), random_state=random_state).reset_index(drop=True)
-    else:
-        df_corr = pd.DataFrame(columns=["grievance","department","urgency"])
-    
+    chunks = list(iter_misclassified_dataframe(
+        label_column, engine,
+        correct_ratio=correct_ratio,
+        random_state=random_state,
+        chunksize=chunksize,
+        sample_method=sample_method,
+    ))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+
     # Combine
-    df_combined = pd.concat([df_mis.reset_index(drop=True), df_corr], ignore_index=True)
-    
+    df_combined = pd.concat(chunks, ignore_index=True)[COLUMNS]
+
     # final check: ensure columns present
-    assert set(df_combined.columns) == {"grievance","department","urgency"}, "Unexpected columns in combined DataFrame"
-    
+    assert set(df_combined.columns) == set(COLUMNS), "Unexpected columns in combined DataFrame"
+
     return df_combined
 
 # # If this file is run directly, simple test:
 # if __name__ == "__main__":
 #     # Quick sanity test for department label
-#     df_test = fetch_misclassified_dataframe(label_column="department", 
+#     df_test = fetch_misclassified_dataframe(label_column="department",
 #                                             correct_ratio=0.5)
 #     print("Rows fetched:", len(df_test))
 #     print(df_test.head())
@@ -1,4 +1,3 @@
-import re
 import pandas as pd
 from datasets import Dataset, DatasetDict
 from sklearn.model_selection import train_test_split
@@ -6,6 +5,7 @@ from huggingface_hub import HfApi, create_repo
 from datetime import datetime, UTC
 import os
 import json
+from text_normalization import clean_text, clean_text_series
 
 
 
@@ -28,18 +28,6 @@ id2urgency = {v: k for k, v in urgency2id.items()}
 
 
 
-# Text Cleaning Function
-
-def clean_text(text: str) -> str:
-    """Clean grievance text by removing URLs, HTML tags, extra whitespace."""
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
-    text = re.sub(r'<.*?>', '', text)  # Remove HTML tags
-    text = re.sub(r'\n', ' ', text)  # Replace newlines with space
-    text = re.sub(r'\s+', ' ', text).strip()  # Reduce multiple spaces
-    return text
-
-
-
 # Dataset Cleaning & Encoding
 
 def clean_and_encode_dataset(df: pd.DataFrame, label_column: str = 'department') -> pd.DataFrame:
@@ -57,7 +45,7 @@ def clean_and_encode_dataset(df: pd.DataFrame, label_column: str = 'department')
         raise ValueError("label_column must be either 'department' or 'urgency'")
 
     df = df.copy()
-    df['grievance'] = df['grievance'].apply(clean_text)
+    df['grievance'] = clean_text_series(df['grievance'])
 
     if label_column == 'department':
         df['label'] = df['department'].map(department2id)
@@ -105,14 +93,12 @@ def split_dataset(df: pd.DataFrame,train_size:float = 0.8, test_size: float = 0.
     return dataset_dict
 
 
-# upload readme.md file
-def upload_hf_readme(hf_token: str, metadata: dict):
+# readme.md content
+def render_hf_readme(metadata: dict) -> str:
     """
-    Uploads or updates a dynamic README.md file in the Hugging Face dataset repository
-    with proper YAML metadata for dataset cards.
+    Builds the dataset card (README.md) with proper YAML metadata.
 
     Args:
-        hf_token (str): Hugging Face write access token.
         metadata (dict): Metadata dictionary containing:
             {
                 "dataset_name": "mr-kush/misclassified-department",
@@ -123,11 +109,11 @@ def upload_hf_readme(hf_token: str, metadata: dict):
                 "num_samples": 2426,
                 "splits": {"train": 1940, "eval": 243, "test": 243},
                 "author": "mr-kush",
-                "description": "Processed and versioned dataset for department classification."
+                "description": "Processed and versioned dataset for department classification.",
+                "data_files": {"train": "data/shards/*/train.parquet", ...}  # optional, sharded builds
             }
     """
 
-    api = HfApi()
     label_column = metadata.get("label_column", "department")
     dataset_name = metadata.get("dataset_name", "unknown-dataset")
     version_tag = metadata.get("version_tag", "v_unknown")
@@ -160,9 +146,17 @@ def upload_hf_readme(hf_token: str, metadata: dict):
         label_map_str = "_No label mapping available._"
 
 
+    # Explicit data files per split (sharded builds); otherwise the Hub infers them
+    data_files = metadata.get("data_files")
+    configs_yaml = ""
+    if data_files:
+        configs_yaml = "configs:\n- config_name: default\n  data_files:\n" + "".join(
+            f"  - split: {split}\n    path: {path}\n" for split, path in data_files.items()
+        )
+
     # Construct YAML metadata (Hugging Face dataset card standard)
     yaml_header = f"""---
-datasets:
+{configs_yaml}datasets:
 - {dataset_name}
 language:
 - en
@@ -217,6 +211,25 @@ It ensures:
 _Last updated automatically by the pipeline on {created_at}._
 """
 
+    return readme_content
+
+
+# upload readme.md file
+def upload_hf_readme(hf_token: str, metadata: dict):
+    """
+    Uploads or updates a dynamic README.md file in the Hugging Face dataset repository
+    with proper YAML metadata for dataset cards (see render_hf_readme for the metadata keys).
+
+    Args:
+        hf_token (str): Hugging Face write access token.
+        metadata (dict): Metadata dictionary
+    """
+
+    api = HfApi()
+    dataset_name = metadata.get("dataset_name", "unknown-dataset")
+    version_tag = metadata.get("version_tag", "v_unknown")
+    readme_content = render_hf_readme(metadata)
+
     # Upload README.md file to the dataset repository
     api.upload_file(
         path_or_fileobj=readme_content.encode("utf-8"),
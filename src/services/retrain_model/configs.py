@@ -27,6 +27,10 @@ class BaseConfig:
     hf_token: str = os.getenv("HF_TOKEN", None)
     model_checkpoint: str = os.getenv("MODEL_CHECKPOINT", "xlm-roberta-base")
     dataset_repo_id: str = os.getenv("DATASET_REPO_ID", None)
+    dataset_shards: str = os.getenv("DATASET_SHARDS", "all")  # all | latest (sharded datasets only)
+    dataset_cache_dir: str = os.getenv("DATASET_CACHE_DIR", "dataset_cache")  # empty disables the local cache
+    dataset_cache_keep: int = int(os.getenv("DATASET_CACHE_KEEP", 3))  # snapshots kept per dataset
+    dataset_offline: bool = os.getenv("DATASET_OFFLINE", "false").lower() == "true"  # train from the cache only
     hub_model_id: str = os.getenv("HUB_MODEL_ID", None)
     api_endpoint: str = os.getenv("API_ENDPOINT", None)
     space_repo_id: str = os.getenv("SPACE_REPO_ID", None)
@@ -37,9 +41,28 @@ class BaseConfig:
     wandb_project_name: str = os.getenv("WANDB_PROJECT_NAME", "sam-urgency-classifier")
 
     # Training hyperparameters
+    max_length: int | None = int(os.getenv("MAX_LENGTH")) if os.getenv("MAX_LENGTH") else None  # default: tokenizer's
     early_stopping_patience: int = int(os.getenv("EARLY_STOPPING_PATIENCE", 1))
     deployed_sample_size: int = int(os.getenv("DEPLOYED_SAMPLE_SIZE", 300))
+    deployed_batch_size: int = int(os.getenv("DEPLOYED_BATCH_SIZE", 32))  # texts per request to API_ENDPOINT
+    deployed_max_workers: int = int(os.getenv("DEPLOYED_MAX_WORKERS", 4))  # concurrent requests to API_ENDPOINT
     decision_threshold: float = float(os.getenv("DECISION_THRESHOLD", 0.001))
+
+    # Distillation (optional): compact student trained from the fine-tuned model's soft labels
+    student_checkpoint: str = os.getenv("STUDENT_CHECKPOINT", "")  # e.g. a 6-layer multilingual MiniLM; empty disables
+    student_learning_rate: float = float(os.getenv("STUDENT_LEARNING_RATE", 5e-5))
+    distill_alpha: float = float(os.getenv("DISTILL_ALPHA", 0.5))  # weight of the teacher's soft labels
+    distill_temperature: float = float(os.getenv("DISTILL_TEMPERATURE", 2.0))
+    student_max_f1_drop: float = float(os.getenv("STUDENT_MAX_F1_DROP", 0.02))  # vs. the teacher's F1 macro
+    serve_student: bool = os.getenv("SERVE_STUDENT", "false").lower() == "true"  # deploy the student when accepted
+
+    # Warm start (optional): resume from the deployed HUB_MODEL_ID and train on the latest
+    # dataset shard plus a replay sample of older rows instead of the full dataset
+    warm_start: bool = os.getenv("WARM_START", "false").lower() == "true"
+    warm_start_replay_ratio: float = float(os.getenv("WARM_START_REPLAY_RATIO", 1.0))  # replay rows per new row
+    warm_start_freeze_layers: int = int(os.getenv("WARM_START_FREEZE_LAYERS", 0))  # + embeddings; 0 trains all
+    warm_start_learning_rate: float = float(os.getenv("WARM_START_LEARNING_RATE", 1e-5))
+    warm_start_epochs: float = float(os.getenv("WARM_START_EPOCHS", 2))
     
     
     def validate_required(self, required_fields):
@@ -66,9 +89,31 @@ class UrgencyConfig(BaseConfig):
     label2id: dict = urgency2id
 
 
+class MultiTaskConfig(BaseConfig):
+    """Configuration for the shared-encoder urgency + department model (multitask_pipeline.py)"""
+    # label
+    label: str = "multitask"
+    # heads: task -> id2label
+    tasks: dict = {"urgency": id2urgency, "department": id2department}
+    # one dataset per task (DATASET_REPO_ID is not used)
+    urgency_dataset_repo_id: str = os.getenv("URGENCY_DATASET_REPO_ID", None)
+    department_dataset_repo_id: str = os.getenv("DEPARTMENT_DATASET_REPO_ID", None)
+    # Deployed models to beat: API_ENDPOINT is the multitask API's /predict_all; while it is
+    # not deployed yet, the single-task APIs' endpoints are compared per task instead
+    urgency_api_endpoint: str = os.getenv("URGENCY_API_ENDPOINT", None)
+    department_api_endpoint: str = os.getenv("DEPARTMENT_API_ENDPOINT", None)
+
+    def api_endpoints(self) -> dict:
+        """{task: (endpoint, response_key)} of the deployed model(s) to compare against."""
+        if self.api_endpoint:
+            return {task: (self.api_endpoint, task) for task in self.tasks}
+        endpoints = {"urgency": self.urgency_api_endpoint, "department": self.department_api_endpoint}
+        return {task: (url, None) for task, url in endpoints.items() if url}
+
+
 def get_config() -> BaseConfig:
     """
-    Dynamically return DepartmentConfig or UrgencyConfig
+    Dynamically return DepartmentConfig, UrgencyConfig or MultiTaskConfig
     based on LABEL environment variable.
     Also validates required secrets.
     """
@@ -96,6 +141,17 @@ def get_config() -> BaseConfig:
             "wandb_api_key", 
             "retrain_space_id"
         ]
+    elif label == "multitask":
+        config = MultiTaskConfig()
+        required_fields = [
+            "hf_token",
+            "urgency_dataset_repo_id",
+            "department_dataset_repo_id",
+            "hub_model_id",
+            "space_repo_id",
+            "wandb_api_key",
+            "retrain_space_id"
+        ]
     else:
         raise ValueError(f"Unsupported LABEL '{label}' in environment variables.")
 
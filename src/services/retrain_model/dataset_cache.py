@@ -0,0 +1,183 @@
+# dataset_cache.py
+"""
+Local store for the retrain datasets, so reruns and sweeps skip the Hub download and
+re-tokenization, and training can run offline.
+
+Layout (one directory per dataset snapshot, keyed by the Hub commit sha):
+
+    <root>/<repo>/<shards>/latest                 sha of the newest stored snapshot
+    <root>/<repo>/<shards>/<sha>/metadata.json    metadata returned by load_dataset_from_hub
+    <root>/<repo>/<shards>/<sha>/<split>.parquet  raw splits
+    <root>/<repo>/<shards>/<sha>/arrow/           Arrow files datasets builds from the Parquet
+    <root>/<repo>/<shards>/<sha>/tokenized/<key>/<split>/
+                                                  tokenized splits (save_to_disk), where <key>
+                                                  hashes the tokenizer config (checkpoint,
+                                                  class, vocabulary, max_length, ...), the
+                                                  text column and the rows of the source split
+
+Everything is loaded memory-mapped. Snapshots are written to a temporary directory and
+renamed into place, so an interrupted run never leaves a half-written entry behind.
+Only the newest `keep` snapshots per (repo, shards) are kept.
+"""
+import hashlib
+import json
+import os
+import shutil
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from datasets import Dataset, DatasetDict, load_dataset, load_from_disk
+
+METADATA_FILE = "metadata.json"
+LATEST_FILE = "latest"
+
+# Bump when tokenize_function changes in a way that changes its output
+TOKENIZE_VERSION = 2
+
+
+def tokenizer_config(tokenizer, checkpoint: str, max_length: Optional[int]) -> Dict[str, Any]:
+    """Everything about the tokenizer that changes tokenize_function's output, for tokenized_key."""
+    return {
+        "checkpoint": checkpoint,
+        "class": type(tokenizer).__name__,
+        "vocab_size": len(tokenizer),
+        "max_length": max_length,
+        "model_max_length": getattr(tokenizer, "model_max_length", None),
+        "truncation_side": getattr(tokenizer, "truncation_side", None),
+        "do_lower_case": getattr(tokenizer, "init_kwargs", {}).get("do_lower_case"),
+    }
+
+
+def source_fingerprint(dataset: Dataset) -> str:
+    """Hash of a split's columns and rows, so a tokenized copy is only reused for the same data."""
+    digest = hashlib.sha1(json.dumps({name: str(feature) for name, feature in dataset.features.items()}).encode("utf-8"))
+    for batch in dataset.with_format("pandas").iter(batch_size=10_000):
+        digest.update(pd.util.hash_pandas_object(batch, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Parquet/Arrow store for raw and tokenized dataset splits."""
+
+    def __init__(self, root: str, keep: int = 3):
+        """
+        Args:
+            root (str): Cache directory, created if missing.
+            keep (int): Snapshots to keep per (repo, shards); older ones are deleted.
+        """
+        self.root = root
+        self.keep = max(1, keep)
+        os.makedirs(root, exist_ok=True)
+
+    #  Raw snapshots
+
+    def _repo_dir(self, repo_id: str, shards: str) -> str:
+        return os.path.join(self.root, repo_id.replace("/", "__"), shards)
+
+    def snapshot_dir(self, repo_id: str, shards: str, sha: str) -> str:
+        return os.path.join(self._repo_dir(repo_id, shards), sha)
+
+    def has_snapshot(self, repo_id: str, shards: str, sha: str) -> bool:
+        return os.path.exists(os.path.join(self.snapshot_dir(repo_id, shards, sha), METADATA_FILE))
+
+    def latest_sha(self, repo_id: str, shards: str) -> Optional[str]:
+        """sha of the newest stored snapshot, or None if nothing is cached."""
+        path = os.path.join(self._repo_dir(repo_id, shards), LATEST_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                sha = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return sha if sha and self.has_snapshot(repo_id, shards, sha) else None
+
+    def load_snapshot(self, repo_id: str, shards: str, sha: str) -> Tuple[DatasetDict, Dict[str, Any]]:
+        """Raw splits (memory-mapped) and the metadata stored with them."""
+        path = self.snapshot_dir(repo_id, shards, sha)
+        with open(os.path.join(path, METADATA_FILE), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        data_files = {split: os.path.join(path, f"{split}.parquet") for split in metadata["dataset_splits"]}
+        dataset = load_dataset("parquet", data_files=data_files, cache_dir=os.path.join(path, "arrow"))
+        return dataset, metadata
+
+    def save_snapshot(self, repo_id: str, shards: str, sha: str, dataset: DatasetDict, metadata: Dict[str, Any]) -> None:
+        """Store the raw splits as Parquet and mark the snapshot as the newest."""
+        repo_dir = self._repo_dir(repo_id, shards)
+        final = os.path.join(repo_dir, sha)
+        tmp = f"{final}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for split, data in dataset.items():
+            data.to_parquet(os.path.join(tmp, f"{split}.parquet"))
+        # Where this snapshot lives, relative to the root, for tokenized_dir
+        metadata = {**metadata, "dataset_cache_entry": os.path.relpath(final, self.root)}
+        with open(os.path.join(tmp, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        with open(os.path.join(repo_dir, LATEST_FILE), "w", encoding="utf-8") as f:
+            f.write(sha)
+        self._prune(repo_dir, sha)
+
+    def _prune(self, repo_dir: str, current: str) -> None:
+        snapshots = [
+            os.path.join(repo_dir, name) for name in os.listdir(repo_dir)
+            if name != current and os.path.exists(os.path.join(repo_dir, name, METADATA_FILE))
+        ]
+        snapshots.sort(key=os.path.getmtime, reverse=True)
+        for path in snapshots[self.keep - 1:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    #  Tokenized splits
+
+    @staticmethod
+    def tokenized_key(tokenizer_config: Dict[str, Any], text_column: str, source: str) -> str:
+        """
+        Args:
+            tokenizer_config (dict): See tokenizer_config().
+            text_column (str): Column that was tokenized.
+            source (str): source_fingerprint() of the untokenized split.
+        """
+        key = json.dumps({
+            "tokenizer": tokenizer_config,
+            "text_column": text_column,
+            "source": source,
+            "version": TOKENIZE_VERSION,
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def tokenized_dir(
+        self,
+        metadata: Dict[str, Any],
+        split: str,
+        tokenizer_config: Dict[str, Any],
+        text_column: str,
+        source: str,
+    ) -> Optional[str]:
+        """
+        Directory for one tokenized split of the snapshot described by `metadata`
+        (as returned by load_dataset_from_hub), or None if it did not come from this cache.
+        A different tokenizer config or source split maps to a different directory.
+        """
+        entry = metadata.get("dataset_cache_entry")
+        if not entry or not os.path.exists(os.path.join(self.root, entry, METADATA_FILE)):
+            return None
+        key = self.tokenized_key(tokenizer_config, text_column, source)
+        return os.path.join(self.root, entry, "tokenized", key, split)
+
+    @staticmethod
+    def load_tokenized(path: str) -> Optional[Dataset]:
+        """Memory-mapped tokenized split, or None if it has not been stored."""
+        if not os.path.exists(os.path.join(path, "dataset_info.json")):
+            return None
+        return load_from_disk(path)
+
+    @staticmethod
+    def save_tokenized(path: str, dataset: Dataset) -> Dataset:
+        """Store a tokenized split and return the memory-mapped copy."""
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        dataset.save_to_disk(tmp)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+        return load_from_disk(path)
@@ -0,0 +1,129 @@
+# deployed_model_client.py
+"""
+Batched, concurrent client for a deployed classifier's POST /predict endpoint.
+
+The inference APIs accept {"text": str | List[str]} and answer with one prediction dict
+(for a single text) or a list of them. Texts are sent in batches of `batch_size`, at
+most `max_workers` batches in flight. A batch is retried with exponential backoff on
+connection errors, timeouts, 429 and 5xx. If the API rejects a whole batch (4xx, e.g. a
+text that is empty after its own validation), its texts are retried one by one, so a
+single bad text costs only its own prediction.
+
+For the multitask API (POST /predict_all) every prediction holds one dict per task, and
+`response_key` picks the task whose label is returned.
+
+scripts/deployed_model_stub.py serves a local stand-in of the API for trying this out.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    """One keep-alive session per worker thread (Session is not thread-safe)."""
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def _post(
+    texts: List[str],
+    api_endpoint: str,
+    timeout: float,
+    max_retries: int,
+    backoff: float,
+) -> Tuple[Optional[List[Dict[str, Any]]], int, Optional[int]]:
+    """POST one batch. Returns (predictions or None, attempts, last HTTP status)."""
+    payload = {"text": texts[0] if len(texts) == 1 else texts}
+    status = None
+    for attempt in range(1, max_retries + 2):
+        try:
+            resp = _session().post(api_endpoint, json=payload, timeout=timeout)
+            status = resp.status_code
+            if status == 200:
+                data = resp.json()
+                preds = data if isinstance(data, list) else [data]
+                if len(preds) == len(texts):
+                    return preds, attempt, status
+                return None, attempt, status
+            if status not in RETRY_STATUS:
+                return None, attempt, status
+        except (requests.ConnectionError, requests.Timeout):
+            status = None
+        if attempt <= max_retries:
+            time.sleep(backoff * 2 ** (attempt - 1))
+    return None, max_retries + 1, status
+
+
+def query_deployed_labels(
+    texts: List[str],
+    api_endpoint: str,
+    batch_size: int = 32,
+    max_workers: int = 4,
+    timeout: float = 30,
+    max_retries: int = 2,
+    backoff: float = 0.5,
+    response_key: Optional[str] = None,
+) -> Tuple[List[Optional[str]], List[Dict[str, Any]]]:
+    """
+    Predicted label for every text, plus per-batch timing.
+
+    Args:
+        texts (list[str]): Raw texts, sent as-is (the API cleans them).
+        api_endpoint (str): POST /predict endpoint URL.
+        batch_size (int): Texts per request.
+        max_workers (int): Requests in flight at once.
+        timeout (float): Per-request timeout in seconds.
+        max_retries (int): Retries per request on connection errors, timeouts, 429 and 5xx.
+        backoff (float): First retry delay in seconds, doubled on each retry.
+        response_key (str, optional): Task of a /predict_all response to read, e.g. "urgency".
+
+    Returns:
+        (labels, batches): labels[i] is the predicted label string for texts[i], or None
+        if it could not be predicted. batches holds one dict per batch:
+        {"batch", "size", "seconds", "attempts", "status", "ok", "split"}.
+    """
+    labels: List[Optional[str]] = [None] * len(texts)
+    # Texts the API's validation would reject never leave the process
+    valid = [i for i, t in enumerate(texts) if isinstance(t, str) and t.strip()]
+    batch_size = max(1, batch_size)
+    batches = [valid[i:i + batch_size] for i in range(0, len(valid), batch_size)]
+
+    def run(batch_no: int, idx: List[int]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        batch_texts = [texts[i] for i in idx]
+        preds, attempts, status = _post(batch_texts, api_endpoint, timeout, max_retries, backoff)
+        split = preds is None and len(idx) > 1 and status is not None and status not in RETRY_STATUS and status != 200
+        if split:
+            preds = []
+            for text in batch_texts:
+                one, tries, _ = _post([text], api_endpoint, timeout, max_retries, backoff)
+                attempts += tries
+                preds.append(one[0] if one else None)
+        for i, pred in zip(idx, preds or []):
+            if response_key and isinstance(pred, dict):
+                pred = pred.get(response_key)
+            if isinstance(pred, dict):
+                labels[i] = pred.get("label")
+        return {
+            "batch": batch_no,
+            "size": len(idx),
+            "seconds": round(time.perf_counter() - start, 4),
+            "attempts": attempts,
+            "status": status,
+            "ok": sum(labels[i] is not None for i in idx),
+            "split": split,
+        }
+
+    if not batches:
+        return labels, []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+        stats = list(pool.map(run, range(len(batches)), batches))
+    return labels, stats
@@ -1,11 +1,106 @@
 #load_dataset.py
 
-from datasets import load_dataset
-from huggingface_hub import HfApi, DatasetInfo
-from typing import Dict, Any
+import json
+from datasets import load_dataset, DatasetDict, Dataset, concatenate_datasets
+from huggingface_hub import HfApi, DatasetInfo, hf_hub_download
+from huggingface_hub.utils import EntryNotFoundError
+from typing import Dict, Any, List, Optional
+from dataset_cache import DatasetCache
 
+# Written by the prepare_dataset pipeline for incrementally built (sharded) datasets
+MANIFEST_FILE = "manifest.json"
+# shards="after-<version_tag>" selects the shards built after the one tagged version_tag
+AFTER_PREFIX = "after-"
 
-def load_dataset_from_hub(model_repo: str, hf_token: str) -> Dict[str, Any]:
+
+def load_manifest(model_repo: str, hf_token: str, revision: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """The dataset's shard manifest, or None for datasets pushed as a single snapshot."""
+    try:
+        path = hf_hub_download(model_repo, MANIFEST_FILE, repo_type="dataset", token=hf_token, revision=revision)
+    except EntryNotFoundError:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _latest_per_complaint(split):
+    """Keep only the newest row per complaint_id (a complaint re-reviewed later appears in a later shard)."""
+    last = {cid: i for i, cid in enumerate(split["complaint_id"])}
+    if len(last) == len(split):
+        return split
+    return split.select(sorted(last.values()))
+
+
+def select_shards(manifest: Dict[str, Any], shards: str = "all") -> List[Dict[str, Any]]:
+    """
+    The manifest entries `shards` selects: "all", "latest" (the newest shard) or
+    "after-<version_tag>" (every shard built after the one tagged version_tag). When no
+    shard has that tag the dataset was rebuilt since, so every shard is new.
+    """
+    entries = manifest["shards"]
+    if shards == "all":
+        return entries
+    if shards == "latest":
+        return entries[-1:]
+    if shards.startswith(AFTER_PREFIX):
+        tags = [shard["version_tag"] for shard in entries]
+        tag = shards[len(AFTER_PREFIX):]
+        return entries[tags.index(tag) + 1:] if tag in tags else entries
+    raise ValueError(f"shards must be 'all', 'latest' or '{AFTER_PREFIX}<version_tag>'")
+
+
+def load_sharded_dataset(
+    model_repo: str,
+    hf_token: str,
+    manifest: Dict[str, Any],
+    shards: str = "all",
+    revision: Optional[str] = None,
+) -> DatasetDict:
+    """
+    Load the shards of `manifest` that `shards` selects (see select_shards). Rows of
+    several shards are deduplicated by complaint, keeping the newest.
+    """
+    selected = select_shards(manifest, shards)
+    if not selected:
+        raise ValueError(f"no shards selected by '{shards}'")
+    split_names = selected[-1]["files"].keys()
+    data_files = {split: [shard["files"][split] for shard in selected] for split in split_names}
+    dataset = load_dataset(model_repo, data_files=data_files, token=hf_token, revision=revision)
+    if len(selected) > 1:
+        dataset = DatasetDict({name: _latest_per_complaint(split) for name, split in dataset.items()})
+    return dataset.remove_columns("complaint_id")
+
+
+def warm_start_train_split(
+    full_train: Dataset,
+    delta_train: Dataset,
+    replay_ratio: float = 1.0,
+    seed: int = 42,
+    text_column: str = "grievance",
+) -> Dataset:
+    """
+    Training rows for a warm start: the delta (the train split of the shards built since the
+    deployed model was trained) plus a random replay sample of the older training rows, `replay_ratio` replay rows per delta row.
+
+    The replay keeps the resumed model from forgetting what it already learned. Older rows
+    are the full train split without the delta's texts (complaint ids are dropped on load).
+    """
+    delta_texts = set(delta_train[text_column])
+    older = full_train.filter(
+        lambda batch: [text not in delta_texts for text in batch[text_column]], batched=True
+    )
+    replay_size = min(len(older), int(round(replay_ratio * len(delta_train))))
+    replay = older.shuffle(seed=seed).select(range(replay_size))
+    return concatenate_datasets([delta_train, replay.cast(delta_train.features)])
+
+
+def load_dataset_from_hub(
+    model_repo: str,
+    hf_token: str,
+    shards: str = "all",
+    cache: Optional[DatasetCache] = None,
+    offline: bool = False,
+) -> Dict[str, Any]:
     """
     Load a dataset from the Hugging Face Hub and return its metadata.
 
@@ -19,6 +114,17 @@ def load_dataset_from_hub(model_repo: str, hf_token: str) -> Dict[str, Any]:
         Example: "username/dataset_name".
     hf_token : str
         Your Hugging Face access token with permission to read the dataset.
+    shards : str
+        For incrementally built datasets (manifest.json present): "all" loads the union
+        of every shard, "latest" only the newest shard, "after-<version_tag>" the shards
+        built after that one. Ignored for single-snapshot datasets.
+    cache : DatasetCache, optional
+        Local Parquet store. If the Hub's current commit is already cached, the dataset is
+        loaded from disk (memory-mapped) instead of downloaded; otherwise it is downloaded
+        at that commit and stored. If the Hub cannot be reached, the newest cached
+        snapshot is used.
+    offline : bool
+        Do not contact the Hub at all; load the newest cached snapshot. Requires `cache`.
 
     Returns
     -------
@@ -27,7 +133,7 @@ def load_dataset_from_hub(model_repo: str, hf_token: str) -> Dict[str, Any]:
             "dataset": datasets.DatasetDict or datasets.Dataset,
             "metadata": {
                 "repo_id": str,
-                "sha": str,
+                "dataset_sha": str,
                 "splits": {"train": int, "test": int, "validation": int, ...},
                 "card_data": dict
             }
@@ -39,18 +145,39 @@ def load_dataset_from_hub(model_repo: str, hf_token: str) -> Dict[str, Any]:
         If the dataset cannot be found or loaded.
     """
     try:
-        #  Load dataset securely 
-        dataset = load_dataset(model_repo, token=hf_token)
-
         #  Initialize Hugging Face API client 
         api = HfApi()
 
-        #  Fetch dataset metadata from the Hub 
-        ds_info: DatasetInfo = api.dataset_info(repo_id=model_repo, token=hf_token)
-
-        # Extract useful details
-        sha = ds_info.sha or "unknown"
-        card_data = ds_info.card_data or {}
+        #  Resolve the dataset's current commit (skipped offline) 
+        sha = None
+        if offline:
+            if cache is None:
+                raise ValueError("offline mode needs a dataset cache")
+        else:
+            try:
+                ds_info: DatasetInfo = api.dataset_info(repo_id=model_repo, token=hf_token)
+                sha = ds_info.sha
+            except Exception as e:
+                if cache is None or cache.latest_sha(model_repo, shards) is None:
+                    raise
+                print(f"[DatasetCache] Hub unreachable ({e}); using the newest cached snapshot", flush=True)
+
+        #  Serve from the local cache when this commit is stored 
+        if cache is not None:
+            cached_sha = sha or cache.latest_sha(model_repo, shards)
+            if cached_sha and cache.has_snapshot(model_repo, shards, cached_sha):
+                dataset, metadata = cache.load_snapshot(model_repo, shards, cached_sha)
+                print(f"[DatasetCache] Loaded {model_repo}@{cached_sha[:8]} from {cache.root}", flush=True)
+                return {"dataset": dataset, "metadata": metadata}
+            if sha is None:
+                raise ValueError(f"no cached snapshot of '{model_repo}' (shards={shards}) in {cache.root}")
+
+        #  Load dataset securely, pinned to the resolved commit 
+        manifest = load_manifest(model_repo, hf_token, revision=sha)
+        if manifest and manifest.get("shards"):
+            dataset = load_sharded_dataset(model_repo, hf_token, manifest, shards=shards, revision=sha)
+        else:
+            dataset = load_dataset(model_repo, token=hf_token, revision=sha)
 
         #  Get latest tag (if exists) 
         latest_tag = None
@@ -73,10 +200,22 @@ def load_dataset_from_hub(model_repo: str, hf_token: str) -> Dict[str, Any]:
 
         metadata = {
             "dataset_repo_id": model_repo,
+            "dataset_sha": sha,
             "dataset_version_tag": latest_tag,
             "dataset_size": size,
             "dataset_splits": splits,
         }
+        if manifest and manifest.get("shards"):
+            metadata["dataset_version_tag"] = manifest["shards"][-1]["version_tag"]
+            metadata["dataset_shards"] = shards
+            metadata["dataset_shard_count"] = len(manifest["shards"])
+            metadata["dataset_shard_id"] = manifest["shards"][-1]["shard_id"]
+            metadata["dataset_watermark"] = manifest["shards"][-1].get("watermark")
+
+        if cache is not None and sha:
+            cache.save_snapshot(model_repo, shards, sha, dataset, metadata)
+            dataset, metadata = cache.load_snapshot(model_repo, shards, sha)
+            print(f"[DatasetCache] Stored {model_repo}@{sha[:8]} in {cache.root}", flush=True)
 
         return {"dataset": dataset, "metadata": metadata}
 
@@ -13,7 +13,7 @@ import wandb
 from wandb import AlertLevel
 import matplotlib.pyplot as plt
 import seaborn as sns
-import requests
+import time
 
 from transformers import (
     AutoTokenizer, DataCollatorWithPadding,
@@ -25,13 +25,22 @@ from sklearn.metrics import (
     precision_score, recall_score,
     classification_report, confusion_matrix
 )
+from dataset_cache import DatasetCache, source_fingerprint, tokenizer_config
+from deployed_model_client import query_deployed_labels
 
 
 
 # function to tokenize a batch of examples
-def tokenize_function(examples, tokenizer, text_column: str):
-    """Helper function for tokenization (pickle-safe for HF caching)."""
-    return tokenizer(examples[text_column], truncation=True)
+def tokenize_function(examples, tokenizer, text_column: str, max_length: int | None = None):
+    """
+    Helper function for tokenization (pickle-safe for HF caching).
+
+    No padding here: DataCollatorWithPadding pads each batch to its own longest sequence.
+    The "length" column feeds the Trainer's length-grouped sampler (group_by_length).
+    """
+    encoded = tokenizer(examples[text_column], truncation=True, max_length=max_length)
+    encoded["length"] = [len(ids) for ids in encoded["input_ids"]]
+    return encoded
 
 def sanitize_training_args(training_args):
     """Convert TrainingArguments to JSON-serializable dictionary."""
@@ -98,9 +107,57 @@ class FocalLossTrainer(Trainer):
         return (loss, outputs) if return_outputs else loss
 
 
+class DistillationTrainer(FocalLossTrainer):
+    """
+    Focal-loss Trainer for a student model that also learns the teacher's soft labels.
+
+    loss = alpha * T^2 * KL(teacher_T || student_T) + (1 - alpha) * focal(student, labels),
+    where *_T are the softmax of logits / temperature. Teacher logits are read from the
+    "teacher_logits" column, so the teacher runs once over the training set instead of
+    once per step. Batches without that column (evaluation) use the focal loss only.
+    """
+
+    def __init__(self, alpha: float = 0.5, temperature: float = 2.0, *args, **kwargs):
+        """
+        Args:
+            alpha (float): Weight of the soft-label (KL) term. Default=0.5
+            temperature (float): Softmax temperature for both logit sets. Default=2.0
+        """
+        super().__init__(*args, **kwargs)
+        self.alpha = alpha
+        self.temperature = temperature
+
+    def _set_signature_columns_if_needed(self):
+        # Keep "teacher_logits" when the Trainer drops columns the model does not accept
+        super()._set_signature_columns_if_needed()
+        if "teacher_logits" not in self._signature_columns:
+            self._signature_columns = list(self._signature_columns) + ["teacher_logits"]
+
+    def compute_loss(self, model: nn.Module, inputs: dict, return_outputs: bool = False, **kwargs) -> torch.Tensor:
+        teacher_logits = inputs.pop("teacher_logits", None)
+        labels = inputs.get("labels")
+        outputs = model(**inputs)
+        logits = outputs.get("logits")
+        loss = FocalLossMultiClass()(logits, labels)
+
+        if teacher_logits is not None:
+            t = self.temperature
+            # The teacher is a fixed target: no gradient flows into its logits
+            soft_loss = F.kl_div(
+                F.log_softmax(logits / t, dim=-1),
+                F.softmax(teacher_logits.detach().to(logits.dtype) / t, dim=-1),
+                reduction="batchmean"
+            ) * (t ** 2)
+            loss = self.alpha * soft_loss + (1 - self.alpha) * loss
+        return (loss, outputs) if return_outputs else loss
+
+
 class GrievanceClassifier:
     """Grievance classification model wrapper with training, evaluation, and HF Hub integration."""
 
+    # Trainer used by train() (a student being distilled uses DistillationTrainer instead)
+    trainer_class = FocalLossTrainer
+
     def __init__(
         self,
         model_checkpoint: str,
@@ -110,6 +167,8 @@ class GrievanceClassifier:
         hf_token: str,
         wandb_api_key: str,
         wandb_project_name: str, 
+        dataset_cache: DatasetCache | None = None,
+        max_length: int | None = None,
     ):
         """
         Args:
@@ -120,6 +179,9 @@ class GrievanceClassifier:
             label2id (dict): Mapping from string labels to label IDs
             wandb_api_key (str) : WandB Access API key 
             wandb_project_name (str): WandB project name for experiment tracking
+            dataset_cache (DatasetCache, optional): Local store for tokenized splits; reused
+                across runs on the same dataset snapshot, tokenizer and max_length
+            max_length (int, optional): Truncation length. Default: the tokenizer's model_max_length
         """
         self.model_checkpoint = model_checkpoint
         self.num_labels = num_labels
@@ -127,9 +189,12 @@ class GrievanceClassifier:
         self.label2id = label2id
         self.hf_token = hf_token
         self.api = HfApi()
+        self.dataset_cache = dataset_cache
+        self.dataset_metadata = {}
         
         # Login wandb
         wandb.login(key=wandb_api_key)
+        self.wandb_api_key = wandb_api_key
         self.wandb_project_name = wandb_project_name
         
 
@@ -147,8 +212,45 @@ class GrievanceClassifier:
             label2id=label2id, 
             token= self.hf_token
         )
+        self.max_length = max_length or self.tokenizer.model_max_length
+
+    def freeze_layers(self, num_layers: int) -> int:
+        """
+        Freeze the embeddings and the lowest `num_layers` encoder layers.
 
-    def tokenize_dataset(self, dataset, text_column: str = "grievance", remove_columns: bool = True, batched: bool = True):
+        Used when fine-tuning an already trained model (warm start): the lower layers keep
+        what they learned, and the optimizer and backward pass skip them, which makes each
+        step cheaper. The classification head is never frozen.
+
+        Args:
+            num_layers (int): Encoder layers to freeze, from the bottom. 0 freezes nothing
+
+        Returns:
+            int: Number of parameters that are still trainable
+        """
+        if num_layers > 0:
+            base_model = self.model.base_model
+            layers = getattr(getattr(base_model, "encoder", None), "layer", None)
+            if layers is None or not hasattr(base_model, "embeddings"):
+                raise ValueError(f"Cannot freeze layers of {type(self.model).__name__}: no embeddings/encoder.layer")
+            if num_layers > len(layers):
+                raise ValueError(f"Cannot freeze {num_layers} layers, the encoder has {len(layers)}")
+            for module in [base_model.embeddings, *layers[:num_layers]]:
+                for param in module.parameters():
+                    param.requires_grad = False
+        trainable = sum(p.numel() for p in self.model.parameters() if p.requires_grad)
+        total = sum(p.numel() for p in self.model.parameters())
+        print(f"Froze embeddings + {num_layers} encoder layers: {trainable:,} of {total:,} parameters trainable", flush=True)
+        return trainable
+
+    def tokenize_dataset(
+        self,
+        dataset,
+        text_column: str = "grievance",
+        remove_columns: bool = True,
+        batched: bool = True,
+        split: str | None = None,
+    ):
         """
         Tokenize a HF Dataset or DatasetDict using the class tokenizer.
 
@@ -157,19 +259,36 @@ class GrievanceClassifier:
             text_column (str): Name of the column containing the text. Default="grievance"
             remove_columns (bool): Whether to remove the original text column after tokenization. Default=True
             batched (bool): Whether to batch examples during tokenization. Default=True
+            split (str, optional): Split name of `dataset` within self.dataset_metadata. When
+                set and the snapshot came from the dataset cache, the tokenized split is
+                loaded from (or stored in) the cache
 
         Returns:
             tokenized_dataset: Tokenized HF Dataset or DatasetDict
         """
-
+        cache_dir = None
+        if self.dataset_cache is not None and split and remove_columns:
+            cache_dir = self.dataset_cache.tokenized_dir(
+                self.dataset_metadata, split,
+                tokenizer_config(self.tokenizer, self.model_checkpoint, self.max_length),
+                text_column, source_fingerprint(dataset),
+            )
+        if cache_dir:
+            cached = self.dataset_cache.load_tokenized(cache_dir)
+            if cached is not None:
+                print(f"[DatasetCache] Loaded tokenized '{split}' split from {cache_dir}", flush=True)
+                return cached
 
         tokenized_dataset = dataset.map(
-            lambda examples: tokenize_function(examples, self.tokenizer, text_column),
+            lambda examples: tokenize_function(examples, self.tokenizer, text_column, self.max_length),
             batched=batched
         )
 
         if remove_columns and text_column in tokenized_dataset.column_names:
             tokenized_dataset = tokenized_dataset.remove_columns([text_column])
+
+        if cache_dir:
+            tokenized_dataset = self.dataset_cache.save_tokenized(cache_dir, tokenized_dataset)
         
         return tokenized_dataset
 
@@ -203,7 +322,11 @@ class GrievanceClassifier:
         output_dir: str | None = None,
         hf_training_args: dict | None = None,
         early_stopping_patience: int = 2,
-        early_stopping_threshold: float=0.001
+        early_stopping_threshold: float=0.001,
+        teacher_logits: np.ndarray | None = None,
+        distill_alpha: float = 0.5,
+        distill_temperature: float = 2.0,
+        train_split: str | None = "train"
     ):
         """
         Train the model using HF Trainer with Focal Loss.
@@ -215,6 +338,12 @@ class GrievanceClassifier:
             output_dir (str, optional): Directory to save checkpoints
             hf_training_args (dict, optional): Dictionary of HuggingFace TrainingArguments to override defaults
             early_stopping_patience (int): Patience for early stopping
+            teacher_logits (np.ndarray, optional): Teacher logits, one row per train_dataset row.
+                When set, the model is trained as a student with DistillationTrainer
+            distill_alpha (float): Weight of the teacher's soft labels in the student loss
+            distill_temperature (float): Softmax temperature for distillation
+            train_split (str, optional): Split name of train_dataset for the tokenized-split cache.
+                None when train_dataset is not a split of the loaded snapshot (e.g. a warm-start mix)
         """
         # Early stopping callback
         early_stopping_callback = EarlyStoppingCallback(
@@ -224,9 +353,13 @@ class GrievanceClassifier:
         
 
 
-        # Tokenize datasets
-        train_dataset = self.tokenize_dataset(train_dataset)
-        eval_dataset = self.tokenize_dataset(eval_dataset)
+        # Tokenize datasets. Evaluation metrics do not depend on row order, so the eval set is
+        # sorted by length: consecutive eval batches then need almost no padding
+        self.train_split = train_split
+        train_dataset = self.tokenize_dataset(train_dataset, split=train_split)
+        eval_dataset = self.tokenize_dataset(eval_dataset, split="eval").sort("length")
+        if teacher_logits is not None:
+            train_dataset = train_dataset.add_column("teacher_logits", teacher_logits.tolist())
 
         # Default training arguments with no logging and no step-wise saving
         self.default_args = {
@@ -246,7 +379,10 @@ class GrievanceClassifier:
             "hub_model_id": None,
             "report_to": ["wandb"],
             "logging_dir": "./logs",
-            "gradient_accumulation_steps": 1
+            "gradient_accumulation_steps": 1,
+            # Bucket training batches by length (LengthGroupedSampler) so dynamic padding stays short
+            "group_by_length": True,
+            "length_column_name": "length"
         }
         
         
@@ -269,8 +405,15 @@ class GrievanceClassifier:
                                 )
 
 
-        # Initialize trainer
-        self.trainer = FocalLossTrainer(
+        # Initialize trainer (a student also learns from the teacher's soft labels)
+        distill_kwargs = {}
+        trainer_cls = self.trainer_class
+        if teacher_logits is not None:
+            trainer_cls = DistillationTrainer
+            distill_kwargs = {"alpha": distill_alpha, "temperature": distill_temperature}
+
+        self.trainer = trainer_cls(
+            **distill_kwargs,
             model=self.model,
             args=self.training_args,
             train_dataset=train_dataset,
@@ -334,39 +477,59 @@ class GrievanceClassifier:
     def _query_deployed_model(self, 
                               texts: list[str],
                               api_endpoint: str,
-                              timeout: int = 8) -> list[int]:
+                              timeout: int = 30,
+                              batch_size: int = 32,
+                              max_workers: int = 4) -> list[int]:
         """
         Query a deployed model API and return predicted label IDs.
 
+        Texts are sent in concurrent batches with retries (see deployed_model_client).
+        Per-batch timings are kept in self.deployed_query_stats.
+
         Args:
             texts (list[str]): List of raw text inputs.
             api_endpoint (str): POST /predict endpoint URL.
-            timeout (int): Request timeout in seconds.
+            timeout (int): Request timeout in seconds (per batch).
+            batch_size (int): Texts per request.
+            max_workers (int): Requests in flight at once.
 
         Returns:
             List[int]: Predicted label IDs (-1 if prediction failed or unknown).
         """
+        start = time.perf_counter()
+        labels, batches = query_deployed_labels(
+            texts, api_endpoint, batch_size=batch_size, max_workers=max_workers, timeout=timeout
+        )
 
         pred_ids = []
-        for txt in texts:
-            try:
-                resp = requests.post(api_endpoint, json={"text": txt}, timeout=timeout)
-                if resp.status_code == 200:
-                    data = resp.json()
-                    label_str = data.get("label")
-                    # Map string label to ID
-                    pred_id = self.label2id.get(label_str, None)
-                    if pred_id is None:
-                        try:
-                            pred_id = int(label_str)
-                        except Exception:
-                            pred_id = -1
-                    pred_ids.append(pred_id if pred_id is not None else -1)
-                else:
-                    pred_ids.append(-1)
-            except Exception:
-                pred_ids.append(-1)
-
+        for label_str in labels:
+            # Map string label to ID
+            pred_id = self.label2id.get(label_str, None)
+            if pred_id is None:
+                try:
+                    pred_id = int(label_str)
+                except Exception:
+                    pred_id = -1
+            pred_ids.append(pred_id)
+
+        seconds = [b["seconds"] for b in batches]
+        self.deployed_query_stats = {
+            "texts": len(texts),
+            "failed": pred_ids.count(-1),
+            "batches": len(batches),
+            "total_seconds": round(time.perf_counter() - start, 3),
+            "batch_seconds_max": max(seconds, default=0.0),
+            "batch_seconds_mean": round(sum(seconds) / len(seconds), 4) if seconds else 0.0,
+            "retries": sum(b["attempts"] - 1 for b in batches if not b["split"]),
+            "per_batch": batches,
+        }
+        print(
+            f"[Deployed] {len(texts)} texts in {len(batches)} batches, "
+            f"{self.deployed_query_stats['total_seconds']}s total, "
+            f"max batch {self.deployed_query_stats['batch_seconds_max']}s, "
+            f"{self.deployed_query_stats['failed']} failed",
+            flush=True
+        )
         return pred_ids
 
 
@@ -375,7 +538,9 @@ class GrievanceClassifier:
         test_dataset,
         api_endpoint: str | None = None,
         threshold: float = 0.00,
-        deployed_sample_size: int = 300
+        deployed_sample_size: int = 300,
+        deployed_batch_size: int = 32,
+        deployed_max_workers: int = 4
     ):
         """
         Pure evaluation function: tokenizes test data, predicts labels, computes metrics,
@@ -386,6 +551,8 @@ class GrievanceClassifier:
             api_endpoint (str, optional): Deployed model /predict API endpoint.
             threshold (float): Minimum F1 macro improvement over deployed model for decision.
             deployed_sample_size (int): Number of samples to query deployed model for F1 comparison.
+            deployed_batch_size (int): Texts per request to the deployed model.
+            deployed_max_workers (int): Concurrent requests to the deployed model.
 
         Returns:
             dict: {
@@ -395,15 +562,19 @@ class GrievanceClassifier:
                 "classification_report": dict,
                 "f1_macro": float,
                 "deployed_f1_macro": float | None,
+                "deployed_query_stats": dict | None,
+                "inference_seconds": float,
                 "decision": "accepted" | "rejected"
             }
         """
 
-        # 1️ Tokenize test dataset
-        test_dataset_tokenized = self.tokenize_dataset(test_dataset)
+        # 1️ Tokenize test dataset (sorted by length for tight batches; y_true comes back in the same order)
+        test_dataset_tokenized = self.tokenize_dataset(test_dataset, split="test").sort("length")
 
         # 2️ Run model predictions
+        start = time.perf_counter()
         predictions = self.trainer.predict(test_dataset_tokenized)
+        inference_seconds = time.perf_counter() - start
         y_true = predictions.label_ids
         y_pred = np.argmax(predictions.predictions, axis=-1)
 
@@ -422,13 +593,19 @@ class GrievanceClassifier:
 
         # 5️ Optionally compare with deployed model F1
         deployed_f1_macro = None
+        self.deployed_query_stats = None
         if api_endpoint:
             raw_test = test_dataset.shuffle(seed=42)
             n = min(deployed_sample_size, len(raw_test))
             texts = raw_test["grievance"][:n]
             true_labels = raw_test["label"][:n] if "label" in raw_test.column_names else raw_test["labels"][:n]
 
-            deployed_preds_ids = self._query_deployed_model(texts, api_endpoint)
+            deployed_preds_ids = self._query_deployed_model(
+                texts,
+                api_endpoint,
+                batch_size=deployed_batch_size,
+                max_workers=deployed_max_workers
+            )
 
             # Filter out failed predictions (-1)
             paired_true, paired_pred = [], []
@@ -454,9 +631,119 @@ class GrievanceClassifier:
             "classification_report": classification_report_dict,
             "current_trained_f1_macro": current_trained_f1_macro,
             "deployed_f1_macro": deployed_f1_macro,
+            "deployed_query_stats": self.deployed_query_stats,
+            "inference_seconds": inference_seconds,
             "decision": decision
         }
 
+    def predict_logits(self, dataset, split: str | None = None) -> np.ndarray:
+        """
+        Logits of the trained model for every row of `dataset`, in the dataset's row order.
+
+        Rows are predicted shortest-first (tight padding) and put back in order afterwards.
+
+        Args:
+            dataset: Raw HF Dataset (with the text column)
+            split (str, optional): Split name, for the tokenized-split cache (see tokenize_dataset)
+
+        Returns:
+            np.ndarray: (len(dataset), num_labels) logits
+        """
+        tokenized = self.tokenize_dataset(dataset, split=split)
+        order = np.argsort(np.asarray(tokenized["length"]), kind="stable")
+        predictions = self.trainer.predict(tokenized.select(order))
+        logits = np.empty_like(predictions.predictions)
+        logits[order] = predictions.predictions
+        return logits
+
+    def distill_student(
+        self,
+        train_dataset,
+        eval_dataset,
+        student_checkpoint: str,
+        hf_training_args: dict | None = None,
+        alpha: float = 0.5,
+        temperature: float = 2.0,
+        early_stopping_patience: int = 2,
+        early_stopping_threshold: float = 0.001
+    ) -> "GrievanceClassifier":
+        """
+        Train a compact student model from this (trained) classifier's soft labels.
+
+        The student has its own tokenizer and is trained with the focal loss on the gold
+        labels plus a KL term towards the teacher's temperature-softened predictions
+        (DistillationTrainer). It uses the same training arguments as the teacher, with
+        its own output directory, updated by `hf_training_args`.
+
+        Args:
+            train_dataset: Raw HF Dataset for training (the teacher's training split)
+            eval_dataset: Raw HF Dataset for validation
+            student_checkpoint (str): HF checkpoint of the student, e.g. a 6-layer multilingual MiniLM
+            hf_training_args (dict, optional): TrainingArguments overrides for the student only
+            alpha (float): Weight of the soft-label term. Default=0.5
+            temperature (float): Distillation temperature. Default=2.0
+            early_stopping_patience (int): Patience for early stopping
+            early_stopping_threshold (float): Threshold for early stopping
+
+        Returns:
+            GrievanceClassifier: The trained student (with its own trainer), ready for evaluate()
+                and push_model_to_hub()
+        """
+        print(f"[Distillation] Computing teacher logits on {len(train_dataset)} training rows...", flush=True)
+        teacher_logits = self.predict_logits(train_dataset, split=self.train_split)
+
+        student = GrievanceClassifier(
+            model_checkpoint=student_checkpoint,
+            num_labels=self.num_labels,
+            id2label=self.id2label,
+            label2id=self.label2id,
+            hf_token=self.hf_token,
+            wandb_api_key=self.wandb_api_key,
+            wandb_project_name=self.wandb_project_name,
+            dataset_cache=self.dataset_cache,
+            max_length=self.max_length
+        )
+        student.max_length = min(student.max_length, student.tokenizer.model_max_length)
+        student.dataset_metadata = self.dataset_metadata
+
+        student_args = {
+            **self.default_args,
+            # Sibling of the teacher's output_dir, so pushing either never uploads the other
+            "output_dir": f"{self.training_args.output_dir.rstrip('/')}-student",
+            "push_to_hub": False,
+            **(hf_training_args or {}),
+        }
+        print(f"[Distillation] Training student {student_checkpoint} "
+              f"(alpha={alpha}, temperature={temperature})...", flush=True)
+        student.train(
+            train_dataset=train_dataset,
+            eval_dataset=eval_dataset,
+            hf_training_args=student_args,
+            early_stopping_patience=early_stopping_patience,
+            early_stopping_threshold=early_stopping_threshold,
+            teacher_logits=teacher_logits,
+            distill_alpha=alpha,
+            distill_temperature=temperature,
+            train_split=self.train_split
+        )
+        return student
+
+    def _push_weights(self, hub_model_id: str, use_trainer: bool = False):
+        """Push the model and tokenizer (or the trainer's output) to `hub_model_id`."""
+        if use_trainer and hasattr(self, "trainer") and self.trainer is not None:
+            self.trainer.push_to_hub(commit_message=self.commit_message, token=self.hf_token)
+        else:
+            self.model.push_to_hub(
+                hub_model_id,
+                commit_message=self.commit_message,
+                token=self.hf_token,
+            )
+            self.tokenizer.push_to_hub(
+                hub_model_id,
+                commit_message=self.commit_message, 
+                token=self.hf_token,
+            )
+
     def push_model_to_hub(
             self,
             hub_model_id: str | None = None,
@@ -489,19 +776,7 @@ class GrievanceClassifier:
                 print("Starting model push to Hugging Face Hub...", flush=True)
 
                 # Step 1: Push model and tokenizer (or trainer)
-                if use_trainer and hasattr(self, "trainer") and self.trainer is not None:
-                    self.trainer.push_to_hub(commit_message=self.commit_message, token=self.hf_token)
-                else:
-                    self.model.push_to_hub(
-                        hub_model_id,
-                        commit_message=self.commit_message,
-                        token=self.hf_token,
-                    )
-                    self.tokenizer.push_to_hub(
-                        hub_model_id,
-                        commit_message=self.commit_message, 
-                        token=self.hf_token,
-                    )
+                self._push_weights(hub_model_id, use_trainer)
 
                 # pushing the log files 
                 # self.push_latest_tensorboard_log(logs_dir='logs', 
@@ -520,6 +795,8 @@ class GrievanceClassifier:
                     "author": "mr-kush",
                     "training_args": self.sanitize_training_args,
                     "eval_metrics": getattr(self, "classification_report", {}),
+                    # The next warm start trains on the dataset shards built after this one
+                    "dataset_metadata": self.dataset_metadata,
                 }
 
                 with open(metadata_path, "w") as f:
@@ -572,7 +849,17 @@ class GrievanceClassifier:
         early_stopping_patience: int = 2,
         early_stopping_threshold: float = 0.001,
         deployed_sample_size: int = 300,
-        decision_threshold: float = 0.001
+        decision_threshold: float = 0.001,
+        deployed_batch_size: int = 32,
+        deployed_max_workers: int = 4,
+        student_checkpoint: str | None = None,
+        student_training_args: dict | None = None,
+        distill_alpha: float = 0.5,
+        distill_temperature: float = 2.0,
+        student_max_f1_drop: float = 0.02,
+        serve_student: bool = False,
+        freeze_layers: int = 0,
+        train_split: str | None = "train"
     ):
         """
         Complete training, evaluation, decision-making, and optional auto-deployment pipeline.
@@ -589,6 +876,20 @@ class GrievanceClassifier:
             early_stopping_threshold (float): Threshold for early stopping.
             deployed_sample_size (int): Sample size to query deployed model for comparison.
             decision_threshold (float): Minimum F1 improvement for auto-deploy.
+            deployed_batch_size (int): Texts per request to the deployed model.
+            deployed_max_workers (int): Concurrent requests to the deployed model.
+            student_checkpoint (str, optional): Checkpoint of a compact student to distill from
+                the trained model (e.g. a 6-layer multilingual MiniLM). None skips distillation.
+            student_training_args (dict, optional): TrainingArguments overrides for the student.
+            distill_alpha (float): Weight of the teacher's soft labels in the student loss.
+            distill_temperature (float): Distillation temperature.
+            student_max_f1_drop (float): Largest F1 macro drop from the teacher the student may have
+                and still be accepted.
+            serve_student (bool): Deploy the student instead of the teacher when it is accepted.
+            freeze_layers (int): Freeze the embeddings and this many lower encoder layers before
+                training (warm start from the deployed model). 0 trains every layer.
+            train_split (str, optional): Split name of train_dataset for the tokenized-split cache
+                (None for a training set that is not a split of the loaded snapshot).
         Returns:
             dict: Contains evaluation metrics, decision, and deployed F1 (if applicable).
         """
@@ -602,17 +903,21 @@ class GrievanceClassifier:
             config={
                 "model_checkpoint": self.model_checkpoint,
                 "num_labels": self.num_labels,
-                "dataset_metadata": self.dataset_metadata
+                "dataset_metadata": self.dataset_metadata,
+                "freeze_layers": freeze_layers
             }
         )
 
         # 2. Train the model
+        if freeze_layers:
+            self.freeze_layers(freeze_layers)
         self.train(
             train_dataset=train_dataset,
             eval_dataset=eval_dataset,
             hf_training_args=hf_training_args,
             early_stopping_patience=early_stopping_patience,
-            early_stopping_threshold=early_stopping_threshold
+            early_stopping_threshold=early_stopping_threshold,
+            train_split=train_split
         )
         
         #  Log sanitized training args to W&B config
@@ -623,7 +928,9 @@ class GrievanceClassifier:
             test_dataset=test_dataset,
             api_endpoint=api_endpoint,
             threshold=decision_threshold,
-            deployed_sample_size=deployed_sample_size
+            deployed_sample_size=deployed_sample_size,
+            deployed_batch_size=deployed_batch_size,
+            deployed_max_workers=deployed_max_workers
         )
         
 
@@ -659,20 +966,100 @@ class GrievanceClassifier:
             "timestamp": datetime.now(UTC).isoformat()
         })
 
+        # 7b. Log deployed-model query timing (one row per batch)
+        query_stats = eval_results.get("deployed_query_stats")
+        if query_stats:
+            wandb.log({f"deployed_query/{k}": v for k, v in query_stats.items() if k != "per_batch"})
+            rows = [[b["batch"], b["size"], b["seconds"], b["attempts"], b["status"], b["ok"], b["split"]]
+                    for b in query_stats["per_batch"]]
+            wandb.log({"deployed_query/batches_table": wandb.Table(
+                columns=["batch", "size", "seconds", "attempts", "status", "ok", "split"], data=rows
+            )})
+
         # 8. Tag run and summarize
         wandb.run.tags = ["train_pipeline", decision]
         wandb.run.summary["accepted"] = (decision == "accepted")
 
-
-        # 9. Auto-deploy if decision accepted
-        if decision == "accepted":
+        # 8b. Optional: distill a compact student and put it through the same decision gate,
+        # plus a bound on its F1 drop from the teacher
+        student, student_results = None, None
+        if student_checkpoint:
+            student = self.distill_student(
+                train_dataset=train_dataset,
+                eval_dataset=eval_dataset,
+                student_checkpoint=student_checkpoint,
+                hf_training_args=student_training_args,
+                alpha=distill_alpha,
+                temperature=distill_temperature,
+                early_stopping_patience=early_stopping_patience,
+                early_stopping_threshold=early_stopping_threshold
+            )
+            # The deployed model was already queried for the teacher; its F1 is reused
+            student_eval = student.evaluate(test_dataset=test_dataset)
+            student_f1_macro = student_eval["current_trained_f1_macro"]
+            student_decision = (
+                "accepted"
+                if student_f1_macro > deployed_f1_to_compare + decision_threshold
+                and student_f1_macro >= current_trained_f1_macro - student_max_f1_drop
+                else "rejected"
+            )
+            speedup = eval_results["inference_seconds"] / max(student_eval["inference_seconds"], 1e-9)
+            student_results = {
+                "checkpoint": student_checkpoint,
+                "decision": student_decision,
+                "f1_macro": student_f1_macro,
+                "f1_drop": current_trained_f1_macro - student_f1_macro,
+                "inference_seconds": student_eval["inference_seconds"],
+                "teacher_inference_seconds": eval_results["inference_seconds"],
+                "speedup": speedup,
+                "classification_report": student_eval["classification_report"],
+                "confusion_matrix": student_eval["confusion_matrix"],
+            }
+            print(f"[Distillation] Student F1 macro {student_f1_macro:.4f} "
+                  f"(teacher {current_trained_f1_macro:.4f}), {speedup:.1f}x faster on the test set: "
+                  f"{student_decision}", flush=True)
+
+            self.log_wandb_eval_metrics(
+                y_true=student_eval["y_true"],
+                y_pred=student_eval["predictions"],
+                classification_report_dict=student_eval["classification_report"],
+                confusion_matrix_array=student_eval["confusion_matrix"],
+                label_names=list(self.id2label.values()),
+                prefix="student_eval"
+            )
+            wandb.log({
+                "student/checkpoint": student_checkpoint,
+                "student/f1_macro": student_f1_macro,
+                "student/f1_drop": student_results["f1_drop"],
+                "student/inference_seconds": student_results["inference_seconds"],
+                "student/teacher_inference_seconds": student_results["teacher_inference_seconds"],
+                "student/speedup": speedup,
+                "student/decision": student_decision
+            })
+            wandb.run.summary["student_accepted"] = (student_decision == "accepted")
+
+        # 9. Auto-deploy the student (if it is to be served and accepted), else the teacher if accepted
+        served_model = None
+        if serve_student and student_results and student_results["decision"] == "accepted":
+            served_model = "student"
+        elif decision == "accepted":
+            served_model = "teacher"
+
+        if served_model:
             try:
                 # 9.1: push model to hub 
-                self.push_model_to_hub(
-                    hub_model_id=self.hub_model_id,
-                    use_trainer=True,
-                    commit_message=f"Auto-deploy: ΔF1 >= {decision_threshold:.4f}"
-                )
+                if served_model == "student":
+                    student.push_model_to_hub(
+                        hub_model_id=self.hub_model_id,
+                        use_trainer=True,
+                        commit_message=f"Auto-deploy distilled {student_checkpoint}: ΔF1 >= {decision_threshold:.4f}"
+                    )
+                else:
+                    self.push_model_to_hub(
+                        hub_model_id=self.hub_model_id,
+                        use_trainer=True,
+                        commit_message=f"Auto-deploy: ΔF1 >= {decision_threshold:.4f}"
+                    )
                 
                 # 9.2: restart th space
                 self.restart_space(
@@ -690,7 +1077,9 @@ class GrievanceClassifier:
             text=(
                 f"Decision: {decision}\n"
                 f"Current Trained F1 Macro: {current_trained_f1_macro}\n"
-                f"Deployed F1 Macro: {deployed_f1_macro}"
+                f"Deployed F1 Macro: {deployed_f1_macro}\n"
+                f"Student F1 Macro: {student_results['f1_macro'] if student_results else None}\n"
+                f"Served: {served_model}"
             ),
             level=AlertLevel.INFO,
             wait_duration=timedelta(minutes=1)  # optional delay before sending
@@ -709,7 +1098,9 @@ class GrievanceClassifier:
             "classification_report": classification_report,
             "confusion_matrix": cm,
             "y_true": y_true,
-            "y_pred": y_pred
+            "y_pred": y_pred,
+            "student": student_results,
+            "served_model": served_model
         }
 
 
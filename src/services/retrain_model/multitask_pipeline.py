@@ -0,0 +1,386 @@
+# multitask_pipeline.py
+"""
+Training, evaluation and deployment of the multitask classifier: one shared encoder with
+an urgency head and a department head (multitask_model.MultiTaskClassifier), served by
+the multitask classifier API's POST /predict_all.
+
+The urgency and department datasets are built separately (prepare_dataset), so a row
+carries one of the two labels. The union of both is trained at once; the missing label is
+IGNORE_INDEX, so every row trains the encoder and its own head only.
+"""
+import tempfile
+import time
+from datetime import datetime, UTC, timedelta
+
+import numpy as np
+import wandb
+from wandb import AlertLevel
+from datasets import DatasetDict, Value, concatenate_datasets
+from huggingface_hub import HfApi
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, f1_score
+from transformers import AutoModel, AutoTokenizer, Trainer
+
+from deployed_model_client import query_deployed_labels
+from model_pipeline import FocalLossMultiClass, GrievanceClassifier
+from multitask_model import IGNORE_INDEX, MultiTaskClassifier
+
+
+class MultiTaskGrievanceClassifier(GrievanceClassifier):
+    """
+    GrievanceClassifier for the shared-encoder model. Training (focal loss per task, summed),
+    tokenization, W&B logging, Hub push and Space restart are inherited; evaluation and the
+    accept/reject decision are per task, and the model is accepted only if every task passes.
+    """
+
+    # MultiTaskClassifier computes its own loss, so the stock Trainer is enough
+    trainer_class = Trainer
+
+    def __init__(
+        self,
+        model_checkpoint: str,
+        tasks: dict,
+        hf_token: str,
+        wandb_api_key: str,
+        wandb_project_name: str,
+        max_length: int | None = None,
+    ):
+        """
+        Args:
+            model_checkpoint (str): HF encoder checkpoint, e.g. 'xlm-roberta-base'
+            tasks (dict): {task: id2label}, e.g. {"urgency": id2urgency, "department": id2department}
+            hf_token (str): HF-token for HF Hub Write Access
+            wandb_api_key (str): WandB Access API key
+            wandb_project_name (str): WandB project name for experiment tracking
+            max_length (int, optional): Truncation length. Default: the tokenizer's model_max_length
+        """
+        self.model_checkpoint = model_checkpoint
+        self.tasks = tasks
+        self.label2ids = {task: {v: k for k, v in id2label.items()} for task, id2label in tasks.items()}
+        self.num_labels = {task: len(id2label) for task, id2label in tasks.items()}
+        self.hf_token = hf_token
+        self.api = HfApi()
+        # The tokenized-split cache is keyed by one dataset snapshot; this model trains on two
+        self.dataset_cache = None
+        self.dataset_metadata = {}
+
+        # Login wandb
+        wandb.login(key=wandb_api_key)
+        self.wandb_api_key = wandb_api_key
+        self.wandb_project_name = wandb_project_name
+
+        # Load tokenizer and the shared encoder with one head per task
+        self.tokenizer = AutoTokenizer.from_pretrained(model_checkpoint, use_fast=True, token=self.hf_token)
+        self.model = MultiTaskClassifier(
+            AutoModel.from_pretrained(model_checkpoint, token=self.hf_token),
+            tasks,
+            loss_fct=FocalLossMultiClass()
+        )
+        self.max_length = max_length or self.tokenizer.model_max_length
+
+    @property
+    def label_names(self) -> list[str]:
+        return [f"labels_{task}" for task in self.tasks]
+
+    def build_dataset(self, datasets: dict) -> DatasetDict:
+        """
+        Union of the per-task datasets, with one label column per task.
+
+        Args:
+            datasets (dict): {task: DatasetDict} with "train", "eval" and "test" splits, each
+                with "grievance" and "label" columns (as returned by load_dataset_from_hub)
+
+        Returns:
+            DatasetDict: "grievance" plus "labels_<task>" for every task (IGNORE_INDEX where a
+                row has no label for that task)
+        """
+        splits = {}
+        for split in ("train", "eval", "test"):
+            parts = []
+            for task, dataset in datasets.items():
+                part = dataset[split].select_columns(["grievance", "label"])
+                part = part.cast_column("label", Value("int64")).rename_column("label", f"labels_{task}")
+                for other in self.tasks:
+                    if other != task:
+                        part = part.add_column(f"labels_{other}", [IGNORE_INDEX] * len(part))
+                parts.append(part.select_columns(["grievance"] + self.label_names))
+            splits[split] = concatenate_datasets(parts)
+        return DatasetDict(splits)
+
+    def compute_metrics(self, eval_pred: tuple) -> dict:
+        """
+        Per-task metrics on the rows labelled for that task, plus "f1_macro", the mean F1 macro
+        over tasks (metric_for_best_model).
+        """
+        logits, labels = eval_pred
+        metrics = {}
+        for task, task_logits, task_labels in zip(self.tasks, logits, labels):
+            mask = task_labels != IGNORE_INDEX
+            y_true, y_pred = task_labels[mask], np.argmax(task_logits[mask], axis=-1)
+            metrics[f"{task}_accuracy"] = accuracy_score(y_true, y_pred)
+            metrics[f"{task}_f1_macro"] = f1_score(y_true, y_pred, average="macro", zero_division=0)
+            metrics[f"{task}_f1_weighted"] = f1_score(y_true, y_pred, average="weighted", zero_division=0)
+        metrics["f1_macro"] = float(np.mean([metrics[f"{task}_f1_macro"] for task in self.tasks]))
+        return metrics
+
+    def train(self, train_dataset, eval_dataset, hf_training_args: dict | None = None, **kwargs):
+        """Train with the inherited setup; the per-task label columns are passed as label_names."""
+        hf_training_args = {"label_names": self.label_names, **(hf_training_args or {})}
+        super().train(train_dataset, eval_dataset, hf_training_args=hf_training_args, **kwargs)
+
+    def _deployed_f1(
+        self,
+        raw_test,
+        task: str,
+        api_endpoint: str,
+        response_key: str | None,
+        sample_size: int,
+        batch_size: int,
+        max_workers: int
+    ) -> tuple[float, dict]:
+        """F1 macro of the deployed model for `task` on a sample of that task's test split."""
+        raw_test = raw_test.shuffle(seed=42)
+        n = min(sample_size, len(raw_test))
+        texts = raw_test["grievance"][:n]
+        true_labels = raw_test["label"][:n]
+
+        start = time.perf_counter()
+        labels, batches = query_deployed_labels(
+            texts, api_endpoint, batch_size=batch_size, max_workers=max_workers, response_key=response_key
+        )
+        label2id = self.label2ids[task]
+        pairs = [(int(t), label2id[label]) for t, label in zip(true_labels, labels) if label in label2id]
+        stats = {
+            "texts": n,
+            "failed": n - len(pairs),
+            "batches": len(batches),
+            "total_seconds": round(time.perf_counter() - start, 3),
+            "retries": sum(b["attempts"] - 1 for b in batches if not b["split"]),
+        }
+        print(f"[Deployed:{task}] {n} texts in {len(batches)} batches, {stats['total_seconds']}s total, "
+              f"{stats['failed']} failed", flush=True)
+        if not pairs:
+            return 0.0, stats
+        y_true, y_pred = zip(*pairs)
+        return f1_score(y_true, y_pred, average="macro", zero_division=0), stats
+
+    def evaluate(
+        self,
+        test_dataset,
+        raw_tests: dict | None = None,
+        api_endpoints: dict | None = None,
+        threshold: float = 0.00,
+        deployed_sample_size: int = 300,
+        deployed_batch_size: int = 32,
+        deployed_max_workers: int = 4
+    ):
+        """
+        Predict every task on the test set in one pass, compute per-task metrics, optionally
+        compare each task with the deployed model and decide.
+
+        Args:
+            test_dataset: Multitask test split (build_dataset)
+            raw_tests (dict, optional): {task: raw test split} for querying the deployed models
+            api_endpoints (dict, optional): {task: (endpoint, response_key)}. response_key is the
+                task key of a /predict_all response, or None for a single-task /predict endpoint
+            threshold (float): Minimum F1 macro improvement over the deployed model, per task
+            deployed_sample_size (int): Texts per task sent to the deployed model
+            deployed_batch_size (int): Texts per request to the deployed model
+            deployed_max_workers (int): Concurrent requests to the deployed model
+
+        Returns:
+            dict: {"tasks": {task: {"predictions", "y_true", "confusion_matrix",
+                "classification_report", "current_trained_f1_macro", "deployed_f1_macro",
+                "deployed_query_stats", "decision"}}, "inference_seconds", "decision"}
+        """
+        raw_tests, api_endpoints = raw_tests or {}, api_endpoints or {}
+        test_dataset_tokenized = self.tokenize_dataset(test_dataset, split="test").sort("length")
+
+        start = time.perf_counter()
+        predictions = self.trainer.predict(test_dataset_tokenized)
+        inference_seconds = time.perf_counter() - start
+
+        results = {}
+        for i, (task, id2label) in enumerate(self.tasks.items()):
+            labelled = predictions.label_ids[i] != IGNORE_INDEX
+            y_true = predictions.label_ids[i][labelled]
+            y_pred = np.argmax(predictions.predictions[i][labelled], axis=-1)
+            label_ids = list(id2label.keys())
+            current_trained_f1_macro = f1_score(y_true, y_pred, average="macro", zero_division=0)
+
+            deployed_f1_macro, query_stats = None, None
+            endpoint, response_key = api_endpoints.get(task, (None, None))
+            if endpoint and task in raw_tests:
+                deployed_f1_macro, query_stats = self._deployed_f1(
+                    raw_tests[task], task, endpoint, response_key,
+                    deployed_sample_size, deployed_batch_size, deployed_max_workers
+                )
+
+            deployed_f1_to_compare = deployed_f1_macro if deployed_f1_macro is not None else 0.0
+            results[task] = {
+                "predictions": y_pred,
+                "y_true": y_true,
+                "confusion_matrix": confusion_matrix(y_true, y_pred, labels=label_ids),
+                "classification_report": classification_report(
+                    y_true, y_pred, labels=label_ids, target_names=list(id2label.values()),
+                    output_dict=True, zero_division=0
+                ),
+                "current_trained_f1_macro": current_trained_f1_macro,
+                "deployed_f1_macro": deployed_f1_macro,
+                "deployed_query_stats": query_stats,
+                "decision": "accepted" if current_trained_f1_macro > deployed_f1_to_compare + threshold else "rejected",
+            }
+
+        # Written to model_metadata.json on push
+        self.classification_report = {task: r["classification_report"] for task, r in results.items()}
+        decision = "accepted" if all(r["decision"] == "accepted" for r in results.values()) else "rejected"
+        return {"tasks": results, "inference_seconds": inference_seconds, "decision": decision}
+
+    def _push_weights(self, hub_model_id: str, use_trainer: bool = False):
+        """Push encoder, heads and tokenizer in the MultiTaskClassifier.from_pretrained layout."""
+        self.api.create_repo(hub_model_id, repo_type="model", token=self.hf_token, exist_ok=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.model.save_pretrained(tmp)
+            self.tokenizer.save_pretrained(tmp)
+            self.api.upload_folder(
+                folder_path=tmp,
+                repo_id=hub_model_id,
+                repo_type="model",
+                token=self.hf_token,
+                commit_message=self.commit_message,
+            )
+
+    def train_pipeline(
+        self,
+        datasets: dict,
+        dataset_metadata: dict,
+        space_repo_id: str | None = None,
+        hf_training_args: dict | None = None,
+        api_endpoints: dict | None = None,
+        early_stopping_patience: int = 2,
+        early_stopping_threshold: float = 0.001,
+        deployed_sample_size: int = 300,
+        decision_threshold: float = 0.001,
+        deployed_batch_size: int = 32,
+        deployed_max_workers: int = 4
+    ):
+        """
+        Train, evaluate, decide and (if accepted) deploy the multitask model.
+
+        Args:
+            datasets (dict): {task: DatasetDict} as returned by load_dataset_from_hub for each task.
+            dataset_metadata (dict): {task: dataset metadata} for logging.
+            space_repo_id (str): HF Space Repo Id of the multitask classifier API.
+            hf_training_args (dict, optional): Hugging Face TrainingArguments overrides.
+            api_endpoints (dict, optional): {task: (endpoint, response_key)} of the deployed
+                model(s) to compare against (see evaluate).
+            early_stopping_patience (int): Patience for early stopping callback.
+            early_stopping_threshold (float): Threshold for early stopping.
+            deployed_sample_size (int): Texts per task sent to the deployed model.
+            decision_threshold (float): Minimum F1 improvement, on every task, for auto-deploy.
+            deployed_batch_size (int): Texts per request to the deployed model.
+            deployed_max_workers (int): Concurrent requests to the deployed model.
+        Returns:
+            dict: Decision, inference time and per-task F1 / deployed F1 / decision / report.
+        """
+        self.space_repo_id = space_repo_id
+        self.dataset_metadata = dataset_metadata
+        dataset = self.build_dataset(datasets)
+
+        # 1. Initialize W&B run
+        wandb.init(
+            project=self.wandb_project_name,
+            name=f"train_multitask_pipeline_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}",
+            config={
+                "model_checkpoint": self.model_checkpoint,
+                "num_labels": self.num_labels,
+                "dataset_metadata": self.dataset_metadata
+            }
+        )
+
+        # 2. Train the model
+        self.train(
+            train_dataset=dataset["train"],
+            eval_dataset=dataset["eval"],
+            hf_training_args=hf_training_args,
+            early_stopping_patience=early_stopping_patience,
+            early_stopping_threshold=early_stopping_threshold
+        )
+        wandb.config.update(self.sanitize_training_args)
+
+        # 3. Evaluate every task, against the deployed model(s) if given
+        eval_results = self.evaluate(
+            test_dataset=dataset["test"],
+            raw_tests={task: data["test"] for task, data in datasets.items()},
+            api_endpoints=api_endpoints,
+            threshold=decision_threshold,
+            deployed_sample_size=deployed_sample_size,
+            deployed_batch_size=deployed_batch_size,
+            deployed_max_workers=deployed_max_workers
+        )
+        decision = eval_results["decision"]
+
+        # 4. Log per-task metrics, F1s and decisions to W&B
+        for task, result in eval_results["tasks"].items():
+            self.log_wandb_eval_metrics(
+                y_true=result["y_true"],
+                y_pred=result["predictions"],
+                classification_report_dict=result["classification_report"],
+                confusion_matrix_array=result["confusion_matrix"],
+                label_names=list(self.tasks[task].values()),
+                prefix=f"train_pipeline_eval/{task}"
+            )
+            wandb.log({
+                f"{task}/current_trained_model_f1_macro": result["current_trained_f1_macro"],
+                f"{task}/deployed_model_f1_macro": result["deployed_f1_macro"] or 0.0,
+                f"{task}/decision": result["decision"]
+            })
+            if result["deployed_query_stats"]:
+                wandb.log({f"deployed_query/{task}/{k}": v for k, v in result["deployed_query_stats"].items()})
+        wandb.log({
+            "decision": decision,
+            "test_inference_seconds": eval_results["inference_seconds"],
+            "timestamp": datetime.now(UTC).isoformat()
+        })
+        wandb.run.tags = ["train_pipeline", "multitask", decision]
+        wandb.run.summary["accepted"] = (decision == "accepted")
+
+        # 5. Auto-deploy if every task was accepted
+        if decision == "accepted":
+            try:
+                self.push_model_to_hub(
+                    hub_model_id=self.hub_model_id,
+                    commit_message=f"Auto-deploy multitask: ΔF1 >= {decision_threshold:.4f} on every task"
+                )
+                self.restart_space(space_repo_id=self.space_repo_id)
+            except Exception as e:
+                wandb.log({"push_error": str(e)})
+                raise RuntimeError(f"Warning: push to hub failed: {e}")
+
+        # 6. Send summary alert and finish the run
+        summary = "\n".join(
+            f"{task}: F1 Macro {r['current_trained_f1_macro']} (deployed {r['deployed_f1_macro']}), {r['decision']}"
+            for task, r in eval_results["tasks"].items()
+        )
+        wandb.alert(
+            title=f"Run Summary: {self.hub_model_id} ",
+            text=f"Decision: {decision}\n{summary}",
+            level=AlertLevel.INFO,
+            wait_duration=timedelta(minutes=1)
+        )
+        wandb.join()
+        wandb.finish()
+
+        return {
+            "decision": decision,
+            "inference_seconds": eval_results["inference_seconds"],
+            "tasks": {
+                task: {
+                    "current_trained_f1_macro": r["current_trained_f1_macro"],
+                    "deployed_f1": r["deployed_f1_macro"],
+                    "decision": r["decision"],
+                    "classification_report": r["classification_report"],
+                    "confusion_matrix": r["confusion_matrix"],
+                }
+                for task, r in eval_results["tasks"].items()
+            }
+        }
@@ -1,10 +1,141 @@
 # train_model.py
-from load_dataset import load_dataset_from_hub
+from load_dataset import AFTER_PREFIX, load_dataset_from_hub, warm_start_train_split
+from dataset_cache import DatasetCache
 from model_pipeline import GrievanceClassifier
+from multitask_pipeline import MultiTaskGrievanceClassifier
 from configs import get_config
+from huggingface_hub import HfApi, hf_hub_download
+import json
 import time
 import os
 
+# Written next to the weights by GrievanceClassifier.push_model_to_hub
+MODEL_METADATA_FILE = "model_metadata.json"
+
+def pause_retrain_space(configs, api):
+    """Pause the retrain Space (if the run is inside one) to free its resources."""
+    if configs.retrain_space_id:
+        try:
+            print(f"[{time.strftime('%H:%M:%S')}] Attempting to pause Hugging Face Space...", flush=True)
+            
+            api.pause_space(repo_id=configs.retrain_space_id, token=configs.hf_token)
+            
+            print(f"[{time.strftime('%H:%M:%S')}] Pause command executed.", flush=True)
+        except Exception as e:
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] WARNING: Failed to pause HF Space: {e}", flush=True)
+
+
+def deployed_dataset_version(configs):
+    """
+    version_tag of the newest dataset shard the deployed HUB_MODEL_ID was trained on, read
+    from its model_metadata.json; None if it was trained on another dataset or the
+    metadata predates the field.
+    """
+    try:
+        path = hf_hub_download(configs.hub_model_id, MODEL_METADATA_FILE, token=configs.hf_token)
+        with open(path, "r", encoding="utf-8") as f:
+            trained_on = json.load(f).get("dataset_metadata") or {}
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] WARNING: Could not read {configs.hub_model_id}/{MODEL_METADATA_FILE}: {e}", flush=True)
+        return None
+    if trained_on.get("dataset_repo_id") != configs.dataset_repo_id or "dataset_shards" not in trained_on:
+        return None
+    return trained_on.get("dataset_version_tag")
+
+
+def load_warm_start_train(configs, full_train, dataset_metadata, dataset_cache=None):
+    """
+    WARM_START=true: training rows for resuming the deployed model, i.e. the train split of
+    every shard built since the deployed model was trained (the new data) plus a replay
+    sample of older rows.
+
+    Returns (train_dataset, info). A dataset pushed as a single snapshot has no shards to
+    tell new rows from old, so its whole train split is used. When the deployed model does
+    not record the shard it was trained through, only the latest shard counts as new.
+    """
+    if "dataset_shards" not in dataset_metadata:
+        print(f"[{time.strftime('%H:%M:%S')}] WARNING: {configs.dataset_repo_id} is not sharded; "
+              f"warm start trains on the full train split", flush=True)
+        return full_train, {"delta_rows": len(full_train), "replay_rows": 0}
+
+    trained_version = deployed_dataset_version(configs)
+    if trained_version is None:
+        print(f"[{time.strftime('%H:%M:%S')}] WARNING: {configs.hub_model_id} does not record its dataset shard; "
+              f"warm start trains on the latest shard", flush=True)
+        shards = "latest"
+    elif trained_version == dataset_metadata.get("dataset_version_tag"):
+        return full_train.select([]), {"delta_rows": 0, "replay_rows": 0, "trained_version_tag": trained_version}
+    else:
+        shards = f"{AFTER_PREFIX}{trained_version}"
+
+    delta = load_dataset_from_hub(
+        model_repo=configs.dataset_repo_id,
+        hf_token=configs.hf_token,
+        shards=shards,
+        cache=dataset_cache,
+        offline=configs.dataset_offline
+    )
+    delta_train = delta['dataset']['train']
+    train_dataset = warm_start_train_split(full_train, delta_train, replay_ratio=configs.warm_start_replay_ratio)
+    info = {
+        "delta_rows": len(delta_train),
+        "replay_rows": len(train_dataset) - len(delta_train),
+        "delta_shards": shards,
+        "trained_version_tag": trained_version,
+        "delta_version_tag": delta['metadata'].get("dataset_version_tag"),
+    }
+    return train_dataset, info
+
+
+def run_multitask_training_pipeline(configs, dataset_cache=None):
+    """
+    LABEL=multitask: load the urgency and department datasets and train one shared-encoder
+    model for both (served by the multitask classifier API's /predict_all).
+    """
+    datasets, dataset_metadata = {}, {}
+    for task, repo_id in (("urgency", configs.urgency_dataset_repo_id), ("department", configs.department_dataset_repo_id)):
+        print(f"[{time.strftime('%H:%M:%S')}] Loading {task} dataset from hub: {repo_id} ...", flush=True)
+        data = load_dataset_from_hub(
+            model_repo=repo_id,
+            hf_token=configs.hf_token,
+            shards=configs.dataset_shards,
+            cache=dataset_cache,
+            offline=configs.dataset_offline
+        )
+        datasets[task] = data['dataset']
+        dataset_metadata[task] = data['metadata']
+        sizes = ", ".join(f"{split}={len(data['dataset'][split])}" for split in ("train", "eval", "test"))
+        print(f"[{time.strftime('%H:%M:%S')}] {task} dataset loaded: {sizes}", flush=True)
+
+    print(f"[{time.strftime('%H:%M:%S')}] Initializing multitask classifier (checkpoint={configs.model_checkpoint}) ...", flush=True)
+    classifier = MultiTaskGrievanceClassifier(
+        model_checkpoint=configs.model_checkpoint,
+        tasks=configs.tasks,
+        hf_token=configs.hf_token,
+        wandb_api_key=configs.wandb_api_key,
+        wandb_project_name=configs.wandb_project_name,
+        max_length=configs.max_length,
+    )
+
+    print(f"[{time.strftime('%H:%M:%S')}] Start training the multitask model ...", flush=True)
+    result = classifier.train_pipeline(
+        datasets=datasets,
+        dataset_metadata=dataset_metadata,
+        space_repo_id=configs.space_repo_id,
+        hf_training_args={"hub_model_id": configs.hub_model_id},
+        api_endpoints=configs.api_endpoints(),
+        early_stopping_patience=configs.early_stopping_patience,
+        deployed_sample_size=configs.deployed_sample_size,
+        decision_threshold=configs.decision_threshold,
+        deployed_batch_size=configs.deployed_batch_size,
+        deployed_max_workers=configs.deployed_max_workers
+    )
+    print(f"[{time.strftime('%H:%M:%S')}] Training completed successfully! Decision: {result['decision']}", flush=True)
+
+    pause_retrain_space(configs, classifier.api)
+    return result
+
+
 def run_grievance_training_pipeline():
     """
     Load configs, dataset, initialize classifier,
@@ -21,10 +152,26 @@ def run_grievance_training_pipeline():
               flush=True)
 
 
+        dataset_cache = DatasetCache(configs.dataset_cache_dir, keep=configs.dataset_cache_keep) if configs.dataset_cache_dir else None
+
+        if configs.label == "multitask":
+            return run_multitask_training_pipeline(configs, dataset_cache)
+
+        # A warm start resumes the deployed model, if there is one yet
+        warm_start = configs.warm_start and HfApi().repo_exists(configs.hub_model_id, token=configs.hf_token)
+        if configs.warm_start and not warm_start:
+            print(f"[{time.strftime('%H:%M:%S')}] WARNING: {configs.hub_model_id} does not exist yet; "
+                  f"cold start from {configs.model_checkpoint}", flush=True)
+
         print(f"[{time.strftime('%H:%M:%S')}] Loading dataset from hub: {configs.dataset_repo_id} ...", flush=True)
         data = load_dataset_from_hub(
             model_repo=configs.dataset_repo_id,
-            hf_token=configs.hf_token
+            hf_token=configs.hf_token,
+            # A warm start needs every shard: replay rows come from the older ones, and the
+            # evaluation gate uses the full eval/test splits as in a cold start
+            shards="all" if warm_start else configs.dataset_shards,
+            cache=dataset_cache,
+            offline=configs.dataset_offline
         )
         dataset = data['dataset']
         dataset_metadata = data['metadata']
@@ -40,30 +187,69 @@ def run_grievance_training_pipeline():
         test_len = _safe_len(dataset.get('test')) if dataset else "no dataset"
         print(f"[{time.strftime('%H:%M:%S')}] Dataset loaded: train={train_len}, eval={eval_len}, test={test_len}", flush=True)
 
-        print(f"[{time.strftime('%H:%M:%S')}] Initializing classifier (checkpoint={configs.model_checkpoint}) ...", flush=True)
+        # Cold start: MODEL_CHECKPOINT on the full train split. Warm start: the deployed model
+        # on the new rows plus replay, with a shorter, gentler schedule
+        model_checkpoint = configs.model_checkpoint
+        train_dataset, train_split = dataset['train'], "train"
+        hf_training_args = {"hub_model_id": configs.hub_model_id}
+        freeze_layers = 0
+        if warm_start:
+            train_dataset, warm_start_info = load_warm_start_train(configs, dataset['train'], dataset_metadata, dataset_cache)
+            print(f"[{time.strftime('%H:%M:%S')}] Warm start from {configs.hub_model_id}: "
+                  f"{warm_start_info['delta_rows']} new + {warm_start_info['replay_rows']} replay rows", flush=True)
+            if warm_start_info["delta_rows"] == 0:
+                print(f"[{time.strftime('%H:%M:%S')}] No new training rows since the deployed model was trained; nothing to train.", flush=True)
+                pause_retrain_space(configs, HfApi())
+                return {"decision": "no_new_data", "warm_start": warm_start_info}
+
+            model_checkpoint = configs.hub_model_id
+            train_split = None  # not a split of the snapshot, so not tokenized-split cached
+            hf_training_args.update({
+                "learning_rate": configs.warm_start_learning_rate,
+                "num_train_epochs": configs.warm_start_epochs,
+                # A short run may not reach eval_steps: evaluate (and keep the best) per epoch
+                "eval_strategy": "epoch",
+                "save_strategy": "epoch",
+            })
+            freeze_layers = configs.warm_start_freeze_layers
+            dataset_metadata = {**dataset_metadata, "warm_start": {"base_model": configs.hub_model_id, **warm_start_info}}
+
+        print(f"[{time.strftime('%H:%M:%S')}] Initializing classifier (checkpoint={model_checkpoint}) ...", flush=True)
         classifier = GrievanceClassifier(
-            model_checkpoint=configs.model_checkpoint,
+            model_checkpoint=model_checkpoint,
             num_labels=len(configs.label2id),
             id2label=configs.id2label,
             label2id=configs.label2id,
             hf_token=configs.hf_token,
             wandb_api_key=configs.wandb_api_key,
             wandb_project_name=configs.wandb_project_name,
+            dataset_cache=dataset_cache,
+            max_length=configs.max_length,
         )
         print(f"[{time.strftime('%H:%M:%S')}] Classifier initialized.", flush=True)
 
         print(f"[{time.strftime('%H:%M:%S')}] Start training the model ...", flush=True)
         result = classifier.train_pipeline(
-            train_dataset=dataset['train'],
+            train_dataset=train_dataset,
             eval_dataset=dataset['eval'],
             test_dataset=dataset['test'],
             dataset_metadata= dataset_metadata, 
             space_repo_id=configs.space_repo_id,
-            hf_training_args={"hub_model_id": configs.hub_model_id},
+            hf_training_args=hf_training_args,
             api_endpoint=configs.api_endpoint,
             early_stopping_patience=configs.early_stopping_patience,
             deployed_sample_size=configs.deployed_sample_size,
-            decision_threshold=configs.decision_threshold
+            decision_threshold=configs.decision_threshold,
+            deployed_batch_size=configs.deployed_batch_size,
+            deployed_max_workers=configs.deployed_max_workers,
+            student_checkpoint=configs.student_checkpoint or None,
+            student_training_args={"learning_rate": configs.student_learning_rate},
+            distill_alpha=configs.distill_alpha,
+            distill_temperature=configs.distill_temperature,
+            student_max_f1_drop=configs.student_max_f1_drop,
+            serve_student=configs.serve_student,
+            freeze_layers=freeze_layers,
+            train_split=train_split
         )
 
         print(f"[{time.strftime('%H:%M:%S')}] Training completed successfully!", flush=True)
@@ -77,15 +263,7 @@ def run_grievance_training_pipeline():
             print(f"[{time.strftime('%H:%M:%S')}] Training finished (could not display result details).", flush=True)
 
         # pause the space if it was run in the hf_space
-        if configs.retrain_space_id:
-            try:
-                print(f"[{time.strftime('%H:%M:%S')}] Attempting to pause Hugging Face Space...", flush=True)
-                
-                classifier.api.pause_space(repo_id=configs.retrain_space_id, token=configs.hf_token)
-                
-                print(f"[{time.strftime('%H:%M:%S')}] Pause command executed.", flush=True)
-            except Exception as e:
-                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] WARNING: Failed to pause HF Space: {e}", flush=True)
+        pause_retrain_space(configs, classifier.api)
 
         return result
 
@@ -1,13 +1,6 @@
 from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Union, List, Annotated, Dict
-import re
-
-def clean_text(text: str) -> str:
-    text = re.sub(r'https?://\S+|www\.\S+', '', text)
-    text = re.sub(r'<.*?>', '', text)
-    text = re.sub(r'\n', ' ', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+from text_normalization import clean_text, clean_text_batch
 
 class TextInput(BaseModel):
     text: Annotated[
@@ -37,7 +30,7 @@ class TextInput(BaseModel):
         if isinstance(model.text, str):
             model.text = clean_text(model.text)
         else:
-            model.text = [clean_text(t) for t in model.text]
+            model.text = clean_text_batch(model.text)
         return model
 
     model_config = {
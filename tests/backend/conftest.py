@@ -0,0 +1,110 @@
+# tests/backend/conftest.py
+"""
+Backend tests run against a throwaway SQLite database: app.core.database reads
+DATABASE_URL at import time, so it is set here before any `app` module is imported.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+# text_normalization is copied next to the app in the Docker image; here it is imported from its source
+COMMON_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src", "common")
+sys.path.append(os.path.abspath(COMMON_DIR))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='sambodhan-tests-')}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app as fastapi_app
+    from app.core.database import Base, engine
+
+    Base.metadata.create_all(engine)
+    return fastapi_app
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def db(app):
+    from app.core.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_admin(db):
+    """Create an admin and return (admin, Authorization header) for it."""
+    from app.models.admin import Admin
+    from app.routers.admin import create_access_token
+
+    created = []
+
+    def _make_admin(role="super_admin", **scope):
+        admin = Admin(
+            name="Test Admin", email=f"admin{len(created)}-{id(created)}@example.com",
+            password_hash="x", role=role, **scope,
+        )
+        db.add(admin)
+        db.commit()
+        created.append(admin)
+        token = create_access_token({"sub": str(admin.id), "role": admin.role, "email": admin.email})
+        return admin, {"Authorization": f"Bearer {token}"}
+
+    yield _make_admin
+    for admin in created:
+        db.delete(admin)
+    db.commit()
+
+
+@pytest.fixture(scope="session")
+def locations(app):
+    """
+    Two districts: Achham / Mangalsen wards 1-2 (ids 1-2, named as in data/location_id.json)
+    and a second district with one municipality and ward (id 3), for scope tests.
+    """
+    from app.core.database import SessionLocal
+    from app.models.location import District, Municipality, Ward
+
+    session = SessionLocal()
+    try:
+        if session.get(Ward, 1) is None:
+            session.add_all([
+                District(id=1, name="Achham"),
+                Municipality(id=1, name="Mangalsen", district_id=1),
+                Ward(id=1, ward_number=1, municipality_id=1),
+                Ward(id=2, ward_number=2, municipality_id=1),
+                District(id=2, name="Kathmandu"),
+                Municipality(id=2, name="Kathmandu Metropolitan", district_id=2),
+                Ward(id=3, ward_number=1, municipality_id=2),
+            ])
+            session.commit()
+    finally:
+        session.close()
+    return {"district_ids": (1, 2), "municipality_ids": (1, 2), "ward_ids": (1, 2, 3)}
+
+
+@pytest.fixture
+def citizen(db, locations):
+    from app.models.user import User
+
+    user = User(name="Citizen", email=f"citizen-{id(db)}@example.com", password_hash="x", ward_id=1)
+    db.add(user)
+    db.commit()
+    yield user
+    db.delete(user)
+    db.commit()
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+from sqlalchemy import text
+
+from app.chatbot_api import create_access_token as create_citizen_token
+from app.models.user import User
+from app.services import auth_token_cache as cache_module
+from app.services.auth_token_cache import AuthTokenCache, auth_token_cache
+
+
+def test_stats_require_admin(client, make_admin):
+    assert client.get("/api/chatbot/auth/token-cache/stats").status_code in (401, 403)
+
+    citizen = {"Authorization": f"Bearer {create_citizen_token(data={'sub': '1'})}"}
+    assert client.get("/api/chatbot/auth/token-cache/stats", headers=citizen).status_code == 401
+
+    bogus = {"Authorization": "Bearer not-a-jwt"}
+    assert client.get("/api/chatbot/auth/token-cache/stats", headers=bogus).status_code == 401
+
+    _, headers = make_admin()
+    response = client.get("/api/chatbot/auth/token-cache/stats", headers=headers)
+    assert response.status_code == 200
+    assert "hit_rate" in response.json()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def shared_cache():
+    auth_token_cache.clear()
+    yield auth_token_cache
+    auth_token_cache.clear()
+
+
+def user(user_id=7, name="Citizen"):
+    return User(id=user_id, name=name, email=f"u{user_id}@example.com", password_hash="secret", ward_id=1)
+
+
+def test_hit_returns_snapshot_without_password(clock):
+    cache = AuthTokenCache(ttl_seconds=30)
+    assert cache.get("t") is None
+    cache.set("t", user())
+    hit = cache.get("t")
+    assert (hit.id, hit.name, hit.ward_id, hit.password_hash) == (7, "Citizen", 1, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AuthTokenCache(ttl_seconds=30)
+    cache.set("t", user())
+    clock[0] += 29
+    assert cache.get("t") is not None
+    clock[0] += 2
+    assert cache.get("t") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_ttl_is_capped_by_token_exp(clock):
+    cache = AuthTokenCache(ttl_seconds=30)
+    cache.set("soon", user(), token_exp=time.time() + 5)
+    cache.set("expired", user(), token_exp=time.time() - 1)
+    assert cache.get("expired") is None
+    clock[0] += 6
+    assert cache.get("soon") is None
+
+
+def test_invalidate_user_drops_only_their_tokens(clock):
+    cache = AuthTokenCache(ttl_seconds=30)
+    cache.set("a1", user(1))
+    cache.set("a2", user(1))
+    cache.set("b", user(2))
+    cache.invalidate_user(1)
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b").id == 2
+
+
+def test_user_update_and_delete_invalidate_cached_tokens(client, db, citizen, shared_cache):
+    headers = {"Authorization": f"Bearer {create_citizen_token(data={'sub': str(citizen.id)})}"}
+    assert client.get("/api/chatbot/auth/me", headers=headers).json()["name"] == "Citizen"
+
+    # A write that bypasses the ORM is not seen while the token is cached
+    db.execute(text("UPDATE users SET name = 'Renamed in SQL' WHERE id = :id"), {"id": citizen.id})
+    db.commit()
+    assert client.get("/api/chatbot/auth/me", headers=headers).json()["name"] == "Citizen"
+    assert shared_cache.stats()["hits"] == 1
+
+    # An ORM update drops the cached token
+    db.refresh(citizen)
+    citizen.name = "Renamed"
+    db.commit()
+    assert client.get("/api/chatbot/auth/me", headers=headers).json()["name"] == "Renamed"
+
+    # So does deleting the user: the token stops working at once
+    other = User(name="Leaving", email=f"leaving-{id(db)}@example.com", password_hash="x", ward_id=1)
+    db.add(other)
+    db.commit()
+    other_headers = {"Authorization": f"Bearer {create_citizen_token(data={'sub': str(other.id)})}"}
+    assert client.get("/api/chatbot/auth/me", headers=other_headers).status_code == 200
+    db.delete(other)
+    db.commit()
+    assert client.get("/api/chatbot/auth/me", headers=other_headers).status_code == 401
@@ -0,0 +1,185 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.routers.feed import clamp_scope
+from app.services import change_feed
+from app.services.change_feed import ChangeBroker, Scope
+
+WATER = "Infrastructure, Utilities & Natural Resources"
+HEALTH = "Education, Health & Social Welfare"
+
+
+def change(ward_id, department=WATER, prev=None):
+    ev = {"op": "update" if prev else "insert", "id": 1, "count": 1, "ward_id": ward_id,
+          "department": department, "urgency": "NORMAL", "current_status": "PENDING"}
+    if prev:
+        ev["prev"] = prev
+    return ev
+
+
+def drain(sub):
+    items = []
+    while not sub.queue.empty():
+        items.append(sub.queue.get_nowait())
+    return items
+
+
+def received(broker, scopes, events):
+    """Ids of the events each scope's subscriber gets when `events` are published."""
+    async def run():
+        subs = [broker.subscribe(scope)[0] for scope in scopes]
+        broker.publish(events)
+        await asyncio.sleep(0)  # deliveries are scheduled on the loop
+        return [[item[2]["id"] for item in drain(sub)] for sub in subs]
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("scope, expected", [
+    (Scope(), [1, 2, 3, 4]),
+    (Scope(ward_id=2), [2]),
+    (Scope(municipality_id=1), [1, 2, 4]),
+    (Scope(district_id=2), [3]),
+    (Scope(department=HEALTH), [4]),
+    (Scope(municipality_id=1, department=WATER), [1, 2]),
+])
+def test_scope_filtering(locations, scope, expected):
+    events = [dict(change(1), id=1), dict(change(2), id=2), dict(change(3), id=3), dict(change(1, HEALTH), id=4)]
+    assert received(ChangeBroker(), [scope], events) == [expected]
+
+
+def test_update_matches_previous_scope(locations):
+    # Moved from ward 3 (district 2) to ward 1 (district 1): both districts see the delta
+    moved = change(1, prev={"ward_id": 3})
+    relabelled = dict(change(2, HEALTH, prev={"department": WATER}), id=2)
+    got = received(ChangeBroker(), [Scope(district_id=2), Scope(district_id=1), Scope(department=WATER)], [moved, relabelled])
+    assert got == [[1], [1, 2], [1, 2]]
+
+
+def test_replay_after_last_event_id(locations):
+    broker = ChangeBroker(replay_size=10)
+    broker.publish([dict(change(n % 3 + 1), id=n) for n in range(1, 6)])
+
+    async def run():
+        _, backlog = broker.subscribe(Scope(ward_id=2), f"{broker.boot}-2")
+        _, everything = broker.subscribe(Scope(), f"{broker.boot}-0")
+        _, current = broker.subscribe(Scope(), broker.last_event_id)
+        return backlog, everything, current
+
+    backlog, everything, current = asyncio.run(run())
+    # Events 3..5 are newer; of those only 4 is in ward 2
+    assert backlog == [(f"{broker.boot}-4", "change", dict(change(2), id=4))]
+    assert [item[0] for item in everything] == [f"{broker.boot}-{n}" for n in range(1, 6)]
+    assert current == []
+
+
+@pytest.mark.parametrize("last_event_id", ["other-3", "{boot}-x", "{boot}-1"])
+def test_unknown_last_event_id_resyncs(locations, last_event_id):
+    broker = ChangeBroker(replay_size=3)
+    broker.publish([dict(change(1), id=n) for n in range(1, 7)])  # 1..3 fell out of the replay buffer
+
+    async def run():
+        return broker.subscribe(Scope(), last_event_id.format(boot=broker.boot))[1]
+
+    assert [item[1] for item in asyncio.run(run())] == ["resync"]
+
+
+def test_overflow_resyncs(locations):
+    broker = ChangeBroker(queue_size=2)
+
+    async def run():
+        sub, _ = broker.subscribe(Scope())
+        broker.publish([dict(change(1), id=n) for n in range(5)])
+        await asyncio.sleep(0)
+        return drain(sub)
+
+    items = asyncio.run(run())
+    assert items[0] == ("", "resync", {"reason": "overflow"})
+    assert len(items) <= 2
+
+
+def test_committed_complaint_reaches_subscriber(db, locations):
+    async def run():
+        near, _ = change_feed.broker.subscribe(Scope(municipality_id=1))
+        far, _ = change_feed.broker.subscribe(Scope(district_id=2))
+        try:
+            complaint = models.Complaint(message="Ward 2 drain is overflowing (feed test)", ward_id=2,
+                                         department=WATER, urgency="URGENT")
+            db.add(complaint)
+            db.commit()
+            await asyncio.sleep(0)
+            return complaint, drain(near), drain(far)
+        finally:
+            change_feed.broker.unsubscribe(near)
+            change_feed.broker.unsubscribe(far)
+
+    complaint, near, far = asyncio.run(run())
+    assert [(item[1], item[2]["op"], item[2]["id"]) for item in near] == [("change", "insert", complaint.id)]
+    assert "message" not in near[0][2]
+    assert far == []
+    db.delete(complaint)
+    db.commit()
+
+
+def test_scope_is_clamped_to_the_admin(make_admin, locations):
+    department_admin, _ = make_admin("department_admin", department=WATER, municipality_id=1)
+    municipal_admin, _ = make_admin("municipal_admin", municipality_id=2)
+    district_admin, _ = make_admin("super_admin", district_id=1)
+    super_admin, _ = make_admin("super_admin")
+
+    scope = clamp_scope(department_admin, {"ward_id": 2, "department": None})
+    assert (scope.ward_id, scope.municipality_id, scope.department) == (2, 1, WATER)
+    assert clamp_scope(municipal_admin, {}).municipality_id == 2
+    assert clamp_scope(district_admin, {"municipality_id": 1}).district_id == 1
+    assert vars(clamp_scope(super_admin, {"district_id": 2})) == vars(Scope(district_id=2))
+    for admin, requested in [
+        (department_admin, {"department": HEALTH}),
+        (municipal_admin, {"municipality_id": 1}),
+        (district_admin, {"district_id": 2}),
+    ]:
+        with pytest.raises(HTTPException) as raised:
+            clamp_scope(admin, requested)
+        assert raised.value.status_code == 403
+
+
+def test_feed_requires_admin(client, make_admin, citizen, locations):
+    from app.routers.admin import create_access_token
+
+    assert client.get("/api/feed/complaints").status_code == 401
+    assert client.get("/api/feed/stats").status_code == 401
+    citizen_token = create_access_token({"sub": str(citizen.id)})
+    assert client.get("/api/feed/complaints", headers={"Authorization": f"Bearer {citizen_token}"}).status_code == 401
+
+    _, headers = make_admin("municipal_admin", municipality_id=1)
+    assert client.get("/api/feed/complaints?municipality_id=2", headers=headers).status_code == 403
+    _, unscoped = make_admin("municipal_admin")
+    assert client.get("/api/feed/complaints", headers=unscoped).status_code == 403
+    stats = client.get("/api/feed/stats", headers=headers)
+    assert stats.status_code == 200
+    assert stats.json()["transport"] == "in-process"
+
+
+def test_update_after_commit_carries_previous_values(db, locations):
+    complaint = models.Complaint(message="Ward 1 street light is broken (feed test)", ward_id=1,
+                                 department=WATER, urgency="NORMAL")
+    db.add(complaint)
+    db.commit()  # expires the row, so the old values are not loaded yet
+
+    async def run():
+        sub, _ = change_feed.broker.subscribe(Scope(ward_id=3))
+        try:
+            complaint.ward_id = 3
+            complaint.urgency = "URGENT"
+            db.commit()
+            await asyncio.sleep(0)
+            return drain(sub)
+        finally:
+            change_feed.broker.unsubscribe(sub)
+
+    items = asyncio.run(run())
+    assert [item[2]["prev"] for item in items] == [{"ward_id": 1, "urgency": "NORMAL"}]
+    db.delete(complaint)
+    db.commit()
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.models.chat_session import ChatSession
+from app.services import chat_session_store
+from app.services.chat_session_store import ChatSessionManager, InMemorySessionStore, SQLSessionStore, new_state
+
+
+@pytest.fixture
+def sql_store(app):
+    store = SQLSessionStore()
+    yield store
+    db = SessionLocal()
+    db.query(ChatSession).delete()
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chat_session_store.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_memory_store_round_trip_is_a_copy():
+    store = InMemorySessionStore()
+    state = new_state(7, {"intent": "file_complaint"})
+    store.set("s1", state)
+    state["context"]["intent"] = "changed"
+
+    loaded = store.get("s1")
+    assert loaded == new_state(7, {"intent": "file_complaint"})
+    loaded["options"]["districts"] = [1]
+    assert store.get("s1")["options"] == {}
+    store.delete("s1")
+    assert store.get("s1") is None
+
+
+def test_memory_store_expires_and_evicts(clock):
+    store = InMemorySessionStore(ttl_seconds=60, max_entries=2)
+    store.set("old", new_state())
+    clock[0] += 61
+    assert store.get("old") is None
+
+    for sid in ("a", "b"):
+        store.set(sid, new_state())
+    store.get("a")  # most recently used survives
+    store.set("c", new_state())
+    assert store.get("b") is None
+    assert store.get("a") is not None and store.get("c") is not None
+
+
+def test_sql_store_round_trip(sql_store):
+    state = new_state(3, {"district_id": 1, "district_name": "Achham"})
+    state["options"]["districts"] = {"key": None, "items": [[1, "Achham"]]}
+    sql_store.set("sql-1", state)
+    assert sql_store.get("sql-1") == state
+
+    state["context"]["municipality_id"] = 1
+    sql_store.set("sql-1", state)
+    assert sql_store.get("sql-1")["context"]["municipality_id"] == 1
+    sql_store.delete("sql-1")
+    assert sql_store.get("sql-1") is None
+
+
+def test_sql_store_expires_and_purges(sql_store):
+    expired = SQLSessionStore(ttl_seconds=-1)
+    expired.set("gone", new_state())
+    assert sql_store.get("gone") is None
+    db = SessionLocal()
+    assert db.get(ChatSession, "gone") is None
+
+    expired.set("stale", new_state())
+    sql_store._writes = SQLSessionStore.PURGE_EVERY - 1
+    sql_store.set("fresh", new_state())
+    assert db.get(ChatSession, "stale") is None
+    assert db.get(ChatSession, "fresh") is not None
+    db.close()
+
+
+def test_sql_store_counts_concurrent_writes(sql_store, monkeypatch):
+    monkeypatch.setattr(SQLSessionStore, "PURGE_EVERY", 10**9)
+    threads = [threading.Thread(target=lambda i=i: [sql_store.set(f"t{i}-{n}", new_state()) for n in range(5)]) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sql_store._writes == 20
+
+
+def test_manager_issues_and_resumes_sessions():
+    manager = ChatSessionManager(InMemorySessionStore())
+    session_id, state = manager.load(None, user_id=5, legacy_context={"intent": "check_status"})
+    assert session_id and state["context"] == {"intent": "check_status"}
+    state["context"]["complaint_id"] = 12
+    manager.save(session_id, state)
+
+    assert manager.load(session_id, user_id=5) == (session_id, state)
+    # Unknown ids and other users' sessions start over
+    other_id, other = manager.load(session_id, user_id=6)
+    assert other_id != session_id and other["context"] == {}
+    unknown_id, _ = manager.load("made-up", user_id=5)
+    assert unknown_id != "made-up"
+
+
+def test_multi_turn_conversation_keeps_server_state(client, citizen):
+    first = client.post("/api/chatbot/message", json={"message": "I want to file a complaint", "user_id": citizen.id})
+    assert first.status_code == 200
+    session_id = first.json()["data"]["session_id"]
+    assert "Achham" in first.json()["reply"]
+
+    second = client.post("/api/chatbot/message", json={"message": "1", "user_id": citizen.id, "session_id": session_id})
+    assert second.status_code == 200
+    assert second.json()["data"]["session_id"] == session_id
+    assert "Achham" in second.json()["reply"] and "selected" in second.json()["reply"]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.routers import complaints
+
+WATER = "Infrastructure, Utilities & Natural Resources"
+HEALTH = "Education, Health & Social Welfare"
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    """Routes the classifier calls to a fake multitask API and records the requests."""
+    calls = []
+    responses = {}
+
+    def handler(request):
+        calls.append((request.url.path, json.loads(request.content)))
+        return httpx.Response(200, json=responses[request.url.path])
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(complaints, "CLASSIFIER_API_BASE", "http://classifier")
+    monkeypatch.setattr(complaints.httpx, "AsyncClient",
+                        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs))
+    return calls, responses
+
+
+def test_predict_all_decodes_both_heads_from_one_call(classifier):
+    calls, responses = classifier
+    responses["/predict_all"] = {"urgency": {"label": "highly urgent", "confidence": 0.9},
+                                 "department": {"label": f" {WATER} ", "confidence": 0.8}}
+
+    result = asyncio.run(complaints.predict_all("Main pipe burst in ward 2"))
+    assert calls == [("/predict_all", {"text": "Main pipe burst in ward 2"})]
+    assert result == {
+        "urgency": {"urgency": 2, "confidence": 0.9, "label": "highly urgent"},
+        "department": {"department": WATER, "confidence": 0.8},
+    }
+    # The single-task helpers go through the same call
+    assert asyncio.run(complaints.predict_department("Main pipe burst in ward 2")) == result["department"]
+    assert len(calls) == 2 and calls[1][0] == "/predict_all"
+
+
+def test_predict_batch_decodes_both_heads_from_one_call(classifier):
+    calls, responses = classifier
+    responses["/predict_all"] = [
+        {"urgency": {"label": "URGENT"}, "department": {"label": WATER}},
+        {"urgency": {"label": "normal"}, "department": {"label": HEALTH}},
+        {"urgency": {"label": "SOMEDAY"}, "department": {"label": "Space Agency"}},
+    ]
+
+    urgency, department = asyncio.run(complaints.predict_batch(["a", "b", "c"]))
+    assert calls == [("/predict_all", {"text": ["a", "b", "c"]})]
+    assert urgency == ["URGENT", "NORMAL", None]
+    assert department == [WATER, HEALTH, None]
+
+
+def test_predict_batch_length_mismatch_is_unlabelled(classifier):
+    _, responses = classifier
+    responses["/predict_all"] = [{"urgency": {"label": "URGENT"}, "department": {"label": WATER}}]
+    assert asyncio.run(complaints.predict_batch(["a", "b"])) == ([None, None], [None, None])
@@ -0,0 +1,46 @@
+import importlib.util
+import os
+from datetime import datetime, timezone
+
+from app import models
+from app.models.complaint import COMPLAINT_CASCADE_CHILDREN
+from app.models.partitioning import cascade_delete_trigger_sql
+
+MIGRATION = os.path.join(os.path.dirname(__file__), "..", "..", "src", "backend", "alembic", "versions",
+                          "f1b7c2d9e4a6_cascade_complaint_deletes_to_derived_tables.py")
+CHILD_MODELS = [models.ComplaintStatusHistory, models.MisclassifiedComplaint, models.ComplaintSignature, models.ComplaintSlaFact]
+
+
+def test_every_child_table_is_cascaded():
+    tables = {model.__tablename__ for model in CHILD_MODELS}
+    assert {child for child, _ in COMPLAINT_CASCADE_CHILDREN} == tables
+    function_sql = cascade_delete_trigger_sql("complaints", COMPLAINT_CASCADE_CHILDREN)[0]
+    for table in tables:
+        assert f"DELETE FROM {table} WHERE complaint_id = OLD.id;" in function_sql
+
+    # The migration installs the same list on existing databases
+    spec = importlib.util.spec_from_file_location("cascade_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    assert migration.CASCADE_CHILDREN == [child for child, _ in COMPLAINT_CASCADE_CHILDREN]
+
+
+def test_deleting_a_complaint_empties_every_child_table(db, locations):
+    complaint = models.Complaint(message="Broken water tap at ward office (cascade test)", ward_id=1,
+                                 department="Infrastructure, Utilities & Natural Resources", urgency="NORMAL")
+    db.add(complaint)
+    db.flush()
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        models.ComplaintStatusHistory(complaint_id=complaint.id, status=0),
+        models.MisclassifiedComplaint(complaint_id=complaint.id),
+        models.ComplaintSignature(complaint_id=complaint.id, ward_id=1, date_submitted=now, signature=b"\0" * 8, cluster_id=complaint.id),
+        models.ComplaintSlaFact(complaint_id=complaint.id, ward_id=1, submitted_at=now, reopen_count=0),
+    ])
+    db.commit()
+    complaint_id = complaint.id
+    assert all(db.query(model).filter(model.complaint_id == complaint_id).count() == 1 for model in CHILD_MODELS)
+
+    db.delete(complaint)
+    db.commit()
+    assert [db.query(model).filter(model.complaint_id == complaint_id).count() for model in CHILD_MODELS] == [0, 0, 0, 0]
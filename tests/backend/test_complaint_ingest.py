@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from app import models
+from app.services import complaint_ingest
+
+
+@pytest.fixture(autouse=True)
+def fresh_location_map():
+    complaint_ingest.location_map.invalidate()
+
+
+def upload(client, name, content, classify=False):
+    return client.post(
+        f"/api/complaints/bulk?classify={str(classify).lower()}",
+        files={"file": (name, content.encode("utf-8"))},
+    )
+
+
+def stored(db, marker):
+    db.expire_all()
+    return db.query(models.Complaint).filter(models.Complaint.message.like(f"%{marker}%")).all()
+
+
+def test_csv_rows_are_validated_and_reported(client, db, citizen):
+    marker = "csv-validation"
+    content = "\n".join([
+        "message,ward_id,district,municipality,ward,citizen_id,urgency,department,date_submitted",
+        f'Water pipe burst near school {marker} 1,1,,,,{citizen.id},URGENT,"Infrastructure, Utilities & Natural Resources",2025-01-05T10:00:00',
+        f'"Streetlight broken {marker} 2",,Achham,Mangalsen,2,,NORMAL,Security & Law Enforcement,',
+        f"short,1,,,,,,,",
+        f"Garbage not collected {marker} 4,999,,,,,,,",
+        f"Garbage not collected {marker} 5,,Achham,Nowhere,1,,,,",
+        f"Road blocked by landslide {marker} 6,1,,,,987654,,,",
+        f"Road blocked by landslide {marker} 7,1,,,,,,,not-a-date",
+    ])
+    response = upload(client, "complaints.csv", content)
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["received"] == 7
+    assert body["inserted"] == 2
+    assert body["write_method"] == "executemany"
+    errors = {e["row"]: e["error"] for e in body["errors"]}
+    assert sorted(errors) == [3, 4, 5, 6, 7]
+    assert "at least" in errors[3]
+    assert "Unknown ward_id 999" in errors[4]
+    assert "Unknown location" in errors[5]
+    assert "does not exist" in errors[6]
+
+    rows = sorted(stored(db, marker), key=lambda c: c.message)
+    assert [c.ward_id for c in rows] == [2, 1]
+    assert rows[1].citizen_id == citizen.id
+    assert rows[1].urgency == "URGENT"
+
+
+def test_ndjson_parse_errors_keep_row_numbers(client, db):
+    marker = "ndjson-parse"
+    lines = [
+        json.dumps({"message": f"No drinking water for a week {marker}", "ward_id": 1, "urgency": "HIGHLY URGENT"}),
+        "{not json",
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"message": f"Drainage overflowing on main road {marker}", "ward_id": 2}),
+    ]
+    body = upload(client, "complaints.ndjson", "\n".join(lines)).json()
+
+    assert body["received"] == 4
+    assert body["inserted"] == 2
+    assert [e["row"] for e in body["errors"]] == [2, 3]
+    assert all(e["error"].startswith("Parse error") for e in body["errors"])
+    assert len(stored(db, marker)) == 2
+
+
+def test_unsupported_format_is_rejected(client):
+    response = upload(client, "complaints.xlsx", "anything")
+    assert response.status_code == 400
+
+
+def test_row_limit(client, monkeypatch):
+    monkeypatch.setattr(complaint_ingest, "BULK_INGEST_MAX_ROWS", 2)
+    lines = [json.dumps({"message": f"Row limit test complaint {i}", "ward_id": 1}) for i in range(4)]
+    body = upload(client, "complaints.jsonl", "\n".join(lines)).json()
+
+    assert body["received"] == 2
+    assert body["inserted"] == 2
+    assert "Row limit" in body["errors"][-1]["error"]
+
+
+@pytest.mark.parametrize("rows, limited", [(4, False), (5, True)])
+def test_row_limit_on_a_batch_boundary(client, monkeypatch, rows, limited):
+    # The limit is a multiple of the batch size, so the last allowed row ends a batch
+    monkeypatch.setattr(complaint_ingest, "BULK_INGEST_BATCH_SIZE", 2)
+    monkeypatch.setattr(complaint_ingest, "BULK_INGEST_MAX_ROWS", 4)
+    lines = [json.dumps({"message": f"Batch boundary limit complaint {i}", "ward_id": 1}) for i in range(rows)]
+    body = upload(client, "complaints.jsonl", "\n".join(lines)).json()
+
+    assert body["received"] == 4
+    assert body["inserted"] == 4
+    assert [e["row"] for e in body["errors"] if "Row limit" in e["error"]] == ([5] if limited else [])
+
+
+def test_only_missing_labels_are_classified(db, locations):
+    marker = "classify-missing"
+    calls = []
+
+    async def classify(texts):
+        calls.append(list(texts))
+        return ["HIGHLY URGENT"] * len(texts), ["Security & Law Enforcement"] * len(texts)
+
+    lines = [
+        json.dumps({"message": f"Fire in the market area {marker} 1", "ward_id": 1}),
+        json.dumps({"message": f"Fire in the market area {marker} 2", "ward_id": 1,
+                    "urgency": "NORMAL", "department": "Education, Health & Social Welfare"}),
+        json.dumps({"message": f"Fire in the market area {marker} 3", "ward_id": 1, "urgency": "URGENT"}),
+    ]
+    from app.core.database import SessionLocal
+
+    body = asyncio.run(complaint_ingest.ingest_upload(
+        io.BytesIO("\n".join(lines).encode()), "ndjson", SessionLocal, classify=classify
+    ))
+
+    assert body["inserted"] == 3
+    assert calls == [[f"Fire in the market area {marker} 1", f"Fire in the market area {marker} 3"]]
+    labels = {c.message[-1]: (c.urgency, c.department) for c in stored(db, marker)}
+    assert labels["1"] == ("HIGHLY URGENT", "Security & Law Enforcement")
+    assert labels["2"] == ("NORMAL", "Education, Health & Social Welfare")
+    assert labels["3"] == ("URGENT", "Security & Law Enforcement")
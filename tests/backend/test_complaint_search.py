@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.services import complaint_search
+from app.services.complaint_search import decode_cursor, encode_cursor, tokenize
+
+WATER = "Infrastructure, Utilities & Natural Resources"
+
+
+@pytest.fixture(autouse=True)
+def sync_every_search(monkeypatch):
+    monkeypatch.setattr(complaint_search, "SEARCH_INDEX_SYNC_SECONDS", 0)
+
+
+@pytest.fixture
+def make_complaints(db, locations):
+    created = []
+
+    def _make(messages, **fields):
+        start = datetime.now(timezone.utc) - timedelta(days=1)
+        fields = {"ward_id": 1, "department": WATER, "urgency": "NORMAL", **fields}
+        rows = [models.Complaint(message=message, date_submitted=start + timedelta(minutes=i), **fields)
+                for i, message in enumerate(messages)]
+        db.add_all(rows)
+        db.commit()
+        created.extend(rows)
+        return rows
+
+    yield _make
+    for row in created:
+        if db.get(models.Complaint, row.id) is not None:
+            db.delete(row)
+    db.commit()
+
+
+def search(db, q, **params):
+    db.expire_all()
+    return complaint_search.search_complaints(db, q, **params)
+
+
+def messages(page):
+    return [complaint.message for complaint, _ in page["items"]]
+
+
+def test_tokenize_keeps_devanagari_words():
+    assert tokenize("Water pipe बिग्रियो। Road") == ["water", "pipe", "बिग्रियो", "road"]
+
+
+def test_cursor_round_trip():
+    now = datetime.now(timezone.utc)
+    assert decode_cursor(encode_cursor(now, 7), "recent") == (now, 7)
+    assert decode_cursor(encode_cursor(1.25, 7), "relevance") == (1.25, 7)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "relevance")
+
+
+def test_relevance_filters_and_fuzzy(client, db, make_complaints):
+    make_complaints([
+        "Quaglint pipe burst, quaglint water everywhere on the road",
+        "Quaglint pipe leaking slowly near the school",
+    ])
+    make_complaints(["Quaglint streetlight broken near the temple"], urgency="URGENT")
+
+    page = search(db, "quaglint pipe")
+    assert page["backend"] == "memory"
+    assert messages(page) == ["Quaglint pipe burst, quaglint water everywhere on the road",
+                              "Quaglint pipe leaking slowly near the school"]
+    assert messages(search(db, "quaglint", urgency="URGENT")) == ["Quaglint streetlight broken near the temple"]
+    assert search(db, "quaglnt streetlight")["items"] == []
+    assert messages(search(db, "quaglnt streetlight", fuzzy=True)) == ["Quaglint streetlight broken near the temple"]
+    assert client.get("/api/complaints/search", params={"q": "quaglint", "cursor": "bogus"}).status_code == 400
+
+
+@pytest.mark.parametrize("sort", ["recent", "relevance"])
+def test_pages_stay_full_across_deleted_rows(db, make_complaints, sort):
+    rows = make_complaints([f"Zorbleth drain blocked report {i}" for i in range(12)])
+    search(db, "zorbleth")  # index them
+    # Delete the newest 7: more than the 2 * limit + 1 candidates the first page orders up front
+    remaining = {row.id for row in rows[:-7]}
+    for row in rows[-7:]:
+        db.delete(row)
+    db.commit()
+
+    pages, cursor = [], None
+    while True:
+        page = search(db, "zorbleth", limit=2, sort=sort, cursor=cursor)
+        pages.append([complaint.id for complaint, _ in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [len(ids) for ids in pages] == [2, 2, 1]
+    assert {cid for ids in pages for cid in ids} == remaining
+    if sort == "recent":
+        assert [cid for ids in pages for cid in ids] == sorted(remaining, reverse=True)
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.core.database import engine
+from app.services import complaint_ingest, data_versions
+
+
+@pytest.fixture
+def complaint(db, locations):
+    row = models.Complaint(
+        message="Garbage has not been collected in ward 2 for two weeks", ward_id=2,
+        department="Municipal Governance & Community Services", urgency="NORMAL",
+    )
+    db.add(row)
+    db.commit()
+    yield row
+    db.delete(row)
+    db.commit()
+
+
+@contextmanager
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement.lstrip())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def version(db):
+    db.expire_all()
+    return data_versions.get_version(db, "complaints")
+
+
+def test_one_bump_per_commit_after_the_writes(db, complaint):
+    before = version(db)
+    with statements() as seen:
+        complaint.urgency = "URGENT"
+        db.flush()
+        complaint.current_status = "IN PROCESS"
+        db.flush()
+        db.add(models.ComplaintStatusHistory(complaint_id=complaint.id, status=1))
+        db.commit()
+
+    assert version(db) == before + 1
+    bumps = [i for i, s in enumerate(seen) if s.startswith("UPDATE data_versions")]
+    # Taken last, so the row lock is only held for the commit
+    assert bumps == [len(seen) - 1]
+
+
+def test_no_bump_without_net_change(db, complaint):
+    before = version(db)
+    complaint.urgency = complaint.urgency
+    assert complaint in db.dirty
+    db.commit()
+    assert version(db) == before
+
+
+def test_no_bump_on_rollback(db, complaint):
+    before = version(db)
+    complaint.urgency = "HIGHLY URGENT"
+    db.flush()
+    db.rollback()
+    assert version(db) == before
+
+
+def test_untracked_tables_do_not_bump(db, citizen):
+    before = version(db)
+    citizen.name = "Renamed Citizen"
+    db.commit()
+    assert version(db) == before
+
+
+def test_bulk_batch_bumps_once(db, locations):
+    before = version(db)
+    rows = [{
+        "_row": i, "citizen_id": None, "department": None, "message": f"Bulk data version row {i}",
+        "urgency": None, "current_status": "PENDING", "date_submitted": datetime.now(timezone.utc), "ward_id": 1,
+    } for i in range(3)]
+    with statements() as seen:
+        inserted, _ = complaint_ingest.write_batch(db, rows, [])
+
+    assert inserted == 3
+    assert version(db) == before + 1
+    assert sum(1 for s in seen if s.startswith("UPDATE data_versions")) == 1
+    db.query(models.Complaint).filter(models.Complaint.message.like("Bulk data version row %")).delete(synchronize_session=False)
+    db.commit()
@@ -0,0 +1,123 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.models.duplicate import ComplaintSignature
+from app.services import duplicate_detector as dd
+
+MESSAGE = "Drinking water has not come to our tole for three days, the main pipe near the school is broken"
+
+
+def legacy_clean(text):
+    """The detector's private cleaner before it used text_normalization."""
+    text = re.sub(r'https?://\S+|www\.\S+', '', text or "")
+    text = re.sub(r'<.*?>', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.lower()
+
+
+@pytest.fixture
+def complaints(db, locations):
+    created = []
+
+    def _add(message, ward_id=1, hours_ago=1.0):
+        complaint = models.Complaint(
+            message=message, ward_id=ward_id, department="Infrastructure, Utilities & Natural Resources",
+            urgency="URGENT", date_submitted=datetime.now(timezone.utc) - timedelta(hours=hours_ago),
+        )
+        db.add(complaint)
+        db.commit()
+        created.append(complaint)
+        return complaint
+
+    yield _add
+    ids = [c.id for c in created]
+    db.query(ComplaintSignature).filter(ComplaintSignature.complaint_id.in_(ids)).delete(synchronize_session=False)
+    for complaint in created:
+        db.delete(complaint)
+    db.commit()
+
+
+@pytest.mark.parametrize("text", [
+    MESSAGE,
+    "  Road <b>blocked</b>\n\nby landslide   see https://example.com/photo  ",
+    "बाटो भत्किएको छ,\twww.example.org कृपया मर्मत गर्नुहोस्",
+    "",
+])
+def test_cleaning_matches_legacy(text):
+    # Signatures are hashed from the cleaned text, so stored ones stay comparable
+    assert dd.clean_text(text).lower() == legacy_clean(text)
+
+
+def test_backfill_signs_every_unsigned_complaint(db, complaints):
+    detector = dd.DuplicateDetector()
+    first = complaints(MESSAGE + " (backfill a)", hours_ago=3)
+    second = complaints(MESSAGE + " (backfill b)", hours_ago=2)
+    # Signed before the older one: an id/date watermark would skip `first` from now on
+    detector.record(db, second.id, second.ward_id, second.date_submitted, dd.signature(second.message), None)
+    db.commit()
+    detector.sync(db)
+
+    signed = db.get(ComplaintSignature, first.id)
+    assert signed is not None
+    assert first.id in detector.index.entries
+    detector.sync(db)
+    assert db.query(ComplaintSignature).filter(ComplaintSignature.complaint_id == first.id).count() == 1
+
+
+def test_sync_loads_signatures_written_elsewhere(db, complaints):
+    detector = dd.DuplicateDetector()
+    detector.sync(db)
+    other = complaints(MESSAGE + " (other worker)")
+    # What another worker's create_complaint leaves behind
+    db.add(ComplaintSignature(
+        complaint_id=other.id, ward_id=other.ward_id, date_submitted=other.date_submitted,
+        signature=dd.signature(other.message).astype("<u4").tobytes(), cluster_id=other.id,
+    ))
+    db.commit()
+    assert other.id not in detector.index.entries
+
+    detector.sync(db)
+    assert other.id in detector.index.entries
+
+
+def test_find_reads_only(db, complaints):
+    detector = dd.DuplicateDetector()
+    head = complaints(MESSAGE + " (find)")
+    detector.record(db, head.id, head.ward_id, head.date_submitted, dd.signature(head.message), None)
+    db.commit()
+    detector.sync(db)
+    unsigned = complaints("Streetlights on the ring road have been off for a week (find)")
+
+    match = detector.find(db, dd.signature(MESSAGE + " (find)!"), 1, datetime.now(timezone.utc))
+    assert match.complaint_id == head.id
+    assert match.urgency == "URGENT"
+    assert detector.find(db, dd.signature(MESSAGE), 2, datetime.now(timezone.utc)) is None
+    assert db.get(ComplaintSignature, unsigned.id) is None
+
+
+def test_create_complaint_reuses_duplicate_labels(client, db, locations, monkeypatch):
+    from app.routers import complaints as complaints_router
+
+    async def no_classifier(text):
+        raise AssertionError("classifier called for a duplicate")
+
+    monkeypatch.setattr(complaints_router, "predict_all", no_classifier)
+    first = client.post("/api/complaints/", json={
+        "message": MESSAGE + " (api)", "ward_id": 2,
+        "department": "Infrastructure, Utilities & Natural Resources", "urgency": "HIGHLY URGENT",
+    })
+    assert first.status_code == 200
+    second = client.post("/api/complaints/", json={"message": MESSAGE + " (api) please help", "ward_id": 2})
+    assert second.status_code == 200
+    assert second.json()["urgency"] == "HIGHLY URGENT"
+
+    db.expire_all()
+    row = db.get(ComplaintSignature, second.json()["id"])
+    assert row.cluster_id == first.json()["id"]
+    for body in (second.json(), first.json()):
+        db.query(ComplaintSignature).filter(ComplaintSignature.complaint_id == body["id"]).delete()
+        db.delete(db.get(models.Complaint, body["id"]))
+    db.commit()
@@ -0,0 +1,105 @@
+import json
+from datetime import datetime
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app import models
+from app.chatbot_api import create_access_token as create_citizen_token
+from app.schemas.complaint import MisclassifiedComplaintRead
+from app.utils.fast_json import ORJSONResponse, items_response, model_list_response, validate_list
+
+WATER = "Infrastructure, Utilities & Natural Resources"
+
+
+def test_orjson_response_matches_stdlib():
+    content = {"id": 1, 2: "non-str key", "scores": np.array([0.5, 0.25]), "nested": [{"ok": True, "none": None}]}
+    plain = dict(content, scores=[0.5, 0.25])
+    assert json.loads(ORJSONResponse(content).body) == json.loads(JSONResponse(plain).body)
+
+
+def test_list_responses_match_response_model(db, locations):
+    complaint = models.Complaint(message="Ward 1 tap is dry (fast json test)", ward_id=1, department=WATER, urgency="NORMAL")
+    db.add(complaint)
+    db.flush()
+    db.add_all([
+        models.MisclassifiedComplaint(complaint_id=complaint.id, model_predicted_urgency="URGENT",
+                                      correct_urgency="NORMAL"),
+        models.MisclassifiedComplaint(complaint_id=complaint.id, model_predicted_department=WATER, reviewed=True),
+    ])
+    db.commit()
+    rows = db.query(models.MisclassifiedComplaint).filter_by(complaint_id=complaint.id).all()
+
+    # The same rows through FastAPI's response_model pass, as the routes served them before
+    app = FastAPI()
+    app.get("/model", response_model=List[MisclassifiedComplaintRead])(lambda: rows)
+    app.get("/fast", response_model=List[MisclassifiedComplaintRead])(lambda: model_list_response(MisclassifiedComplaintRead, rows))
+
+    def amended():
+        items = validate_list(MisclassifiedComplaintRead, rows)
+        for item in items:
+            item.reviewed = not item.reviewed
+        return items_response(MisclassifiedComplaintRead, items)
+
+    app.get("/items", response_model=List[MisclassifiedComplaintRead])(amended)
+
+    with TestClient(app) as client:
+        expected = client.get("/model")
+        fast = client.get("/fast")
+        items = client.get("/items")
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json() == expected.json() and len(expected.json()) == 2
+    assert items.json() == [dict(row, reviewed=not row["reviewed"]) for row in expected.json()]
+
+    db.delete(complaint)
+    db.commit()
+
+
+def previous_user_complaint(complaint):
+    """The dict /auth/complaints built per ORM row before it selected columns."""
+    ward = complaint.ward
+    municipality = ward.municipality if ward else None
+    district = municipality.district if municipality else None
+    return {
+        "id": complaint.id,
+        "message": complaint.message or "",
+        "department": complaint.department or "",
+        "department_name": complaint.department or "Unknown",
+        "urgency": complaint.urgency or "",
+        "urgency_name": complaint.urgency or "NORMAL",
+        "current_status": complaint.current_status or "PENDING",
+        "status_name": complaint.current_status or "PENDING",
+        "created_at": complaint.created_at,
+        "ward_id": complaint.ward_id,
+        "ward_name": f"Ward {ward.ward_number}" if (ward and ward.ward_number) else "",
+        "ward_number": ward.ward_number if ward else None,
+        "municipality_id": municipality.id if municipality else None,
+        "municipality_name": municipality.name if municipality else None,
+        "district_id": district.id if district else None,
+        "district_name": district.name if district else None,
+    }
+
+
+def test_user_complaints_match_previous_rows(client, db, citizen):
+    located = models.Complaint(message="Ward 3 road has potholes (fast json test)", ward_id=3, citizen_id=citizen.id,
+                               department=WATER, urgency="URGENT")
+    unlocated = models.Complaint(message="No ward given (fast json test)", citizen_id=citizen.id)
+    db.add_all([located, unlocated])
+    db.commit()
+
+    headers = {"Authorization": f"Bearer {create_citizen_token(data={'sub': str(citizen.id)})}"}
+    got = client.get("/api/chatbot/auth/complaints", headers=headers).json()
+    expected = [previous_user_complaint(c) for c in sorted([located, unlocated], key=lambda c: c.created_at, reverse=True)]
+    for row in got:
+        row["created_at"] = datetime.fromisoformat(row["created_at"]).replace(tzinfo=None)
+    for row in expected:
+        row["created_at"] = row["created_at"].replace(tzinfo=None)
+    assert got == expected
+    assert {row["ward_id"] for row in got} == {3, None}
+
+    for complaint in (located, unlocated):
+        db.delete(complaint)
+    db.commit()
@@ -0,0 +1,24 @@
+def test_public_db_health_is_up_or_down_only(client):
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert response.json() == {"status": "up"}
+
+
+def test_db_health_reports_down(client, monkeypatch):
+    from app import main
+
+    def unreachable():
+        raise ConnectionError("connection refused by db.internal:5432")
+
+    monkeypatch.setattr(main.engine, "connect", unreachable)
+    response = client.get("/health/db")
+    assert response.status_code == 503
+    assert response.json() == {"status": "down"}
+
+
+def test_pool_details_require_admin(client, make_admin):
+    assert client.get("/health/db/pool").status_code in (401, 403)
+    _, headers = make_admin()
+    response = client.get("/health/db/pool", headers=headers)
+    assert response.status_code == 200
+    assert "sync" in response.json()
@@ -0,0 +1,85 @@
+import pytest
+
+from app.services.intent_engine import IntentEngine, intent_engine
+
+# Labelled messages: what the chatbot should route each one to
+CORPUS = [
+    ("hello", "greeting"),
+    ("Hi there", "greeting"),
+    ("namaste", "greeting"),
+    ("नमस्ते", "greeting"),
+    ("I want to file a complaint", "file_complaint"),
+    ("submit grievance", "file_complaint"),
+    ("there is a problem with the road", "file_complaint"),
+    ("बाटोमा समस्या छ", "file_complaint"),
+    ("उजुरी दर्ता गर्नु छ", "file_complaint"),
+    ("track 123", "check_status"),
+    ("check status of complaint 45", "check_status"),
+    ("where is my complaint", "check_status"),
+    ("मेरो उजुरीको स्थिति", "check_status"),
+    ("मेरो उजुरीहरू हेर्न", "list_complaints"),
+    ("show my complaints", "list_complaints"),
+    ("list all", "list_complaints"),
+    ("view all my grievances", "list_complaints"),
+    ("help", "help"),
+    ("what can you do", "help"),
+    ("मद्दत चाहियो", "help"),
+    ("this is about the water tank", "unknown"),
+    ("which office handles this", "unknown"),
+    ("tell me about Sambodhan", "unknown"),
+    # Inflections the substring matcher caught
+    ("any updates on 12?", "check_status"),
+    ("tracking my request", "check_status"),
+    ("I filed it yesterday", "file_complaint"),
+    ("I reported a broken pipe", "file_complaint"),
+    ("filing a grievance", "file_complaint"),
+    ("submitted twice", "file_complaint"),
+    ("issues with garbage collection", "file_complaint"),
+    ("so many problems", "file_complaint"),
+    ("greetings", "greeting"),
+    # Short keywords stay exact
+    ("his water tank", "unknown"),
+]
+
+
+def legacy_detect(message: str) -> str:
+    """detect_intent as it was in chatbot_api.py before the compiled matcher."""
+    message_lower = message.lower()
+    if any(word in message_lower for word in ["hello", "hi", "hey", "namaste", "greetings"]):
+        return "greeting"
+    if any(word in message_lower for word in ["file", "register", "submit", "complaint", "grievance", "problem", "issue", "report"]):
+        return "file_complaint"
+    if any(word in message_lower for word in ["status", "track", "check", "progress", "update", "where is", "my complaint"]):
+        return "check_status"
+    if any(word in message_lower for word in ["my complaints", "my grievances", "list", "show all", "view all"]):
+        return "list_complaints"
+    if any(word in message_lower for word in ["help", "support", "assist", "how", "what can you do", "guide"]):
+        return "help"
+    return "unknown"
+
+
+@pytest.mark.parametrize("message,intent", CORPUS)
+def test_detect(message, intent):
+    assert intent_engine.detect(message).intent == intent
+
+
+def test_more_accurate_than_substring_scan():
+    compiled = sum(intent_engine.detect(text).intent == label for text, label in CORPUS)
+    legacy = sum(legacy_detect(text) == label for text, label in CORPUS)
+    assert compiled == len(CORPUS)
+    assert legacy < compiled
+
+
+def test_match_span():
+    match = intent_engine.detect("Please help me track complaint 7")
+    assert match.intent == "check_status"
+    assert match.keyword == "track"
+    assert "Please help me track complaint 7"[slice(*match.span)] == "track"
+
+
+def test_priority_and_default():
+    engine = IntentEngine([("a", ["alpha"]), ("b", ["beta"])], default="none")
+    assert engine.detect("beta then alpha").intent == "a"
+    assert engine.detect("gamma").intent == "none"
+    assert engine.detect("").intent == "none"
+
@@ -0,0 +1,32 @@
+import pytest
+
+from app.models.location import District
+
+PATHS = ["/api/location/districts/", "/api/location/districts/1", "/api/location/municipalities/?district_id=1",
+         "/api/location/wards/3", "/api/location/location-ids?district=Achham"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_conditional_get(client, locations, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "public, max-age=300, must-revalidate"
+
+    again = client.get(path, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert (again.headers["ETag"], again.headers["Cache-Control"]) == (etag, first.headers["Cache-Control"])
+    assert client.get(path, headers={"If-None-Match": 'W/"stale"'}).headers["ETag"] == etag
+
+
+def test_location_change_moves_the_etag(client, db, locations):
+    etag = client.get("/api/location/districts/").headers["ETag"]
+    db.add(District(name="Doti"))
+    db.commit()
+
+    fresh = client.get("/api/location/districts/", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert "Doti" in [d["name"] for d in fresh.json()]
+    db.query(District).filter(District.name == "Doti").delete()
+    db.commit()
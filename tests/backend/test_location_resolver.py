@@ -0,0 +1,50 @@
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.services.location_resolver import admin_location_names, user_location_info
+from app.services.password_service import hash_password_blocking
+
+
+def test_user_location_info(db, locations):
+    assert user_location_info(db, 3) == {"ward_name": "Ward 1", "municipality_name": "Kathmandu Metropolitan", "district_name": "Kathmandu"}
+    assert user_location_info(db, None) == {}
+    assert user_location_info(db, 999) == {}
+
+
+def test_admin_names_in_two_queries(db, make_admin, locations):
+    admins = [make_admin("municipal_admin", municipality_id=m)[0] for m in (1, 2, 1)] + [make_admin("super_admin", district_id=2)[0]]
+    for admin in admins:
+        db.refresh(admin)  # committed by make_admin; load them before counting
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        names = admin_location_names(db, admins, own_district=True)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(statements) == 2
+    assert names[:2] == [
+        {"municipality_name": "Mangalsen", "district_name": "Achham"},
+        {"municipality_name": "Kathmandu Metropolitan", "district_name": "Kathmandu"},
+    ]
+    assert names[3] == {"district_name": "Kathmandu"}
+
+
+def test_own_district_name_only_at_login(client, db, make_admin, locations):
+    # Listing and detail name the district of the assigned municipality only, as before;
+    # login also names a super admin's own district.
+    admin, _ = make_admin("super_admin", district_id=1)
+    admin.password_hash = hash_password_blocking("admin-pass")
+    db.commit()
+
+    detail = client.get(f"/api/admins/{admin.id}").json()
+    listed = next(a for a in client.get("/api/admins/", params={"district_id": 1}).json() if a["id"] == admin.id)
+    assert detail["district_name"] is None and listed["district_name"] is None
+
+    login = client.post("/api/admins/login", json={"email": admin.email, "password": "admin-pass"})
+    assert login.status_code == 200
+    assert login.json()["admin"]["district_name"] == "Achham"
+
+    municipal, _ = make_admin("municipal_admin", municipality_id=1)
+    detail = client.get(f"/api/admins/{municipal.id}").json()
+    assert (detail["municipality_name"], detail["district_name"]) == ("Mangalsen", "Achham")
@@ -0,0 +1,44 @@
+import asyncio
+
+from app.services import password_service
+from app.services.password_service import hash_password, hash_password_blocking, pwd_context, verify_password, verify_password_blocking
+
+
+def test_blocking_hash_and_verify():
+    hashed = hash_password_blocking("s3cret-pass")
+    assert hashed.startswith("$argon2")
+    assert verify_password_blocking("s3cret-pass", hashed)
+    assert not verify_password_blocking("wrong-pass", hashed)
+    # Salted: hashing the same password again gives a different hash that also verifies
+    again = hash_password_blocking("s3cret-pass")
+    assert again != hashed and verify_password_blocking("s3cret-pass", again)
+
+
+def test_async_hash_and_verify():
+    async def run():
+        hashed = await hash_password("s3cret-pass")
+        return hashed, await verify_password("s3cret-pass", hashed), await verify_password("wrong-pass", hashed)
+
+    hashed, ok, wrong = asyncio.run(run())
+    assert ok and not wrong
+    assert verify_password_blocking("s3cret-pass", hashed)
+
+
+def test_hashes_from_weaker_params_still_verify_and_need_rehash():
+    current = hash_password_blocking("s3cret-pass")
+    weaker = pwd_context.handler("argon2").using(memory_cost=1024, rounds=1).hash("s3cret-pass")
+    assert not pwd_context.needs_update(current)
+    assert pwd_context.needs_update(weaker)
+    assert verify_password_blocking("s3cret-pass", weaker)
+
+    valid, rehashed = pwd_context.verify_and_update("s3cret-pass", weaker)
+    assert valid and rehashed and not pwd_context.needs_update(rehashed)
+    assert verify_password_blocking("s3cret-pass", rehashed)
+
+
+def test_blocking_calls_run_on_the_shared_pool(monkeypatch):
+    submitted = []
+    real_submit = password_service._executor.submit
+    monkeypatch.setattr(password_service._executor, "submit", lambda fn, *args: submitted.append(fn) or real_submit(fn, *args))
+    verify_password_blocking("s3cret-pass", hash_password_blocking("s3cret-pass"))
+    assert submitted == [pwd_context.hash, pwd_context.verify]
@@ -0,0 +1,148 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import models
+from app.core.database import SessionLocal
+from app.models.sla import ComplaintSlaFact, SlaRefreshState, SlaSummary
+from app.services import sla_service
+
+
+@pytest.fixture
+def resolved_complaint(db, locations):
+    submitted = datetime.now(timezone.utc) - timedelta(hours=10)
+    complaint = models.Complaint(
+        message="Drinking water supply cut for a week (sla test)", ward_id=1,
+        department="Infrastructure, Utilities & Natural Resources", urgency="URGENT",
+        current_status="RESOLVED", date_submitted=submitted,
+    )
+    db.add(complaint)
+    db.flush()
+    db.add_all([
+        models.ComplaintStatusHistory(complaint_id=complaint.id, status=1, changed_at=submitted + timedelta(hours=2)),
+        models.ComplaintStatusHistory(complaint_id=complaint.id, status=2, changed_at=submitted + timedelta(hours=6)),
+    ])
+    db.commit()
+    yield complaint
+    db.delete(complaint)
+    db.commit()
+
+
+def test_reads_never_refresh(client, db, resolved_complaint):
+    db.query(SlaRefreshState).delete()
+    db.commit()
+
+    assert client.get("/api/analytics/sla").status_code == 200
+    assert client.get("/api/analytics/performance").status_code == 200
+
+    db.expire_all()
+    assert db.get(SlaRefreshState, 1) is None
+    assert db.get(ComplaintSlaFact, resolved_complaint.id) is None
+
+
+def test_post_refresh_then_read(client, db, resolved_complaint):
+    response = client.post("/api/analytics/sla/refresh?full=true")
+    assert response.status_code == 200
+    assert response.json()["mode"] == "full"
+
+    fact = db.get(ComplaintSlaFact, resolved_complaint.id)
+    assert fact.first_action_seconds == pytest.approx(2 * 3600)
+    assert fact.resolution_seconds == pytest.approx(6 * 3600)
+    department = client.get("/api/analytics/sla?dimension=department").json()["data"]["department"]
+    assert department["Infrastructure, Utilities & Natural Resources"]["resolved"] >= 1
+
+
+def test_concurrent_refreshes_are_serialized(db, resolved_complaint):
+    errors, results = [], []
+
+    def run():
+        session = SessionLocal()
+        try:
+            results.append(sla_service.refresh(session, full=True))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=run) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == 6
+    db.expire_all()
+    assert db.query(SlaSummary).filter(SlaSummary.dimension == "all").count() == 1
+    assert db.query(SlaRefreshState).count() == 1
+
+
+def test_refresh_if_stale_skips_fresh_and_busy(db, resolved_complaint):
+    sla_service.refresh(db)
+    assert sla_service.refresh_if_stale(db, max_age_seconds=3600) is None
+    assert sla_service.refresh_if_stale(db, max_age_seconds=0) is not None
+
+    with sla_service._refresh_lock:
+        assert sla_service.refresh_if_stale(db, max_age_seconds=0) is None
+
+
+def summary_row(db, dimension, group_key):
+    db.expire_all()
+    return db.query(SlaSummary).filter(SlaSummary.dimension == dimension, SlaSummary.group_key == group_key).one_or_none()
+
+
+def test_deleted_complaint_leaves_the_summary(db, locations):
+    department = "Security & Law Enforcement"
+    complaint = models.Complaint(message="Streetlights out along the highway (sla delete test)", ward_id=3,
+                                 department=department, urgency="HIGHLY URGENT", current_status="IN PROCESS")
+    db.add(complaint)
+    db.flush()
+    db.add(models.ComplaintStatusHistory(complaint_id=complaint.id, status=1))
+    db.commit()
+    sla_service.refresh(db, full=True)
+    complaint_id = complaint.id
+    assert db.get(ComplaintSlaFact, complaint_id) is not None
+    before = summary_row(db, "department", department).complaints
+    all_before = summary_row(db, "all", "all").complaints
+
+    complaint = db.get(models.Complaint, complaint_id)
+    db.delete(complaint)
+    db.commit()
+    db.expire_all()
+    assert db.get(ComplaintSlaFact, complaint_id) is None
+    assert summary_row(db, "department", department).refreshed_at is None
+
+    assert sla_service.refresh(db)["mode"] == "incremental"
+    remaining = summary_row(db, "department", department)  # gone once its last complaint is
+    assert (remaining.complaints if remaining else 0) == before - 1
+    assert summary_row(db, "all", "all").complaints == all_before - 1
+    assert summary_row(db, "all", "all").refreshed_at is not None
+
+
+def test_incremental_refresh_applies_deltas_to_all(db, resolved_complaint):
+    sla_service.refresh(db, full=True)
+    percentiles_at = summary_row(db, "all", "all").refreshed_at
+
+    # Reopen the resolved complaint: one more history row, new fact values
+    db.add(models.ComplaintStatusHistory(complaint_id=resolved_complaint.id, status=1))
+    db.commit()
+    sla_service.refresh(db)
+
+    row = summary_row(db, "all", "all")
+    expected = sla_service._aggregate_python(db, "all", None)[0]
+    for column in ("complaints", "actioned", "resolved", "reopened", "avg_first_action_seconds", "avg_resolution_seconds"):
+        assert getattr(row, column) == pytest.approx(expected[column])
+    assert row.reopened >= 1
+    # The percentiles were not re-aggregated, and refreshed_at still dates them
+    assert row.refreshed_at == percentiles_at
+
+
+def test_stale_all_percentiles_are_reaggregated(db, resolved_complaint, monkeypatch):
+    sla_service.refresh(db, full=True)
+    percentiles_at = summary_row(db, "all", "all").refreshed_at
+    monkeypatch.setattr(sla_service, "SLA_ALL_PERCENTILES_MAX_AGE_SECONDS", 0)
+    db.add(models.ComplaintStatusHistory(complaint_id=resolved_complaint.id, status=2))
+    db.commit()
+    sla_service.refresh(db)
+    assert summary_row(db, "all", "all").refreshed_at > percentiles_at
@@ -0,0 +1,38 @@
+# tests/data_science/conftest.py
+"""
+The data science services are flat script directories (each is its own Docker build
+context), so their modules are imported by putting the directory on sys.path. The
+shared modules they import as top-level files come from src/common here; their copies
+in the service directories are checked against it.
+"""
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SERVICES_DIR = os.path.join(ROOT, "src", "services")
+sys.path.append(ROOT)  # the src.data_science package
+sys.path.insert(0, os.path.join(SERVICES_DIR, "prepare_dataset"))
+sys.path.insert(0, os.path.join(SERVICES_DIR, "retrain_model"))
+# Local stand-ins for deployed services (deployed_model_stub.py)
+sys.path.append(os.path.join(ROOT, "scripts"))
+sys.path.append(os.path.join(ROOT, "src", "common"))
+
+
+@pytest.fixture
+def complaints_engine(tmp_path):
+    """SQLite engine with the two tables the dataset queries read, empty."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'complaints.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE complaints (id INTEGER PRIMARY KEY, message TEXT, department TEXT, urgency TEXT)"))
+        conn.execute(text("""
+            CREATE TABLE misclassified_complaints (
+                id INTEGER PRIMARY KEY, complaint_id INTEGER, reviewed BOOLEAN,
+                model_predicted_department TEXT, correct_department TEXT,
+                model_predicted_urgency TEXT, correct_urgency TEXT,
+                created_at TIMESTAMP, reviewed_at TIMESTAMP, updated_at TIMESTAMP)
+        """))
+    yield engine
+    engine.dispose()
@@ -0,0 +1,76 @@
+import os
+
+from datasets import Dataset, DatasetDict
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+from dataset_cache import DatasetCache, source_fingerprint, tokenizer_config
+
+
+def make_tokenizer():
+    tokenizer = Tokenizer(models.WordLevel({"[UNK]": 0, "[PAD]": 1, "water": 2, "road": 3}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]")
+
+
+def snapshot(labels=(0, 1, 0)):
+    train = Dataset.from_dict({"grievance": ["no water", "road broken", "water leak"], "label": list(labels)})
+    return DatasetDict({"train": train, "test": train.select([0])})
+
+
+def stored(cache, dataset, sha="abc123"):
+    cache.save_snapshot("owner/urgency", "all", sha, dataset, {"dataset_splits": {s: len(d) for s, d in dataset.items()}})
+    return cache.load_snapshot("owner/urgency", "all", sha)
+
+
+def test_snapshot_round_trip_and_pruning(tmp_path):
+    cache = DatasetCache(str(tmp_path), keep=2)
+    assert cache.latest_sha("owner/urgency", "all") is None
+    dataset, metadata = stored(cache, snapshot())
+    assert dataset["train"]["grievance"] == ["no water", "road broken", "water leak"]
+    assert metadata["dataset_cache_entry"] == os.path.join("owner__urgency", "all", "abc123")
+
+    for sha in ("def456", "789abc"):
+        os.utime(cache.snapshot_dir("owner/urgency", "all", "abc123"), (0, 0))  # oldest
+        stored(cache, snapshot(), sha)
+    assert cache.latest_sha("owner/urgency", "all") == "789abc"
+    assert not cache.has_snapshot("owner/urgency", "all", "abc123")
+    assert cache.has_snapshot("owner/urgency", "all", "def456")
+
+
+def tokenized_dir(cache, metadata, split, tokenizer, source, max_length=16):
+    return cache.tokenized_dir(metadata, split, tokenizer_config(tokenizer, "toy", max_length), "grievance",
+                               source_fingerprint(source))
+
+
+def test_tokenized_split_hit(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    tokenizer = make_tokenizer()
+    dataset, metadata = stored(cache, snapshot())
+    path = tokenized_dir(cache, metadata, "train", tokenizer, dataset["train"])
+    assert path.startswith(str(tmp_path)) and cache.load_tokenized(path) is None
+
+    tokenized = dataset["train"].map(lambda batch: tokenizer(batch["grievance"], truncation=True, max_length=16),
+                                     batched=True).remove_columns("grievance")
+    cache.save_tokenized(path, tokenized)
+    # A rerun on the same snapshot finds it again
+    again, metadata = cache.load_snapshot("owner/urgency", "all", "abc123")
+    assert tokenized_dir(cache, metadata, "train", tokenizer, again["train"]) == path
+    hit = cache.load_tokenized(path)
+    assert hit["input_ids"] == [[0, 2], [3, 0], [2, 0]] and hit["label"] == [0, 1, 0]
+
+
+def test_tokenized_split_invalidation(tmp_path):
+    cache = DatasetCache(str(tmp_path))
+    tokenizer = make_tokenizer()
+    dataset, metadata = stored(cache, snapshot())
+    path = tokenized_dir(cache, metadata, "train", tokenizer, dataset["train"])
+
+    # Same number of rows, different labels: a length check alone would have reused the old split
+    relabelled, _ = stored(cache, snapshot(labels=(1, 1, 0)), sha="def456")
+    assert tokenized_dir(cache, metadata, "train", tokenizer, relabelled["train"]) != path
+    assert tokenized_dir(cache, metadata, "train", tokenizer, dataset["train"], max_length=8) != path
+    tokenizer.add_tokens(["leak"])
+    assert tokenized_dir(cache, metadata, "train", tokenizer, dataset["train"]) != path
+    # Outside the cache there is nothing to key on
+    assert cache.tokenized_dir({}, "train", {}, "grievance", "x") is None
@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import dataset_snapshots
+from dataset_snapshots import SPLITS, _stale_files, assign_splits, build_incremental_dataset, fetch_delta
+
+
+def test_split_is_a_pure_function_of_the_id():
+    ids = np.arange(1, 5001)
+    splits = assign_splits(ids)
+    # Same id, same split: in another order, in small batches, as other integer types
+    shuffled = np.random.default_rng(0).permutation(ids)
+    assert (assign_splits(shuffled) == splits[shuffled - 1]).all()
+    batched = np.concatenate([assign_splits(ids[i:i + 7]) for i in range(0, len(ids), 7)])
+    assert (batched == splits).all()
+    assert (assign_splits(pd.Series(ids, dtype="int64")) == splits).all()
+    assert (assign_splits([str(i) for i in ids]) == splits).all()
+
+
+def test_growing_dataset_never_moves_rows():
+    before = assign_splits(range(1, 1001))
+    after = assign_splits(range(1, 3001))
+    assert (after[:1000] == before).all()
+
+
+def test_pinned_assignments():
+    # Shards already on the Hub were split with these; a change here silently leaks eval/test into train
+    assert list(assign_splits([1, 2, 3, 4, 5])) == ["train", "train", "test", "train", "train"]
+
+
+def test_proportions_and_salt():
+    ids = range(1, 20001)
+    splits = assign_splits(ids)
+    for split, size in zip(SPLITS, (0.8, 0.1, 0.1)):
+        assert (splits == split).mean() == pytest.approx(size, abs=0.01)
+    assert set(assign_splits(ids, 0.6, 0.2, 0.2)) == set(SPLITS)
+    assert (assign_splits(ids, salt="other") != splits).mean() > 0.2
+
+
+def test_sizes_must_sum_to_one():
+    with pytest.raises(ValueError):
+        assign_splits([1, 2], train_size=0.8, val_size=0.2, test_size=0.1)
+
+
+URGENCY = ["NORMAL", "URGENT", "HIGHLY URGENT"]
+
+
+def add_complaints(engine, ids):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO complaints (id, message, department, urgency) VALUES (:id, :message, 'Dept', :urgency)"),
+                     [{"id": i, "message": f"street light {i} is broken", "urgency": URGENCY[i % 3]} for i in ids])
+
+
+def misclassify(engine, complaint_ids, updated_at, correct="HIGHLY URGENT"):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO misclassified_complaints (complaint_id, reviewed, model_predicted_urgency, correct_urgency, updated_at)
+            VALUES (:complaint_id, TRUE, 'NORMAL', :correct, :updated_at)
+        """), [{"complaint_id": i, "correct": correct, "updated_at": updated_at} for i in complaint_ids])
+
+
+def test_fetch_delta_only_returns_rows_past_the_watermark(complaints_engine):
+    add_complaints(complaints_engine, range(1, 41))
+    misclassify(complaints_engine, [1, 2, 3, 4], "2025-01-02 00:00:00")
+    df, watermark, n_mis = fetch_delta("urgency", complaints_engine, None)
+    assert n_mis == 4 and len(df) == 6
+    assert watermark == {"updated_at": "2025-01-02T00:00:00", "misclassified_id": 4, "complaint_id": 40}
+
+    add_complaints(complaints_engine, range(41, 61))
+    misclassify(complaints_engine, [50], "2025-01-02 00:00:00")  # same timestamp, later id
+    misclassify(complaints_engine, [51, 52], "2025-01-03 00:00:00")
+    df, next_watermark, n_mis = fetch_delta("urgency", complaints_engine, watermark)
+    correct = df[df["misclassified_id"].isna()]
+    assert sorted(df["misclassified_id"].dropna().astype(int)) == [5, 6, 7]
+    assert len(correct) == 1 and correct["complaint_id"].between(41, 60).all()
+    assert next_watermark == {"updated_at": "2025-01-03T00:00:00", "misclassified_id": 7, "complaint_id": 60}
+
+    # A later edit moves a misclassification past the watermark; manifests from before updated_at still work
+    with complaints_engine.begin() as conn:
+        conn.execute(text("UPDATE misclassified_complaints SET correct_urgency = 'URGENT', updated_at = '2025-01-04 00:00:00' WHERE id = 1"))
+    legacy = {"reviewed_at": next_watermark["updated_at"], "misclassified_id": 7, "complaint_id": 60}
+    df, _, n_mis = fetch_delta("urgency", complaints_engine, legacy)
+    assert n_mis == 1 and list(df["urgency"]) == ["URGENT"]
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_incremental_builds_append_shards(complaints_engine, tmp_path):
+    out = str(tmp_path / "dataset")
+    add_complaints(complaints_engine, range(1, 201))
+    misclassify(complaints_engine, range(1, 41), "2025-01-02 00:00:00")
+    first = build_incremental_dataset(complaints_engine, None, "owner/urgency", label_column="urgency", local_dir=out)
+    assert (first["status"], first["shard_id"], first["num_samples"]) == ("pushed", "000001", 60)
+
+    assert build_incremental_dataset(complaints_engine, None, "owner/urgency", label_column="urgency",
+                                     local_dir=out)["status"] == "no_new_data"
+
+    add_complaints(complaints_engine, range(201, 301))
+    misclassify(complaints_engine, range(201, 211), "2025-01-03 00:00:00")
+    second = build_incremental_dataset(complaints_engine, None, "owner/urgency", label_column="urgency", local_dir=out)
+    assert (second["shard_id"], second["delta_samples"], second["num_samples"]) == ("000002", 15, 75)
+
+    manifest = read_json(os.path.join(out, "manifest.json"))
+    assert [shard["shard_id"] for shard in manifest["shards"]] == ["000001", "000002"]
+    assert manifest["watermark"] == second["watermark"] == manifest["shards"][-1]["watermark"]
+    assert manifest["watermark"]["complaint_id"] == 300
+    assert sum(manifest["splits"].values()) == manifest["num_samples"] == 75
+    assert read_json(os.path.join(out, "dataset_metadata.json"))["watermark"] == manifest["watermark"]
+    shard = pd.concat(pd.read_parquet(os.path.join(out, path)) for path in manifest["shards"][1]["files"].values())
+    assert list(shard.columns) == ["complaint_id", "grievance", "label"]
+    assert shard["complaint_id"].between(201, 300).all()
+
+
+def test_full_rebuild_replaces_old_files(complaints_engine, tmp_path, monkeypatch):
+    out = str(tmp_path / "dataset")
+    # A dataset pushed before shards existed, then two shards
+    legacy = os.path.join(out, "data", "train-00000-of-00001.parquet")
+    os.makedirs(os.path.dirname(legacy))
+    open(legacy, "wb").close()
+    add_complaints(complaints_engine, range(1, 101))
+    for n, updated_at in enumerate(["2025-01-02 00:00:00", "2025-01-03 00:00:00"]):
+        misclassify(complaints_engine, range(1 + 20 * n, 21 + 20 * n), updated_at)
+        build_incremental_dataset(complaints_engine, None, "owner/urgency", label_column="urgency", local_dir=out)
+    assert not os.path.exists(legacy)  # the first incremental build replaces pre-shard files
+    assert {path.split("/")[2] for path in _stale_files("owner/urgency", None, out)} == {"000001", "000002"}
+
+    commits = []
+    commit = dataset_snapshots._commit
+    monkeypatch.setattr(dataset_snapshots, "_commit", lambda *args: commits.append(args) or commit(*args))
+    rebuilt = build_incremental_dataset(complaints_engine, None, "owner/urgency", label_column="urgency",
+                                        full_rebuild=True, local_dir=out)
+    assert (rebuilt["shard_id"], rebuilt["num_samples"]) == ("000001", 60)
+    # On the Hub deletes and adds go into one commit, so shard 000001 must not be deleted again
+    _, _, files, deletes, *_ = commits[0]
+    assert sorted(deletes) == [f"data/shards/000002/{split}.parquet" for split in ("eval", "test", "train")]
+    assert not set(deletes) & set(files)
+    assert sorted(_stale_files("owner/urgency", None, out)) == [f"data/shards/000001/{split}.parquet" for split in ("eval", "test", "train")]
+    assert sum(len(pd.read_parquet(os.path.join(out, "data/shards/000001", f"{split}.parquet"))) for split in SPLITS) == 60
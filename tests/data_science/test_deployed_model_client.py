@@ -0,0 +1,82 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from deployed_model_client import query_deployed_labels
+from deployed_model_stub import DEPARTMENT_LABELS, make_handler, serve, stub_label, stub_prediction
+
+TEXTS = [f"grievance {i}: the street light near the ward office is broken" for i in range(20)]
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def _serve(fail_rate=0.0, handler=None, path="/predict"):
+        if handler is None:
+            server = serve(0, latency=0.0, per_text=0.0, fail_rate=fail_rate, seed=1)
+        else:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("batch_size, max_workers", [(1, 1), (7, 4), (32, 2)])
+def test_labels_line_up_with_texts(stub, batch_size, max_workers):
+    labels, batches = query_deployed_labels(TEXTS, stub(), batch_size=batch_size, max_workers=max_workers)
+    assert labels == [stub_label(t) for t in TEXTS]
+    assert [b["size"] for b in batches] == [len(TEXTS[i:i + batch_size]) for i in range(0, len(TEXTS), batch_size)]
+    assert all(b["status"] == 200 and b["attempts"] == 1 and not b["split"] for b in batches)
+
+
+def test_invalid_texts_are_not_sent(stub):
+    texts = ["ok one", "", "   ", None, "ok two"]
+    labels, batches = query_deployed_labels(texts, stub(), batch_size=10)
+    assert labels == [stub_label("ok one"), None, None, None, stub_label("ok two")]
+    assert [b["size"] for b in batches] == [2]
+    assert query_deployed_labels(["", None], stub()) == ([None, None], [])
+
+
+def test_retries_server_errors(stub):
+    labels, batches = query_deployed_labels(TEXTS, stub(fail_rate=0.3), batch_size=5, max_retries=8, backoff=0.001)
+    assert labels == [stub_label(t) for t in TEXTS]
+    assert sum(b["attempts"] for b in batches) > len(batches)
+
+
+def test_unreachable_endpoint_gives_no_labels():
+    labels, batches = query_deployed_labels(TEXTS[:3], "http://127.0.0.1:1/predict", max_retries=1, backoff=0.001)
+    assert labels == [None, None, None]
+    assert batches[0]["status"] is None and batches[0]["attempts"] == 2
+
+
+def test_rejected_batch_is_retried_text_by_text(stub):
+    class Rejecting(make_handler(0.0, 0.0, 0.0, 0)):
+        # Rejects texts the client considers valid, as a stricter API validation would
+        def do_POST(self):
+            texts = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["text"]
+            texts = [texts] if isinstance(texts, str) else texts
+            if any("REJECT" in t for t in texts):
+                return self._reply(422, {"detail": "rejected"})
+            preds = [stub_prediction(t, self.path) for t in texts]
+            self._reply(200, preds[0] if len(preds) == 1 else preds)
+
+    texts = ["fine a", "REJECT me", "fine b", "fine c"]
+    labels, batches = query_deployed_labels(texts, stub(handler=Rejecting), batch_size=4, max_workers=1)
+    assert labels == [stub_label("fine a"), None, stub_label("fine b"), stub_label("fine c")]
+    assert batches[0]["split"] and batches[0]["status"] == 422
+    assert batches[0]["attempts"] == 1 + len(texts)
+    assert batches[0]["ok"] == 3
+
+
+def test_multitask_response_key(stub):
+    labels, _ = query_deployed_labels(TEXTS[:10], stub(path="/predict_all"), batch_size=4, response_key="department")
+    assert labels == [stub_label(t, DEPARTMENT_LABELS) for t in TEXTS[:10]]
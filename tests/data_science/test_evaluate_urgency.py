@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+from src.data_science.evaluation.evaluate_urgency import stepwise_metrics
+
+
+def sklearn_metrics(y_true, y_pred):
+    """What the step-wise curves used to recompute from the label prefixes."""
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "macro_f1": f1_score(y_true, y_pred, average="macro", zero_division=0),
+        "precision": precision_score(y_true, y_pred, average="macro", zero_division=0),
+        "recall": recall_score(y_true, y_pred, average="macro", zero_division=0),
+    }
+
+
+def running_metrics(y_true, y_pred, num_labels=3):
+    """stepwise_metrics after every sample, as evaluate_model updates its confusion matrix."""
+    cm = np.zeros((num_labels, num_labels), dtype=np.int64)
+    for t, p in zip(y_true, y_pred):
+        cm[t, p] += 1
+        yield stepwise_metrics(cm)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_sklearn_on_every_prefix(seed):
+    rng = np.random.default_rng(seed)
+    y_true = rng.choice(3, size=120, p=[0.6, 0.3, 0.1])
+    # Mostly right, with some labels predicted that are absent from y_true so far
+    y_pred = np.where(rng.random(120) < 0.7, y_true, rng.integers(0, 3, size=120))
+    for n, got in enumerate(running_metrics(y_true, y_pred), start=1):
+        expected = sklearn_metrics(y_true[:n], y_pred[:n])
+        assert got == pytest.approx(expected), f"prefix of {n}"
+
+
+@pytest.mark.parametrize("y_true, y_pred", [
+    ([0], [0]),
+    ([0], [2]),  # a label only predicted still counts in the macro average
+    ([1, 1, 1], [1, 1, 1]),
+    ([0, 1, 2], [2, 0, 1]),
+    ([2, 2, 0, 0], [2, 2, 2, 2]),
+])
+def test_matches_sklearn_on_edge_cases(y_true, y_pred):
+    got = list(running_metrics(y_true, y_pred))[-1]
+    assert got == pytest.approx(sklearn_metrics(y_true, y_pred))
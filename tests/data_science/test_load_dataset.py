@@ -0,0 +1,91 @@
+import os
+
+import pandas as pd
+import pytest
+from datasets import Dataset
+
+from load_dataset import _latest_per_complaint, load_sharded_dataset, select_shards, warm_start_train_split
+
+
+def test_latest_per_complaint_keeps_the_newest_row():
+    split = Dataset.from_dict({"complaint_id": [1, 2, 1, 3, 2], "label": [0, 0, 1, 0, 2]})
+    latest = _latest_per_complaint(split)
+    assert latest["complaint_id"] == [1, 3, 2] and latest["label"] == [1, 0, 2]
+    unique = Dataset.from_dict({"complaint_id": [1, 2], "label": [0, 1]})
+    assert _latest_per_complaint(unique) is unique
+
+
+def write_shards(root, shards):
+    """manifest for `shards` ({shard_id: {split: [(complaint_id, label)]}}) written as Parquet under `root`."""
+    manifest = {"shards": []}
+    for shard_id, splits in shards.items():
+        files = {}
+        for split, rows in splits.items():
+            path = f"data/shards/{shard_id}/{split}.parquet"
+            os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+            pd.DataFrame({"complaint_id": [cid for cid, _ in rows], "grievance": [f"complaint {cid}" for cid, _ in rows],
+                          "label": [label for _, label in rows]}).to_parquet(os.path.join(root, path), index=False)
+            files[split] = path
+        manifest["shards"].append({"shard_id": shard_id, "version_tag": f"v{shard_id}", "files": files})
+    return manifest
+
+
+def test_sharded_dataset_union_and_latest(tmp_path):
+    root = str(tmp_path)
+    manifest = write_shards(root, {
+        "000001": {"train": [(1, 0), (2, 1)], "test": [(3, 0)]},
+        "000002": {"train": [(1, 2), (4, 1)], "test": [(5, 1)]},  # complaint 1 was re-labelled
+    })
+    union = load_sharded_dataset(root, None, manifest, shards="all")
+    assert sorted(zip(union["train"]["grievance"], union["train"]["label"])) == [
+        ("complaint 1", 2), ("complaint 2", 1), ("complaint 4", 1)]
+    assert "complaint_id" not in union["train"].column_names and len(union["test"]) == 2
+
+    latest = load_sharded_dataset(root, None, manifest, shards="latest")
+    assert latest["train"]["grievance"] == ["complaint 1", "complaint 4"]
+
+
+@pytest.mark.parametrize("shards, expected", [
+    ("all", ["000001", "000002", "000003"]),
+    ("latest", ["000003"]),
+    ("after-v000001", ["000002", "000003"]),
+    ("after-v000003", []),
+    ("after-v999999", ["000001", "000002", "000003"]),  # rebuilt since: every shard is new
+])
+def test_select_shards(shards, expected):
+    manifest = {"shards": [{"shard_id": sid, "version_tag": f"v{sid}"} for sid in ("000001", "000002", "000003")]}
+    assert [shard["shard_id"] for shard in select_shards(manifest, shards)] == expected
+
+
+def test_select_shards_rejects_unknown_selectors():
+    with pytest.raises(ValueError):
+        select_shards({"shards": []}, "newest")
+
+
+def test_shards_after_a_version_are_deduplicated(tmp_path):
+    root = str(tmp_path)
+    manifest = write_shards(root, {
+        "000001": {"train": [(1, 0), (2, 1)]},
+        "000002": {"train": [(3, 0), (4, 1)]},
+        "000003": {"train": [(3, 2), (5, 0)]},  # complaint 3 was re-labelled again
+    })
+    delta = load_sharded_dataset(root, None, manifest, shards="after-v000001")
+    assert sorted(zip(delta["train"]["grievance"], delta["train"]["label"])) == [
+        ("complaint 3", 2), ("complaint 4", 1), ("complaint 5", 0)]
+    with pytest.raises(ValueError):
+        load_sharded_dataset(root, None, manifest, shards="after-v000003")
+
+
+def texts(n, start=0):
+    return Dataset.from_dict({"grievance": [f"complaint {i}" for i in range(start, start + n)], "label": [i % 3 for i in range(n)]})
+
+
+@pytest.mark.parametrize("ratio, replay_rows", [(1.0, 4), (0.5, 2), (0.0, 0), (10.0, 6)])
+def test_warm_start_train_split_replays_older_rows(ratio, replay_rows):
+    full, delta = texts(10), texts(4, start=6)
+    train = warm_start_train_split(full, delta, replay_ratio=ratio)
+    assert len(train) == 4 + replay_rows  # capped by the 6 older rows
+    assert train["grievance"][:4] == delta["grievance"]
+    replay = train["grievance"][4:]
+    assert len(set(replay)) == replay_rows and not set(replay) & set(delta["grievance"])
+    assert warm_start_train_split(full, delta, replay_ratio=ratio)["grievance"] == train["grievance"]
@@ -0,0 +1,91 @@
+import math
+
+import pytest
+import torch
+from torch import nn
+from transformers import BertConfig, BertForSequenceClassification, TrainingArguments
+
+from model_pipeline import DistillationTrainer, GrievanceClassifier
+
+STUDENT = [[2.0, 0.5, -1.0], [0.0, 1.0, 0.0]]
+TEACHER = [[3.0, 0.0, -2.0], [0.5, 0.5, 1.0]]
+LABELS = [0, 2]
+
+
+class FixedLogits(nn.Module):
+    """Student whose logits are STUDENT plus a trainable offset (zero), ignoring its inputs."""
+
+    def __init__(self):
+        super().__init__()
+        self.offset = nn.Parameter(torch.zeros(3))
+
+    def forward(self, input_ids=None, labels=None):
+        return {"logits": torch.tensor(STUDENT) + self.offset}
+
+
+def softmax(row, t=1.0):
+    exps = [math.exp(x / t) for x in row]
+    return [e / sum(exps) for e in exps]
+
+
+def focal(gamma=2.0, alpha=0.25):
+    losses = []
+    for row, label in zip(STUDENT, LABELS):
+        pt = softmax(row)[label]
+        losses.append(alpha * (1 - pt) ** gamma * -math.log(pt))
+    return sum(losses) / len(losses)
+
+
+def kl(t):
+    total = 0.0
+    for student, teacher in zip(STUDENT, TEACHER):
+        p, q = softmax(teacher, t), softmax(student, t)
+        total += sum(pi * math.log(pi / qi) for pi, qi in zip(p, q))
+    return total / len(STUDENT)
+
+
+@pytest.fixture
+def trainer(tmp_path):
+    def make(alpha, temperature):
+        args = TrainingArguments(output_dir=str(tmp_path), report_to=[], use_cpu=True)
+        return DistillationTrainer(alpha=alpha, temperature=temperature, model=FixedLogits(), args=args)
+    return make
+
+
+@pytest.mark.parametrize("alpha, temperature", [(0.5, 2.0), (0.3, 4.0), (1.0, 1.0)])
+def test_loss_mixes_kl_and_focal(trainer, alpha, temperature):
+    distiller = trainer(alpha, temperature)
+    teacher = torch.tensor(TEACHER, requires_grad=True)
+    inputs = {"input_ids": torch.zeros(2, 1, dtype=torch.long), "labels": torch.tensor(LABELS), "teacher_logits": teacher}
+    loss = distiller.compute_loss(distiller.model, inputs)
+
+    expected = alpha * temperature ** 2 * kl(temperature) + (1 - alpha) * focal()
+    assert loss.item() == pytest.approx(expected, rel=1e-5)
+    assert "teacher_logits" not in inputs  # popped before the model call
+
+    loss.backward()
+    assert teacher.grad is None
+    assert distiller.model.offset.grad is not None and distiller.model.offset.grad.abs().sum() > 0
+
+
+def test_batches_without_teacher_use_focal_only(trainer):
+    distiller = trainer(0.5, 2.0)
+    inputs = {"input_ids": torch.zeros(2, 1, dtype=torch.long), "labels": torch.tensor(LABELS)}
+    loss, outputs = distiller.compute_loss(distiller.model, inputs, return_outputs=True)
+    assert loss.item() == pytest.approx(focal(), rel=1e-5)
+    assert outputs["logits"].tolist() == STUDENT
+
+
+@pytest.mark.parametrize("num_layers", [0, 1, 2])
+def test_freeze_layers(num_layers):
+    classifier = GrievanceClassifier.__new__(GrievanceClassifier)
+    classifier.model = BertForSequenceClassification(BertConfig(
+        vocab_size=10, hidden_size=8, num_hidden_layers=3, num_attention_heads=2, intermediate_size=16, num_labels=3))
+    trainable = classifier.freeze_layers(num_layers)
+
+    frozen_prefixes = ["bert.embeddings."] * bool(num_layers) + [f"bert.encoder.layer.{i}." for i in range(num_layers)]
+    for name, param in classifier.model.named_parameters():
+        assert param.requires_grad != any(name.startswith(prefix) for prefix in frozen_prefixes), name
+    assert trainable == sum(p.numel() for p in classifier.model.parameters() if p.requires_grad)
+    with pytest.raises(ValueError):
+        classifier.freeze_layers(4)
@@ -0,0 +1,102 @@
+import filecmp
+import os
+
+import numpy as np
+import pytest
+import torch
+import torch.nn.functional as F
+from datasets import Dataset, DatasetDict
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import BertConfig, BertModel, PreTrainedTokenizerFast
+
+import multitask_pipeline
+from multitask_model import IGNORE_INDEX, MultiTaskClassifier
+from vendor_shared_modules import COMMON_DIR, SERVICES_DIR, SHARED_MODULES
+
+TASKS = {"urgency": {0: "NORMAL", 1: "URGENT", 2: "HIGHLY URGENT"}, "department": {0: "A", 1: "B", 2: "C", 3: "D"}}
+VOCAB = {"[UNK]": 0, "[PAD]": 1, "[CLS]": 2, "water": 3, "road": 4, "fire": 5}
+
+
+def tiny_encoder():
+    torch.manual_seed(0)
+    return BertModel(BertConfig(vocab_size=len(VOCAB), hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+                                intermediate_size=16))
+
+
+def tiny_tokenizer():
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]", model_max_length=16)
+
+
+@pytest.mark.parametrize("service", [s for s, modules in SHARED_MODULES.items() if "multitask_model.py" in modules])
+def test_service_copies_match(service):
+    # Spaces are built from their own directory; run scripts/vendor_shared_modules.py after editing src/common
+    copy = os.path.join(SERVICES_DIR, service, "multitask_model.py")
+    assert filecmp.cmp(os.path.join(COMMON_DIR, "multitask_model.py"), copy, shallow=False)
+
+
+def test_forward_sums_the_labelled_task_losses():
+    model = MultiTaskClassifier(tiny_encoder(), TASKS, dropout=0.0).eval()
+    input_ids = torch.tensor([[2, 3, 4], [2, 5, 1], [2, 4, 4]])
+    urgency = torch.tensor([1, IGNORE_INDEX, 2])
+    department = torch.tensor([IGNORE_INDEX, 3, IGNORE_INDEX])
+
+    out = model(input_ids=input_ids, labels_urgency=urgency, labels_department=department)
+    assert out["logits_urgency"].shape == (3, 3) and out["logits_department"].shape == (3, 4)
+    expected = (F.cross_entropy(out["logits_urgency"][[0, 2]], urgency[[0, 2]])
+                + F.cross_entropy(out["logits_department"][[1]], department[[1]]))
+    assert out["loss"].item() == pytest.approx(expected.item(), rel=1e-6)
+
+    # A task with no labelled rows adds nothing, and its head gets no gradient
+    only_urgency = model(input_ids=input_ids, labels_urgency=urgency,
+                         labels_department=torch.full((3,), IGNORE_INDEX))
+    assert only_urgency["loss"].item() == pytest.approx(F.cross_entropy(out["logits_urgency"][[0, 2]], urgency[[0, 2]]).item())
+    only_urgency["loss"].backward()
+    assert model.heads["department"].weight.grad is None
+    assert model.heads["urgency"].weight.grad.abs().sum() > 0
+    assert "loss" not in model(input_ids=input_ids)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    model = MultiTaskClassifier(tiny_encoder(), TASKS).eval()
+    model.save_pretrained(str(tmp_path))
+    loaded = MultiTaskClassifier.from_pretrained(str(tmp_path)).eval()
+    assert loaded.tasks == TASKS
+    input_ids = torch.tensor([[2, 3, 5]])
+    for task in TASKS:
+        assert torch.allclose(model(input_ids=input_ids)[f"logits_{task}"], loaded(input_ids=input_ids)[f"logits_{task}"])
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(multitask_pipeline.wandb, "login", lambda **kwargs: True)
+    monkeypatch.setattr(multitask_pipeline.AutoTokenizer, "from_pretrained", lambda *args, **kwargs: tiny_tokenizer())
+    monkeypatch.setattr(multitask_pipeline.AutoModel, "from_pretrained", lambda *args, **kwargs: tiny_encoder())
+    return multitask_pipeline.MultiTaskGrievanceClassifier("tiny", TASKS, hf_token=None, wandb_api_key="x",
+                                                          wandb_project_name="test")
+
+
+def per_task(rows):
+    return DatasetDict({split: Dataset.from_dict({"grievance": [text for text, _ in rows], "label": [label for _, label in rows]})
+                        for split in ("train", "eval", "test")})
+
+
+def test_pipeline_trains_the_union_of_both_datasets(classifier):
+    dataset = classifier.build_dataset({
+        "urgency": per_task([("water", 1), ("fire", 2)]),
+        "department": per_task([("road", 3)]),
+    })
+    train = dataset["train"]
+    assert train["labels_urgency"] == [1, 2, IGNORE_INDEX]
+    assert train["labels_department"] == [IGNORE_INDEX, IGNORE_INDEX, 3]
+
+    tokenized = classifier.tokenize_dataset(train)
+    batch = classifier.tokenizer.pad([{"input_ids": ids} for ids in tokenized["input_ids"]], return_tensors="pt")
+    out = classifier.model(**batch, **{name: torch.tensor(tokenized[name]) for name in classifier.label_names})
+    assert out["loss"].requires_grad and out["loss"].item() > 0
+
+    logits = (np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.0]]), np.eye(4)[[0, 0, 3]])
+    metrics = classifier.compute_metrics((logits, (np.array(train["labels_urgency"]), np.array(train["labels_department"]))))
+    assert metrics["urgency_accuracy"] == 1.0 and metrics["department_accuracy"] == 1.0
+    assert metrics["f1_macro"] == 1.0
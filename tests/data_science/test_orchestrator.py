@@ -0,0 +1,20 @@
+from sqlalchemy import text
+
+from orchestrator.orchestrator import compute_dataset_len
+
+
+def test_dataset_len_counts_only_rows_past_the_watermark(complaints_engine):
+    rows = [(1, "NORMAL", "URGENT", "2025-01-02 00:00:00"), (2, "NORMAL", "URGENT", "2025-01-03 00:00:00"),
+            (3, "URGENT", "URGENT", "2025-01-04 00:00:00"), (4, "NORMAL", "URGENT", "2025-01-04 00:00:00")]
+    with complaints_engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO misclassified_complaints (id, complaint_id, reviewed, model_predicted_urgency, correct_urgency, updated_at)
+            VALUES (:id, :id, TRUE, :predicted, :correct, :updated_at)
+        """), [{"id": i, "predicted": p, "correct": c, "updated_at": at} for i, p, c, at in rows])
+
+    assert compute_dataset_len("urgency", complaints_engine) == (4, 3, 1)
+    watermark = {"updated_at": "2025-01-03T00:00:00", "misclassified_id": 2, "complaint_id": 4}
+    assert compute_dataset_len("urgency", complaints_engine, watermark) == (1, 1, 0)
+    # Manifests written before updated_at existed call the timestamp reviewed_at
+    legacy = {"reviewed_at": "2025-01-02T00:00:00", "misclassified_id": 1, "complaint_id": 4}
+    assert compute_dataset_len("urgency", complaints_engine, legacy)[1] == 2
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from prepare_pd_df import COLUMNS, fetch_misclassified_dataframe, iter_misclassified_dataframe
+
+URGENCY = ["NORMAL", "URGENT", "HIGHLY URGENT"]
+N_COMPLAINTS = 400
+MISCLASSIFIED = range(10, 400, 13)  # 30 complaints reviewed with a different urgency
+
+
+def add_complaints(engine, ids):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO complaints (id, message, department, urgency) VALUES (:id, :message, 'Dept', :urgency)"),
+                     [{"id": i, "message": f"complaint {i}", "urgency": URGENCY[i % 3]} for i in ids])
+
+
+@pytest.fixture
+def engine(complaints_engine):
+    engine = complaints_engine
+    add_complaints(engine, range(1, N_COMPLAINTS + 1))
+    rows = [{"complaint_id": i, "reviewed": True, "predicted": URGENCY[i % 3], "correct": URGENCY[(i + 1) % 3]}
+            for i in MISCLASSIFIED]
+    # Unreviewed, and reviewed but confirmed: neither is a training row, and neither is sampled as correct
+    rows += [{"complaint_id": 3, "reviewed": False, "predicted": "NORMAL", "correct": "URGENT"},
+             {"complaint_id": 5, "reviewed": True, "predicted": "URGENT", "correct": "URGENT"}]
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO misclassified_complaints
+                (complaint_id, reviewed, model_predicted_urgency, correct_urgency, created_at, reviewed_at, updated_at)
+            VALUES (:complaint_id, :reviewed, :predicted, :correct, '2025-01-01 00:00:00', '2025-01-02 00:00:00', '2025-01-02 00:00:00')
+        """), rows)
+    return engine
+
+
+def sample(engine, **kwargs):
+    chunks = list(iter_misclassified_dataframe("urgency", engine, sample_method="hash", **kwargs))
+    df = pd.concat(chunks, ignore_index=True)
+    misclassified = df[df["misclassified_id"].notna()]
+    return misclassified, df[df["misclassified_id"].isna()]
+
+
+def test_keeps_every_misclassified_row(engine):
+    misclassified, correct = sample(engine)
+    assert sorted(misclassified["complaint_id"]) == list(MISCLASSIFIED)
+    assert (misclassified["urgency"] == [URGENCY[(i + 1) % 3] for i in misclassified["complaint_id"]]).all()
+    # Correct records come from complaints without any misclassification report
+    assert not set(correct["complaint_id"]) & (set(MISCLASSIFIED) | {3, 5})
+
+
+@pytest.mark.parametrize("ratio", [0.5, 1.0, 2.0])
+def test_samples_the_requested_ratio(engine, ratio):
+    misclassified, correct = sample(engine, correct_ratio=ratio)
+    assert len(correct) == int(len(MISCLASSIFIED) * ratio)
+    assert correct["complaint_id"].is_unique
+
+
+def test_hash_sample_is_deterministic(engine):
+    _, first = sample(engine)
+    _, again = sample(engine)
+    _, chunked = sample(engine, chunksize=4)
+    assert list(first["complaint_id"]) == list(again["complaint_id"]) == list(chunked["complaint_id"])
+    _, other_seed = sample(engine, random_state=7)
+    assert set(other_seed["complaint_id"]) != set(first["complaint_id"])
+
+
+def test_new_complaints_never_reshuffle_existing_ones(engine):
+    _, before = sample(engine)
+    add_complaints(engine, range(N_COMPLAINTS + 1, 2 * N_COMPLAINTS + 1))
+    _, after = sample(engine)
+    kept = set(after["complaint_id"]) & set(range(1, N_COMPLAINTS + 1))
+    assert kept <= set(before["complaint_id"])
+
+
+def test_id_range_bounds_the_correct_sample(engine):
+    since = {"updated_at": "2025-01-01 00:00:00", "misclassified_id": 0, "complaint_id": 100}
+    misclassified, correct = sample(engine, since=since, max_complaint_id=200, correct_ratio=0.5)
+    assert len(misclassified) == len(MISCLASSIFIED)
+    assert correct["complaint_id"].between(101, 200).all() and len(correct) == 15
+
+
+def test_tablesample_falls_back_to_hash_off_postgres(engine):
+    _, hashed = sample(engine)
+    df = fetch_misclassified_dataframe("urgency", engine, sample_method="tablesample")
+    assert list(df.columns) == COLUMNS
+    assert list(df["grievance"].iloc[len(MISCLASSIFIED):]) == [f"complaint {i}" for i in hashed["complaint_id"]]
+    with pytest.raises(ValueError):
+        fetch_misclassified_dataframe("urgency", engine, sample_method="reservoir")
@@ -0,0 +1,97 @@
+import filecmp
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import text_normalization as tn
+from vendor_shared_modules import COMMON_DIR, SERVICES_DIR, SHARED_MODULES
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "plain text",
+    "  leading and trailing  ",
+    "tabs\tand\nnew\r\nlines",
+    "non breaking spaces　here and\u0085there too",
+    "<b>bold</b> and <i>italic</i>",
+    "<a href=http://example.com>link</a>",
+    "<a href='https://example.com/x?y=1'>link</a> text",
+    "visit www.example.com now",
+    "http://a.b/c<br>next",
+    "multi\nline <tag\nspanning> lines",
+    "mail me at someone@example.com please",
+    "foo@http://x.y",
+    "emoji 😀 and symbols € ™ ✓",
+    "नमस्ते, हाम्रो टोलमा पानी छैन। कृपया छिटो मद्दत गर्नुहोस्!",
+    "mixed नेपाली and English (with punctuation): yes; no? \"quoted\" 'single' - dash",
+    "१२३ devanagari digits ॐ",
+    "​zero‌width‍joiners",
+    "x ᠎ mongolian vowel separator",
+    "<<nested>> <unclosed",
+    "www.a.com www.b.com http://c.com",
+    "Drinking water has not come to our tole for three days, the main pipe near the school is broken",
+]
+
+
+def legacy_clean_text(text):
+    """clean_text as it was in prepare_dataset, the classifier APIs and data_science."""
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)  # Remove URLs
+    text = re.sub(r'<.*?>', '', text)  # Remove HTML tags
+    text = re.sub(r'\n', ' ', text)  # Replace newlines with space
+    text = re.sub(r'\s+', ' ', text).strip()  # Reduce multiple spaces
+    return text
+
+
+def legacy_clean_nepali_text(text):
+    """clean_nepali_text as it was in data_prep.py."""
+    if pd.isna(text):
+        return ""
+    text = str(text)
+    text = re.sub(r'http\S+|www\S+', '', text)
+    text = re.sub(r'\S+@\S+', '', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^A-Za-z0-9ऀ-ॿ\s.,!?;:()\"\'-]', '', text)
+    return text.strip()
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_clean_text_matches_legacy(text):
+    assert tn.clean_text(text) == legacy_clean_text(text)
+
+
+@pytest.mark.parametrize("text", EDGE_CASES + [None, np.nan, 12345])
+def test_clean_nepali_text_matches_legacy(text):
+    assert tn.clean_nepali_text(text) == legacy_clean_nepali_text(text)
+
+
+@pytest.mark.parametrize("arrow", [True, False], ids=["pyarrow", "python"])
+def test_batch_and_series_forms_match_legacy(arrow, monkeypatch):
+    if arrow and tn.ARROW_STRING is None:
+        pytest.skip("pyarrow not installed")
+    if not arrow:
+        monkeypatch.setattr(tn, "ARROW_STRING", None)
+    texts = pd.Series(EDGE_CASES)
+    expected = [legacy_clean_text(t) for t in EDGE_CASES]
+    assert tn.clean_text_batch(EDGE_CASES) == expected
+    assert tn.clean_text_series(texts).tolist() == expected
+
+    with_missing = pd.Series(EDGE_CASES + [None, np.nan, 12345], dtype=object)
+    expected = [legacy_clean_nepali_text(t) for t in with_missing]
+    assert tn.clean_nepali_text_batch(with_missing) == expected
+    assert tn.clean_nepali_text_series(with_missing).tolist() == expected
+
+
+def test_clean_text_series_keeps_missing_values():
+    cleaned = tn.clean_text_series(pd.Series([" a ", None]))
+    assert cleaned.dtype == object
+    assert cleaned.isna().tolist() == [False, True]
+
+
+@pytest.mark.parametrize("service", [s for s, modules in SHARED_MODULES.items() if "text_normalization.py" in modules])
+def test_service_copies_match(service):
+    # Spaces are built from their own directory; run scripts/vendor_shared_modules.py after editing src/common
+    copy = os.path.join(SERVICES_DIR, service, "text_normalization.py")
+    assert filecmp.cmp(os.path.join(COMMON_DIR, "text_normalization.py"), copy, shallow=False)
@@ -0,0 +1,60 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from datasets import Dataset
+
+import train_model
+
+REPO = "org/urgency-dataset"
+
+
+def configs():
+    return SimpleNamespace(hub_model_id="org/urgency-model", hf_token=None, dataset_repo_id=REPO,
+                           dataset_offline=False, warm_start_replay_ratio=1.0)
+
+
+def texts(ids):
+    return Dataset.from_dict({"grievance": [f"complaint {i}" for i in ids], "label": [0] * len(ids)})
+
+
+@pytest.fixture
+def hub(monkeypatch, tmp_path):
+    """Deployed model metadata and the shard selections load_warm_start_train asks for."""
+    state = {"trained_on": None, "requested": []}
+
+    def download(repo_id, filename, token=None):
+        path = tmp_path / filename
+        path.write_text(json.dumps({"model_name": repo_id, "dataset_metadata": state["trained_on"]}))
+        return str(path)
+
+    def load(model_repo, hf_token, shards, cache, offline):
+        state["requested"].append(shards)
+        return {"dataset": {"train": texts([8, 9])}, "metadata": {"dataset_version_tag": "v3"}}
+
+    monkeypatch.setattr(train_model, "hf_hub_download", download)
+    monkeypatch.setattr(train_model, "load_dataset_from_hub", load)
+    return state
+
+
+SHARDED = {"dataset_repo_id": REPO, "dataset_shards": "all", "dataset_version_tag": "v3"}
+
+
+@pytest.mark.parametrize("trained_on, shards", [
+    ({**SHARDED, "dataset_version_tag": "v1"}, "after-v1"),
+    ({"dataset_repo_id": REPO, "dataset_version_tag": "v1"}, "latest"),  # trained on a single snapshot
+    ({**SHARDED, "dataset_repo_id": "org/other", "dataset_version_tag": "v1"}, "latest"),
+    (None, "latest"),  # pushed before model_metadata.json recorded the dataset
+])
+def test_warm_start_loads_the_shards_after_the_deployed_model(hub, trained_on, shards):
+    hub["trained_on"] = trained_on
+    train, info = train_model.load_warm_start_train(configs(), texts(range(10)), SHARDED)
+    assert hub["requested"] == [shards]
+    assert train["grievance"][:2] == ["complaint 8", "complaint 9"]
+    assert (info["delta_rows"], info["replay_rows"], info["delta_shards"]) == (2, 2, shards)
+
+
+def test_warm_start_without_new_shards_trains_nothing(hub):
+    hub["trained_on"] = SHARDED
+    train, info = train_model.load_warm_start_train(configs(), texts(range(10)), SHARDED)
+    assert hub["requested"] == [] and len(train) == 0 and info["delta_rows"] == 0